@@ -8,7 +8,8 @@ from alembic import context
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
-from backend import models, database
+from backend import models
+from backend.core import database
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
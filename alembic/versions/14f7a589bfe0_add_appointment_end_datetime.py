@@ -0,0 +1,72 @@
+"""Add appointment end_datetime and slot indexes
+
+Revision ID: 14f7a589bfe0
+Revises: 4760d498899b
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '14f7a589bfe0'
+down_revision: Union[str, None] = '4760d498899b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SLOT_INDEXES = {
+    'idx_appointment_doctor_slot': ['doctor_id', 'status', 'scheduled_datetime'],
+    'idx_appointment_patient_slot': ['patient_id', 'status', 'scheduled_datetime'],
+}
+
+# end_datetime = scheduled_datetime + duration_minutes, per dialect. On
+# SQLite the start's fractional seconds are carried over so the value has
+# the same text format the ORM writes and compares correctly with it
+END_DATETIME = {
+    'postgresql': "scheduled_datetime + duration_minutes * interval '1 minute'",
+    'sqlite': (
+        "datetime(scheduled_datetime, '+' || duration_minutes || ' minutes')"
+        " || substr(scheduled_datetime, 20)"
+    ),
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # Tables created by create_all on a new database already have it all
+    if 'appointments' not in inspector.get_table_names():
+        return
+    columns = {column['name'] for column in inspector.get_columns('appointments')}
+    indexes = {index['name'] for index in inspector.get_indexes('appointments')}
+    sqlite = bind.dialect.name == 'sqlite'
+
+    if 'end_datetime' not in columns:
+        if sqlite:
+            # Rebuilding the table below must not trip the foreign keys of
+            # rows referencing it; this only takes effect outside a transaction
+            op.execute("PRAGMA foreign_keys=OFF")
+        op.add_column('appointments', sa.Column('end_datetime', sa.DateTime(), nullable=True))
+        op.execute("UPDATE appointments SET duration_minutes = 30 WHERE duration_minutes IS NULL")
+        op.execute(
+            f"UPDATE appointments SET end_datetime = {END_DATETIME[bind.dialect.name]} "
+            "WHERE end_datetime IS NULL"
+        )
+        with op.batch_alter_table('appointments') as batch_op:
+            batch_op.alter_column('end_datetime', existing_type=sa.DateTime(), nullable=False)
+        if sqlite:
+            op.execute("PRAGMA foreign_keys=ON")
+
+    for name, index_columns in SLOT_INDEXES.items():
+        if name not in indexes:
+            op.create_index(name, 'appointments', index_columns, unique=False)
+
+
+def downgrade() -> None:
+    for name in SLOT_INDEXES:
+        op.drop_index(name, table_name='appointments')
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.drop_column('end_datetime')
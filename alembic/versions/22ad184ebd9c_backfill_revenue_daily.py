@@ -0,0 +1,57 @@
+"""Create and backfill the daily revenue rollup
+
+Revision ID: 22ad184ebd9c
+Revises: ff03a2f68f7c
+Create Date: 2026-10-17 12:47:20.193654
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '22ad184ebd9c'
+down_revision: Union[str, None] = 'ff03a2f68f7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Revenue reports read whole days from this rollup, so it is seeded with
+# the payments already recorded, as rollups.rebuild_revenue_daily would
+BACKFILL = """
+    INSERT INTO revenue_daily (day, payment_method, total, payments)
+    SELECT date(payment_date), payment_method, sum(amount), count(*)
+    FROM payments
+    WHERE payment_date IS NOT NULL AND payment_method IS NOT NULL
+    GROUP BY date(payment_date), payment_method
+"""
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    # A new database has no payments; create_all builds the empty table
+    if 'payments' not in tables:
+        return
+
+    if 'revenue_daily' not in tables:
+        op.create_table('revenue_daily',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('payment_method', sa.String(length=50), nullable=False),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('payments', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('day', 'payment_method', name='uq_revenue_daily')
+        )
+        op.create_index(op.f('ix_revenue_daily_id'), 'revenue_daily', ['id'], unique=False)
+
+    # Rebuilt from scratch, in case the application filled it partially
+    op.execute("DELETE FROM revenue_daily")
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    # Derived data only; the previous code does not read it
+    op.execute("DROP TABLE IF EXISTS revenue_daily")
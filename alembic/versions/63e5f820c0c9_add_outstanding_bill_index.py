@@ -0,0 +1,40 @@
+"""Add the partial index on outstanding bills
+
+Revision ID: 63e5f820c0c9
+Revises: 22ad184ebd9c
+Create Date: 2026-10-17 13:02:36.558471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '63e5f820c0c9'
+down_revision: Union[str, None] = '22ad184ebd9c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Matches the predicate create_all writes, so the aging queries can use it
+OUTSTANDING = sa.text("payment_status IN ('PENDING', 'PARTIAL')")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'bills' not in inspector.get_table_names():
+        return
+    if 'idx_bill_outstanding' in {index['name'] for index in inspector.get_indexes('bills')}:
+        return
+
+    op.create_index(
+        'idx_bill_outstanding', 'bills', ['due_date', 'id'], unique=False,
+        postgresql_where=OUTSTANDING,
+        postgresql_include=['total_amount', 'paid_amount'],
+        sqlite_where=OUTSTANDING,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_bill_outstanding', table_name='bills')
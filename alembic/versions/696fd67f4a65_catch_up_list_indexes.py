@@ -0,0 +1,93 @@
+"""Recreate changed list indexes and add the new ordering indexes
+
+Revision ID: 696fd67f4a65
+Revises: 887b1ead3092
+Create Date: 2026-10-17 10:48:12.930561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '696fd67f4a65'
+down_revision: Union[str, None] = '887b1ead3092'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes behind keyset pages, patient timelines and export watermarks.
+# create_all skips an index whose name already exists, so the ones whose
+# columns changed are dropped and recreated here
+INDEXES = {
+    'appointments': {
+        'idx_appointment_datetime': ['scheduled_datetime', 'id'],
+        'idx_appointment_patient': ['patient_id', 'scheduled_datetime'],
+        'idx_appointment_created': ['created_at'],
+        'idx_appointment_updated': ['updated_at'],
+    },
+    'bills': {
+        'idx_bill_date': ['bill_date', 'id'],
+        'idx_bill_patient': ['patient_id', 'bill_date'],
+        'idx_bill_created': ['created_at'],
+        'idx_bill_updated': ['updated_at'],
+    },
+    'payments': {
+        'idx_payment_date': ['payment_date', 'id'],
+        'idx_payment_bill': ['bill_id', 'payment_date'],
+        'idx_payment_created': ['created_at'],
+    },
+    'patients': {
+        'idx_patient_created': ['created_at'],
+        'idx_patient_updated': ['updated_at'],
+    },
+    'doctors': {
+        'idx_doctor_sort_name': ['last_name', 'first_name', 'id'],
+    },
+    'patient_documents': {
+        'idx_document_patient': ['patient_id', 'uploaded_at'],
+    },
+}
+
+# The definitions the changed indexes had before
+PREVIOUS = {
+    'appointments': {
+        'idx_appointment_datetime': ['scheduled_datetime'],
+        'idx_appointment_patient': ['patient_id'],
+    },
+    'bills': {
+        'idx_bill_date': ['bill_date'],
+        'idx_bill_patient': ['patient_id'],
+    },
+    'payments': {
+        'idx_payment_date': ['payment_date'],
+    },
+}
+
+
+def _set_indexes(definitions, drop_others=()) -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    for table, indexes in definitions.items():
+        if table not in tables:
+            continue
+        existing = {index['name']: index['column_names'] for index in inspector.get_indexes(table)}
+        for name, columns in indexes.items():
+            if existing.get(name) == columns:
+                continue
+            if name in existing:
+                op.drop_index(name, table_name=table)
+            op.create_index(name, table, columns, unique=False)
+        for name in drop_others:
+            if name in existing and name not in indexes:
+                op.drop_index(name, table_name=table)
+
+
+def upgrade() -> None:
+    _set_indexes(INDEXES)
+
+
+def downgrade() -> None:
+    added = [name for indexes in INDEXES.values() for name in indexes]
+    _set_indexes({table: PREVIOUS.get(table, {}) for table in INDEXES}, drop_others=added)
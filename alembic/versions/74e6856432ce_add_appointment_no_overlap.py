@@ -0,0 +1,78 @@
+"""Enforce non-overlapping active appointments per doctor
+
+Revision ID: 74e6856432ce
+Revises: 14f7a589bfe0
+Create Date: 2026-10-17 09:48:05.672913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '74e6856432ce'
+down_revision: Union[str, None] = '14f7a589bfe0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The constraint name doubles as the error core.booking looks for. Creating
+# it fails while any doctor already has overlapping active appointments;
+# those have to be resolved first
+CONSTRAINT = 'appointment_no_overlap'
+
+_SQLITE_OVERLAP_CHECK = """
+    SELECT RAISE(ABORT, 'appointment_no_overlap')
+    WHERE EXISTS (
+        SELECT 1 FROM appointments
+        WHERE doctor_id = NEW.doctor_id
+          AND status IN ('SCHEDULED', 'CONFIRMED')
+          AND scheduled_datetime > datetime(NEW.scheduled_datetime, '-480 minutes')
+          AND scheduled_datetime < NEW.end_datetime
+          AND end_datetime > NEW.scheduled_datetime
+          AND id IS NOT NEW.id
+    );
+"""
+
+SQLITE_TRIGGERS = {
+    'appointment_no_overlap_insert': "BEFORE INSERT ON appointments",
+    'appointment_no_overlap_update': (
+        "BEFORE UPDATE OF doctor_id, scheduled_datetime, end_datetime, status ON appointments"
+    ),
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if 'appointments' not in sa.inspect(bind).get_table_names():
+        return
+
+    if bind.dialect.name == 'postgresql':
+        exists = bind.execute(
+            sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": CONSTRAINT}
+        ).first()
+        if exists:
+            return
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            f"ALTER TABLE appointments ADD CONSTRAINT {CONSTRAINT} "
+            "EXCLUDE USING gist (doctor_id WITH =, tsrange(scheduled_datetime, end_datetime) WITH &&) "
+            "WHERE (status IN ('SCHEDULED', 'CONFIRMED'))"
+        )
+    elif bind.dialect.name == 'sqlite':
+        for name, timing in SQLITE_TRIGGERS.items():
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {name} {timing} "
+                "WHEN NEW.status IN ('SCHEDULED', 'CONFIRMED') "
+                f"BEGIN {_SQLITE_OVERLAP_CHECK} END"
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"ALTER TABLE appointments DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
+    elif bind.dialect.name == 'sqlite':
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
@@ -0,0 +1,67 @@
+"""Create and backfill the appointment daily rollup
+
+Revision ID: 887b1ead3092
+Revises: 74e6856432ce
+Create Date: 2026-10-17 10:21:37.504118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '887b1ead3092'
+down_revision: Union[str, None] = '74e6856432ce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The appointments.status type; it already exists wherever appointments does
+STATUS = postgresql.ENUM(
+    'SCHEDULED', 'CONFIRMED', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', 'NO_SHOW',
+    name='appointmentstatusenum', create_type=False,
+)
+
+# The daily report reads this rollup, so it is seeded with the history
+# already in the appointments table, as rollups.rebuild_appointment_stats
+# would. date() works on SQLite and PostgreSQL
+BACKFILL = """
+    INSERT INTO appointment_daily_stats (day, doctor_id, status, count)
+    SELECT date(scheduled_datetime), doctor_id, COALESCE(status, 'SCHEDULED'), count(*)
+    FROM appointments
+    GROUP BY date(scheduled_datetime), doctor_id, COALESCE(status, 'SCHEDULED')
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+    # A new database has no history; create_all builds the empty table
+    if 'appointments' not in tables:
+        return
+
+    if 'appointment_daily_stats' not in tables:
+        op.create_table('appointment_daily_stats',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('doctor_id', sa.Integer(), nullable=False),
+            sa.Column('status', STATUS, nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('day', 'doctor_id', 'status', name='uq_appointment_stat')
+        )
+        op.create_index(op.f('ix_appointment_daily_stats_id'), 'appointment_daily_stats', ['id'], unique=False)
+        op.create_index('idx_appointment_stat_doctor_day', 'appointment_daily_stats', ['doctor_id', 'day'], unique=False)
+
+    # Rebuilt from scratch, in case the application filled it partially
+    op.execute("DELETE FROM appointment_daily_stats")
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    # Derived data only; the previous code does not read it
+    op.execute("DROP TABLE IF EXISTS appointment_daily_stats")
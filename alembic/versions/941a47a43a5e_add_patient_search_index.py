@@ -0,0 +1,49 @@
+"""Add normalized patient phones and the patient search index
+
+Revision ID: 941a47a43a5e
+Revises: b4ed4645fdd1
+Create Date: 2026-10-17 11:58:44.062731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision: str = '941a47a43a5e'
+down_revision: Union[str, None] = 'b4ed4645fdd1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'patients' not in inspector.get_table_names():
+        return
+
+    if 'phone_normalized' not in {column['name'] for column in inspector.get_columns('patients')}:
+        op.add_column('patients', sa.Column('phone_normalized', sa.String(length=20), nullable=True))
+    if 'idx_patient_phone_normalized' not in {index['name'] for index in inspector.get_indexes('patients')}:
+        op.create_index('idx_patient_phone_normalized', 'patients', ['phone_normalized'], unique=False)
+
+    # The same backfill and DDL as POST /patients/search/rebuild: normalize
+    # every phone, then create the FTS5 table and its sync triggers and
+    # fill it (SQLite) or the trigram GIN index (PostgreSQL)
+    from backend.core import patient_search
+    patient_search.rebuild(Session(bind=bind))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_patient_search_trgm")
+    elif bind.dialect.name == 'sqlite':
+        for name in ('patient_search_insert', 'patient_search_delete', 'patient_search_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS patient_search")
+    op.drop_index('idx_patient_phone_normalized', table_name='patients')
+    op.drop_column('patients', 'phone_normalized')
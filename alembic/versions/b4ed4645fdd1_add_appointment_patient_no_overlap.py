@@ -0,0 +1,78 @@
+"""Enforce non-overlapping active appointments per patient
+
+Revision ID: b4ed4645fdd1
+Revises: f34354a3a195
+Create Date: 2026-10-17 11:32:09.814420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4ed4645fdd1'
+down_revision: Union[str, None] = 'f34354a3a195'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The patient-side twin of appointment_no_overlap. Creating it fails while
+# any patient already has overlapping active appointments; those have to
+# be resolved first
+CONSTRAINT = 'appointment_patient_no_overlap'
+
+_SQLITE_OVERLAP_CHECK = """
+    SELECT RAISE(ABORT, 'appointment_patient_no_overlap')
+    WHERE EXISTS (
+        SELECT 1 FROM appointments
+        WHERE patient_id = NEW.patient_id
+          AND status IN ('SCHEDULED', 'CONFIRMED')
+          AND scheduled_datetime > datetime(NEW.scheduled_datetime, '-480 minutes')
+          AND scheduled_datetime < NEW.end_datetime
+          AND end_datetime > NEW.scheduled_datetime
+          AND id IS NOT NEW.id
+    );
+"""
+
+SQLITE_TRIGGERS = {
+    'appointment_patient_no_overlap_insert': "BEFORE INSERT ON appointments",
+    'appointment_patient_no_overlap_update': (
+        "BEFORE UPDATE OF patient_id, scheduled_datetime, end_datetime, status ON appointments"
+    ),
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if 'appointments' not in sa.inspect(bind).get_table_names():
+        return
+
+    if bind.dialect.name == 'postgresql':
+        exists = bind.execute(
+            sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": CONSTRAINT}
+        ).first()
+        if exists:
+            return
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            f"ALTER TABLE appointments ADD CONSTRAINT {CONSTRAINT} "
+            "EXCLUDE USING gist (patient_id WITH =, tsrange(scheduled_datetime, end_datetime) WITH &&) "
+            "WHERE (status IN ('SCHEDULED', 'CONFIRMED'))"
+        )
+    elif bind.dialect.name == 'sqlite':
+        for name, timing in SQLITE_TRIGGERS.items():
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {name} {timing} "
+                "WHEN NEW.status IN ('SCHEDULED', 'CONFIRMED') "
+                f"BEGIN {_SQLITE_OVERLAP_CHECK} END"
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"ALTER TABLE appointments DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
+    elif bind.dialect.name == 'sqlite':
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
@@ -0,0 +1,35 @@
+"""Add idempotency keys to payments
+
+Revision ID: e9ed73db9f6b
+Revises: 63e5f820c0c9
+Create Date: 2026-10-17 13:15:08.730412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9ed73db9f6b'
+down_revision: Union[str, None] = '63e5f820c0c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'payments' not in inspector.get_table_names():
+        return
+
+    # Earlier payments have no key; NULLs never collide in a unique index
+    if 'idempotency_key' not in {column['name'] for column in inspector.get_columns('payments')}:
+        op.add_column('payments', sa.Column('idempotency_key', sa.String(length=100), nullable=True))
+    if 'uq_payment_idempotency' not in {index['name'] for index in inspector.get_indexes('payments')}:
+        op.create_index('uq_payment_idempotency', 'payments', ['bill_id', 'idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_payment_idempotency', table_name='payments')
+    op.drop_column('payments', 'idempotency_key')
@@ -0,0 +1,41 @@
+"""Add the phonetic last name blocking key to patients
+
+Revision ID: eaabd17c8c03
+Revises: 941a47a43a5e
+Create Date: 2026-10-17 12:14:09.815327
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'eaabd17c8c03'
+down_revision: Union[str, None] = '941a47a43a5e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'patients' not in inspector.get_table_names():
+        return
+
+    if 'last_name_phonetic' not in {column['name'] for column in inspector.get_columns('patients')}:
+        op.add_column('patients', sa.Column('last_name_phonetic', sa.String(length=8), nullable=True))
+    if 'idx_patient_blocking' not in {index['name'] for index in inspector.get_indexes('patients')}:
+        op.create_index('idx_patient_blocking', 'patients', ['last_name_phonetic', 'date_of_birth'], unique=False)
+
+    # Duplicate detection only compares patients that share a key, so every
+    # existing patient needs one; the same backfill the batch job runs
+    from backend.core import duplicates
+    duplicates.backfill_keys(Session(bind=bind))
+
+
+def downgrade() -> None:
+    op.drop_index('idx_patient_blocking', table_name='patients')
+    op.drop_column('patients', 'last_name_phonetic')
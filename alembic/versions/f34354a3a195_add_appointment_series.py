@@ -0,0 +1,85 @@
+"""Add appointment series and link appointments to them
+
+Revision ID: f34354a3a195
+Revises: 696fd67f4a65
+Create Date: 2026-10-17 11:05:51.226840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f34354a3a195'
+down_revision: Union[str, None] = '696fd67f4a65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The name PostgreSQL gives the unnamed foreign key create_all declares
+FOREIGN_KEY = 'appointments_series_id_fkey'
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+    if 'appointments' not in tables:
+        return
+
+    # appointments.series_id references it, so it cannot wait for create_all
+    if 'appointment_series' not in tables:
+        op.create_table('appointment_series',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('patient_id', sa.Integer(), nullable=False),
+            sa.Column('doctor_id', sa.Integer(), nullable=False),
+            sa.Column('start_datetime', sa.DateTime(), nullable=False),
+            sa.Column('duration_minutes', sa.Integer(), nullable=False),
+            sa.Column('frequency', sa.Enum('DAILY', 'WEEKLY', name='recurrencefrequencyenum'), nullable=False),
+            sa.Column('interval', sa.Integer(), nullable=False),
+            sa.Column('weekdays', sa.String(length=20), nullable=True),
+            sa.Column('until', sa.Date(), nullable=True),
+            sa.Column('count', sa.Integer(), nullable=True),
+            sa.Column('materialized_until', sa.Date(), nullable=True),
+            sa.Column('reason', sa.Text(), nullable=False),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+            sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_appointment_series_id'), 'appointment_series', ['id'], unique=False)
+        op.create_index('idx_series_patient', 'appointment_series', ['patient_id'], unique=False)
+        op.create_index('idx_series_doctor', 'appointment_series', ['doctor_id'], unique=False)
+
+    columns = {column['name'] for column in inspector.get_columns('appointments')}
+    if 'series_id' not in columns:
+        if bind.dialect.name == 'sqlite':
+            # SQLite adds a nullable column with its foreign key in place,
+            # without rebuilding the table and its overlap triggers
+            op.execute(
+                "ALTER TABLE appointments ADD COLUMN series_id INTEGER "
+                "REFERENCES appointment_series (id)"
+            )
+        else:
+            op.add_column('appointments', sa.Column('series_id', sa.Integer(), nullable=True))
+            op.create_foreign_key(FOREIGN_KEY, 'appointments', 'appointment_series', ['series_id'], ['id'])
+
+    indexes = {index['name'] for index in inspector.get_indexes('appointments')}
+    if 'idx_appointment_series' not in indexes:
+        op.create_index('idx_appointment_series', 'appointments', ['series_id'], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    op.drop_index('idx_appointment_series', table_name='appointments')
+    # SQLite cannot drop a column with a foreign key without rebuilding the
+    # table, which would lose its triggers; the unused column stays there
+    if bind.dialect.name != 'sqlite':
+        op.drop_constraint(FOREIGN_KEY, 'appointments', type_='foreignkey')
+        op.drop_column('appointments', 'series_id')
+        op.drop_table('appointment_series')
+        op.execute("DROP TYPE IF EXISTS recurrencefrequencyenum")
@@ -0,0 +1,40 @@
+"""Add content hashes and types to patient documents
+
+Revision ID: ff03a2f68f7c
+Revises: eaabd17c8c03
+Create Date: 2026-10-17 12:31:52.407196
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ff03a2f68f7c'
+down_revision: Union[str, None] = 'eaabd17c8c03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'patient_documents' not in inspector.get_table_names():
+        return
+
+    # Documents uploaded before stay NULL: they keep their own file path,
+    # are served without an ETag and get a type guessed from the filename
+    columns = {column['name'] for column in inspector.get_columns('patient_documents')}
+    if 'content_hash' not in columns:
+        op.add_column('patient_documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    if 'content_type' not in columns:
+        op.add_column('patient_documents', sa.Column('content_type', sa.String(length=100), nullable=True))
+    if 'idx_document_hash' not in {index['name'] for index in inspector.get_indexes('patient_documents')}:
+        op.create_index('idx_document_hash', 'patient_documents', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_document_hash', table_name='patient_documents')
+    op.drop_column('patient_documents', 'content_type')
+    op.drop_column('patient_documents', 'content_hash')
@@ -1,8 +1,11 @@
 import json
 from datetime import datetime, date
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from fastapi import Request
+from .core.bulk import INSERT_CHUNK, chunked
+from .core.pagination import keyset_page
 from .models import AuditLog
 
 
@@ -63,6 +66,63 @@ class AuditLogger:
         db.add(audit_log)
         db.commit()
     
+    @staticmethod
+    def log_bulk_create(
+        db: Session,
+        user_id: int,
+        table_name: str,
+        records: Iterable[Tuple[int, dict]],
+        request: Request = None
+    ) -> None:
+        """Log many create operations with batched inserts.
+
+        Unlike the single-row helpers this does not commit, so the audit
+        rows land in the caller's transaction.
+        """
+        ip_address = request.client.host if request and request.client else None
+        user_agent = request.headers.get("user-agent") if request else None
+        rows = (
+            {
+                "user_id": user_id,
+                "action": "create",
+                "table_name": table_name,
+                "record_id": record_id,
+                "new_values": str(new_values),
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+            }
+            for record_id, new_values in records
+        )
+        for chunk in chunked(rows, INSERT_CHUNK):
+            db.execute(insert(AuditLog), chunk)
+    
+    @staticmethod
+    def log_bulk_update(
+        db: Session,
+        user_id: int,
+        table_name: str,
+        records: Iterable[Tuple[int, dict, dict]],
+        request: Request = None
+    ) -> None:
+        """Log many update operations with batched inserts, without committing."""
+        ip_address = request.client.host if request and request.client else None
+        user_agent = request.headers.get("user-agent") if request else None
+        rows = (
+            {
+                "user_id": user_id,
+                "action": "update",
+                "table_name": table_name,
+                "record_id": record_id,
+                "old_values": str(old_values),
+                "new_values": str(new_values),
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+            }
+            for record_id, old_values, new_values in records
+        )
+        for chunk in chunked(rows, INSERT_CHUNK):
+            db.execute(insert(AuditLog), chunk)
+    
     @staticmethod
     def log_login(
         db: Session,
@@ -98,7 +158,7 @@ class AuditLogger:
         )
 
 
-def get_audit_logs(
+def get_audit_log_page(
     db: Session,
     user_id: Optional[int] = None,
     action: Optional[str] = None,
@@ -106,9 +166,14 @@ def get_audit_logs(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     limit: int = 100,
-    offset: int = 0
-) -> list[AuditLog]:
-    """Get audit logs with filtering options."""
+    offset: int = 0,
+    cursor: Optional[str] = None
+) -> Tuple[List[AuditLog], Optional[str]]:
+    """Get one page of audit logs, newest first, and the cursor of the next page.
+    
+    Logs are append-only, so ids follow creation order and serve as the
+    keyset. Raises ``ValueError`` for a malformed cursor.
+    """
     
     query = db.query(AuditLog)
     
@@ -127,7 +192,28 @@ def get_audit_logs(
     if end_date:
         query = query.filter(AuditLog.created_at <= end_date)
     
-    return query.order_by(AuditLog.created_at.desc()).offset(offset).limit(limit).all()
+    return keyset_page(query, [(AuditLog.id, True)], limit, cursor, offset)
+
+
+def get_audit_logs(
+    db: Session,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    table_name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[str] = None
+) -> list[AuditLog]:
+    """Get audit logs with filtering options."""
+    
+    logs, _ = get_audit_log_page(
+        db, user_id=user_id, action=action, table_name=table_name,
+        start_date=start_date, end_date=end_date,
+        limit=limit, offset=offset, cursor=cursor
+    )
+    return logs
 
 
 def get_user_activity_summary(db: Session, user_id: int, days: int = 30) -> Dict[str, Any]:
@@ -0,0 +1,428 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from math import ceil
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import and_, event, select, tuple_, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core import booking
+from backend.core.bulk import conflict_insert
+from backend.core.scheduling import ACTIVE_STATUSES, MAX_APPOINTMENT_MINUTES
+
+# Bitmap granularity: one bit per 5-minute slot, 288 bits (36 bytes) per day
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BITMAP_BYTES = SLOTS_PER_DAY // 8
+
+# Default bookable hours for doctors without a working-hour template
+WORKDAY_START = time(8, 0)
+WORKDAY_END = time(18, 0)
+DEFAULT_SLOT_MINUTES = 30
+
+OccupancyKey = Tuple[int, date]
+# (start, end, slot_minutes) of one bookable window within a day
+WorkingWindow = Tuple[time, time, int]
+
+
+def encode_bitmap(mask: int) -> bytes:
+    """Serialize an occupancy mask to its fixed-width storage format."""
+    return mask.to_bytes(BITMAP_BYTES, "little")
+
+
+def decode_bitmap(data: Optional[bytes]) -> int:
+    """Deserialize a stored occupancy bitmap."""
+    return int.from_bytes(data, "little") if data else 0
+
+
+def span_mask(first_slot: int, last_slot: int) -> int:
+    """Mask with bits [first_slot, last_slot) set."""
+    if last_slot <= first_slot:
+        return 0
+    return ((1 << (last_slot - first_slot)) - 1) << first_slot
+
+
+def slot_index(day: date, moment: datetime, round_up: bool = False) -> int:
+    """Slot of ``moment`` within ``day``, clamped to the day."""
+    minutes = (moment - datetime.combine(day, time.min)).total_seconds() / 60
+    slot = ceil(minutes / SLOT_MINUTES) if round_up else int(minutes // SLOT_MINUTES)
+    return max(0, min(SLOTS_PER_DAY, slot))
+
+
+def interval_mask(day: date, start: datetime, end: datetime) -> int:
+    """Occupancy mask of the part of [start, end) that falls on ``day``."""
+    return span_mask(slot_index(day, start), slot_index(day, end, round_up=True))
+
+
+def window_mask(day: date, start: time = WORKDAY_START, end: time = WORKDAY_END) -> int:
+    """Mask of the bookable window of a day."""
+    return interval_mask(day, datetime.combine(day, start), datetime.combine(day, end))
+
+
+def windows_mask(day: date, windows: List[WorkingWindow]) -> int:
+    """Mask of all bookable windows of a day."""
+    mask = 0
+    for start, end, _ in windows:
+        mask |= window_mask(day, start, end)
+    return mask
+
+
+def _subtract_window(windows: List[WorkingWindow], start: time, end: time) -> List[WorkingWindow]:
+    """Remove [start, end) from a list of windows."""
+    remaining = []
+    for window_start, window_end, slot_minutes in windows:
+        if end <= window_start or start >= window_end:
+            remaining.append((window_start, window_end, slot_minutes))
+            continue
+        if window_start < start:
+            remaining.append((window_start, start, slot_minutes))
+        if end < window_end:
+            remaining.append((end, window_end, slot_minutes))
+    return remaining
+
+
+def working_windows(
+    db: Session,
+    doctor_ids: List[int],
+    start_day: date,
+    end_day: date,
+) -> Dict[OccupancyKey, List[WorkingWindow]]:
+    """Resolve each doctor's bookable windows per day.
+
+    Reads weekly templates and date exceptions with one query each.
+    Doctors without any template fall back to the default working day.
+    """
+    templates = defaultdict(list)
+    for row in db.query(models.DoctorWorkingHours).filter(
+        models.DoctorWorkingHours.doctor_id.in_(doctor_ids)
+    ).all():
+        templates[row.doctor_id].append(row)
+
+    exceptions = defaultdict(list)
+    for row in db.query(models.DoctorScheduleException).filter(
+        models.DoctorScheduleException.doctor_id.in_(doctor_ids),
+        models.DoctorScheduleException.date >= start_day,
+        models.DoctorScheduleException.date <= end_day,
+    ).all():
+        exceptions[(row.doctor_id, row.date)].append(row)
+
+    result: Dict[OccupancyKey, List[WorkingWindow]] = {}
+    day = start_day
+    while day <= end_day:
+        for doctor_id in doctor_ids:
+            if doctor_id in templates:
+                windows = [
+                    (row.start_time, row.end_time, row.slot_minutes)
+                    for row in templates[doctor_id]
+                    if row.weekday == day.weekday()
+                ]
+            else:
+                windows = [(WORKDAY_START, WORKDAY_END, DEFAULT_SLOT_MINUTES)]
+
+            day_exceptions = exceptions.get((doctor_id, day), [])
+            for row in day_exceptions:
+                if row.is_available:
+                    continue
+                if row.start_time is None or row.end_time is None:
+                    windows = []
+                else:
+                    windows = _subtract_window(windows, row.start_time, row.end_time)
+            for row in day_exceptions:
+                if row.is_available and row.start_time and row.end_time:
+                    windows.append((row.start_time, row.end_time, row.slot_minutes))
+
+            result[(doctor_id, day)] = sorted(windows)
+        day += timedelta(days=1)
+
+    return result
+
+
+def days_covered(start: datetime, end: datetime) -> List[date]:
+    """Calendar days touched by the interval [start, end)."""
+    last = (end - timedelta(microseconds=1)).date() if end > start else start.date()
+    days = []
+    current = start.date()
+    while current <= last:
+        days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def run_starts(free: int, length: int) -> int:
+    """Bits ``s`` of ``free`` that begin a run of ``length`` set bits."""
+    runs = free
+    have = 1
+    while have < length:
+        shift = min(have, length - have)
+        runs &= runs >> shift
+        have += shift
+    return runs
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the indices of the set bits of ``mask`` in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def compute_masks(connection, keys: Iterable[OccupancyKey]) -> Dict[OccupancyKey, int]:
+    """Compute occupancy masks for (doctor_id, day) keys from appointments.
+
+    Runs one bounded range query over all requested doctors and days.
+    """
+    keys = set(keys)
+    masks = {key: 0 for key in keys}
+    if not keys:
+        return masks
+
+    doctor_ids = {doctor_id for doctor_id, _ in keys}
+    first_day = min(day for _, day in keys)
+    last_day = max(day for _, day in keys)
+    range_start = datetime.combine(first_day, time.min)
+    range_end = datetime.combine(last_day + timedelta(days=1), time.min)
+
+    table = models.Appointment.__table__
+    rows = connection.execute(
+        select(table.c.doctor_id, table.c.scheduled_datetime, table.c.end_datetime).where(
+            and_(
+                table.c.doctor_id.in_(doctor_ids),
+                table.c.status.in_(ACTIVE_STATUSES),
+                table.c.scheduled_datetime
+                > range_start - timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+                table.c.scheduled_datetime < range_end,
+                table.c.end_datetime > range_start,
+            )
+        )
+    )
+
+    for doctor_id, start, end in rows:
+        for day in days_covered(start, end):
+            key = (doctor_id, day)
+            if key in masks:
+                masks[key] |= interval_mask(day, start, end)
+
+    return masks
+
+
+def lock_masks(connection, keys: Iterable[OccupancyKey]) -> None:
+    """Lock the bitmap rows of ``keys`` on PostgreSQL, creating missing ones.
+
+    Without the lock, two transactions booking the same doctor and day
+    would each recompute the bitmap from their own snapshot and the later
+    upsert would drop the other's bits. Holding the rows, the second
+    transaction waits and, under READ COMMITTED, computes from a fresh
+    snapshot that includes the first one's appointment. Rows are locked
+    in key order to rule out deadlocks. SQLite serializes writers, so
+    this is a no-op there.
+    """
+    keys = sorted(set(keys))
+    if not keys or connection.dialect.name != "postgresql":
+        return
+
+    table = models.DoctorDayOccupancy.__table__
+    connection.execute(
+        conflict_insert(connection, table).on_conflict_do_nothing(
+            index_elements=[table.c.doctor_id, table.c.day]
+        ),
+        [{"doctor_id": doctor_id, "day": day, "bitmap": encode_bitmap(0)} for doctor_id, day in keys],
+    )
+    connection.execute(
+        select(table.c.id)
+        .where(tuple_(table.c.doctor_id, table.c.day).in_(keys))
+        .order_by(table.c.doctor_id, table.c.day)
+        .with_for_update()
+    )
+
+
+def store_masks(connection, masks: Dict[OccupancyKey, int], overwrite: bool = True) -> None:
+    """Upsert occupancy bitmaps.
+
+    With ``overwrite`` false, bitmaps already stored are kept.
+    """
+    if not masks:
+        return
+
+    table = models.DoctorDayOccupancy.__table__
+    rows = [
+        {"doctor_id": doctor_id, "day": day, "bitmap": encode_bitmap(mask)}
+        for (doctor_id, day), mask in masks.items()
+    ]
+
+    stmt = conflict_insert(connection, table)
+    if stmt is not None:
+        index_elements = [table.c.doctor_id, table.c.day]
+        if overwrite:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={"bitmap": stmt.excluded.bitmap},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        key_matches = and_(table.c.doctor_id == row["doctor_id"], table.c.day == row["day"])
+        if overwrite:
+            found = connection.execute(update(table).where(key_matches).values(bitmap=row["bitmap"])).rowcount
+        else:
+            found = connection.execute(select(table.c.id).where(key_matches)).first() is not None
+        if not found:
+            connection.execute(table.insert().values(**row))
+
+
+def refresh(connection, keys: Iterable[OccupancyKey]) -> Dict[OccupancyKey, int]:
+    """Recompute and store the bitmaps of the given (doctor_id, day) keys.
+
+    The rows are locked first, so concurrent refreshes of the same key
+    apply one after the other.
+    """
+    keys = set(keys)
+    lock_masks(connection, keys)
+    masks = compute_masks(connection, keys)
+    store_masks(connection, masks)
+    return masks
+
+
+def keys_for_interval(doctor_id: int, start: datetime, end: datetime) -> Set[OccupancyKey]:
+    """Occupancy keys touched by an appointment interval."""
+    return {(doctor_id, day) for day in days_covered(start, end)}
+
+
+def _appointment_keys(appointment: models.Appointment, current: bool = True) -> Set[OccupancyKey]:
+    """Keys covered by an appointment's current or pre-flush state."""
+    state = sa_inspect(appointment)
+
+    def value(attr):
+        history = state.attrs[attr].history
+        if not current and history.deleted:
+            return history.deleted[0]
+        return getattr(appointment, attr)
+
+    doctor_id = value("doctor_id")
+    start = value("scheduled_datetime")
+    duration = value("duration_minutes") or 0
+    if doctor_id is None or start is None:
+        return set()
+    return keys_for_interval(doctor_id, start, start + timedelta(minutes=duration))
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_occupancy(session, flush_context):
+    """Keep occupancy bitmaps in step with ORM appointment writes."""
+    keys: Set[OccupancyKey] = set()
+    for obj in session.new:
+        if isinstance(obj, models.Appointment):
+            keys |= _appointment_keys(obj)
+    for obj in session.dirty:
+        if isinstance(obj, models.Appointment) and session.is_modified(obj):
+            keys |= _appointment_keys(obj)
+            keys |= _appointment_keys(obj, current=False)
+    for obj in session.deleted:
+        if isinstance(obj, models.Appointment):
+            keys |= _appointment_keys(obj, current=False)
+    if keys:
+        refresh(session.connection(), keys)
+
+
+def load_bitmaps(
+    db: Session,
+    doctor_ids: List[int],
+    start_day: date,
+    end_day: date,
+) -> Dict[OccupancyKey, int]:
+    """Load occupancy masks for doctors over a day range.
+
+    Days that have no stored bitmap yet are computed from appointments in
+    one range query and persisted, so later searches read only bitmaps.
+    They are stored in a transaction of their own, leaving the caller's
+    uncommitted, and never replace a bitmap a booking stored meanwhile.
+    If the database is busy they are simply computed again next time.
+    """
+    if not doctor_ids:
+        return {}
+
+    rows = db.query(
+        models.DoctorDayOccupancy.doctor_id,
+        models.DoctorDayOccupancy.day,
+        models.DoctorDayOccupancy.bitmap,
+    ).filter(
+        models.DoctorDayOccupancy.doctor_id.in_(doctor_ids),
+        models.DoctorDayOccupancy.day >= start_day,
+        models.DoctorDayOccupancy.day <= end_day,
+    ).all()
+    masks = {(row.doctor_id, row.day): decode_bitmap(row.bitmap) for row in rows}
+
+    missing = set()
+    day = start_day
+    while day <= end_day:
+        for doctor_id in doctor_ids:
+            if (doctor_id, day) not in masks:
+                missing.add((doctor_id, day))
+        day += timedelta(days=1)
+
+    if missing:
+        computed = compute_masks(db.connection(), missing)
+        masks.update(computed)
+        try:
+            with db.get_bind().begin() as connection:
+                store_masks(connection, computed, overwrite=False)
+        except OperationalError as e:
+            if not booking.is_transient(e):
+                raise
+
+    return masks
+
+
+def find_free_slots(
+    db: Session,
+    doctors: List[models.Doctor],
+    start_day: date,
+    end_day: date,
+    duration_minutes: int,
+    limit: int,
+    step_minutes: int = 15,
+    not_before: Optional[datetime] = None,
+) -> List[Tuple[models.Doctor, datetime]]:
+    """Return the earliest ``limit`` free (doctor, start) pairs.
+
+    Slots start on a ``step_minutes`` grid within each doctor's working
+    windows, ordered by start time and then by doctor.
+    """
+    slots_needed = ceil(duration_minutes / SLOT_MINUTES)
+    step_slots = max(1, step_minutes // SLOT_MINUTES)
+    step_mask = sum(1 << slot for slot in range(0, SLOTS_PER_DAY, step_slots))
+    doctor_ids = [doctor.id for doctor in doctors]
+    masks = load_bitmaps(db, doctor_ids, start_day, end_day)
+    windows = working_windows(db, doctor_ids, start_day, end_day)
+
+    results: List[Tuple[models.Doctor, datetime]] = []
+    day = start_day
+    while day <= end_day and len(results) < limit:
+        day_start = datetime.combine(day, time.min)
+        earliest = 0
+        if not_before is not None and not_before.date() == day:
+            earliest = slot_index(day, not_before, round_up=True)
+        elif not_before is not None and not_before.date() > day:
+            earliest = SLOTS_PER_DAY
+
+        hits = []
+        for doctor in doctors:
+            key = (doctor.id, day)
+            free = windows_mask(day, windows[key]) & ~masks.get(key, 0)
+            starts = run_starts(free, slots_needed) & step_mask
+            starts &= ~span_mask(0, earliest)
+            for count, slot in enumerate(iter_bits(starts)):
+                if count >= limit:
+                    break
+                hits.append((slot, doctor.id, doctor))
+
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        for slot, _, doctor in hits[:limit - len(results)]:
+            results.append((doctor, day_start + timedelta(minutes=slot * SLOT_MINUTES)))
+        day += timedelta(days=1)
+
+    return results
@@ -0,0 +1,159 @@
+import random
+import time as _time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+from fastapi import HTTPException, status
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from backend import models, schemas
+from backend.core import scheduling
+from backend.core.security import generate_appointment_id
+from backend.models.appointment import AppointmentStatusEnum
+
+T = TypeVar("T")
+
+# Names shared by the PostgreSQL exclusion constraints and the SQLite
+# trigger errors, used to tell overlap violations from other integrity
+# errors and whose calendar is taken
+OVERLAP_CONSTRAINT = "appointment_no_overlap"
+PATIENT_OVERLAP_CONSTRAINT = "appointment_patient_no_overlap"
+
+DOCTOR_CONFLICT_DETAIL = "Doctor has a conflicting appointment at this time"
+PATIENT_CONFLICT_DETAIL = "Patient has a conflicting appointment at this time"
+
+# Attempts for transient failures (lock timeouts, serialization failures,
+# deadlocks) and the base of the jittered exponential backoff between them
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.02
+
+# PostgreSQL SQLSTATEs worth retrying
+_TRANSIENT_SQLSTATES = {"40001", "40P01", "55P03"}
+
+
+def overlap_detail(error: DBAPIError) -> Optional[str]:
+    """The conflict message for a non-overlap violation, else None."""
+    message = str(error.orig)
+    if PATIENT_OVERLAP_CONSTRAINT in message:
+        return PATIENT_CONFLICT_DETAIL
+    if OVERLAP_CONSTRAINT in message:
+        return DOCTOR_CONFLICT_DETAIL
+    return None
+
+
+def is_overlap_violation(error: DBAPIError) -> bool:
+    """Whether an integrity error came from a non-overlap constraint."""
+    return overlap_detail(error) is not None
+
+
+def is_transient(error: DBAPIError) -> bool:
+    """Whether a database error is worth retrying."""
+    sqlstate = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+    if sqlstate in _TRANSIENT_SQLSTATES:
+        return True
+    return "database is locked" in str(error.orig)
+
+
+@contextmanager
+def write_lock(db: Session) -> Iterator[None]:
+    """Take the database write lock before a check-and-write on SQLite.
+
+    The transaction is opened with BEGIN IMMEDIATE, so concurrent bookings
+    check and write in turn in every worker process; the others wait up
+    to the busy timeout and are then retried as transient. SQLite has one
+    write lock per database, so this serializes all bookings, not only
+    those of one doctor; what it guards is a few indexed statements. It
+    only turns races into clean conflict checks: the doctor and patient
+    triggers reject overlaps whether or not the lock is held. If the
+    transaction has already written it holds the lock. On PostgreSQL this
+    is a no-op and the exclusion constraints arbitrate.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        connection = db.connection()
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    yield
+
+
+@contextmanager
+def overlap_as_conflict(db: Session) -> Iterator[None]:
+    """Report non-overlap constraint violations as the usual 400 response."""
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        detail = overlap_detail(e)
+        if detail:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=detail
+            )
+        raise
+
+
+def run_booking(db: Session, operation: Callable[[], T]) -> T:
+    """Run a check-and-write booking operation safely under concurrency.
+
+    ``operation`` must perform its conflict checks, write and commit. It
+    runs under the write lock; constraint violations surface as 400 and
+    transient errors are retried up to MAX_ATTEMPTS times.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with overlap_as_conflict(db), write_lock(db):
+                return operation()
+        except OperationalError as e:
+            db.rollback()
+            if attempt == MAX_ATTEMPTS or not is_transient(e):
+                raise
+            _time.sleep(RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)) * (1 + random.random()))
+
+
+def book_appointment(
+    db: Session,
+    appointment_data: schemas.AppointmentCreate,
+    user_id: Optional[int] = None,
+) -> models.Appointment:
+    """Check conflicts and create a scheduled appointment, then commit.
+
+    Raises ``HTTPException`` (400) when the doctor or patient is busy,
+    whether the check or the database constraint catches it.
+    """
+    appointment_start = appointment_data.scheduled_datetime
+    appointment_end = scheduling.appointment_end(
+        appointment_start, appointment_data.duration_minutes
+    )
+
+    def book():
+        if scheduling.find_doctor_conflict(
+            db, appointment_data.doctor_id, appointment_start, appointment_end
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=DOCTOR_CONFLICT_DETAIL
+            )
+
+        if scheduling.find_patient_conflict(
+            db, appointment_data.patient_id, appointment_start, appointment_end
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=PATIENT_CONFLICT_DETAIL
+            )
+
+        appointment = models.Appointment(
+            appointment_id=generate_appointment_id(),
+            patient_id=appointment_data.patient_id,
+            doctor_id=appointment_data.doctor_id,
+            scheduled_datetime=appointment_start,
+            duration_minutes=appointment_data.duration_minutes,
+            reason=appointment_data.reason,
+            status=AppointmentStatusEnum.SCHEDULED,
+            notes=appointment_data.notes,
+            created_by=user_id
+        )
+        db.add(appointment)
+        db.commit()
+        db.refresh(appointment)
+        return appointment
+
+    return run_booking(db, book)
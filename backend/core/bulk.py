@@ -0,0 +1,101 @@
+import json
+from typing import Any, Callable, Iterable, Iterator, List, TypeVar
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+# Rows accepted by a single bulk request
+MAX_BULK_ROWS = 100_000
+
+# Bound parameters per IN (...) clause, well under SQLite's limit
+IN_CLAUSE_CHUNK = 500
+
+# Rows per executemany batch
+INSERT_CHUNK = 5_000
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield lists of at most ``size`` items."""
+    chunk: List[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_records(body: bytes, content_type: str = "") -> List[Any]:
+    """Parse a JSON array or NDJSON request body into a list of records.
+
+    NDJSON is used when the content type says so or when the body does not
+    start with ``[``. Blank lines are ignored. Raises ``ValueError`` with
+    the offending line number on malformed input.
+    """
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+
+    if "ndjson" not in content_type and text.startswith("["):
+        records = json.loads(text)
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array")
+        return records
+
+    records = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e.msg}")
+    return records
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic validation error into a single line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def existing_ids(db: Session, column, values: Iterable[Any], *criteria) -> set:
+    """Return the subset of ``values`` present in ``column``, chunking the IN clause."""
+    found = set()
+    for chunk in chunked(set(values), IN_CLAUSE_CHUNK):
+        found.update(db.scalars(select(column).where(column.in_(chunk), *criteria)))
+    return found
+
+
+def unique_ids(db: Session, column, generator: Callable[[], str], count: int) -> List[str]:
+    """Allocate ``count`` generated identifiers not yet used in ``column``.
+
+    Identifiers are drawn in blocks and checked with chunked IN queries,
+    retrying only the ones that collide.
+    """
+    allocated: set = set()
+    while len(allocated) < count:
+        candidates = {generator() for _ in range(count - len(allocated))} - allocated
+        allocated |= candidates - existing_ids(db, column, candidates)
+    return list(allocated)
+
+
+def conflict_insert(connection, table):
+    """Return an INSERT supporting ``on_conflict_do_update`` for this dialect.
+
+    Returns ``None`` on dialects without ON CONFLICT support, in which case
+    callers fall back to UPDATE-then-INSERT.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    return None
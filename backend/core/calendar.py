@@ -0,0 +1,116 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.availability import working_windows
+from backend.core.scheduling import MAX_APPOINTMENT_MINUTES
+from backend.models.appointment import AppointmentStatusEnum
+
+# Appointments that no longer hold their slot on the calendar
+RELEASED_STATUSES = (
+    AppointmentStatusEnum.CANCELLED,
+    AppointmentStatusEnum.NO_SHOW,
+)
+
+
+def _slot_starts(day: date, start: time, end: time, slot_minutes: int):
+    """Yield (slot_start, slot_end) pairs that fit entirely in a window."""
+    current = datetime.combine(day, start)
+    window_end = datetime.combine(day, end)
+    step = timedelta(minutes=slot_minutes)
+    while current + step <= window_end:
+        yield current, current + step
+        current += step
+
+
+def build_calendars(
+    db: Session,
+    doctor_ids: List[int],
+    start_day: date,
+    end_day: date,
+) -> Dict[int, dict]:
+    """Build slot calendars for several doctors over a day range.
+
+    Appointments are read with one range query ordered by doctor and start
+    time, then merged with the generated slots in a single forward sweep
+    per doctor.
+    """
+    windows = working_windows(db, doctor_ids, start_day, end_day)
+
+    range_start = datetime.combine(start_day, time.min)
+    range_end = datetime.combine(end_day + timedelta(days=1), time.min)
+    appointments = db.query(models.Appointment).filter(
+        and_(
+            models.Appointment.doctor_id.in_(doctor_ids),
+            models.Appointment.scheduled_datetime
+            > range_start - timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+            models.Appointment.scheduled_datetime < range_end,
+            models.Appointment.end_datetime > range_start,
+        )
+    ).order_by(
+        models.Appointment.doctor_id,
+        models.Appointment.scheduled_datetime
+    ).all()
+
+    by_doctor: Dict[int, List[models.Appointment]] = {doctor_id: [] for doctor_id in doctor_ids}
+    for appointment in appointments:
+        by_doctor[appointment.doctor_id].append(appointment)
+
+    calendars = {}
+    for doctor_id in doctor_ids:
+        booked = [a for a in by_doctor[doctor_id] if a.status not in RELEASED_STATUSES]
+        first_open = 0
+        days = []
+
+        day = start_day
+        while day <= end_day:
+            day_windows = windows[(doctor_id, day)]
+            day_slots = sorted({
+                slot
+                for window_start, window_end, slot_minutes in day_windows
+                for slot in _slot_starts(day, window_start, window_end, slot_minutes)
+            })
+
+            time_slots = []
+            for slot_start, slot_end in day_slots:
+                # Appointments that ended before this slot end before every
+                # later slot too, so the sweep never looks back.
+                while (first_open < len(booked)
+                       and booked[first_open].end_datetime <= slot_start):
+                    first_open += 1
+
+                occupied: Optional[models.Appointment] = None
+                index = first_open
+                while index < len(booked) and booked[index].scheduled_datetime < slot_end:
+                    if booked[index].end_datetime > slot_start:
+                        occupied = booked[index]
+                        break
+                    index += 1
+
+                time_slots.append({
+                    "time": slot_start.strftime("%H:%M"),
+                    "datetime": slot_start,
+                    "available": occupied is None,
+                    "appointment": occupied,
+                })
+
+            days.append({
+                "date": day,
+                "working_hours": [
+                    {"start": start, "end": end, "slot_minutes": slot_minutes}
+                    for start, end, slot_minutes in day_windows
+                ],
+                "time_slots": time_slots,
+            })
+            day += timedelta(days=1)
+
+        calendars[doctor_id] = {
+            "days": days,
+            "appointments": [
+                a for a in by_doctor[doctor_id]
+                if a.scheduled_datetime >= range_start
+            ],
+        }
+
+    return calendars
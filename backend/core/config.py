@@ -19,6 +19,9 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_TIMEOUT: int = 30
+    # Raise instead of logging when a request runs more queries than its
+    # route's declared budget; always on under TESTING
+    QUERY_BUDGET_STRICT: bool = False
     
     # Redis configuration
     REDIS_ENABLED: bool = False  # Disable Redis in development mode
@@ -48,8 +51,11 @@ class Settings(BaseSettings):
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
-    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_UPLOAD_SIZE: int = 1024 * 1024 * 1024  # 1GB; uploads are streamed to disk
     ALLOWED_UPLOAD_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".pdf"]
+    # Internal nginx location serving UPLOAD_DIR/documents; when set,
+    # downloads are handed to nginx with X-Accel-Redirect
+    DOCUMENT_ACCEL_REDIRECT: Optional[str] = None
     
     # Email
     # Logging
@@ -0,0 +1,167 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+from typing import AsyncIterable, NamedTuple, Optional
+from urllib.parse import quote
+from fastapi import HTTPException, Response, status
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from backend import models
+from backend.core.config import settings
+
+# Document files live under UPLOAD_DIR in this directory, named by the
+# SHA-256 of their content, so identical uploads share one file
+DOCUMENTS_DIR = "documents"
+
+# Received chunks are gathered into blocks of this size before being
+# hashed and written off the event loop
+WRITE_BLOCK = 1024 * 1024
+
+
+class StoredFile(NamedTuple):
+    content_hash: str
+    size: int
+    path: str  # Relative to the documents directory
+    existed: bool
+
+
+def documents_root() -> str:
+    return os.path.join(settings.UPLOAD_DIR, DOCUMENTS_DIR)
+
+
+def blob_path(content_hash: str) -> str:
+    """Where a file with this content is kept, fanned out over two levels."""
+    return os.path.join(content_hash[:2], content_hash[2:4], content_hash)
+
+
+def check_filename(filename: str) -> str:
+    """The file's extension, if uploads allow it; otherwise a 400."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in settings.ALLOWED_UPLOAD_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type must be one of: {', '.join(settings.ALLOWED_UPLOAD_EXTENSIONS)}"
+        )
+    return extension
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the {settings.MAX_UPLOAD_SIZE} byte upload limit"
+    )
+
+
+def check_size(content_length: Optional[str]) -> None:
+    """Refuse a body declared larger than MAX_UPLOAD_SIZE before reading it."""
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE:
+        raise _too_large()
+
+
+def _write(file, digest, block: bytes) -> None:
+    digest.update(block)
+    file.write(block)
+
+
+def _finish(file) -> None:
+    file.flush()
+    os.fsync(file.fileno())
+    file.close()
+
+
+async def store(chunks: AsyncIterable[bytes]) -> StoredFile:
+    """Stream an upload to disk, hashing it on the way.
+
+    The body goes to a temporary file in WRITE_BLOCK pieces, so memory
+    stays flat whatever the file size. Once complete it is moved to its
+    content address, or dropped when a file with the same content is
+    already stored. Bodies over MAX_UPLOAD_SIZE are a 413 and empty ones
+    a 400; nothing is left behind either way.
+    """
+    root = documents_root()
+    staging = os.path.join(root, "tmp")
+    os.makedirs(staging, exist_ok=True)
+    file = tempfile.NamedTemporaryFile(dir=staging, delete=False)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        pending, pending_size = [], 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > settings.MAX_UPLOAD_SIZE:
+                raise _too_large()
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= WRITE_BLOCK:
+                await run_in_threadpool(_write, file, digest, b"".join(pending))
+                pending, pending_size = [], 0
+        if pending:
+            await run_in_threadpool(_write, file, digest, b"".join(pending))
+        await run_in_threadpool(_finish, file)
+        if not size:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+
+        content_hash = digest.hexdigest()
+        path = blob_path(content_hash)
+        destination = os.path.join(root, path)
+        existed = os.path.exists(destination)
+        if existed:
+            os.unlink(file.name)
+        else:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(file.name, destination)
+        return StoredFile(content_hash, size, path, existed)
+    except BaseException:
+        file.close()
+        if os.path.exists(file.name):
+            os.unlink(file.name)
+        raise
+
+
+def content_type(filename: str, declared: Optional[str] = None) -> str:
+    if declared and declared.split(";")[0].strip() not in ("", "application/octet-stream"):
+        return declared.split(";")[0].strip()
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _inline(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"inline; filename*=utf-8''{quoted}"
+    return f'inline; filename="{filename}"'
+
+
+def download(document: models.PatientDocument) -> Response:
+    """Serve a stored document with Range support.
+
+    With DOCUMENT_ACCEL_REDIRECT set, the response only names the file and
+    the fronting nginx sends it from disk with sendfile. Otherwise it is
+    served by the application; servers implementing the ASGI pathsend
+    extension also hand it to the kernel. The content hash is the ETag,
+    so If-Range and conditional requests work across renames.
+    """
+    headers = {"Cache-Control": "private, max-age=31536000, immutable"}
+    if document.content_hash:
+        headers["ETag"] = f'"{document.content_hash}"'
+    media_type = document.content_type or content_type(document.original_filename)
+    if settings.DOCUMENT_ACCEL_REDIRECT:
+        response = Response(media_type=media_type, headers=headers)
+        location = settings.DOCUMENT_ACCEL_REDIRECT.rstrip("/") + "/" + document.file_path.replace(os.sep, "/")
+        response.headers["X-Accel-Redirect"] = location
+        response.headers["Content-Disposition"] = _inline(document.original_filename)
+        return response
+
+    path = os.path.join(documents_root(), document.file_path)
+    if not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document file not found"
+        )
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=document.original_filename,
+        content_disposition_type="inline",
+        headers=headers,
+    )
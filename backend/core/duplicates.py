@@ -0,0 +1,358 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import combinations
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+from sqlalchemy import and_, bindparam, case, create_engine, func, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.bulk import IN_CLAUSE_CHUNK, INSERT_CHUNK, chunked, conflict_insert
+from backend.core.phonetic import metaphone
+from backend.models.patient import normalize_phone
+
+# Candidates scored per registration; blocking keeps this small, the cap
+# bounds the cost for very common keys
+MAX_CANDIDATES = 25
+
+# Pairs scoring at or above this are reported as probable duplicates
+DUPLICATE_THRESHOLD = 0.8
+
+# Score weights; they add up to 1
+LAST_NAME_WEIGHT = 0.3
+FIRST_NAME_WEIGHT = 0.3
+BIRTH_DATE_WEIGHT = 0.3
+CONTACT_WEIGHT = 0.1
+
+# Patients per batch task, and the largest block compared pairwise; larger
+# blocks (placeholder names, shared clinic phones) are skipped
+BATCH_CHUNK = 20_000
+MAX_BLOCK_SIZE = 500
+
+# Response header listing probable duplicates of a new registration
+DUPLICATES_HEADER = "X-Possible-Duplicates"
+
+REGISTRATION = "registration"
+BATCH = "batch"
+
+
+class Person(NamedTuple):
+    """The fields duplicate detection looks at."""
+    id: Optional[int]
+    first_name: str
+    last_name: str
+    date_of_birth: date
+    phone_normalized: Optional[str]
+    email: Optional[str]
+
+
+class Match(NamedTuple):
+    patient_id: int
+    duplicate_of_id: int
+    score: float
+    reasons: Tuple[str, ...]
+
+
+_PERSON_COLUMNS = (
+    models.Patient.id,
+    models.Patient.first_name,
+    models.Patient.last_name,
+    models.Patient.date_of_birth,
+    models.Patient.phone_normalized,
+    models.Patient.email,
+)
+
+
+def person(data, patient_id: Optional[int] = None) -> Person:
+    """Build a Person from a patient, a PatientCreate or a row."""
+    return Person(
+        patient_id if patient_id is not None else getattr(data, "id", None),
+        data.first_name,
+        data.last_name,
+        data.date_of_birth,
+        getattr(data, "phone_normalized", None) or normalize_phone(getattr(data, "phone", None)),
+        data.email,
+    )
+
+
+def jaro_winkler(a: str, b: str) -> float:
+    """Jaro-Winkler similarity of two strings, between 0 and 1."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    a_matched = [False] * len(a)
+    b_matched = [False] * len(b)
+    matches = 0
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_matched[j] and b[j] == char:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    a_chars = [char for char, matched in zip(a, a_matched) if matched]
+    b_chars = [char for char, matched in zip(b, b_matched) if matched]
+    transpositions = sum(x != y for x, y in zip(a_chars, b_chars)) / 2
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _birth_date_similarity(a: date, b: date) -> float:
+    if a == b:
+        return 1.0
+    if a.year != b.year:
+        return 0.0
+    if (a.month, a.day) == (b.day, b.month):
+        # Day and month swapped
+        return 0.8
+    if a.month == b.month or a.day == b.day:
+        # One field mistyped
+        return 0.5
+    return 0.0
+
+
+def score(a: Person, b: Person) -> Tuple[float, Tuple[str, ...]]:
+    """Similarity of two registrations and the reasons behind it."""
+    last = jaro_winkler(a.last_name.lower(), b.last_name.lower())
+    first = jaro_winkler(a.first_name.lower(), b.first_name.lower())
+    birth = _birth_date_similarity(a.date_of_birth, b.date_of_birth)
+    same_phone = bool(a.phone_normalized) and a.phone_normalized == b.phone_normalized
+    same_email = bool(a.email) and (a.email or "").lower() == (b.email or "").lower()
+
+    total = (
+        LAST_NAME_WEIGHT * last
+        + FIRST_NAME_WEIGHT * first
+        + BIRTH_DATE_WEIGHT * birth
+        + CONTACT_WEIGHT * (same_phone or same_email)
+    )
+    reasons = []
+    if last >= 0.9 and first >= 0.9:
+        reasons.append("similar name")
+    if birth == 1:
+        reasons.append("same date of birth")
+    elif birth:
+        reasons.append("similar date of birth")
+    if same_phone:
+        reasons.append("same phone")
+    if same_email:
+        reasons.append("same email")
+    return round(total, 4), tuple(reasons)
+
+
+def find_candidates(db: Session, subject: Person, limit: int = MAX_CANDIDATES) -> List[Person]:
+    """Patients sharing a blocking key with ``subject``.
+
+    The keys are the phonetic last name within the same birth year, served
+    by ``idx_patient_blocking``, and the normalized phone, served by
+    ``idx_patient_phone_normalized``. When a block holds more than
+    ``limit`` patients, those sharing the phone come first, then those
+    born on the same day, then the oldest registrations.
+    """
+    blocks = []
+    order = []
+    if subject.phone_normalized:
+        same_phone = models.Patient.phone_normalized == subject.phone_normalized
+        blocks.append(same_phone)
+        order.append(case((same_phone, 0), else_=1))
+    phonetic = metaphone(subject.last_name)
+    if phonetic:
+        year = subject.date_of_birth.year
+        blocks.append(and_(
+            models.Patient.last_name_phonetic == phonetic,
+            models.Patient.date_of_birth >= date(year, 1, 1),
+            models.Patient.date_of_birth <= date(year, 12, 31),
+        ))
+        order.append(case((models.Patient.date_of_birth == subject.date_of_birth, 0), else_=1))
+    if not blocks:
+        return []
+
+    query = select(*_PERSON_COLUMNS).where(or_(*blocks))
+    if subject.id is not None:
+        query = query.where(models.Patient.id != subject.id)
+    query = query.order_by(*order, models.Patient.id).limit(limit)
+    return [Person(*row) for row in db.execute(query)]
+
+
+def find_duplicates(db: Session, subject: Person) -> List[Tuple[Person, float, Tuple[str, ...]]]:
+    """Probable duplicates of ``subject``, best first."""
+    scored = []
+    for candidate in find_candidates(db, subject):
+        value, reasons = score(subject, candidate)
+        if value >= DUPLICATE_THRESHOLD:
+            scored.append((candidate, value, reasons))
+    scored.sort(key=lambda item: (-item[1], item[0].id))
+    return scored
+
+
+def record(connection, matches: Iterable[Match], source: str) -> int:
+    """Store probable duplicate pairs, keeping the latest score per pair.
+
+    Pairs are normalized to (newer, older). Does not commit; returns the
+    number of pairs written.
+    """
+    rows = {}
+    for match in matches:
+        newer, older = max(match.patient_id, match.duplicate_of_id), min(match.patient_id, match.duplicate_of_id)
+        rows[(newer, older)] = {
+            "patient_id": newer,
+            "duplicate_of_id": older,
+            "score": match.score,
+            "reasons": ",".join(match.reasons),
+            "source": source,
+        }
+    if not rows:
+        return 0
+
+    table = models.PatientDuplicate.__table__
+    stmt = conflict_insert(connection, table)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.patient_id, table.c.duplicate_of_id],
+            set_={"score": stmt.excluded.score, "reasons": stmt.excluded.reasons, "source": stmt.excluded.source},
+        )
+        for chunk in chunked(list(rows.values()), INSERT_CHUNK):
+            connection.execute(stmt, chunk)
+        return len(rows)
+
+    for row in rows.values():
+        result = connection.execute(
+            update(table)
+            .where(and_(
+                table.c.patient_id == row["patient_id"],
+                table.c.duplicate_of_id == row["duplicate_of_id"],
+            ))
+            .values(score=row["score"], reasons=row["reasons"], source=row["source"])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+    return len(rows)
+
+
+# Offline batch mode
+
+def backfill_keys(db: Session) -> int:
+    """Fill blocking keys for rows written outside SQLAlchemy; does not commit."""
+    patients = models.Patient.__table__
+    missing = db.execute(
+        select(patients.c.id, patients.c.last_name, patients.c.phone).where(or_(
+            patients.c.last_name_phonetic.is_(None),
+            patients.c.phone_normalized.is_(None),
+        ))
+    ).all()
+    rows = [
+        {"row_id": row_id, "phonetic": metaphone(last_name), "normalized": normalize_phone(phone)}
+        for row_id, last_name, phone in missing
+    ]
+    for chunk in chunked(rows, INSERT_CHUNK):
+        db.execute(
+            update(patients)
+            .where(patients.c.id == bindparam("row_id"))
+            .values(last_name_phonetic=bindparam("phonetic"), phone_normalized=bindparam("normalized")),
+            chunk,
+        )
+    return len(missing)
+
+
+def _compare_block(people: Sequence[Person]) -> List[Match]:
+    matches = []
+    for a, b in combinations(people, 2):
+        value, reasons = score(a, b)
+        if value >= DUPLICATE_THRESHOLD:
+            matches.append(Match(b.id, a.id, value, reasons))
+    return matches
+
+
+def scan_chunk(bind: Union[Engine, str], kind: str, keys: Sequence[str]) -> List[Match]:
+    """Compare every pair within the blocks of one batch task.
+
+    ``kind`` is "phonetic" (blocks are phonetic key and birth year) or
+    "phone". ``bind`` is an engine, or a URL when run in a worker process.
+    """
+    engine = create_engine(bind) if isinstance(bind, str) else bind
+    column = models.Patient.last_name_phonetic if kind == "phonetic" else models.Patient.phone_normalized
+    blocks: Dict[tuple, List[Person]] = defaultdict(list)
+    try:
+        with engine.connect() as connection:
+            for key_chunk in chunked(keys, IN_CLAUSE_CHUNK):
+                rows = connection.execute(
+                    select(column, *_PERSON_COLUMNS)
+                    .where(column.in_(key_chunk))
+                    .order_by(models.Patient.id)
+                )
+                for key, *fields in rows:
+                    subject = Person(*fields)
+                    block = (key, subject.date_of_birth.year) if kind == "phonetic" else (key,)
+                    blocks[block].append(subject)
+    finally:
+        if isinstance(bind, str):
+            engine.dispose()
+
+    matches = []
+    for people in blocks.values():
+        if 1 < len(people) <= MAX_BLOCK_SIZE:
+            matches.extend(_compare_block(people))
+    return matches
+
+
+def _tasks(db: Session, column, kind: str, chunk_size: int) -> List[Tuple[str, List[str]]]:
+    """Split the keys shared by several patients into tasks of ~chunk_size patients."""
+    tasks = []
+    keys, size = [], 0
+    rows = db.execute(
+        select(column, func.count())
+        .where(column.isnot(None), column != "")
+        .group_by(column)
+        .having(func.count() > 1)
+        .order_by(column)
+    )
+    for key, count in rows:
+        keys.append(key)
+        size += count
+        if size >= chunk_size:
+            tasks.append((kind, keys))
+            keys, size = [], 0
+    if keys:
+        tasks.append((kind, keys))
+    return tasks
+
+
+def scan_registry(engine: Engine, workers: int = 1, chunk_size: int = BATCH_CHUNK) -> int:
+    """Find probable duplicates across the whole registry and record them.
+
+    Blocks are split into tasks of about ``chunk_size`` patients, run in
+    ``workers`` processes (inline when 1), and the resulting pairs are
+    stored with source "batch". Returns the number of pairs recorded.
+    """
+    with Session(engine) as db:
+        backfill_keys(db)
+        db.commit()
+        tasks = (
+            _tasks(db, models.Patient.last_name_phonetic, "phonetic", chunk_size)
+            + _tasks(db, models.Patient.phone_normalized, "phone", chunk_size)
+        )
+
+    matches: List[Match] = []
+    if workers > 1 and len(tasks) > 1:
+        url = engine.url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(scan_chunk, url, kind, keys) for kind, keys in tasks]
+            for future in futures:
+                matches.extend(future.result())
+    else:
+        for kind, keys in tasks:
+            matches.extend(scan_chunk(engine, kind, keys))
+
+    # A pair found through both blocks keeps one row
+    with engine.begin() as connection:
+        return record(connection, matches, BATCH)
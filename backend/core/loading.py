@@ -0,0 +1,44 @@
+from functools import lru_cache
+from typing import Optional, Tuple, Type, get_args
+from pydantic import BaseModel
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def _nested_schema(annotation) -> Optional[Type[BaseModel]]:
+    # The model inside List[...] or Optional[...], if the field nests one
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for argument in get_args(annotation):
+        schema = _nested_schema(argument)
+        if schema is not None:
+            return schema
+    return None
+
+
+@lru_cache(maxsize=None)
+def eager(model, schema: Type[BaseModel]) -> Tuple:
+    """Loader options for every relationship of ``model`` that ``schema`` returns.
+
+    The response model is the declaration: a field named after a
+    relationship is loaded up front, collections with ``selectinload``
+    (one query per relationship for the whole result) and many-to-one
+    references with ``joinedload`` (in the same query). Nested schemas
+    get their own options, so serializing a list never loads related
+    rows one parent at a time.
+    """
+    mapper = sa_inspect(model)
+    options = []
+    for name, field in schema.model_fields.items():
+        if name not in mapper.relationships:
+            continue
+        relationship = mapper.relationships[name]
+        attribute = getattr(model, name)
+        loader = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+        nested = _nested_schema(field.annotation)
+        if nested is not None:
+            children = eager(relationship.mapper.class_, nested)
+            if children:
+                loader = loader.options(*children)
+        options.append(loader)
+    return tuple(options)
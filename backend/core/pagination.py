@@ -0,0 +1,142 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_, tuple_
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque token."""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Decode a cursor token, checking it carries ``size`` key values.
+
+    Raises ``ValueError`` for tokens that were not produced by
+    :func:`encode_cursor` for the same ordering.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return [_decode_value(value) for value in values]
+
+
+def _after(ordering: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """Seek predicate selecting rows strictly after ``values`` in the ordering.
+
+    A single direction becomes a row-value comparison that the matching
+    composite index answers with one range scan. Mixed directions expand
+    to ``(a > x) OR (a = x AND b > y) ...`` under a bound on the leading
+    column so the index still limits the scan.
+    """
+    columns = [column for column, _ in ordering]
+    directions = {descending for _, descending in ordering}
+    if len(directions) == 1:
+        if directions.pop():
+            return tuple_(*columns) < tuple_(*values)
+        return tuple_(*columns) > tuple_(*values)
+
+    clauses = []
+    for position, (column, descending) in enumerate(ordering):
+        step = column < values[position] if descending else column > values[position]
+        equal_prefix = [columns[index] == values[index] for index in range(position)]
+        clauses.append(and_(*equal_prefix, step))
+    leading, leading_descending = ordering[0]
+    bound = leading <= values[0] if leading_descending else leading >= values[0]
+    return and_(bound, or_(*clauses))
+
+
+def keyset_page(
+    query,
+    ordering: Sequence[Tuple[Any, bool]],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    key: Optional[Callable[[Any], Sequence[Any]]] = None,
+) -> Tuple[list, Optional[str]]:
+    """Fetch one page of ``query`` by keyset and return it with the next cursor.
+
+    ``ordering`` lists ``(column, descending)`` pairs and must end with a
+    unique, non-null column (the primary key) so every row has a distinct
+    position. With a cursor the page starts right after the encoded row at
+    constant cost; without one, ``skip`` is applied as an OFFSET for
+    backward compatibility. ``key`` extracts the ordering values from a
+    row when they are not attributes named after the ordering columns
+    (e.g. computed columns). Raises ``ValueError`` for a malformed cursor.
+    """
+    if cursor:
+        query = query.filter(_after(ordering, decode_cursor(cursor, len(ordering))))
+
+    query = query.order_by(
+        *(column.desc() if descending else column.asc() for column, descending in ordering)
+    )
+    if skip and not cursor:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if limit > 0 and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if key is not None:
+            values = list(key(last))
+        else:
+            values = [getattr(last, column.key) for column, _ in ordering]
+        next_cursor = encode_cursor(values)
+    return rows, next_cursor
+
+
+def paginate(
+    query,
+    ordering: Sequence[Tuple[Any, bool]],
+    limit: int,
+    cursor: Optional[str],
+    skip: int,
+    response: Response,
+    key: Optional[Callable[[Any], Sequence[Any]]] = None,
+) -> list:
+    """Router helper around :func:`keyset_page`.
+
+    Sets the next cursor on the ``X-Next-Cursor`` response header so list
+    bodies keep their shape, and reports malformed cursors as 400.
+    """
+    try:
+        rows, next_cursor = keyset_page(query, ordering, limit, cursor, skip, key)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
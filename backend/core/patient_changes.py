@@ -0,0 +1,214 @@
+import abc
+import threading
+import time as _time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.bulk import IN_CLAUSE_CHUNK, chunked
+
+# How often a worker checks the change log for writes made elsewhere
+REFRESH_INTERVAL_SECONDS = 1.0
+
+# Change ids below the newest applied one that are re-read on each refresh,
+# so writes committed out of id order are not skipped
+RESCAN_WINDOW = 256
+
+# Change log entries older than this are pruned at startup and then every
+# PRUNE_EVERY_WRITES logged writes; a worker that has not refreshed for
+# that long reloads instead of replaying
+CHANGE_RETENTION = timedelta(days=1)
+PRUNE_EVERY_WRITES = 1000
+
+_PENDING_KEY = "patient_changes_pending"
+
+
+class ChangeFollower(abc.ABC):
+    """Base for in-process patient indexes kept current across workers.
+
+    Writes made through this process's ORM are applied as soon as they
+    commit, from snapshots taken at flush time. Writes made by other
+    workers, or by Core bulk paths, are found in the patient_changes log
+    by ``refresh``. Subclasses build their state in ``_load``, re-read
+    patients in ``apply`` and convert ORM objects in ``snapshot``.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._reset_position()
+
+    def _reset_position(self) -> None:
+        self.version = 0
+        self._seen: Set[int] = set()
+        self.loaded_at: Optional[datetime] = None
+        self._checked_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @abc.abstractmethod
+    def _load(self, db: Session) -> None:
+        """Build the index state from every patient."""
+
+    @abc.abstractmethod
+    def apply(self, db: Session, patient_ids: Iterable[int]) -> None:
+        """Re-read some patients and update or drop their entries."""
+
+    @abc.abstractmethod
+    def snapshot(self, patient: models.Patient) -> Any:
+        """What ``apply_snapshot`` needs from a flushed patient."""
+
+    @abc.abstractmethod
+    def apply_snapshot(self, patient_id: int, snapshot: Any) -> None:
+        """Apply a committed write; ``snapshot`` is None for a deletion."""
+
+    def load(self, db: Session) -> None:
+        """Build the index from the patients table and swap it in.
+
+        The change log position is read first, so writes that land while
+        loading are replayed by the next refresh.
+        """
+        changes = models.PatientChange.__table__
+        version = db.execute(select(func.max(changes.c.id))).scalar() or 0
+        seen = set(db.execute(
+            select(changes.c.id).where(changes.c.id > version - RESCAN_WINDOW)
+        ).scalars())
+
+        self._load(db)
+        with self._lock:
+            self.version = version
+            self._seen = seen
+            self.loaded_at = datetime.now(timezone.utc)
+            self._checked_at = _time.monotonic()
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        """Apply writes other workers logged since the last refresh.
+
+        Loads the index on first use. Otherwise checks the change log at
+        most every REFRESH_INTERVAL_SECONDS and reloads only the patients
+        named by unseen entries. Concurrent callers skip the check rather
+        than wait for it.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            now = _time.monotonic()
+            if not self.loaded or now - self._checked_at > CHANGE_RETENTION.total_seconds():
+                self.load(db)
+                return
+            if not force and now - self._checked_at < REFRESH_INTERVAL_SECONDS:
+                return
+            self._checked_at = now
+
+            changes = models.PatientChange.__table__
+            rows = db.execute(
+                select(changes.c.id, changes.c.patient_id)
+                .where(changes.c.id > self.version - RESCAN_WINDOW)
+                .order_by(changes.c.id)
+            ).all()
+            unseen = [(change_id, patient_id) for change_id, patient_id in rows if change_id not in self._seen]
+            if not unseen:
+                return
+
+            self.apply(db, {patient_id for _, patient_id in unseen})
+            with self._lock:
+                self._seen.update(change_id for change_id, _ in unseen)
+                self.version = max(self.version, unseen[-1][0])
+                floor = self.version - RESCAN_WINDOW
+                self._seen = {change_id for change_id in self._seen if change_id > floor}
+        finally:
+            self._refresh_lock.release()
+
+
+followers: List[ChangeFollower] = []
+
+# Writes this process has logged since it last pruned the change log
+_writes_since_prune = 0
+_prune_counter_lock = threading.Lock()
+
+
+def register(follower: ChangeFollower) -> ChangeFollower:
+    """Keep ``follower`` current with this process's committed ORM writes."""
+    followers.append(follower)
+    return follower
+
+
+def record_changes(connection, patient_ids: Iterable[int]) -> None:
+    """Log patient writes for other workers' indexes.
+
+    The ORM does this automatically; Core bulk writes call it themselves.
+    Every PRUNE_EVERY_WRITES logged writes the old entries are pruned in
+    the same transaction, so the log stays bounded between restarts.
+    """
+    global _writes_since_prune
+    rows = [{"patient_id": patient_id} for patient_id in patient_ids]
+    for chunk in chunked(rows, IN_CLAUSE_CHUNK):
+        connection.execute(insert(models.PatientChange.__table__), chunk)
+
+    with _prune_counter_lock:
+        _writes_since_prune += len(rows)
+        due = _writes_since_prune >= PRUNE_EVERY_WRITES
+        if due:
+            _writes_since_prune = 0
+    if due:
+        prune_changes(connection)
+
+
+def prune_changes(db: Union[Session, Connection]) -> int:
+    """Delete change log entries older than CHANGE_RETENTION; does not commit."""
+    cutoff = datetime.now(timezone.utc) - CHANGE_RETENTION
+    changes = models.PatientChange.__table__
+    return db.execute(delete(changes).where(changes.c.changed_at < cutoff)).rowcount
+
+
+def warm_up(session_factory: Callable[[], Session]) -> None:
+    """Prune the change log and load every registered index; run at startup."""
+    with session_factory() as db:
+        prune_changes(db)
+        db.commit()
+        for follower in followers:
+            follower.load(db)
+
+
+@event.listens_for(Session, "after_flush")
+def _log_patient_writes(session, flush_context):
+    """Log ORM patient writes and snapshot them for this process's indexes."""
+    changed: Dict[int, Optional[models.Patient]] = {}
+    for obj in session.new:
+        if isinstance(obj, models.Patient):
+            changed[obj.id] = obj
+    for obj in session.dirty:
+        if isinstance(obj, models.Patient) and session.is_modified(obj):
+            changed[obj.id] = obj
+    for obj in session.deleted:
+        if isinstance(obj, models.Patient):
+            changed[obj.id] = None
+    if not changed:
+        return
+
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for patient_id, obj in changed.items():
+        pending[patient_id] = obj and [follower.snapshot(obj) for follower in followers]
+    record_changes(session.connection(), changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_patient_writes(session):
+    """Update this process's indexes as soon as patient writes commit."""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for position, follower in enumerate(followers):
+        if not follower.loaded:
+            continue
+        for patient_id, snapshots in pending.items():
+            follower.apply_snapshot(patient_id, snapshots and snapshots[position])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_patient_writes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
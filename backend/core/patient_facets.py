@@ -0,0 +1,189 @@
+import sys
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.bitmap import Bitmap
+from backend.core.bulk import IN_CLAUSE_CHUNK, chunked
+from backend.core.patient_changes import ChangeFollower, register
+
+# Facets of the population screen, in response order
+FACETS = ("gender", "blood_group", "insurance_provider", "has_allergies")
+
+LOAD_CHUNK = 10_000
+
+_COLUMNS = (
+    models.Patient.id,
+    models.Patient.gender,
+    models.Patient.blood_group,
+    models.Patient.insurance_provider,
+    models.Patient.allergies,
+)
+
+
+def facet_values(gender, blood_group, insurance_provider, allergies) -> Tuple[Any, ...]:
+    """A patient's value for each facet, in FACETS order.
+
+    Has-allergies follows advanced search: any recorded allergies count.
+    """
+    return (
+        gender.value if isinstance(gender, Enum) else gender,
+        blood_group or None,
+        insurance_provider or None,
+        allergies is not None,
+    )
+
+
+class FacetIndex(ChangeFollower):
+    """In-process bitmap index of patients by facet value.
+
+    Each facet value maps to a compressed bitmap of the patient ids that
+    have it. Counts for a filter combination intersect bitmaps instead of
+    scanning patients; each facet is narrowed by the filters on the other
+    facets but not its own, so the screen can offer the alternatives to a
+    selected value.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bitmaps: Dict[str, Dict[Any, Bitmap]] = {facet: {} for facet in FACETS}
+            self._values: Dict[int, Tuple[Any, ...]] = {}
+            self._reset_position()
+
+    # Maintenance
+
+    def _unset(self, patient_id: int) -> None:
+        values = self._values.pop(patient_id, None)
+        if values is None:
+            return
+        for facet, value in zip(FACETS, values):
+            bitmaps = self._bitmaps[facet]
+            bitmaps[value].discard(patient_id)
+            if not len(bitmaps[value]):
+                del bitmaps[value]
+
+    def upsert(self, patient_id: int, values: Tuple[Any, ...]) -> None:
+        with self._lock:
+            if self._values.get(patient_id) == values:
+                return
+            self._unset(patient_id)
+            for facet, value in zip(FACETS, values):
+                self._bitmaps[facet].setdefault(value, Bitmap()).add(patient_id)
+            self._values[patient_id] = values
+
+    def remove(self, patient_id: int) -> None:
+        with self._lock:
+            self._unset(patient_id)
+
+    # Lookups
+
+    def _selection(self, facet: str, values: Sequence[Any]) -> Bitmap:
+        selected = Bitmap()
+        for value in values:
+            bitmap = self._bitmaps[facet].get(value)
+            if bitmap is not None:
+                selected = selected | bitmap
+        return selected
+
+    def counts(self, filters: Dict[str, Sequence[Any]]) -> dict:
+        """Patient counts per facet value under ``filters``.
+
+        ``filters`` maps facets to the accepted values; several values of
+        one facet are alternatives. Returns the number of patients matching
+        every filter and, for each facet, the values with patients matching
+        the other facets' filters, largest first.
+        """
+        with self._lock:
+            selections = {
+                facet: self._selection(facet, values)
+                for facet, values in filters.items()
+                if facet in self._bitmaps and values
+            }
+
+            def narrowed(excluded: Optional[str]) -> Optional[Bitmap]:
+                result = None
+                for facet, selection in selections.items():
+                    if facet != excluded:
+                        result = selection if result is None else result & selection
+                return result
+
+            everyone = narrowed(None)
+            facets = {}
+            for facet in FACETS:
+                base = narrowed(facet)
+                selected = set(filters.get(facet) or ())
+                counts = {
+                    value: bitmap.intersection_count(base)
+                    for value, bitmap in self._bitmaps[facet].items()
+                }
+                # Selected values stay listed even when nothing matches
+                counts.update((value, 0) for value in selected if value not in counts)
+                facets[facet] = [
+                    {"value": value, "count": count}
+                    for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+                    if count or value in selected
+                ]
+            return {
+                "total": len(self._values) if everyone is None else len(everyone),
+                "facets": facets,
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "patients": len(self._values),
+                "values": {facet: len(self._bitmaps[facet]) for facet in FACETS},
+                "estimated_bytes": sys.getsizeof(self._values) + sum(
+                    bitmap.nbytes() for bitmaps in self._bitmaps.values() for bitmap in bitmaps.values()
+                ),
+                "version": self.version,
+                "loaded_at": self.loaded_at,
+            }
+
+    # Loading and change log hooks
+
+    def _load(self, db: Session) -> None:
+        members: Dict[str, Dict[Any, List[int]]] = {facet: {} for facet in FACETS}
+        records = {}
+        for rows in db.execute(select(*_COLUMNS)).yield_per(LOAD_CHUNK).partitions():
+            for patient_id, *columns in rows:
+                values = facet_values(*columns)
+                records[patient_id] = values
+                for facet, value in zip(FACETS, values):
+                    members[facet].setdefault(value, []).append(patient_id)
+        bitmaps = {
+            facet: {value: Bitmap(ids) for value, ids in by_value.items()}
+            for facet, by_value in members.items()
+        }
+
+        with self._lock:
+            self._bitmaps = bitmaps
+            self._values = records
+
+    def apply(self, db: Session, patient_ids: Iterable[int]) -> None:
+        """Re-read some patients and update or drop their entries."""
+        patient_ids = set(patient_ids)
+        found = set()
+        for chunk in chunked(sorted(patient_ids), IN_CLAUSE_CHUNK):
+            for patient_id, *columns in db.execute(select(*_COLUMNS).where(models.Patient.id.in_(chunk))):
+                self.upsert(patient_id, facet_values(*columns))
+                found.add(patient_id)
+        for patient_id in patient_ids - found:
+            self.remove(patient_id)
+
+    def snapshot(self, patient: models.Patient) -> Tuple[Any, ...]:
+        return facet_values(patient.gender, patient.blood_group, patient.insurance_provider, patient.allergies)
+
+    def apply_snapshot(self, patient_id: int, snapshot) -> None:
+        if snapshot is None:
+            self.remove(patient_id)
+        else:
+            self.upsert(patient_id, snapshot)
+
+
+index = register(FacetIndex())
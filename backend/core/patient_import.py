@@ -0,0 +1,347 @@
+import codecs
+import csv
+import json
+from datetime import datetime, timezone
+from enum import Enum
+from io import StringIO
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
+from fastapi import Request
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from backend import audit, models, schemas
+from backend.core import patient_changes
+from backend.core.bulk import IN_CLAUSE_CHUNK, INSERT_CHUNK, chunked, format_validation_error, unique_ids
+from backend.core.phonetic import metaphone
+from backend.core.security import generate_patient_id
+from backend.models.patient import GenderEnum, normalize_phone
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+
+RUNNING = "running"
+COMPLETED = "completed"
+
+# Records validated, inserted and committed together
+IMPORT_CHUNK = INSERT_CHUNK
+
+# Row errors returned in the response; later ones are only counted
+MAX_REPORTED_ERRORS = 1_000
+
+# Bytes read per block by file-based imports
+READ_BLOCK = 1 << 16
+
+# (row, record, error): record is None when the row could not be parsed
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+def detect_format(content_type: str = "", filename: str = "") -> str:
+    """Pick CSV or NDJSON from a content type or file name; NDJSON by default."""
+    if "csv" in content_type or filename.lower().endswith(".csv"):
+        return CSV
+    return NDJSON
+
+
+class RecordParser:
+    """Incremental CSV or NDJSON parser.
+
+    Bytes are fed as they arrive and complete records come out as
+    (row, record, error) triples, so only the current partial line is
+    held. CSV input starts with a header row; empty cells are omitted so
+    optional fields take their defaults. Rows are numbered from 0,
+    not counting the header or blank lines. Raises ``ValueError`` on
+    input that is not UTF-8.
+    """
+
+    def __init__(self, format: str):
+        self.format = format
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._partial = ""
+        self._pending: List[str] = []
+        self._quotes = 0
+        self._header: Optional[List[str]] = None
+        self._rows = 0
+
+    def feed(self, data: bytes) -> Iterator[ParsedRow]:
+        lines = (self._partial + self._decoder.decode(data)).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            yield from self._line(line + "\n")
+
+    def close(self) -> Iterator[ParsedRow]:
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if text:
+            yield from self._line(text)
+        if self._pending:
+            self._pending, self._quotes = [], 0
+            yield self._next_row(), None, "Unterminated quoted field"
+
+    def _next_row(self) -> int:
+        row = self._rows
+        self._rows += 1
+        return row
+
+    def _line(self, line: str) -> Iterator[ParsedRow]:
+        if self.format == NDJSON:
+            if not line.strip():
+                return
+            row = self._next_row()
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row, None, f"Invalid JSON: {e.msg}"
+                return
+            if not isinstance(record, dict):
+                yield row, None, "Expected a JSON object"
+                return
+            yield row, record, None
+            return
+
+        # A CSV record ends at a line break outside quotes; quotes inside
+        # fields are doubled, so an odd count means the field continues
+        self._pending.append(line)
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            return
+        lines, self._pending, self._quotes = self._pending, [], 0
+        fields = next(csv.reader(lines), [])
+        if not any(field.strip() for field in fields):
+            return
+        if self._header is None:
+            self._header = [field.strip() for field in fields]
+            return
+
+        row = self._next_row()
+        if len(fields) != len(self._header):
+            yield row, None, f"Expected {len(self._header)} fields, found {len(fields)}"
+            return
+        yield row, {name: value for name, value in zip(self._header, fields) if value != ""}, None
+
+
+def _values(patient: schemas.PatientCreate) -> dict:
+    value = patient.model_dump()
+    value["gender"] = GenderEnum(value["gender"])
+    value["phone_normalized"] = normalize_phone(value["phone"])
+    value["last_name_phonetic"] = metaphone(value["last_name"])
+    return value
+
+
+def _copy_field(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, Enum):
+        value = value.value
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_patients(connection, values: List[dict]) -> None:
+    table = models.Patient.__table__
+    columns = list(values[0])
+    buffer = StringIO()
+    for value in values:
+        buffer.write("\t".join(_copy_field(value[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def insert_patients(db: Session, values: List[dict]) -> List[int]:
+    """Insert patient rows with Core and return their ids in input order.
+
+    Uses COPY on PostgreSQL and executemany elsewhere, then reads the ids
+    back by patient_id. Search index triggers fire as for any insert; the
+    suggest change log is written here. Does not commit.
+    """
+    connection = db.connection()
+    table = models.Patient.__table__
+    if connection.dialect.name == "postgresql":
+        _copy_patients(connection, values)
+    else:
+        for chunk in chunked(values, INSERT_CHUNK):
+            connection.execute(insert(table), chunk)
+
+    ids = {}
+    for chunk in chunked([value["patient_id"] for value in values], IN_CLAUSE_CHUNK):
+        ids.update(
+            (patient_id, record_id) for record_id, patient_id in connection.execute(
+                select(table.c.id, table.c.patient_id).where(table.c.patient_id.in_(chunk))
+            )
+        )
+    record_ids = [ids[value["patient_id"]] for value in values]
+    patient_changes.record_changes(connection, record_ids)
+    return record_ids
+
+
+def start(db: Session, format: str, key: Optional[str] = None, user_id: Optional[int] = None) -> models.PatientImport:
+    """Return the import recorded under ``key``, creating it if needed.
+
+    A new key is generated when none is given. Commits a new import so its
+    key survives a failure before the first chunk.
+    """
+    if key:
+        job = db.query(models.PatientImport).filter(models.PatientImport.key == key).first()
+        if job is not None:
+            return job
+    job = models.PatientImport(
+        key=key or uuid4().hex,
+        format=format,
+        status=RUNNING,
+        rows_processed=0,
+        created=0,
+        failed=0,
+        created_by=user_id
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+class PatientImporter:
+    """Validate and insert parsed patient records chunk by chunk.
+
+    Each chunk is validated with ``PatientCreate``, given patient IDs
+    allocated in one block, inserted and committed together with the
+    import's progress. Rows before the import's committed progress are
+    skipped, which makes re-sending an interrupted file resume it. Memory
+    is bounded by the chunk size and MAX_REPORTED_ERRORS.
+
+    Probable duplicates are not checked per row; run the batch scan after
+    a large import.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        format: str,
+        job: Optional[models.PatientImport] = None,
+        dry_run: bool = False,
+        user_id: Optional[int] = None,
+        request: Request = None,
+        chunk_size: int = IMPORT_CHUNK
+    ):
+        self.db = db
+        self.format = format
+        self.job = job
+        self.dry_run = dry_run
+        self.user_id = user_id
+        self.request = request
+        self.chunk_size = chunk_size
+        self.resume_from = job.rows_processed if job is not None else 0
+        self.total = 0
+        self.skipped = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self._chunk: List[ParsedRow] = []
+
+    def add(self, rows: Iterable[ParsedRow]) -> None:
+        for row, record, error in rows:
+            self.total += 1
+            if row < self.resume_from:
+                self.skipped += 1
+                continue
+            self._chunk.append((row, record, error))
+            if len(self._chunk) >= self.chunk_size:
+                self.flush()
+
+    def flush(self) -> None:
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+
+        rows, values = [], []
+        failed = 0
+        for row, record, error in chunk:
+            if error is None:
+                try:
+                    values.append(_values(schemas.PatientCreate.model_validate(record)))
+                    rows.append(row)
+                    continue
+                except ValidationError as e:
+                    error = format_validation_error(e)
+            failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"row": row, "success": False, "error": error})
+        self.failed += failed
+
+        if self.dry_run:
+            return
+
+        if values:
+            patient_ids = unique_ids(
+                self.db, models.Patient.patient_id, generate_patient_id, len(values)
+            )
+            for value, patient_id in zip(values, patient_ids):
+                value["patient_id"] = patient_id
+            record_ids = insert_patients(self.db, values)
+            audit.AuditLogger.log_bulk_create(
+                self.db, self.user_id, "patients",
+                (
+                    (record_id, {
+                        "patient_id": value["patient_id"],
+                        "first_name": value["first_name"],
+                        "last_name": value["last_name"],
+                        "date_of_birth": value["date_of_birth"].isoformat()
+                    })
+                    for record_id, value in zip(record_ids, values)
+                ),
+                self.request
+            )
+            self.created += len(values)
+
+        if self.job is not None:
+            self.job.rows_processed = chunk[-1][0] + 1
+            self.job.created += len(values)
+            self.job.failed += failed
+        self.db.commit()
+
+    def finish(self) -> dict:
+        """Write the last chunk, mark the import completed and summarize this run."""
+        self.flush()
+        if self.job is not None and not self.dry_run:
+            self.job.status = COMPLETED
+            self.job.completed_at = self.job.completed_at or datetime.now(timezone.utc)
+            self.db.commit()
+        return {
+            "import_key": self.job.key if self.job is not None else None,
+            "format": self.format,
+            "status": self.job.status if self.job is not None else COMPLETED,
+            "total": self.total,
+            "skipped": self.skipped,
+            "created": self.created,
+            "failed": self.failed,
+            "dry_run": self.dry_run,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_file(
+    db: Session,
+    file,
+    format: str,
+    job: Optional[models.PatientImport] = None,
+    dry_run: bool = False,
+    user_id: Optional[int] = None
+) -> dict:
+    """Import patients from a binary file object, reading it in blocks."""
+    parser = RecordParser(format)
+    importer = PatientImporter(db, format, job, dry_run=dry_run, user_id=user_id)
+    for block in iter(lambda: file.read(READ_BLOCK), b""):
+        importer.add(parser.feed(block))
+    importer.add(parser.close())
+    return importer.finish()
@@ -0,0 +1,250 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi import Response
+from sqlalchemy import bindparam, case, column, func, literal, literal_column, or_, select, table, text
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core import pagination
+from backend.core.bulk import INSERT_CHUNK, chunked
+from backend.models.patient import (
+    POSTGRES_SEARCH_DDL,
+    SEARCH_COLUMNS,
+    SQLITE_SEARCH_DDL,
+    SQLITE_SEARCH_DROP,
+    fts5_trigram_available,
+    normalize_phone,
+)
+
+# Searchable field groups and the patient columns behind them. "any" is the
+# single search box of the patient list.
+FIELDS: Dict[str, Tuple[str, ...]] = {
+    "any": SEARCH_COLUMNS,
+    "name": ("first_name", "last_name"),
+    "phone": ("phone_normalized",),
+    "email": ("email",),
+    "insurance_provider": ("insurance_provider",),
+}
+
+# Trigram indexes cannot answer terms shorter than a trigram; those fall
+# back to a plain (unindexed) substring filter
+MIN_INDEXED_LENGTH = 3
+
+_PHONE_LIKE = re.compile(r"[\d\s().+\-]+")
+
+_fts = table("patient_search", column("rowid"))
+
+
+def search_tokens(term: Optional[str], field: str = "any") -> List[str]:
+    """Split a search term into lowercase tokens that must all match.
+
+    A term that looks like a phone number becomes one digits-only token so
+    it matches ``phone_normalized`` whatever the formatting.
+    """
+    term = (term or "").strip().lower()
+    if not term:
+        return []
+    if field == "phone" or _PHONE_LIKE.fullmatch(term):
+        digits = normalize_phone(term)
+        if digits:
+            return [digits]
+    return term.split()
+
+
+def _criteria_tokens(criteria: Dict[str, Optional[str]]) -> List[Tuple[str, str]]:
+    return [
+        (field, token)
+        for field, term in criteria.items()
+        for token in search_tokens(term, field)
+    ]
+
+
+def _columns(field: str):
+    return [getattr(models.Patient, name) for name in FIELDS[field]]
+
+
+def _substring(field: str, token: str):
+    pattern = f"%{token}%"
+    return or_(*(column.ilike(pattern) for column in _columns(field)))
+
+
+def _match_quality(tokens: Sequence[Tuple[str, str]]):
+    """2 per token equal to a whole column, 1 per token prefixing one."""
+    return sum(
+        (
+            case(
+                (or_(*(func.lower(column) == token for column in _columns(field))), 2),
+                (or_(*(column.ilike(f"{token}%") for column in _columns(field))), 1),
+                else_=0,
+            )
+            for field, token in tokens
+        ),
+        literal(0),
+    )
+
+
+class LikeSearchIndex:
+    """Fallback for databases without a supported text index.
+
+    Filters with ILIKE and ranks by match quality: whole-column matches,
+    then prefix matches, then inner matches. Index-backed subclasses add a
+    fractional text-similarity tie-break within each quality tier.
+    """
+
+    name = "like"
+
+    def apply(self, query, tokens: Sequence[Tuple[str, str]]):
+        query = query.filter(*(_substring(field, token) for field, token in tokens))
+        return query, _match_quality(tokens)
+
+
+class TrigramSearchIndex(LikeSearchIndex):
+    """PostgreSQL pg_trgm.
+
+    The ILIKE filters are answered by the ``idx_patient_search_trgm`` GIN
+    index; ties are broken by the mean word similarity of the tokens.
+    """
+
+    name = "pg_trgm"
+
+    def apply(self, query, tokens: Sequence[Tuple[str, str]]):
+        query, quality = super().apply(query, tokens)
+        similarity = sum(
+            (
+                func.greatest(*(
+                    func.coalesce(func.word_similarity(token, column), 0)
+                    for column in _columns(field)
+                ))
+                for field, token in tokens
+            ),
+            literal(0.0),
+        )
+        # Mean similarity in [0, 1), so it never lifts a row into the next tier
+        return query, quality + similarity * 0.99 / len(tokens)
+
+
+def _fts_phrase(field: str, token: str) -> str:
+    columns = " ".join(FIELDS[field])
+    return '{%s} : "%s"' % (columns, token.replace('"', '""'))
+
+
+class Fts5SearchIndex(LikeSearchIndex):
+    """SQLite FTS5 with the trigram tokenizer.
+
+    Tokens of three or more characters become column-filtered phrases of
+    one MATCH against ``patient_search``; shorter tokens are applied as
+    substring filters on the matched rows. Ties are broken by bm25.
+    """
+
+    name = "fts5"
+
+    def apply(self, query, tokens: Sequence[Tuple[str, str]]):
+        indexed = [(f, t) for f, t in tokens if len(t) >= MIN_INDEXED_LENGTH]
+        if not indexed:
+            return super().apply(query, tokens)
+
+        matches = (
+            select(_fts.c.rowid, func.bm25(literal_column("patient_search")).label("rank"))
+            .where(text("patient_search MATCH :search_match").bindparams(
+                search_match=" AND ".join(_fts_phrase(f, t) for f, t in indexed)
+            ))
+            .subquery("search_matches")
+        )
+        query = query.join(matches, matches.c.rowid == models.Patient.id)
+        short = [(f, t) for f, t in tokens if len(t) < MIN_INDEXED_LENGTH]
+        if short:
+            query = query.filter(*(_substring(field, token) for field, token in short))
+        # bm25 is negative, lower for better matches; map it into [0, 1)
+        strength = -matches.c.rank
+        return query, _match_quality(tokens) + strength / (strength + 1)
+
+
+def index_for(db: Session) -> LikeSearchIndex:
+    """Pick the search index implementation for the session's database."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return TrigramSearchIndex()
+    if dialect == "sqlite" and fts5_trigram_available():
+        return Fts5SearchIndex()
+    return LikeSearchIndex()
+
+
+def search(db: Session, query, criteria: Dict[str, Optional[str]]):
+    """Filter a patient query by search terms.
+
+    ``criteria`` maps a key of :data:`FIELDS` to a search term. Returns the
+    filtered query and a relevance score expression (higher is better), or
+    ``None`` as score when no criterion carried a term.
+    """
+    tokens = _criteria_tokens(criteria)
+    if not tokens:
+        return query, None
+    return index_for(db).apply(query, tokens)
+
+
+def paginate(
+    db: Session,
+    query,
+    criteria: Dict[str, Optional[str]],
+    limit: int,
+    cursor: Optional[str],
+    skip: int,
+    response: Response,
+) -> List[models.Patient]:
+    """Search and page patients, most relevant first.
+
+    Without search terms this is the plain id-ordered cursor pagination.
+    With terms the keyset is (score, id), so cursors keep working while
+    results come back in relevance order.
+    """
+    query, score = search(db, query, criteria)
+    if score is None:
+        return pagination.paginate(
+            query, [(models.Patient.id, False)], limit, cursor, skip, response
+        )
+
+    rows = pagination.paginate(
+        query.add_columns(score.label("search_score")),
+        [(score, True), (models.Patient.id, False)],
+        limit, cursor, skip, response,
+        key=lambda row: (row.search_score, row[0].id),
+    )
+    return [row[0] for row in rows]
+
+
+def rebuild(db: Session) -> int:
+    """Backfill normalized phones and (re)create the search index.
+
+    For databases created before the index existed or rows written outside
+    SQLAlchemy. The FTS5 table is dropped first because its sync triggers
+    assume the index already matches the table. Does not commit; returns
+    the number of patients whose phone was normalized.
+    """
+    index = index_for(db)
+    if isinstance(index, Fts5SearchIndex):
+        for statement in SQLITE_SEARCH_DROP:
+            db.execute(text(statement))
+
+    patients = models.Patient.__table__
+    updates = [
+        {"row_id": row_id, "normalized": normalize_phone(phone)}
+        for row_id, phone, current in db.execute(
+            select(patients.c.id, patients.c.phone, patients.c.phone_normalized)
+        )
+        if normalize_phone(phone) != current
+    ]
+    for chunk in chunked(updates, INSERT_CHUNK):
+        db.execute(
+            patients.update()
+            .where(patients.c.id == bindparam("row_id"))
+            .values(phone_normalized=bindparam("normalized")),
+            chunk,
+        )
+
+    if isinstance(index, Fts5SearchIndex):
+        for statement in SQLITE_SEARCH_DDL:
+            db.execute(text(statement))
+        db.execute(text("INSERT INTO patient_search(patient_search) VALUES ('rebuild')"))
+    elif isinstance(index, TrigramSearchIndex):
+        for statement in POSTGRES_SEARCH_DDL:
+            db.execute(text(statement))
+    return len(updates)
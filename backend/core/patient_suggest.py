@@ -0,0 +1,307 @@
+import re
+import sys
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.bulk import IN_CLAUSE_CHUNK, chunked
+from backend.core.patient_changes import ChangeFollower, register
+
+# All entries live in one sorted array; the first character of a key says
+# what it indexes so one bisect finds the range for each kind
+NAME = "n"
+PATIENT_ID = "i"
+PHONE = "p"
+
+# Phone lookups match the trailing digits; shorter suffixes match too much
+MIN_PHONE_SUFFIX = 4
+
+LOAD_CHUNK = 10_000
+
+# Entries per block of the sorted array; a block splits at twice this
+BLOCK_SIZE = 1024
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Fixed per-object sizes for the footprint estimate, measured once
+_STR_OVERHEAD = sys.getsizeof("")
+_RECORD_OVERHEAD = sys.getsizeof((0,) * 5) + sys.getsizeof(0) + sys.getsizeof(date.today())
+_KEYS_OVERHEAD = sys.getsizeof(("",) * 4) + sys.getsizeof((None, None)) + 100
+
+
+class Suggestion(NamedTuple):
+    id: int
+    patient_id: str
+    first_name: str
+    last_name: str
+    date_of_birth: date
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, strip accents and reduce punctuation to single spaces."""
+    text = (text or "").lower()
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def index_keys(suggestion: Suggestion, phone_normalized: Optional[str]) -> Tuple[str, ...]:
+    """Keys a patient is found under.
+
+    Both name orders, so typing either the first or the last name matches,
+    the patient ID, and the phone digits reversed so a prefix lookup finds
+    phone suffixes.
+    """
+    first, last = normalize(suggestion.first_name), normalize(suggestion.last_name)
+    keys = {
+        f"{NAME}{first} {last}",
+        f"{NAME}{last} {first}",
+        f"{PATIENT_ID}{normalize(suggestion.patient_id).replace(' ', '')}",
+    }
+    if phone_normalized and len(phone_normalized) >= MIN_PHONE_SUFFIX:
+        keys.add(f"{PHONE}{phone_normalized[::-1]}")
+    return tuple(sorted(keys))
+
+
+def _footprint(suggestion: Suggestion, keys: Tuple[str, ...]) -> int:
+    """Approximate bytes held for one patient.
+
+    The record and its strings, the key tuple and strings, two array slots
+    per key and a dict entry; ASCII strings are assumed.
+    """
+    strings = len(suggestion.patient_id) + len(suggestion.first_name) + len(suggestion.last_name)
+    size = _RECORD_OVERHEAD + 3 * _STR_OVERHEAD + strings + _KEYS_OVERHEAD
+    return size + sum(_STR_OVERHEAD + len(key) + 16 for key in keys)
+
+
+_COLUMNS = (
+    models.Patient.id,
+    models.Patient.patient_id,
+    models.Patient.first_name,
+    models.Patient.last_name,
+    models.Patient.date_of_birth,
+    models.Patient.phone_normalized,
+)
+
+
+def _split(row) -> Tuple[Suggestion, Optional[str]]:
+    return Suggestion(*row[:5]), row[5]
+
+
+class PrefixIndex(ChangeFollower):
+    """In-process prefix index of patients for typeahead.
+
+    Entries are (key, patient id) pairs kept sorted in blocks of parallel
+    key and id arrays, with the last entry of each block in a separate
+    array. A lookup bisects that array, then the block, and scans forward;
+    an incremental write only shifts one block, so it stays cheap however
+    large the index grows. Reads and writes take a lock held only for the
+    in-memory work.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._set_entries([])
+            self._records: Dict[int, Tuple[Suggestion, Tuple[str, ...]]] = {}
+            self._bytes = 0
+            self._reset_position()
+
+    # Maintenance
+
+    def _set_entries(self, entries: List[Tuple[str, int]]) -> None:
+        """Replace all entries with an already sorted list."""
+        self._block_keys: List[List[str]] = []
+        self._block_ids: List[List[int]] = []
+        self._maxes: List[Tuple[str, int]] = []
+        for start in range(0, len(entries), BLOCK_SIZE):
+            block = entries[start:start + BLOCK_SIZE]
+            self._block_keys.append([key for key, _ in block])
+            self._block_ids.append([patient_id for _, patient_id in block])
+            self._maxes.append(block[-1])
+        self._entries = len(entries)
+
+    def _position(self, keys: List[str], ids: List[int], key: str, patient_id: int) -> int:
+        # Ids are sorted within a run of equal keys
+        start = bisect_left(keys, key)
+        end = bisect_right(keys, key, start)
+        return bisect_left(ids, patient_id, start, end)
+
+    def _insert(self, key: str, patient_id: int) -> None:
+        if not self._maxes:
+            self._block_keys.append([key])
+            self._block_ids.append([patient_id])
+            self._maxes.append((key, patient_id))
+            self._entries += 1
+            return
+
+        block = min(bisect_left(self._maxes, (key, patient_id)), len(self._maxes) - 1)
+        keys, ids = self._block_keys[block], self._block_ids[block]
+        position = self._position(keys, ids, key, patient_id)
+        keys.insert(position, key)
+        ids.insert(position, patient_id)
+        self._maxes[block] = (keys[-1], ids[-1])
+        self._entries += 1
+
+        if len(keys) > 2 * BLOCK_SIZE:
+            self._block_keys[block:block + 1] = [keys[:BLOCK_SIZE], keys[BLOCK_SIZE:]]
+            self._block_ids[block:block + 1] = [ids[:BLOCK_SIZE], ids[BLOCK_SIZE:]]
+            self._maxes[block:block + 1] = [(keys[BLOCK_SIZE - 1], ids[BLOCK_SIZE - 1]), (keys[-1], ids[-1])]
+
+    def _delete(self, key: str, patient_id: int) -> None:
+        block = bisect_left(self._maxes, (key, patient_id))
+        if block == len(self._maxes):
+            return
+        keys, ids = self._block_keys[block], self._block_ids[block]
+        position = self._position(keys, ids, key, patient_id)
+        if position == len(keys) or keys[position] != key or ids[position] != patient_id:
+            return
+        del keys[position]
+        del ids[position]
+        self._entries -= 1
+        if keys:
+            self._maxes[block] = (keys[-1], ids[-1])
+        else:
+            del self._block_keys[block]
+            del self._block_ids[block]
+            del self._maxes[block]
+
+    def _remove(self, patient_id: int) -> None:
+        entry = self._records.pop(patient_id, None)
+        if entry is None:
+            return
+        suggestion, keys = entry
+        for key in keys:
+            self._delete(key, patient_id)
+        self._bytes -= _footprint(suggestion, keys)
+
+    def upsert(self, suggestion: Suggestion, phone_normalized: Optional[str]) -> None:
+        """Add a patient or replace its entries."""
+        keys = index_keys(suggestion, phone_normalized)
+        with self._lock:
+            self._remove(suggestion.id)
+            for key in keys:
+                self._insert(key, suggestion.id)
+            self._records[suggestion.id] = (suggestion, keys)
+            self._bytes += _footprint(suggestion, keys)
+
+    def remove(self, patient_id: int) -> None:
+        with self._lock:
+            self._remove(patient_id)
+
+    # Lookups
+
+    def _scan(self, prefix: str) -> Iterator[int]:
+        """Patient ids of entries whose key starts with ``prefix``, in order."""
+        block = bisect_left(self._maxes, (prefix,))
+        if block == len(self._maxes):
+            return
+        position = bisect_left(self._block_keys[block], prefix)
+        while block < len(self._maxes):
+            keys, ids = self._block_keys[block], self._block_ids[block]
+            while position < len(keys):
+                if not keys[position].startswith(prefix):
+                    return
+                yield ids[position]
+                position += 1
+            block += 1
+            position = 0
+
+    def suggest(self, query: str, limit: int = 10) -> List[Suggestion]:
+        """Patients whose name, patient ID or phone suffix starts with ``query``.
+
+        Patient ID matches come first, then names in alphabetical order.
+        An all-digit query is a phone suffix and needs MIN_PHONE_SUFFIX
+        digits.
+        """
+        normalized = normalize(query)
+        compact = normalized.replace(" ", "")
+        if not compact:
+            return []
+        if compact.isdigit():
+            if len(compact) < MIN_PHONE_SUFFIX:
+                return []
+            prefixes = [f"{PHONE}{compact[::-1]}"]
+        else:
+            prefixes = [f"{PATIENT_ID}{compact}", f"{NAME}{normalized}"]
+
+        found: List[Suggestion] = []
+        seen: Set[int] = set()
+        with self._lock:
+            for prefix in prefixes:
+                for patient_id in self._scan(prefix):
+                    if len(found) >= limit:
+                        return found
+                    if patient_id not in seen:
+                        seen.add(patient_id)
+                        found.append(self._records[patient_id][0])
+        return found
+
+    def stats(self) -> dict:
+        """Size of the index, for capacity planning."""
+        with self._lock:
+            containers = sys.getsizeof(self._records) + sys.getsizeof(self._maxes) + sum(
+                sys.getsizeof(keys) + sys.getsizeof(ids)
+                for keys, ids in zip(self._block_keys, self._block_ids)
+            )
+            return {
+                "patients": len(self._records),
+                "entries": self._entries,
+                "version": self.version,
+                "estimated_bytes": self._bytes + containers,
+                "loaded_at": self.loaded_at,
+            }
+
+    # Loading and change log hooks
+
+    def _load(self, db: Session) -> None:
+        entries = []
+        records = {}
+        footprint = 0
+        for rows in db.execute(select(*_COLUMNS)).yield_per(LOAD_CHUNK).partitions():
+            for row in rows:
+                suggestion, phone = _split(row)
+                keys = index_keys(suggestion, phone)
+                entries.extend((key, suggestion.id) for key in keys)
+                records[suggestion.id] = (suggestion, keys)
+                footprint += _footprint(suggestion, keys)
+        entries.sort()
+
+        with self._lock:
+            self._set_entries(entries)
+            self._records = records
+            self._bytes = footprint
+
+    def apply(self, db: Session, patient_ids: Iterable[int]) -> None:
+        """Re-read some patients and update or drop their entries."""
+        patient_ids = set(patient_ids)
+        found = set()
+        for chunk in chunked(sorted(patient_ids), IN_CLAUSE_CHUNK):
+            for row in db.execute(select(*_COLUMNS).where(models.Patient.id.in_(chunk))):
+                suggestion, phone = _split(row)
+                self.upsert(suggestion, phone)
+                found.add(suggestion.id)
+        for patient_id in patient_ids - found:
+            self.remove(patient_id)
+
+    def snapshot(self, patient: models.Patient) -> Tuple[Suggestion, Optional[str]]:
+        return (
+            Suggestion(patient.id, patient.patient_id, patient.first_name, patient.last_name, patient.date_of_birth),
+            patient.phone_normalized,
+        )
+
+    def apply_snapshot(self, patient_id: int, snapshot) -> None:
+        if snapshot is None:
+            self.remove(patient_id)
+        else:
+            self.upsert(*snapshot)
+
+
+index = register(PrefixIndex())
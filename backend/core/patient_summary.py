@@ -0,0 +1,142 @@
+from typing import Iterable, Optional, Set
+from sqlalchemy import event, func, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, aliased, contains_eager
+from backend import models, schemas
+from backend.core.cache import TTLCache
+
+# Charts kept per process, and how long one may be served. The TTL bounds
+# staleness from writes made by other worker processes.
+CACHE_SIZE = 10_000
+CACHE_TTL_SECONDS = 30
+
+_PENDING_KEY = "patient_summary_stale"
+
+cache = TTLCache(CACHE_SIZE, CACHE_TTL_SECONDS)
+
+
+def _load(db: Session, patient_id: int) -> Optional[dict]:
+    """Build a patient summary with a single query.
+
+    Counts are correlated subqueries and the latest appointment and bill
+    are joined through "top 1" subqueries, answered by the
+    (patient_id, scheduled_datetime) and (patient_id, bill_date) indexes.
+    The latest bill's items are joined in too, one row per item.
+    """
+    Patient = models.Patient
+    LatestAppointment = aliased(models.Appointment)
+    LatestBill = aliased(models.Bill)
+    LatestBillItem = aliased(models.BillItem)
+
+    appointment_count = (
+        select(func.count(models.Appointment.id))
+        .where(models.Appointment.patient_id == Patient.id)
+        .scalar_subquery()
+    )
+    bill_count = (
+        select(func.count(models.Bill.id))
+        .where(models.Bill.patient_id == Patient.id)
+        .scalar_subquery()
+    )
+    latest_appointment_id = (
+        select(models.Appointment.id)
+        .where(models.Appointment.patient_id == Patient.id)
+        .order_by(models.Appointment.scheduled_datetime.desc(), models.Appointment.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    latest_bill_id = (
+        select(models.Bill.id)
+        .where(models.Bill.patient_id == Patient.id)
+        .order_by(models.Bill.bill_date.desc(), models.Bill.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    row = db.execute(
+        select(Patient, appointment_count, bill_count, LatestAppointment, LatestBill)
+        .select_from(Patient)
+        .outerjoin(LatestAppointment, LatestAppointment.id == latest_appointment_id)
+        .outerjoin(LatestBill, LatestBill.id == latest_bill_id)
+        .outerjoin(LatestBillItem, LatestBill.bill_items)
+        .options(contains_eager(LatestBill.bill_items.of_type(LatestBillItem)))
+        .where(Patient.id == patient_id)
+        .order_by(LatestBillItem.id)
+    ).unique().first()
+    if row is None:
+        return None
+
+    patient, appointments, bills, latest_appointment, latest_bill = row
+    return {
+        "patient": schemas.Patient.model_validate(patient).model_dump(mode="json"),
+        "summary": {
+            "total_appointments": appointments,
+            "total_bills": bills,
+            "latest_appointment": (
+                schemas.Appointment.model_validate(latest_appointment).model_dump(mode="json")
+                if latest_appointment is not None else None
+            ),
+            "latest_bill": (
+                schemas.Bill.model_validate(latest_bill).model_dump(mode="json")
+                if latest_bill is not None else None
+            ),
+        },
+    }
+
+
+def patient_summary(db: Session, patient_id: int) -> Optional[dict]:
+    """Return a patient's chart summary, or None if there is no such patient.
+
+    Served from the cache when possible; a miss costs one query.
+    """
+    summary = cache.get(patient_id)
+    if summary is None:
+        summary = _load(db, patient_id)
+        if summary is not None:
+            cache.put(patient_id, summary)
+    return summary
+
+
+def mark_stale(session: Session, patient_ids: Iterable[int]) -> None:
+    """Drop summaries of patients touched by a write now and again on commit.
+
+    The second pass covers readers that cached the pre-commit state while
+    the transaction was still open.
+    """
+    patient_ids = {patient_id for patient_id in patient_ids if patient_id is not None}
+    if not patient_ids:
+        return
+    cache.discard(patient_ids)
+    session.info.setdefault(_PENDING_KEY, set()).update(patient_ids)
+
+
+def _patient_ids(obj) -> Set[int]:
+    """Patients whose summary an ORM write to ``obj`` affects.
+
+    Payments are covered through the bill they update.
+    """
+    if isinstance(obj, models.Patient):
+        return {obj.id}
+    if isinstance(obj, (models.Appointment, models.Bill)):
+        history = sa_inspect(obj).attrs["patient_id"].history
+        return {obj.patient_id, *(history.deleted or ())}
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    """Mark summaries stale for patients, appointments and bills written through the ORM."""
+    patient_ids: Set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        patient_ids |= _patient_ids(obj)
+    mark_stale(session, patient_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    cache.discard(session.info.pop(_PENDING_KEY, ()))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):
+    cache.discard(session.info.pop(_PENDING_KEY, ()))
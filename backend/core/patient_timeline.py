@@ -0,0 +1,147 @@
+import heapq
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from itertools import islice
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import and_, null, or_, select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.pagination import decode_cursor, encode_cursor
+
+APPOINTMENT = "appointment"
+BILL = "bill"
+PAYMENT = "payment"
+DOCUMENT = "document"
+
+# Entry types visible only to roles that may see a patient's bills
+FINANCIAL_TYPES = (BILL, PAYMENT)
+
+
+class Stream(NamedTuple):
+    """One entity table feeding the timeline.
+
+    ``query`` selects a patient's rows as id, occurred_at, reference,
+    status, amount and description. ``rank`` orders entries of different
+    types recorded at the same instant, highest first.
+    """
+    type: str
+    rank: int
+    occurred_at: object
+    id: object
+    query: Callable[[int], object]
+
+
+def _appointments(patient_id: int):
+    a = models.Appointment
+    return select(
+        a.id, a.scheduled_datetime, a.appointment_id, a.status, null(), a.reason
+    ).where(a.patient_id == patient_id)
+
+
+def _bills(patient_id: int):
+    b = models.Bill
+    return select(
+        b.id, b.bill_date, b.bill_id, b.payment_status, b.total_amount, b.notes
+    ).where(b.patient_id == patient_id)
+
+
+def _payments(patient_id: int):
+    p, b = models.Payment, models.Bill
+    return select(
+        p.id, p.payment_date, p.payment_id, null(), p.amount, p.payment_method
+    ).join(b, b.id == p.bill_id).where(b.patient_id == patient_id)
+
+
+def _documents(patient_id: int):
+    d = models.PatientDocument
+    return select(
+        d.id, d.uploaded_at, d.original_filename, d.document_type, null(), d.description
+    ).where(d.patient_id == patient_id)
+
+
+STREAMS = (
+    Stream(APPOINTMENT, 0, models.Appointment.scheduled_datetime, models.Appointment.id, _appointments),
+    Stream(BILL, 1, models.Bill.bill_date, models.Bill.id, _bills),
+    Stream(PAYMENT, 2, models.Payment.payment_date, models.Payment.id, _payments),
+    Stream(DOCUMENT, 3, models.PatientDocument.uploaded_at, models.PatientDocument.id, _documents),
+)
+
+ENTRY_TYPES = tuple(stream.type for stream in STREAMS)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Upload times are timezone-aware where the server supports it; the
+    # other streams store naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _after(stream: Stream, occurred_at: datetime, rank: int, id: int):
+    """Rows of ``stream`` that come after the cursor entry, newest first.
+
+    Equality is tested as a ±1µs range, as in exports, so the predicate
+    also holds where SQLite compares second-resolution default timestamps
+    as strings against ones with microseconds.
+    """
+    before = occurred_at - timedelta(microseconds=1)
+    after = occurred_at + timedelta(microseconds=1)
+    column = stream.occurred_at
+    if stream.rank < rank:
+        return column < after
+    if stream.rank > rank:
+        return column <= before
+    return and_(column < after, or_(column <= before, stream.id < id))
+
+
+def timeline_page(
+    db: Session,
+    patient_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    types: Optional[Sequence[str]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of a patient's entries across all streams, newest first.
+
+    Each stream is read by keyset from its (patient, time) index, at most
+    ``limit + 1`` rows, and the streams are k-way merged; the page costs
+    the same however long the patient's history is. Entries are ordered
+    by time, type rank and id, which the cursor encodes. Raises
+    ``ValueError`` for a malformed cursor.
+    """
+    position = decode_cursor(cursor, 3) if cursor else None
+    if position is not None and not isinstance(position[0], datetime):
+        raise ValueError("Invalid cursor")
+
+    runs = []
+    for stream in STREAMS:
+        if types is not None and stream.type not in types:
+            continue
+        query = stream.query(patient_id)
+        if position is not None:
+            query = query.where(_after(stream, *position))
+        query = query.order_by(stream.occurred_at.desc(), stream.id.desc()).limit(limit + 1)
+        runs.append([
+            ((_naive_utc(occurred_at), stream.rank, id), stream.type, reference, status, amount, description)
+            for id, occurred_at, reference, status, amount, description in db.execute(query)
+        ])
+
+    merged = list(islice(heapq.merge(*runs, key=lambda entry: entry[0], reverse=True), limit + 1))
+    next_cursor = None
+    if limit > 0 and len(merged) > limit:
+        merged = merged[:limit]
+        next_cursor = encode_cursor(list(merged[-1][0]))
+
+    entries = [
+        {
+            "type": type,
+            "id": key[2],
+            "occurred_at": key[0],
+            "reference": reference,
+            "status": status.value if isinstance(status, Enum) else status,
+            "amount": amount,
+            "description": description,
+        }
+        for key, type, reference, status, amount, description in merged
+    ]
+    return entries, next_cursor
@@ -0,0 +1,144 @@
+import random
+import time as _time
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import case, literal, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from backend import models, schemas
+from backend.core import patient_summary
+from backend.core.booking import MAX_ATTEMPTS, RETRY_BACKOFF_SECONDS, is_transient
+from backend.core.security import generate_payment_id
+from backend.models.billing import PaymentStatusEnum
+
+# Request header carrying a client-chosen idempotency key
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Response header set when a retried posting returned the original payment
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+_bills = models.Bill.__table__
+
+
+def find_payment(db: Session, bill_id: int, idempotency_key: str) -> Optional[models.Payment]:
+    """The payment already posted to a bill under this key, if any."""
+    return db.query(models.Payment).filter(
+        models.Payment.bill_id == bill_id,
+        models.Payment.idempotency_key == idempotency_key
+    ).first()
+
+
+def _replay(payment: models.Payment, payment_data: schemas.PaymentCreate) -> models.Payment:
+    # A key reused for a different posting is a client error, not a retry
+    if payment.amount != payment_data.amount or payment.payment_method != payment_data.payment_method:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Idempotency key already used for payment {payment.payment_id}"
+        )
+    return payment
+
+
+def _apply_to_bill(db: Session, bill_id: int, amount: float) -> Optional[int]:
+    """Add ``amount`` to a bill's paid amount if it does not overpay it.
+
+    A single conditional UPDATE, so concurrent postings to the same bill
+    can neither lose each other's amounts nor together exceed the total.
+    Returns the bill's patient id, or None when nothing was updated.
+    """
+    paid = _bills.c.paid_amount + amount
+    status_type = _bills.c.payment_status.type
+    row = db.execute(
+        update(_bills)
+        .where(_bills.c.id == bill_id, paid <= _bills.c.total_amount)
+        .values(
+            paid_amount=paid,
+            payment_status=case(
+                (paid >= _bills.c.total_amount, literal(PaymentStatusEnum.PAID, status_type)),
+                else_=literal(PaymentStatusEnum.PARTIAL, status_type)
+            )
+        )
+        .returning(_bills.c.patient_id)
+    ).first()
+    return row.patient_id if row else None
+
+
+def _rejection(db: Session, bill_id: int) -> HTTPException:
+    bill = db.query(models.Bill.total_amount, models.Bill.paid_amount).filter(
+        models.Bill.id == bill_id
+    ).first()
+    if bill is None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bill not found"
+        )
+    remaining_balance = bill.total_amount - bill.paid_amount
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Payment amount exceeds remaining balance of ${remaining_balance:.2f}"
+    )
+
+
+def post_payment(
+    db: Session,
+    bill_id: int,
+    payment_data: schemas.PaymentCreate,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[models.Payment, bool]:
+    """Record a payment against a bill, then commit.
+
+    The bill is updated with one conditional statement and the payment
+    inserted in the same transaction. A posting whose ``idempotency_key``
+    is already recorded for the bill returns the original payment without
+    touching the bill, also when two retries race, since the unique index
+    admits only one. Without a key every posting is recorded.
+
+    Returns the payment and whether it was replayed. Raises
+    ``HTTPException``: 404 for a missing bill, 400 when the amount
+    exceeds the balance, 409 when the key belongs to a different
+    payment. Transient lock errors are retried up to MAX_ATTEMPTS times.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            if idempotency_key:
+                existing = find_payment(db, bill_id, idempotency_key)
+                if existing is not None:
+                    return _replay(existing, payment_data), True
+
+            patient_id = _apply_to_bill(db, bill_id, payment_data.amount)
+            if patient_id is None:
+                db.rollback()
+                raise _rejection(db, bill_id)
+
+            payment = models.Payment(
+                payment_id=generate_payment_id(),
+                bill_id=bill_id,
+                amount=payment_data.amount,
+                payment_method=payment_data.payment_method,
+                payment_date=payment_data.payment_date,
+                reference_number=payment_data.reference_number,
+                notes=payment_data.notes,
+                idempotency_key=idempotency_key
+            )
+            db.add(payment)
+            try:
+                db.flush()
+            except IntegrityError:
+                # Another posting with this key committed first; undo the
+                # bill update and hand back its payment
+                db.rollback()
+                existing = find_payment(db, bill_id, idempotency_key) if idempotency_key else None
+                if existing is None:
+                    raise
+                return _replay(existing, payment_data), True
+
+            # The bill was updated outside the ORM, which would otherwise
+            # mark the patient's summary stale
+            patient_summary.mark_stale(db, [patient_id])
+            db.commit()
+            db.refresh(payment)
+            return payment, False
+        except OperationalError as e:
+            db.rollback()
+            if attempt == MAX_ATTEMPTS or not is_transient(e):
+                raise
+            _time.sleep(RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)) * (1 + random.random()))
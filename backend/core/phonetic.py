@@ -0,0 +1,101 @@
+from typing import Optional
+
+# Length of phonetic keys, as in Double Metaphone
+KEY_LENGTH = 4
+
+_VOWELS = set("AEIOU")
+_FRONT_VOWELS = set("EIY")
+_INITIAL_SILENT = ("AE", "GN", "KN", "PN", "WR")
+
+
+def metaphone(name: Optional[str], length: int = KEY_LENGTH) -> str:
+    """Phonetic key of a name following the Metaphone rules.
+
+    Names that sound alike share a key ("Smith"/"Smyth",
+    "Catherine"/"Katherine", "Philips"/"Phillips"), which makes the key
+    usable as an indexed blocking key. Non-letters are ignored; returns
+    "" for names without letters.
+    """
+    word = "".join(char for char in (name or "").upper() if "A" <= char <= "Z")
+    if not word:
+        return ""
+
+    if word.startswith(_INITIAL_SILENT):
+        word = word[1:]
+    elif word.startswith("X"):
+        word = "S" + word[1:]
+    elif word.startswith("WH"):
+        word = "W" + word[2:]
+
+    def at(index: int) -> str:
+        return word[index] if 0 <= index < len(word) else ""
+
+    key = []
+    for index, char in enumerate(word):
+        if len(key) >= length:
+            break
+        prev, next_, after = at(index - 1), at(index + 1), at(index + 2)
+        if char == prev and char != "C":
+            continue
+
+        if char in _VOWELS:
+            if index == 0:
+                key.append(char)
+        elif char == "B":
+            if not (prev == "M" and index == len(word) - 1):
+                key.append("B")
+        elif char == "C":
+            if next_ == "I" and after == "A" or next_ == "H":
+                key.append("K" if prev == "S" else "X")
+            elif next_ in _FRONT_VOWELS:
+                if prev != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif char == "D":
+            key.append("J" if next_ == "G" and after in _FRONT_VOWELS else "T")
+        elif char == "G":
+            if next_ == "H" and after and after not in _VOWELS:
+                continue
+            if next_ == "N" and (after == "" or word[index + 2:] == "ED"):
+                continue
+            if prev == "D" and next_ in _FRONT_VOWELS:
+                continue
+            key.append("J" if next_ in _FRONT_VOWELS and prev != "G" else "K")
+        elif char == "H":
+            if prev in "CGPST":
+                continue
+            if prev in _VOWELS and next_ not in _VOWELS:
+                continue
+            key.append("H")
+        elif char == "K":
+            if prev != "C":
+                key.append("K")
+        elif char == "P":
+            key.append("F" if next_ == "H" else "P")
+        elif char == "Q":
+            key.append("K")
+        elif char == "S":
+            if next_ == "H" or next_ == "I" and after in ("O", "A"):
+                key.append("X")
+            else:
+                key.append("S")
+        elif char == "T":
+            if next_ == "I" and after in ("O", "A"):
+                key.append("X")
+            elif next_ == "H":
+                key.append("0")
+            elif not (next_ == "C" and after == "H"):
+                key.append("T")
+        elif char == "V":
+            key.append("F")
+        elif char in "WY":
+            if next_ in _VOWELS:
+                key.append(char)
+        elif char == "X":
+            key.extend("KS")
+        elif char == "Z":
+            key.append("S")
+        else:
+            key.append(char)
+    return "".join(key)[:length]
@@ -0,0 +1,88 @@
+import logging
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.core import database
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more statements than its route declared."""
+
+
+class _Counter:
+    __slots__ = ("queries", "budget")
+
+    def __init__(self):
+        self.queries = 0
+        self.budget: Optional[int] = None
+
+
+# Set for the duration of each HTTP request. Threadpool work started by
+# the request (sync dependencies and endpoints) runs in a copy of this
+# context and so shares the counter
+_current: ContextVar[Optional[_Counter]] = ContextVar("query_budget", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.queries += 1
+
+
+def budget(queries: int):
+    """Route dependency declaring the most statements a request may run.
+
+    Every statement sent to the database while the request is handled
+    counts, including the user lookup during authentication and any
+    loads made while the response is serialized, so a lazy load per row
+    shows up as soon as a page holds more than a few rows::
+
+        @router.get("/bills", dependencies=[query_budget.budget(3)])
+    """
+    async def declare():
+        counter = _current.get()
+        if counter is not None:
+            counter.budget = queries
+    return Depends(declare)
+
+
+def strict() -> bool:
+    return settings.QUERY_BUDGET_STRICT or database.TESTING
+
+
+class QueryBudgetMiddleware:
+    """Count each request's statements and check them against its budget.
+
+    Requests over budget are logged as a warning; in strict mode, which
+    the test suite runs in, they raise ``QueryBudgetExceeded`` instead so
+    a new N+1 fails the build.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        counter = _Counter()
+        token = _current.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+
+        if counter.budget is not None and counter.queries > counter.budget:
+            message = (
+                f"{scope['method']} {scope['path']} ran {counter.queries} queries, "
+                f"over its budget of {counter.budget}"
+            )
+            if strict():
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
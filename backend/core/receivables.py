@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core import exports
+from backend.models.billing import PaymentStatusEnum
+
+OUTSTANDING_STATUSES = (PaymentStatusEnum.PENDING, PaymentStatusEnum.PARTIAL)
+
+# Aging buckets by whole days past the due date: (name, first day, last day)
+AGING_BUCKETS = (
+    ("0-30", 0, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+)
+
+_bills = models.Bill.__table__
+
+# Matches the predicate of idx_bill_outstanding so the planner can use it
+OUTSTANDING = _bills.c.payment_status.in_(OUTSTANDING_STATUSES)
+
+BALANCE = (_bills.c.total_amount - func.coalesce(_bills.c.paid_amount, 0.0)).label("balance")
+
+DETAIL_COLUMNS = (
+    _bills.c.id,
+    _bills.c.bill_id,
+    _bills.c.patient_id,
+    _bills.c.bill_date,
+    _bills.c.due_date,
+    _bills.c.total_amount,
+    _bills.c.paid_amount,
+    BALANCE,
+    _bills.c.payment_status,
+)
+
+# Detail is ordered by due date, oldest first
+ORDERING = ((_bills.c.due_date, False), (_bills.c.id, False))
+
+
+def _bucket_conditions(as_of: datetime) -> List[Tuple[str, object]]:
+    """SQL conditions for "not yet due" and each aging bucket.
+
+    Days past due are turned into due date cutoffs here, so the conditions
+    are plain range comparisons on the indexed column on every database.
+    """
+    def cutoff(days):
+        return as_of - timedelta(days=days)
+
+    conditions = [("current", _bills.c.due_date > as_of)]
+    for name, first, last in AGING_BUCKETS:
+        condition = _bills.c.due_date <= cutoff(first)
+        if last is not None:
+            condition = condition & (_bills.c.due_date > cutoff(last + 1))
+        conditions.append((name, condition))
+    return conditions
+
+
+def aging_summary(db: Session, as_of: datetime) -> dict:
+    """Outstanding totals by status and aging bucket, in one aggregate query."""
+    conditions = _bucket_conditions(as_of)
+    columns = [
+        func.count(),
+        func.sum(BALANCE),
+        func.sum(case((_bills.c.payment_status == PaymentStatusEnum.PENDING, 1), else_=0)),
+        func.sum(case((_bills.c.payment_status == PaymentStatusEnum.PARTIAL, 1), else_=0)),
+    ]
+    for _, condition in conditions:
+        columns.append(func.sum(case((condition, 1), else_=0)))
+        columns.append(func.sum(case((condition, BALANCE), else_=0.0)))
+    row = db.execute(select(*columns).where(OUTSTANDING)).one()
+
+    count, amount, pending, partial, *buckets = row
+    return {
+        "as_of": as_of,
+        "total_outstanding_amount": float(amount or 0),
+        "total_outstanding_bills": count,
+        "pending_bills_count": int(pending or 0),
+        "partial_bills_count": int(partial or 0),
+        "aging": [
+            {"bucket": name, "bills": int(buckets[2 * index] or 0), "amount": float(buckets[2 * index + 1] or 0)}
+            for index, (name, _) in enumerate(conditions)
+        ],
+    }
+
+
+def detail_query(db: Session):
+    """Outstanding bills as lightweight rows, for keyset pagination."""
+    return db.query(*DETAIL_COLUMNS).filter(OUTSTANDING)
+
+
+def days_past_due(due_date: datetime, as_of: datetime) -> int:
+    return max((as_of - due_date).days, 0)
+
+
+def detail_row(row, as_of: datetime) -> dict:
+    return {
+        "id": row.id,
+        "bill_id": row.bill_id,
+        "patient_id": row.patient_id,
+        "bill_date": row.bill_date,
+        "due_date": row.due_date,
+        "total_amount": row.total_amount,
+        "paid_amount": row.paid_amount,
+        "balance": row.balance,
+        "payment_status": row.payment_status.value,
+        "days_past_due": days_past_due(row.due_date, as_of),
+    }
+
+
+def _pages(bind, as_of: datetime, page_size: int) -> Iterator[Sequence]:
+    # One short query per page, each in its own transaction, resuming after
+    # the last row of the previous page; nothing stays open between pages
+    after: Optional[tuple] = None
+    with bind.connect() as connection:
+        while True:
+            query = select(*DETAIL_COLUMNS).where(OUTSTANDING)
+            if after is not None:
+                query = query.where(tuple_(_bills.c.due_date, _bills.c.id) > tuple_(*after))
+            rows = connection.execute(
+                query.order_by(_bills.c.due_date, _bills.c.id).limit(page_size)
+            ).all()
+            connection.rollback()
+            if not rows:
+                return
+            yield [
+                tuple(row) + (days_past_due(row.due_date, as_of),)
+                for row in rows
+            ]
+            after = (rows[-1].due_date, rows[-1].id)
+
+
+def stream_detail(db: Session, format: str, as_of: datetime, compress: bool = False):
+    """Stream every outstanding bill as CSV or NDJSON, oldest due first.
+
+    Rows are read by keyset, FETCH_SIZE at a time, on a separate
+    connection, so memory stays flat and no transaction is held open
+    while the client reads.
+    """
+    names = [column.name for column in DETAIL_COLUMNS] + ["days_past_due"]
+    body = exports.encode(format, names, _pages(db.get_bind(), as_of, exports.FETCH_SIZE))
+    filename = f"outstanding-bills-{as_of:%Y%m%dT%H%M%S}.{format}"
+    media_type = exports.MEDIA_TYPES[format]
+    if compress:
+        body = exports.gzip(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
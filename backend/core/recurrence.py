@@ -0,0 +1,76 @@
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence
+from backend.models.appointment import RecurrenceFrequencyEnum
+
+# Longest stretch a single request may materialize, and the hard cap on
+# occurrences per request regardless of the rule
+MAX_HORIZON_DAYS = 366
+MAX_OCCURRENCES = 1_000
+
+
+def parse_weekdays(value: Optional[str]) -> List[int]:
+    """Parse the stored comma-separated weekday list."""
+    if not value:
+        return []
+    return sorted({int(part) for part in value.split(",") if part != ""})
+
+
+def format_weekdays(weekdays: Sequence[int]) -> str:
+    """Format weekdays for storage."""
+    return ",".join(str(day) for day in sorted(set(weekdays)))
+
+
+def _unbounded(
+    start: datetime,
+    frequency: RecurrenceFrequencyEnum,
+    interval: int,
+    weekdays: Sequence[int],
+) -> Iterator[datetime]:
+    """Yield occurrence start times in order, forever."""
+    if frequency == RecurrenceFrequencyEnum.DAILY:
+        step = timedelta(days=interval)
+        current = start
+        while True:
+            yield current
+            current += step
+
+    days = sorted(set(weekdays)) or [start.weekday()]
+    week_start = start - timedelta(days=start.weekday())
+    step = timedelta(weeks=interval)
+    while True:
+        for weekday in days:
+            occurrence = week_start + timedelta(days=weekday)
+            if occurrence >= start:
+                yield occurrence
+        week_start += step
+
+
+def iter_occurrences(
+    start: datetime,
+    frequency: RecurrenceFrequencyEnum,
+    interval: int = 1,
+    weekdays: Sequence[int] = (),
+    until: Optional[date] = None,
+    count: Optional[int] = None,
+    after: Optional[datetime] = None,
+    horizon_end: Optional[date] = None,
+) -> Iterator[datetime]:
+    """Lazily expand a recurrence rule.
+
+    ``count`` and ``until`` end the series itself; ``after`` and
+    ``horizon_end`` select the window to expand, so a series can be
+    materialized in pieces while ``count`` still applies to the whole
+    series.
+    """
+    occurrences = _unbounded(start, frequency, interval, weekdays)
+    if count is not None:
+        occurrences = islice(occurrences, count)
+
+    last_day = min((d for d in (until, horizon_end) if d is not None), default=None)
+    for occurrence in occurrences:
+        if last_day is not None and occurrence.date() > last_day:
+            return
+        if after is not None and occurrence <= after:
+            continue
+        yield occurrence
@@ -0,0 +1,333 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, delete, event, func, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.bulk import INSERT_CHUNK, chunked, conflict_insert
+from backend.models.appointment import AppointmentStatusEnum
+
+# (day, doctor_id, status) -> appointment count
+StatKey = Tuple[date, int, AppointmentStatusEnum]
+
+
+def _status(value) -> Optional[AppointmentStatusEnum]:
+    """Coerce a model enum, schema enum, value or name to the model enum."""
+    if value is None or isinstance(value, AppointmentStatusEnum):
+        return value
+    value = getattr(value, "value", value)
+    try:
+        return AppointmentStatusEnum(value)
+    except ValueError:
+        return AppointmentStatusEnum[value]
+
+
+def stat_key(scheduled_datetime: datetime, doctor_id: int, status) -> StatKey:
+    """Rollup key of an appointment."""
+    return (
+        scheduled_datetime.date(),
+        doctor_id,
+        _status(status) or AppointmentStatusEnum.SCHEDULED,
+    )
+
+
+def _add_to_rollup(connection, table, keys: Sequence[str], values: Sequence[str], rows: List[dict]) -> None:
+    """Add the ``values`` of each row to the rollup row with the same ``keys``, creating it as needed."""
+    stmt = conflict_insert(connection, table)
+    if stmt is not None:
+        set_ = {value: table.c[value] + stmt.excluded[value] for value in values}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={**set_, "updated_at": func.now()},
+        )
+        for chunk in chunked(rows, INSERT_CHUNK):
+            connection.execute(stmt, chunk)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(and_(*(table.c[key] == row[key] for key in keys)))
+            .values({value: table.c[value] + row[value] for value in values})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def apply_appointment_deltas(connection, deltas: Dict[StatKey, int]) -> None:
+    """Add count deltas to the daily rollup, creating rows as needed."""
+    rows = [
+        {"day": day, "doctor_id": doctor_id, "status": status, "count": delta}
+        for (day, doctor_id, status), delta in deltas.items()
+        if delta
+    ]
+    if rows:
+        _add_to_rollup(
+            connection, models.AppointmentDailyStat.__table__,
+            ("day", "doctor_id", "status"), ("count",), rows
+        )
+
+
+def _previous_value(obj, attr: str):
+    """An attribute's value before the pending flush."""
+    history = sa_inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def _previous_key(appointment: models.Appointment) -> Optional[StatKey]:
+    """Rollup key of an appointment's pre-flush state."""
+    start = _previous_value(appointment, "scheduled_datetime")
+    doctor_id = _previous_value(appointment, "doctor_id")
+    if start is None or doctor_id is None:
+        return None
+    return stat_key(start, doctor_id, _previous_value(appointment, "status"))
+
+
+def _current_key(appointment: models.Appointment) -> Optional[StatKey]:
+    """Rollup key of an appointment's current state."""
+    if appointment.scheduled_datetime is None or appointment.doctor_id is None:
+        return None
+    return stat_key(appointment.scheduled_datetime, appointment.doctor_id, appointment.status)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_appointment_stats(session, flush_context):
+    """Keep the daily rollup in step with ORM appointment writes."""
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, models.Appointment):
+            key = _current_key(obj)
+            if key:
+                deltas[key] += 1
+    for obj in session.dirty:
+        if isinstance(obj, models.Appointment) and session.is_modified(obj):
+            old_key, new_key = _previous_key(obj), _current_key(obj)
+            if old_key != new_key:
+                if old_key:
+                    deltas[old_key] -= 1
+                if new_key:
+                    deltas[new_key] += 1
+    for obj in session.deleted:
+        if isinstance(obj, models.Appointment):
+            key = _previous_key(obj)
+            if key:
+                deltas[key] -= 1
+    if deltas:
+        apply_appointment_deltas(session.connection(), deltas)
+
+
+def rebuild_appointment_stats(
+    db: Session,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+) -> int:
+    """Recompute the rollup from the appointments table.
+
+    Used to backfill the table and to repair drift after writes that bypass
+    the ORM. Returns the number of rollup rows written; does not commit.
+    """
+    stats = models.AppointmentDailyStat.__table__
+    appointments = models.Appointment.__table__
+
+    cleared = delete(stats)
+    source = select(
+        func.date(appointments.c.scheduled_datetime).label("day"),
+        appointments.c.doctor_id,
+        appointments.c.status,
+        func.count().label("count"),
+    ).group_by(
+        func.date(appointments.c.scheduled_datetime),
+        appointments.c.doctor_id,
+        appointments.c.status,
+    )
+    if start_day is not None:
+        cleared = cleared.where(stats.c.day >= start_day)
+        source = source.where(
+            appointments.c.scheduled_datetime >= datetime.combine(start_day, datetime.min.time())
+        )
+    if end_day is not None:
+        cleared = cleared.where(stats.c.day <= end_day)
+        source = source.where(
+            appointments.c.scheduled_datetime <= datetime.combine(end_day, datetime.max.time())
+        )
+
+    rows = []
+    for day, doctor_id, status, count in db.execute(source):
+        # SQLite returns DATE() as text
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        rows.append({"day": day, "doctor_id": doctor_id, "status": status, "count": count})
+
+    db.execute(cleared)
+    for chunk in chunked(rows, INSERT_CHUNK):
+        db.execute(stats.insert(), chunk)
+    return len(rows)
+
+
+# (day, payment_method) -> [amount, payments]
+RevenueKey = Tuple[date, str]
+
+
+def revenue_key(payment_date: datetime, payment_method: str) -> RevenueKey:
+    """Revenue rollup key of a payment."""
+    return (payment_date.date(), payment_method)
+
+
+def apply_revenue_deltas(connection, deltas: Dict[RevenueKey, Tuple[float, int]]) -> None:
+    """Add amount and payment count deltas to the daily revenue rollup.
+
+    Called for ORM payment writes by the flush listener below; Core writes
+    to payments call it themselves, in the same transaction.
+    """
+    rows = [
+        {"day": day, "payment_method": method, "total": amount, "payments": count}
+        for (day, method), (amount, count) in deltas.items()
+        if amount or count
+    ]
+    if rows:
+        _add_to_rollup(
+            connection, models.RevenueDaily.__table__,
+            ("day", "payment_method"), ("total", "payments"), rows
+        )
+
+
+def _previous_revenue(payment: models.Payment) -> Optional[Tuple[RevenueKey, float]]:
+    """Rollup key and amount of a payment's pre-flush state."""
+    payment_date = _previous_value(payment, "payment_date")
+    method = _previous_value(payment, "payment_method")
+    if payment_date is None or method is None:
+        return None
+    return revenue_key(payment_date, method), _previous_value(payment, "amount") or 0.0
+
+
+def _current_revenue(payment: models.Payment) -> Optional[Tuple[RevenueKey, float]]:
+    """Rollup key and amount of a payment's current state."""
+    if payment.payment_date is None or payment.payment_method is None:
+        return None
+    return revenue_key(payment.payment_date, payment.payment_method), payment.amount or 0.0
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_revenue(session, flush_context):
+    """Keep the revenue rollup in step with ORM payment writes.
+
+    A deleted payment (a reversal) is subtracted from its day; an edited
+    one moves from its old day and method to the new ones.
+    """
+    deltas: Dict[RevenueKey, List] = {}
+
+    def add(entry, sign):
+        if entry:
+            key, amount = entry
+            delta = deltas.setdefault(key, [0.0, 0])
+            delta[0] += sign * amount
+            delta[1] += sign
+
+    for obj in session.new:
+        if isinstance(obj, models.Payment):
+            add(_current_revenue(obj), 1)
+    for obj in session.dirty:
+        if isinstance(obj, models.Payment) and session.is_modified(obj):
+            add(_previous_revenue(obj), -1)
+            add(_current_revenue(obj), 1)
+    for obj in session.deleted:
+        if isinstance(obj, models.Payment):
+            add(_previous_revenue(obj), -1)
+    if deltas:
+        apply_revenue_deltas(session.connection(), {key: tuple(delta) for key, delta in deltas.items()})
+
+
+def rebuild_revenue_daily(
+    db: Session,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+) -> int:
+    """Recompute the revenue rollup from the payments table.
+
+    Used to backfill the table and to repair drift after writes that bypass
+    the ORM. Returns the number of rollup rows written; does not commit.
+    """
+    revenue = models.RevenueDaily.__table__
+    payments = models.Payment.__table__
+
+    day = func.date(payments.c.payment_date)
+    cleared = delete(revenue)
+    source = select(
+        day, payments.c.payment_method, func.sum(payments.c.amount), func.count()
+    ).group_by(day, payments.c.payment_method)
+    if start_day is not None:
+        cleared = cleared.where(revenue.c.day >= start_day)
+        source = source.where(payments.c.payment_date >= datetime.combine(start_day, datetime.min.time()))
+    if end_day is not None:
+        cleared = cleared.where(revenue.c.day <= end_day)
+        source = source.where(payments.c.payment_date <= datetime.combine(end_day, datetime.max.time()))
+
+    rows = [
+        {
+            # SQLite returns DATE() as text
+            "day": date.fromisoformat(row_day) if isinstance(row_day, str) else row_day,
+            "payment_method": method,
+            "total": total,
+            "payments": count,
+        }
+        for row_day, method, total, count in db.execute(source)
+    ]
+    db.execute(cleared)
+    for chunk in chunked(rows, INSERT_CHUNK):
+        db.execute(revenue.insert(), chunk)
+    return len(rows)
+
+
+def revenue_by_day(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Tuple[date, str, float]]:
+    """Payment totals per day and method for payments dated in [start, end].
+
+    Whole days come from the rollup, so the cost follows the number of
+    days rather than payments. A bound that falls inside a day leaves that
+    day partial; partial days are summed from the payments themselves
+    through the payment date index.
+    """
+    revenue = models.RevenueDaily.__table__
+    payments = models.Payment.__table__
+    tick = timedelta(microseconds=1)
+
+    # Whole days in the range; first > last when there are none
+    first = None
+    if start is not None:
+        first = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last = None if end is None else (end + tick).date() - timedelta(days=1)
+
+    rollup = select(revenue.c.day, revenue.c.payment_method, revenue.c.total).where(revenue.c.payments != 0)
+    if first is not None:
+        rollup = rollup.where(revenue.c.day >= first)
+    if last is not None:
+        rollup = rollup.where(revenue.c.day <= last)
+
+    partial = []
+    if first is not None and last is not None and first > last:
+        partial.append((start, end))
+        rollup = None
+    else:
+        if start is not None and start < datetime.combine(first, time.min):
+            partial.append((start, datetime.combine(first, time.min) - tick))
+        if end is not None and end >= datetime.combine(last + timedelta(days=1), time.min):
+            partial.append((datetime.combine(last + timedelta(days=1), time.min), end))
+
+    totals: Dict[RevenueKey, float] = {}
+    if rollup is not None:
+        for day, method, total in db.execute(rollup):
+            totals[(day, method)] = totals.get((day, method), 0.0) + total
+    for low, high in partial:
+        for payment_date, method, amount in db.execute(
+            select(payments.c.payment_date, payments.c.payment_method, payments.c.amount)
+            .where(payments.c.payment_date >= low, payments.c.payment_date <= high)
+        ):
+            key = revenue_key(payment_date, method)
+            totals[key] = totals.get(key, 0.0) + amount
+    return [(day, method, total) for (day, method), total in sorted(totals.items())]
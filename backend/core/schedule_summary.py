@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import and_, case, event, func
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.cache import TTLCache
+from backend.models.appointment import AppointmentStatusEnum
+
+# (doctor_id, day)
+SummaryKey = Tuple[int, date]
+
+# Entries kept per process, and how long one may be served. The TTL bounds
+# staleness from writes made by other worker processes.
+CACHE_SIZE = 4096
+CACHE_TTL_SECONDS = 30
+
+_PENDING_KEY = "schedule_summary_stale"
+
+
+cache = TTLCache(CACHE_SIZE, CACHE_TTL_SECONDS)
+
+
+def _count(status: AppointmentStatusEnum):
+    return func.sum(case((models.Appointment.status == status, 1), else_=0))
+
+
+def _empty_summary() -> dict:
+    return {
+        "total_appointments": 0,
+        "completed_appointments": 0,
+        "cancelled_appointments": 0,
+        "no_shows": 0,
+        "completion_rate": 0,
+    }
+
+
+def doctor_day_summaries(db: Session, doctor_ids: List[int], day: date) -> Dict[int, dict]:
+    """Return schedule statistics for several doctors on one day.
+
+    Cached entries are served as is; the rest are computed with one grouped
+    query of conditional aggregates over the (doctor_id, status,
+    scheduled_datetime) index.
+    """
+    summaries = {}
+    missing = []
+    for doctor_id in doctor_ids:
+        cached = cache.get((doctor_id, day))
+        if cached is None:
+            missing.append(doctor_id)
+        else:
+            summaries[doctor_id] = dict(cached)
+
+    if missing:
+        start_datetime = datetime.combine(day, datetime.min.time())
+        rows = db.query(
+            models.Appointment.doctor_id,
+            func.count(models.Appointment.id),
+            _count(AppointmentStatusEnum.COMPLETED),
+            _count(AppointmentStatusEnum.CANCELLED),
+            _count(AppointmentStatusEnum.NO_SHOW),
+        ).filter(
+            and_(
+                models.Appointment.doctor_id.in_(missing),
+                models.Appointment.scheduled_datetime >= start_datetime,
+                models.Appointment.scheduled_datetime < start_datetime + timedelta(days=1),
+            )
+        ).group_by(models.Appointment.doctor_id).all()
+
+        computed = {doctor_id: _empty_summary() for doctor_id in missing}
+        for doctor_id, total, completed, cancelled, no_shows in rows:
+            computed[doctor_id] = {
+                "total_appointments": total,
+                "completed_appointments": completed or 0,
+                "cancelled_appointments": cancelled or 0,
+                "no_shows": no_shows or 0,
+                "completion_rate": (completed or 0) / total * 100 if total else 0,
+            }
+        for doctor_id, summary in computed.items():
+            cache.put((doctor_id, day), dict(summary))
+        summaries.update(computed)
+
+    return summaries
+
+
+def doctor_day_summary(db: Session, doctor_id: int, day: date) -> dict:
+    """Return schedule statistics for one doctor on one day."""
+    return doctor_day_summaries(db, [doctor_id], day)[doctor_id]
+
+
+def mark_stale(session: Session, keys: Iterable[SummaryKey]) -> None:
+    """Drop summaries touched by a write now and again once it commits.
+
+    The second pass covers readers that cached the pre-commit state while
+    the transaction was still open.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    cache.discard(keys)
+    session.info.setdefault(_PENDING_KEY, set()).update(keys)
+
+
+def _appointment_keys(appointment: models.Appointment) -> Set[SummaryKey]:
+    """Keys of an appointment's current and pre-flush state."""
+    state = sa_inspect(appointment)
+    keys = set()
+    for current in (True, False):
+        values = []
+        for attr in ("doctor_id", "scheduled_datetime"):
+            history = state.attrs[attr].history
+            if not current and history.deleted:
+                values.append(history.deleted[0])
+            else:
+                values.append(getattr(appointment, attr))
+        doctor_id, start = values
+        if doctor_id is not None and start is not None:
+            keys.add((doctor_id, start.date()))
+    return keys
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    """Mark summaries stale for appointments written through the ORM."""
+    keys: Set[SummaryKey] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Appointment):
+            keys |= _appointment_keys(obj)
+    mark_stale(session, keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    cache.discard(session.info.pop(_PENDING_KEY, ()))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):
+    cache.discard(session.info.pop(_PENDING_KEY, ()))
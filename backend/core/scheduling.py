@@ -0,0 +1,229 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.core.bulk import IN_CLAUSE_CHUNK, chunked
+from backend.models.appointment import AppointmentStatusEnum
+
+# Statuses that occupy a slot in a doctor's or patient's schedule
+ACTIVE_STATUSES = (
+    AppointmentStatusEnum.SCHEDULED,
+    AppointmentStatusEnum.CONFIRMED,
+)
+
+# Statuses an appointment may move to, keyed by target status
+STATUS_TRANSITIONS = {
+    AppointmentStatusEnum.SCHEDULED: (),
+    AppointmentStatusEnum.CONFIRMED: (AppointmentStatusEnum.SCHEDULED,),
+    AppointmentStatusEnum.IN_PROGRESS: (
+        AppointmentStatusEnum.SCHEDULED,
+        AppointmentStatusEnum.CONFIRMED,
+    ),
+    AppointmentStatusEnum.COMPLETED: (
+        AppointmentStatusEnum.SCHEDULED,
+        AppointmentStatusEnum.CONFIRMED,
+        AppointmentStatusEnum.IN_PROGRESS,
+    ),
+    AppointmentStatusEnum.CANCELLED: (
+        AppointmentStatusEnum.SCHEDULED,
+        AppointmentStatusEnum.CONFIRMED,
+    ),
+    AppointmentStatusEnum.NO_SHOW: (
+        AppointmentStatusEnum.SCHEDULED,
+        AppointmentStatusEnum.CONFIRMED,
+    ),
+}
+
+# Longest appointment the schemas accept (8 hours). Any appointment that
+# overlaps a window must start less than this long before the window opens,
+# which turns the overlap test into a bounded range probe on
+# (doctor_id, status, scheduled_datetime).
+MAX_APPOINTMENT_MINUTES = 480
+
+
+def appointment_end(start: datetime, duration_minutes: int) -> datetime:
+    """Return the end time of an appointment."""
+    return start + timedelta(minutes=duration_minutes or 0)
+
+
+def conflict_query(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+    exclude_appointment_id: Optional[int] = None,
+):
+    """Build a query for active appointments overlapping [start, end).
+
+    Exactly one of ``doctor_id`` or ``patient_id`` must be given; the
+    query is served by the matching composite index.
+    """
+    if (doctor_id is None) == (patient_id is None):
+        raise ValueError("Specify exactly one of doctor_id or patient_id")
+
+    if doctor_id is not None:
+        owner_filter = models.Appointment.doctor_id == doctor_id
+    else:
+        owner_filter = models.Appointment.patient_id == patient_id
+
+    window_start = start - timedelta(minutes=MAX_APPOINTMENT_MINUTES)
+    query = db.query(models.Appointment).filter(
+        and_(
+            owner_filter,
+            models.Appointment.status.in_(ACTIVE_STATUSES),
+            models.Appointment.scheduled_datetime > window_start,
+            models.Appointment.scheduled_datetime < end,
+            models.Appointment.end_datetime > start,
+        )
+    )
+
+    if exclude_appointment_id is not None:
+        query = query.filter(models.Appointment.id != exclude_appointment_id)
+
+    return query.order_by(models.Appointment.scheduled_datetime)
+
+
+def find_doctor_conflict(
+    db: Session,
+    doctor_id: int,
+    start: datetime,
+    end: datetime,
+    exclude_appointment_id: Optional[int] = None,
+) -> Optional[models.Appointment]:
+    """Return the first appointment of a doctor overlapping the slot."""
+    return conflict_query(
+        db, start, end,
+        doctor_id=doctor_id,
+        exclude_appointment_id=exclude_appointment_id,
+    ).first()
+
+
+def find_patient_conflict(
+    db: Session,
+    patient_id: int,
+    start: datetime,
+    end: datetime,
+    exclude_appointment_id: Optional[int] = None,
+) -> Optional[models.Appointment]:
+    """Return the first appointment of a patient overlapping the slot."""
+    return conflict_query(
+        db, start, end,
+        patient_id=patient_id,
+        exclude_appointment_id=exclude_appointment_id,
+    ).first()
+
+
+def find_doctor_conflicts(
+    db: Session,
+    doctor_id: int,
+    start: datetime,
+    end: datetime,
+    exclude_appointment_id: Optional[int] = None,
+) -> List[models.Appointment]:
+    """Return every appointment of a doctor overlapping the slot."""
+    return conflict_query(
+        db, start, end,
+        doctor_id=doctor_id,
+        exclude_appointment_id=exclude_appointment_id,
+    ).all()
+
+
+class Interval(NamedTuple):
+    """A candidate booking checked by :func:`find_batch_conflicts`."""
+    key: Hashable
+    doctor_id: int
+    patient_id: int
+    start: datetime
+    end: datetime
+
+
+class _Timeline:
+    """Sorted existing intervals of one owner with prefix-max end times."""
+
+    def __init__(self, intervals: List[Tuple[datetime, datetime]]):
+        intervals.sort()
+        self.starts = [start for start, _ in intervals]
+        self.max_ends = []
+        latest = None
+        for _, end in intervals:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        # Intervals starting before ``end`` overlap iff one ends after ``start``
+        index = bisect_left(self.starts, end)
+        return index > 0 and self.max_ends[index - 1] > start
+
+
+def _existing_timelines(db: Session, column, owner_ids, range_start, range_end):
+    """Load active intervals per owner for the given column and range."""
+    table = models.Appointment.__table__
+    intervals = defaultdict(list)
+    for ids in chunked(sorted(owner_ids), IN_CLAUSE_CHUNK):
+        rows = db.execute(
+            select(column, table.c.scheduled_datetime, table.c.end_datetime).where(
+                and_(
+                    column.in_(ids),
+                    table.c.status.in_(ACTIVE_STATUSES),
+                    table.c.scheduled_datetime
+                    > range_start - timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+                    table.c.scheduled_datetime < range_end,
+                    table.c.end_datetime > range_start,
+                )
+            )
+        )
+        for owner_id, start, end in rows:
+            intervals[owner_id].append((start, end))
+    return {owner_id: _Timeline(items) for owner_id, items in intervals.items()}
+
+
+def find_batch_conflicts(db: Session, intervals: List[Interval]) -> Dict[Hashable, str]:
+    """Check a batch of bookings against the database and each other.
+
+    Existing appointments are loaded with one range query per owner type
+    and probed by binary search. The batch itself is then swept in start
+    order; when two candidates overlap, the earlier one wins. Returns a
+    mapping of rejected keys to the reason.
+    """
+    if not intervals:
+        return {}
+
+    range_start = min(interval.start for interval in intervals)
+    range_end = max(interval.end for interval in intervals)
+    table = models.Appointment.__table__
+    doctor_timelines = _existing_timelines(
+        db, table.c.doctor_id, {i.doctor_id for i in intervals}, range_start, range_end
+    )
+    patient_timelines = _existing_timelines(
+        db, table.c.patient_id, {i.patient_id for i in intervals}, range_start, range_end
+    )
+
+    rejected: Dict[Hashable, str] = {}
+    doctor_busy_until: Dict[int, datetime] = {}
+    patient_busy_until: Dict[int, datetime] = {}
+
+    for interval in sorted(intervals, key=lambda i: (i.start, i.end)):
+        doctor_timeline = doctor_timelines.get(interval.doctor_id)
+        patient_timeline = patient_timelines.get(interval.patient_id)
+        doctor_busy = doctor_busy_until.get(interval.doctor_id)
+        patient_busy = patient_busy_until.get(interval.patient_id)
+
+        if doctor_timeline and doctor_timeline.overlaps(interval.start, interval.end):
+            rejected[interval.key] = "Doctor has a conflicting appointment at this time"
+        elif patient_timeline and patient_timeline.overlaps(interval.start, interval.end):
+            rejected[interval.key] = "Patient has a conflicting appointment at this time"
+        elif doctor_busy and doctor_busy > interval.start:
+            rejected[interval.key] = "Doctor has a conflicting appointment in the same batch"
+        elif patient_busy and patient_busy > interval.start:
+            rejected[interval.key] = "Patient has a conflicting appointment in the same batch"
+        else:
+            if not doctor_busy or interval.end > doctor_busy:
+                doctor_busy_until[interval.doctor_id] = interval.end
+            if not patient_busy or interval.end > patient_busy:
+                patient_busy_until[interval.patient_id] = interval.end
+
+    return rejected
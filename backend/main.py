@@ -6,7 +6,9 @@ from backend.routers import (
     patients, doctors, appointments, billing, auth, dashboard,
 )
 from backend.models import Base
-from backend.core.database import engine
+from backend.core.database import engine, SessionLocal
+from backend.core import patient_changes, patient_facets, patient_suggest
+from backend.core.query_budget import QueryBudgetMiddleware
 from backend.core.config import settings
 # If you have custom middleware, exceptions, logger, update their imports here
 # from backend.core.middleware import LoggingMiddleware, SecurityMiddleware,
@@ -26,6 +28,9 @@ async def lifespan(app: FastAPI):
     # Create database tables
     Base.metadata.create_all(bind=engine)
 
+    # Load the in-memory patient typeahead and facet indexes
+    patient_changes.warm_up(SessionLocal)
+
     yield
 
     # Shutdown
@@ -44,6 +49,7 @@ app = FastAPI(
 # app.add_middleware(LoggingMiddleware)
 # app.add_middleware(SecurityMiddleware)
 # app.add_middleware(RateLimitMiddleware, requests_per_minute=60)
+app.add_middleware(QueryBudgetMiddleware)
 
 # CORS configuration
 app.add_middleware(
@@ -1,8 +1,10 @@
 from .user import User, UserSession, AuditLog
-from .patient import Patient, PatientDocument
+from .patient import Patient, PatientChange, PatientDocument, PatientDuplicate, PatientImport
 from .doctor import Doctor
-from .appointment import Appointment, AppointmentStatusEnum
+from .appointment import Appointment, AppointmentStatusEnum, AppointmentSeries, RecurrenceFrequencyEnum
 from .billing import Bill, BillItem, Payment, InsuranceClaim, PaymentStatusEnum
+from .schedule import DoctorDayOccupancy, DoctorWorkingHours, DoctorScheduleException
+from .reporting import AppointmentDailyStat, RevenueDaily
 from backend.core.database import Base
 
 __all__ = [
@@ -13,13 +15,26 @@ __all__ = [
     
     # Patient models
     "Patient",
+    "PatientChange",
     "PatientDocument",
+    "PatientDuplicate",
+    "PatientImport",
     
     # Doctor models
     "Doctor",
     
     # Appointment models
     "Appointment",
+    "AppointmentSeries",
+    
+    # Schedule models
+    "DoctorDayOccupancy",
+    "DoctorWorkingHours",
+    "DoctorScheduleException",
+    
+    # Reporting models
+    "AppointmentDailyStat",
+    "RevenueDaily",
     
     # Billing models
     "Bill",
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, Enum
+from datetime import timedelta
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Index, Enum, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.core.database import Base
@@ -14,6 +15,44 @@ class AppointmentStatusEnum(enum.Enum):
     NO_SHOW = "no_show"
 
 
+class RecurrenceFrequencyEnum(enum.Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+
+class AppointmentSeries(Base):
+    """Recurrence rule for standing appointments.
+
+    Occurrences are materialized as ordinary appointments up to
+    ``materialized_until`` and can be extended later.
+    """
+    __tablename__ = "appointment_series"
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    start_datetime = Column(DateTime, nullable=False)
+    duration_minutes = Column(Integer, nullable=False, default=30)
+    frequency = Column(Enum(RecurrenceFrequencyEnum), nullable=False)
+    interval = Column(Integer, nullable=False, default=1)
+    weekdays = Column(String(20))  # Comma-separated, 0 = Monday ... 6 = Sunday
+    until = Column(Date)
+    count = Column(Integer)
+    materialized_until = Column(Date)
+    reason = Column(Text, nullable=False)
+    notes = Column(Text)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    appointments = relationship("Appointment", back_populates="series")
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_series_patient', 'patient_id'),
+        Index('idx_series_doctor', 'doctor_id'),
+    )
+
+
 class Appointment(Base):
     __tablename__ = "appointments"
     id = Column(Integer, primary_key=True, index=True)
@@ -22,22 +61,117 @@ class Appointment(Base):
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
     scheduled_datetime = Column(DateTime, nullable=False)
     duration_minutes = Column(Integer, default=30)
+    # Denormalized scheduled_datetime + duration_minutes for overlap checks
+    end_datetime = Column(DateTime, nullable=False)
     reason = Column(Text, nullable=False)
     status = Column(Enum(AppointmentStatusEnum), default=AppointmentStatusEnum.SCHEDULED)
     notes = Column(Text)
+    series_id = Column(Integer, ForeignKey("appointment_series.id"), nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
+    series = relationship("AppointmentSeries", back_populates="appointments")
     patient = relationship("Patient", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
     created_by_user = relationship("User", back_populates="appointments_created")
     
     # Indexes
     __table_args__ = (
-        Index('idx_appointment_datetime', 'scheduled_datetime'),
+        Index('idx_appointment_datetime', 'scheduled_datetime', 'id'),
         Index('idx_appointment_status', 'status'),
-        Index('idx_appointment_patient', 'patient_id'),
+        Index('idx_appointment_patient', 'patient_id', 'scheduled_datetime'),
         Index('idx_appointment_doctor', 'doctor_id'),
-    ) 
\ No newline at end of file
+        Index('idx_appointment_doctor_slot', 'doctor_id', 'status', 'scheduled_datetime'),
+        Index('idx_appointment_patient_slot', 'patient_id', 'status', 'scheduled_datetime'),
+        Index('idx_appointment_series', 'series_id'),
+        Index('idx_appointment_created', 'created_at'),
+        Index('idx_appointment_updated', 'updated_at'),
+    )
+
+
+@event.listens_for(Appointment, "before_insert")
+@event.listens_for(Appointment, "before_update")
+def _set_end_datetime(mapper, connection, target):
+    """Keep end_datetime in sync with the start time and duration."""
+    if target.duration_minutes is None:
+        target.duration_minutes = 30
+    if target.scheduled_datetime is not None:
+        target.end_datetime = target.scheduled_datetime + timedelta(
+            minutes=target.duration_minutes
+        )
+
+
+@event.listens_for(Appointment.doctor_id, "set", active_history=True)
+@event.listens_for(Appointment.scheduled_datetime, "set", active_history=True)
+@event.listens_for(Appointment.duration_minutes, "set", active_history=True)
+@event.listens_for(Appointment.status, "set", active_history=True)
+def _track_previous_value(target, value, oldvalue, initiator):
+    """Load the old value on change so derived tables can undo it at flush."""
+
+
+# Database-enforced non-overlap of active appointments, per doctor and per
+# patient. The constraint names double as the error messages core.booking
+# looks for.
+OVERLAP_CONSTRAINTS = {
+    'appointment_no_overlap': 'doctor_id',
+    'appointment_patient_no_overlap': 'patient_id',
+}
+
+event.listen(
+    Appointment.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
+
+_SQLITE_OVERLAP_CHECK = """
+    SELECT RAISE(ABORT, '{constraint}')
+    WHERE EXISTS (
+        SELECT 1 FROM appointments
+        WHERE {owner} = NEW.{owner}
+          AND status IN ('SCHEDULED', 'CONFIRMED')
+          AND scheduled_datetime > datetime(NEW.scheduled_datetime, '-480 minutes')
+          AND scheduled_datetime < NEW.end_datetime
+          AND end_datetime > NEW.scheduled_datetime
+          AND id IS NOT NEW.id
+    );
+"""
+
+
+def _add_overlap_guard(constraint: str, owner: str) -> None:
+    """Reject overlapping active appointments sharing ``owner`` at write time."""
+    check = _SQLITE_OVERLAP_CHECK.format(constraint=constraint, owner=owner)
+    event.listen(
+        Appointment.__table__,
+        "after_create",
+        DDL(
+            f"ALTER TABLE appointments ADD CONSTRAINT {constraint} "
+            f"EXCLUDE USING gist ({owner} WITH =, tsrange(scheduled_datetime, end_datetime) WITH &&) "
+            "WHERE (status IN ('SCHEDULED', 'CONFIRMED'))"
+        ).execute_if(dialect="postgresql")
+    )
+    event.listen(
+        Appointment.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER IF NOT EXISTS {constraint}_insert "
+            "BEFORE INSERT ON appointments "
+            "WHEN NEW.status IN ('SCHEDULED', 'CONFIRMED') "
+            f"BEGIN {check} END"
+        ).execute_if(dialect="sqlite")
+    )
+    event.listen(
+        Appointment.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER IF NOT EXISTS {constraint}_update "
+            f"BEFORE UPDATE OF {owner}, scheduled_datetime, end_datetime, status ON appointments "
+            "WHEN NEW.status IN ('SCHEDULED', 'CONFIRMED') "
+            f"BEGIN {check} END"
+        ).execute_if(dialect="sqlite")
+    )
+
+
+for constraint, owner in OVERLAP_CONSTRAINTS.items():
+    _add_overlap_guard(constraint, owner)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Index, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Index, Enum, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.core.database import Base
@@ -38,9 +38,19 @@ class Bill(Base):
     
     # Indexes
     __table_args__ = (
-        Index('idx_bill_date', 'bill_date'),
+        Index('idx_bill_date', 'bill_date', 'id'),
         Index('idx_bill_status', 'payment_status'),
-        Index('idx_bill_patient', 'patient_id'),
+        Index('idx_bill_patient', 'patient_id', 'bill_date'),
+        Index('idx_bill_created', 'created_at'),
+        Index('idx_bill_updated', 'updated_at'),
+        # Receivables: only unpaid bills, with the balance columns included
+        # so aging totals are answered from the index alone
+        Index(
+            'idx_bill_outstanding', 'due_date', 'id',
+            postgresql_where=payment_status.in_([PaymentStatusEnum.PENDING, PaymentStatusEnum.PARTIAL]),
+            postgresql_include=['total_amount', 'paid_amount'],
+            sqlite_where=payment_status.in_([PaymentStatusEnum.PENDING, PaymentStatusEnum.PARTIAL]),
+        ),
     )
 
 
@@ -68,6 +78,10 @@ class Payment(Base):
     payment_date = Column(DateTime, nullable=False)
     reference_number = Column(String(100))
     notes = Column(Text)
+    # Idempotency-Key header sent with the posting; a retry with the same
+    # key returns the original payment. Reference numbers are not keys,
+    # since genuine payments may share one
+    idempotency_key = Column(String(100))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -75,11 +89,21 @@ class Payment(Base):
     
     # Indexes
     __table_args__ = (
-        Index('idx_payment_date', 'payment_date'),
+        Index('idx_payment_date', 'payment_date', 'id'),
         Index('idx_payment_method', 'payment_method'),
+        Index('idx_payment_bill', 'bill_id', 'payment_date'),
+        Index('idx_payment_created', 'created_at'),
+        Index('uq_payment_idempotency', 'bill_id', 'idempotency_key', unique=True),
     )
 
 
+@event.listens_for(Payment.amount, "set", active_history=True)
+@event.listens_for(Payment.payment_method, "set", active_history=True)
+@event.listens_for(Payment.payment_date, "set", active_history=True)
+def _track_previous_value(target, value, oldvalue, initiator):
+    """Load the old value on change so the revenue rollup can undo it at flush."""
+
+
 class InsuranceClaim(Base):
     __tablename__ = "insurance_claims"
     id = Column(Integer, primary_key=True, index=True)
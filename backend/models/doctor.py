@@ -27,6 +27,7 @@ class Doctor(Base):
     # Indexes
     __table_args__ = (
         Index('idx_doctor_name', 'first_name', 'last_name'),
+        Index('idx_doctor_sort_name', 'last_name', 'first_name', 'id'),
         Index('idx_doctor_specialization', 'specialization'),
         Index('idx_doctor_license', 'license_number'),
     ) 
\ No newline at end of file
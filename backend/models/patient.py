@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Date, Index, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float, Text, Date, Index, Enum, DDL, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.core.database import Base
+from backend.core.phonetic import metaphone
+from functools import lru_cache
 import enum
+import re
+import sqlite3
 
 
 class GenderEnum(enum.Enum):
@@ -17,11 +21,13 @@ class Patient(Base):
     patient_id = Column(String(20), unique=True, index=True, nullable=False)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
+    last_name_phonetic = Column(String(8))
     date_of_birth = Column(Date, nullable=False)
     gender = Column(Enum(GenderEnum), nullable=False)
     blood_group = Column(String(5))
     address = Column(Text, nullable=False)
     phone = Column(String(20), nullable=False)
+    phone_normalized = Column(String(20))
     email = Column(String(100))
     emergency_contact_name = Column(String(100))
     emergency_contact_phone = Column(String(20))
@@ -41,10 +47,163 @@ class Patient(Base):
     __table_args__ = (
         Index('idx_patient_name', 'first_name', 'last_name'),
         Index('idx_patient_phone', 'phone'),
+        Index('idx_patient_phone_normalized', 'phone_normalized'),
+        Index('idx_patient_blocking', 'last_name_phonetic', 'date_of_birth'),
         Index('idx_patient_email', 'email'),
+        Index('idx_patient_created', 'created_at'),
+        Index('idx_patient_updated', 'updated_at'),
     )
 
 
+def normalize_phone(phone):
+    """Reduce a phone number to its digits so formatting never affects matching."""
+    if phone is None:
+        return None
+    return re.sub(r"\D", "", phone)
+
+
+@event.listens_for(Patient, "before_insert")
+@event.listens_for(Patient, "before_update")
+def _set_derived_fields(mapper, connection, target):
+    """Keep phone_normalized and last_name_phonetic in sync."""
+    target.phone_normalized = normalize_phone(target.phone)
+    target.last_name_phonetic = metaphone(target.last_name)
+
+
+# Columns covered by the patient search index, in FTS5 column order
+SEARCH_COLUMNS = (
+    "first_name", "last_name", "patient_id", "phone_normalized", "email", "insurance_provider",
+)
+
+
+@lru_cache(maxsize=None)
+def fts5_trigram_available() -> bool:
+    """Whether the linked SQLite has FTS5 with the trigram tokenizer (3.34+)."""
+    try:
+        connection = sqlite3.connect(":memory:")
+        try:
+            connection.execute("CREATE VIRTUAL TABLE probe USING fts5(x, tokenize='trigram')")
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def _use_fts5(ddl, target, bind, **kw):
+    return bind.dialect.name == "sqlite" and fts5_trigram_available()
+
+
+# PostgreSQL: one multi-column trigram GIN index serves ILIKE '%term%' on
+# any of the searched columns
+POSTGRES_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_patient_search_trgm ON patients USING gin ("
+    + ", ".join(f"{column} gin_trgm_ops" for column in SEARCH_COLUMNS)
+    + ")",
+)
+
+# SQLite: an external-content FTS5 table over the same columns, kept in
+# sync by triggers so Core and ORM writes are both covered
+_FTS_COLUMNS = ", ".join(SEARCH_COLUMNS)
+_FTS_NEW = ", ".join(f"NEW.{column}" for column in SEARCH_COLUMNS)
+_FTS_OLD = ", ".join(f"OLD.{column}" for column in SEARCH_COLUMNS)
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_search USING fts5("
+    f"{_FTS_COLUMNS}, content='patients', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS patient_search_insert AFTER INSERT ON patients BEGIN "
+    f"INSERT INTO patient_search(rowid, {_FTS_COLUMNS}) VALUES (NEW.id, {_FTS_NEW}); END",
+    "CREATE TRIGGER IF NOT EXISTS patient_search_delete AFTER DELETE ON patients BEGIN "
+    f"INSERT INTO patient_search(patient_search, rowid, {_FTS_COLUMNS}) "
+    f"VALUES ('delete', OLD.id, {_FTS_OLD}); END",
+    f"CREATE TRIGGER IF NOT EXISTS patient_search_update AFTER UPDATE OF {_FTS_COLUMNS} ON patients BEGIN "
+    f"INSERT INTO patient_search(patient_search, rowid, {_FTS_COLUMNS}) "
+    f"VALUES ('delete', OLD.id, {_FTS_OLD}); "
+    f"INSERT INTO patient_search(rowid, {_FTS_COLUMNS}) VALUES (NEW.id, {_FTS_NEW}); END",
+)
+SQLITE_SEARCH_DROP = (
+    "DROP TRIGGER IF EXISTS patient_search_insert",
+    "DROP TRIGGER IF EXISTS patient_search_delete",
+    "DROP TRIGGER IF EXISTS patient_search_update",
+    "DROP TABLE IF EXISTS patient_search",
+)
+
+for _statement in POSTGRES_SEARCH_DDL[:1]:
+    event.listen(Patient.__table__, "before_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in POSTGRES_SEARCH_DDL[1:]:
+    event.listen(Patient.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(_statement).execute_if(callable_=_use_fts5))
+event.listen(
+    Patient.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS patient_search").execute_if(callable_=_use_fts5)
+)
+
+
+class PatientChange(Base):
+    """Append-only log of patient writes.
+
+    Each worker's in-memory suggest index replays entries newer than the
+    last one it has seen to pick up writes made by other workers.
+    """
+    __tablename__ = "patient_changes"
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_patient_change_changed_at', 'changed_at'),
+    )
+
+
+class PatientDuplicate(Base):
+    """A probable duplicate registration awaiting review.
+
+    Pairs are stored once, newer patient first.
+    """
+    __tablename__ = "patient_duplicates"
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
+    duplicate_of_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+    reasons = Column(String(200))  # Comma-separated
+    source = Column(String(20), nullable=False)  # registration, batch
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    patient = relationship("Patient", foreign_keys=[patient_id])
+    duplicate_of = relationship("Patient", foreign_keys=[duplicate_of_id])
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('patient_id', 'duplicate_of_id', name='uq_patient_duplicate'),
+        Index('idx_patient_duplicate_of', 'duplicate_of_id'),
+    )
+
+
+class PatientImport(Base):
+    """Progress of a bulk patient import.
+
+    Updated in the transaction that writes each chunk, so re-sending the
+    same file under the same key resumes after the last committed chunk.
+    """
+    __tablename__ = "patient_imports"
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(100), unique=True, index=True, nullable=False)
+    format = Column(String(10), nullable=False)  # csv, ndjson
+    status = Column(String(20), nullable=False, default="running")  # running, completed
+    rows_processed = Column(Integer, nullable=False, default=0)
+    created = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+
 class PatientDocument(Base):
     __tablename__ = "patient_documents"
     id = Column(Integer, primary_key=True, index=True)
@@ -55,6 +214,8 @@ class PatientDocument(Base):
     document_type = Column(String(50), nullable=False)
     description = Column(Text)
     file_size = Column(Integer)
+    content_hash = Column(String(64))  # SHA-256; the file is stored under it
+    content_type = Column(String(100))
     uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -66,4 +227,6 @@ class PatientDocument(Base):
     __table_args__ = (
         Index('idx_document_type', 'document_type'),
         Index('idx_uploaded_at', 'uploaded_at'),
+        Index('idx_document_patient', 'patient_id', 'uploaded_at'),
+        Index('idx_document_hash', 'content_hash'),
     ) 
\ No newline at end of file
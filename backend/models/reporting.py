@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Date, Enum, Float, Index, String, UniqueConstraint
+from sqlalchemy.sql import func
+from backend.core.database import Base
+from backend.models.appointment import AppointmentStatusEnum
+
+
+class AppointmentDailyStat(Base):
+    """Appointment count per scheduled day, doctor and status."""
+    __tablename__ = "appointment_daily_stats"
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    status = Column(Enum(AppointmentStatusEnum), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('day', 'doctor_id', 'status', name='uq_appointment_stat'),
+        Index('idx_appointment_stat_doctor_day', 'doctor_id', 'day'),
+    )
+
+
+class RevenueDaily(Base):
+    """Payment total and count per payment day and method."""
+    __tablename__ = "revenue_daily"
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    payment_method = Column(String(50), nullable=False)
+    total = Column(Float, nullable=False, default=0.0)
+    payments = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('day', 'payment_method', name='uq_revenue_daily'),
+    )
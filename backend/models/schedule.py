@@ -0,0 +1,69 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Time, Boolean, LargeBinary, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from backend.core.database import Base
+
+
+class DoctorDayOccupancy(Base):
+    """Occupancy bitmap of one doctor's day, one bit per 5-minute slot."""
+    __tablename__ = "doctor_day_occupancy"
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    bitmap = Column(LargeBinary(36), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    doctor = relationship("Doctor")
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('doctor_id', 'day', name='uq_occupancy_doctor_day'),
+        Index('idx_occupancy_day', 'day'),
+    )
+
+
+class DoctorWorkingHours(Base):
+    """Weekly working-hour template; several rows per weekday allow split shifts."""
+    __tablename__ = "doctor_working_hours"
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    weekday = Column(Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    doctor = relationship("Doctor")
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_working_hours_doctor', 'doctor_id', 'weekday'),
+    )
+
+
+class DoctorScheduleException(Base):
+    """Date-specific deviation from a doctor's weekly template.
+
+    Unavailable exceptions without times block the whole day; with times
+    they block that window. Available exceptions add extra hours.
+    """
+    __tablename__ = "doctor_schedule_exceptions"
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    start_time = Column(Time)
+    end_time = Column(Time)
+    is_available = Column(Boolean, nullable=False, default=False)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+    reason = Column(String(255))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    doctor = relationship("Doctor")
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_schedule_exception_doctor_date', 'doctor_id', 'date'),
+    )
@@ -1,17 +1,70 @@
+from itertools import islice
 from typing import List, Optional
 from datetime import datetime, timedelta, date
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, insert, select, update
 from backend import models, schemas
 from backend.core import database
 from backend.core import security as auth
 from backend import audit
+from backend.core import availability, booking, bulk, calendar, exports, fieldsets, pagination, patient_summary, query_budget, recurrence, rollups, schedule_summary, scheduling
 from backend.core.security import generate_appointment_id
-from backend.models.appointment import AppointmentStatusEnum
+from backend.models.appointment import AppointmentStatusEnum, RecurrenceFrequencyEnum
 
 router = APIRouter(prefix="/appointments", tags=["Appointments"])
 
+def _insert_appointments(db: Session, values: List[dict], user_id: Optional[int], request: Request = None) -> List[int]:
+    """Insert appointment rows with Core and keep derived tables in step.
+    
+    Core inserts bypass the ORM flush listeners, so occupancy bitmaps, the
+    daily rollup, cached schedule summaries and the audit trail are updated
+    here. Nothing is committed; returns the new ids in input order.
+    """
+    table = models.Appointment.__table__
+    inserted_ids = []
+    for chunk in bulk.chunked(values, bulk.INSERT_CHUNK):
+        result = db.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            chunk
+        )
+        inserted_ids.extend(result.scalars().all())
+    
+    occupancy_keys = set()
+    stat_deltas = {}
+    for value in values:
+        if value["status"] in scheduling.ACTIVE_STATUSES:
+            occupancy_keys |= availability.keys_for_interval(
+                value["doctor_id"], value["scheduled_datetime"], value["end_datetime"]
+            )
+        key = rollups.stat_key(value["scheduled_datetime"], value["doctor_id"], value["status"])
+        stat_deltas[key] = stat_deltas.get(key, 0) + 1
+    availability.refresh(db.connection(), occupancy_keys)
+    rollups.apply_appointment_deltas(db.connection(), stat_deltas)
+    schedule_summary.mark_stale(db, ((doctor_id, day) for day, doctor_id, _ in stat_deltas))
+    patient_summary.mark_stale(db, (value["patient_id"] for value in values))
+    
+    audit.AuditLogger.log_bulk_create(
+        db, user_id, "appointments",
+        (
+            (
+                record_id,
+                {
+                    "appointment_id": value["appointment_id"],
+                    "patient_id": value["patient_id"],
+                    "doctor_id": value["doctor_id"],
+                    "scheduled_datetime": value["scheduled_datetime"].isoformat(),
+                    "duration_minutes": value["duration_minutes"]
+                }
+            )
+            for value, record_id in zip(values, inserted_ids)
+        ),
+        request
+    )
+    
+    return inserted_ids
+
 @router.post("/", response_model=schemas.Appointment, status_code=201)
 async def create_appointment(
     appointment_data: schemas.AppointmentCreate,
@@ -42,97 +95,501 @@ async def create_appointment(
             detail="Doctor not found or inactive"
         )
     
-    # Check for scheduling conflicts
-    appointment_start = appointment_data.scheduled_datetime
-    appointment_end = appointment_start + timedelta(minutes=appointment_data.duration_minutes)
-    
-    # Check doctor availability (simplified)
-    conflicting_appointments = db.query(models.Appointment).filter(
-        and_(
-            models.Appointment.doctor_id == appointment_data.doctor_id,
-            models.Appointment.status.in_([
-                AppointmentStatusEnum.SCHEDULED,
-                AppointmentStatusEnum.CONFIRMED
-            ]),
-            models.Appointment.scheduled_datetime < appointment_end
+    # Check for conflicts and create the appointment under the doctor's lock
+    db_appointment = booking.book_appointment(
+        db, appointment_data, current_user.id if current_user else None
+    )
+    appointment_id = db_appointment.appointment_id
+    
+    # Log appointment creation
+    user_id = current_user.id if current_user else None
+    audit.AuditLogger.log_create(
+        db, user_id, "appointments", db_appointment.id,
+        {
+            "appointment_id": appointment_id,
+            "patient_id": appointment_data.patient_id,
+            "doctor_id": appointment_data.doctor_id,
+            "scheduled_datetime": appointment_data.scheduled_datetime.isoformat(),
+            "duration_minutes": appointment_data.duration_minutes
+        },
+        request
+    )
+    
+    return db_appointment
+
+@router.post("/bulk", response_model=schemas.BulkImportResult)
+async def bulk_create_appointments(
+    request: Request,
+    dry_run: bool = Query(False, description="Validate without writing anything"),
+    all_or_nothing: bool = Query(False, description="Write nothing if any row fails"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Import appointments from a JSON array or NDJSON body in one transaction."""
+    
+    try:
+        records = bulk.parse_records(
+            await request.body(), request.headers.get("content-type", "")
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-    ).first()
     
-    if conflicting_appointments:
+    if len(records) > bulk.MAX_BULK_ROWS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Doctor has a conflicting appointment at this time"
+            detail=f"At most {bulk.MAX_BULK_ROWS} appointments can be imported at once"
+        )
+    
+    # Validate rows against the schema
+    errors = {}
+    rows = {}
+    for index, record in enumerate(records):
+        try:
+            rows[index] = schemas.BulkAppointmentRow.model_validate(record)
+        except ValidationError as e:
+            errors[index] = bulk.format_validation_error(e)
+    
+    # Verify patients and active doctors with one IN query each
+    known_patients = bulk.existing_ids(
+        db, models.Patient.id, {row.patient_id for row in rows.values()}
+    )
+    active_doctors = bulk.existing_ids(
+        db, models.Doctor.id, {row.doctor_id for row in rows.values()},
+        models.Doctor.is_active == True
+    )
+    for index, row in rows.items():
+        if row.patient_id not in known_patients:
+            errors[index] = "Patient not found"
+        elif row.doctor_id not in active_doctors:
+            errors[index] = "Doctor not found or inactive"
+    
+    # Check conflicts against the database and within the batch
+    active_values = {s.value for s in scheduling.ACTIVE_STATUSES}
+    intervals = [
+        scheduling.Interval(
+            index, row.doctor_id, row.patient_id, row.scheduled_datetime,
+            scheduling.appointment_end(row.scheduled_datetime, row.duration_minutes)
         )
+        for index, row in rows.items()
+        if index not in errors and row.status.value in active_values
+    ]
+    errors.update(scheduling.find_batch_conflicts(db, intervals))
+    
+    accepted = [index for index in rows if index not in errors]
+    created = {}
     
-    # Check patient availability (simplified)
-    patient_conflicts = db.query(models.Appointment).filter(
-        and_(
-            models.Appointment.patient_id == appointment_data.patient_id,
-            models.Appointment.status.in_([
-                AppointmentStatusEnum.SCHEDULED,
-                AppointmentStatusEnum.CONFIRMED
-            ]),
-            models.Appointment.scheduled_datetime < appointment_end
+    if accepted and not dry_run and not (all_or_nothing and errors):
+        appointment_ids = bulk.unique_ids(
+            db, models.Appointment.appointment_id, generate_appointment_id, len(accepted)
+        )
+        user_id = current_user.id if current_user else None
+        values = []
+        for index, appointment_id in zip(accepted, appointment_ids):
+            row = rows[index]
+            values.append({
+                "appointment_id": appointment_id,
+                "patient_id": row.patient_id,
+                "doctor_id": row.doctor_id,
+                "scheduled_datetime": row.scheduled_datetime,
+                "duration_minutes": row.duration_minutes,
+                "end_datetime": scheduling.appointment_end(
+                    row.scheduled_datetime, row.duration_minutes
+                ),
+                "reason": row.reason,
+                "status": AppointmentStatusEnum(row.status.value),
+                "notes": row.notes,
+                "created_by": user_id
+            })
+        
+        with booking.overlap_as_conflict(db):
+            inserted_ids = _insert_appointments(db, values, user_id, request)
+            db.commit()
+        for index, value, record_id in zip(accepted, values, inserted_ids):
+            created[index] = (record_id, value["appointment_id"])
+    
+    results = []
+    for index in range(len(records)):
+        if index in errors:
+            results.append({"row": index, "success": False, "error": errors[index]})
+        elif index in created:
+            record_id, appointment_id = created[index]
+            results.append({
+                "row": index, "success": True, "id": record_id, "reference": appointment_id
+            })
+        else:
+            results.append({"row": index, "success": True})
+    
+    return {
+        "total": len(records),
+        "created": len(created),
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "results": results
+    }
+
+@router.post("/status/bulk", response_model=schemas.BulkStatusTransitionResult)
+async def bulk_update_appointment_status(
+    transition: schemas.BulkStatusTransition,
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db),
+    request: Request = None
+):
+    """Move many appointments to a new status with set-based updates."""
+    
+    target = AppointmentStatusEnum(transition.status.value)
+    sources = set(scheduling.STATUS_TRANSITIONS[target])
+    if transition.current_status:
+        sources &= {AppointmentStatusEnum(s.value) for s in transition.current_status}
+    
+    table = models.Appointment.__table__
+    criteria = []
+    if transition.appointment_ids is not None:
+        criteria.append(table.c.id.in_(transition.appointment_ids))
+    if transition.scheduled_date is not None:
+        day_start = datetime.combine(transition.scheduled_date, datetime.min.time())
+        criteria.append(table.c.scheduled_datetime >= day_start)
+        criteria.append(table.c.scheduled_datetime < day_start + timedelta(days=1))
+    if transition.doctor_id is not None:
+        criteria.append(table.c.doctor_id == transition.doctor_id)
+    
+    # One statement per allowed source status, so each returned row's
+    # previous status is known without reading it first
+    columns = (
+        table.c.id, table.c.patient_id, table.c.doctor_id,
+        table.c.scheduled_datetime, table.c.end_datetime
+    )
+    changed = []
+    for source in sorted(sources, key=lambda s: s.value):
+        if transition.dry_run:
+            rows = db.execute(
+                select(*columns).where(table.c.status == source, *criteria)
+            ).all()
+        else:
+            with booking.overlap_as_conflict(db):
+                rows = db.execute(
+                    update(table)
+                    .where(table.c.status == source, *criteria)
+                    .values(status=target)
+                    .returning(*columns)
+                ).all()
+        changed.extend((source, row) for row in rows)
+    
+    if changed and not transition.dry_run:
+        # Core updates bypass the ORM listeners, so keep derived tables in step
+        occupancy_keys = set()
+        stat_deltas = {}
+        for source, row in changed:
+            if source in scheduling.ACTIVE_STATUSES and target not in scheduling.ACTIVE_STATUSES:
+                occupancy_keys |= availability.keys_for_interval(
+                    row.doctor_id, row.scheduled_datetime, row.end_datetime
+                )
+            old_key = rollups.stat_key(row.scheduled_datetime, row.doctor_id, source)
+            new_key = rollups.stat_key(row.scheduled_datetime, row.doctor_id, target)
+            stat_deltas[old_key] = stat_deltas.get(old_key, 0) - 1
+            stat_deltas[new_key] = stat_deltas.get(new_key, 0) + 1
+        availability.refresh(db.connection(), occupancy_keys)
+        rollups.apply_appointment_deltas(db.connection(), stat_deltas)
+        schedule_summary.mark_stale(db, ((doctor_id, day) for day, doctor_id, _ in stat_deltas))
+        patient_summary.mark_stale(db, (row.patient_id for _, row in changed))
+        
+        audit.AuditLogger.log_bulk_update(
+            db, current_user.id if current_user else None, "appointments",
+            (
+                (row.id, {"status": source.value}, {"status": target.value})
+                for source, row in changed
+            ),
+            request
+        )
+    
+    db.commit()
+    
+    updated_ids = sorted(row.id for _, row in changed)
+    skipped_ids = []
+    if transition.appointment_ids is not None:
+        skipped_ids = sorted(set(transition.appointment_ids) - set(updated_ids))
+    
+    return {
+        "status": transition.status,
+        "dry_run": transition.dry_run,
+        "updated": len(updated_ids),
+        "appointment_ids": updated_ids,
+        "skipped_ids": skipped_ids
+    }
+
+def _materialize_series(
+    db: Session,
+    series: models.AppointmentSeries,
+    horizon_end: date,
+    after: Optional[datetime],
+    dry_run: bool,
+    skip_conflicts: bool,
+    user_id: Optional[int],
+    request: Request = None
+) -> dict:
+    """Expand a series up to ``horizon_end`` and book the free occurrences.
+    
+    Occurrences come from a lazy generator capped at MAX_OCCURRENCES and
+    are checked against existing bookings in one sorted sweep. Unless
+    ``skip_conflicts`` is set, any conflict rejects the whole request.
+    """
+    occurrences = list(islice(
+        recurrence.iter_occurrences(
+            series.start_datetime,
+            series.frequency,
+            series.interval,
+            recurrence.parse_weekdays(series.weekdays),
+            until=series.until,
+            count=series.count,
+            after=after,
+            horizon_end=horizon_end
+        ),
+        recurrence.MAX_OCCURRENCES + 1
+    ))
+    if len(occurrences) > recurrence.MAX_OCCURRENCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A series can book at most {recurrence.MAX_OCCURRENCES} occurrences per request"
         )
-    ).first()
     
-    if patient_conflicts:
+    conflicts = scheduling.find_batch_conflicts(db, [
+        scheduling.Interval(
+            index, series.doctor_id, series.patient_id, start,
+            scheduling.appointment_end(start, series.duration_minutes)
+        )
+        for index, start in enumerate(occurrences)
+    ])
+    if conflicts and not skip_conflicts and not dry_run:
+        first = min(conflicts)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Patient has a conflicting appointment at this time"
+            detail=f"{len(conflicts)} occurrences conflict with existing appointments, "
+                   f"first on {occurrences[first].isoformat()}: {conflicts[first]}"
+        )
+    
+    accepted = [index for index in range(len(occurrences)) if index not in conflicts]
+    created = {}
+    if accepted and not dry_run:
+        appointment_ids = bulk.unique_ids(
+            db, models.Appointment.appointment_id, generate_appointment_id, len(accepted)
+        )
+        values = [
+            {
+                "appointment_id": appointment_id,
+                "patient_id": series.patient_id,
+                "doctor_id": series.doctor_id,
+                "scheduled_datetime": occurrences[index],
+                "duration_minutes": series.duration_minutes,
+                "end_datetime": scheduling.appointment_end(
+                    occurrences[index], series.duration_minutes
+                ),
+                "reason": series.reason,
+                "status": AppointmentStatusEnum.SCHEDULED,
+                "notes": series.notes,
+                "series_id": series.id,
+                "created_by": user_id
+            }
+            for index, appointment_id in zip(accepted, appointment_ids)
+        ]
+        with booking.overlap_as_conflict(db):
+            inserted_ids = _insert_appointments(db, values, user_id, request)
+            db.flush()
+        created = dict(zip(accepted, inserted_ids))
+    
+    if not dry_run:
+        series.materialized_until = horizon_end
+    
+    return {
+        "dry_run": dry_run,
+        "created": len(created),
+        "conflicts": len(conflicts),
+        "occurrences": [
+            {
+                "scheduled_datetime": start,
+                "appointment_id": created.get(index),
+                "error": conflicts.get(index)
+            }
+            for index, start in enumerate(occurrences)
+        ]
+    }
+
+def _series_horizon(series_start: date, until: Optional[date], horizon_end: Optional[date]) -> date:
+    """Last day to materialize, bounded by the rule and MAX_HORIZON_DAYS."""
+    limit = series_start + timedelta(days=recurrence.MAX_HORIZON_DAYS)
+    candidates = [limit] + [d for d in (until, horizon_end) if d is not None]
+    return min(candidates)
+
+@router.post("/series", response_model=schemas.AppointmentSeriesResult, status_code=201)
+async def create_appointment_series(
+    series_data: schemas.AppointmentSeriesCreate,
+    horizon_end: Optional[date] = Query(None, description="Last day to book now (default: one year)"),
+    dry_run: bool = Query(False, description="Expand and check without booking"),
+    skip_conflicts: bool = Query(False, description="Book the free occurrences and report the rest"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db),
+    request: Request = None
+):
+    """Create a recurring appointment series and book its occurrences."""
+    
+    # Verify patient exists
+    patient = db.query(models.Patient).filter(
+        models.Patient.id == series_data.patient_id
+    ).first()
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found"
+        )
+    
+    # Verify doctor exists and is active
+    doctor = db.query(models.Doctor).filter(
+        models.Doctor.id == series_data.doctor_id,
+        models.Doctor.is_active == True
+    ).first()
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found or inactive"
         )
     
-    # Generate unique appointment ID
-    appointment_id = generate_appointment_id()
-    
-    # Create appointment
-    db_appointment = models.Appointment(
-        appointment_id=appointment_id,
-        patient_id=appointment_data.patient_id,
-        doctor_id=appointment_data.doctor_id,
-        scheduled_datetime=appointment_data.scheduled_datetime,
-        duration_minutes=appointment_data.duration_minutes,
-        reason=appointment_data.reason,
-        status=AppointmentStatusEnum.SCHEDULED,
-        notes=appointment_data.notes,
-        created_by=current_user.id if current_user else None
+    user_id = current_user.id if current_user else None
+    series = models.AppointmentSeries(
+        patient_id=series_data.patient_id,
+        doctor_id=series_data.doctor_id,
+        start_datetime=series_data.start_datetime,
+        duration_minutes=series_data.duration_minutes,
+        frequency=RecurrenceFrequencyEnum(series_data.frequency.value),
+        interval=series_data.interval,
+        weekdays=recurrence.format_weekdays(series_data.weekdays) or None,
+        until=series_data.until,
+        count=series_data.count,
+        reason=series_data.reason,
+        notes=series_data.notes,
+        created_by=user_id
+    )
+    if not dry_run:
+        db.add(series)
+        db.flush()
+    
+    result = _materialize_series(
+        db, series,
+        _series_horizon(series_data.start_datetime.date(), series_data.until, horizon_end),
+        after=None, dry_run=dry_run, skip_conflicts=skip_conflicts,
+        user_id=user_id, request=request
     )
     
-    db.add(db_appointment)
+    if dry_run:
+        return result
+    
     db.commit()
-    db.refresh(db_appointment)
+    db.refresh(series)
     
-    # Log appointment creation
-    user_id = current_user.id if current_user else None
     audit.AuditLogger.log_create(
-        db, user_id, "appointments", db_appointment.id,
+        db, user_id, "appointment_series", series.id,
         {
-            "appointment_id": appointment_id,
-            "patient_id": appointment_data.patient_id,
-            "doctor_id": appointment_data.doctor_id,
-            "scheduled_datetime": appointment_data.scheduled_datetime.isoformat(),
-            "duration_minutes": appointment_data.duration_minutes
+            "patient_id": series.patient_id,
+            "doctor_id": series.doctor_id,
+            "start_datetime": series.start_datetime.isoformat(),
+            "frequency": series.frequency.value,
+            "interval": series.interval,
+            "weekdays": series.weekdays,
+            "created": result["created"]
         },
         request
     )
     
-    return db_appointment
+    result["series"] = series
+    return result
+
+@router.get("/series/{series_id}", response_model=schemas.AppointmentSeries)
+async def get_appointment_series(
+    series_id: int,
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get a recurring appointment series."""
+    
+    series = db.query(models.AppointmentSeries).filter(
+        models.AppointmentSeries.id == series_id
+    ).first()
+    if not series:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment series not found"
+        )
+    
+    return series
+
+@router.post("/series/{series_id}/extend", response_model=schemas.AppointmentSeriesResult)
+async def extend_appointment_series(
+    series_id: int,
+    horizon_end: date = Query(..., description="Last day to book"),
+    dry_run: bool = Query(False, description="Expand and check without booking"),
+    skip_conflicts: bool = Query(False, description="Book the free occurrences and report the rest"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db),
+    request: Request = None
+):
+    """Book a series' occurrences after its current horizon."""
+    
+    series = db.query(models.AppointmentSeries).filter(
+        models.AppointmentSeries.id == series_id
+    ).first()
+    if not series:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment series not found"
+        )
+    
+    if series.materialized_until and horizon_end <= series.materialized_until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Series is already booked through {series.materialized_until.isoformat()}"
+        )
+    
+    start_day = series.materialized_until or series.start_datetime.date()
+    after = datetime.combine(start_day, datetime.max.time()) if series.materialized_until else None
+    result = _materialize_series(
+        db, series, _series_horizon(start_day, series.until, horizon_end),
+        after=after, dry_run=dry_run, skip_conflicts=skip_conflicts,
+        user_id=current_user.id if current_user else None, request=request
+    )
+    
+    if not dry_run:
+        db.commit()
+        db.refresh(series)
+    
+    result["series"] = series
+    return result
 
-@router.get("/", response_model=List[schemas.Appointment])
+@router.get("/", response_model=List[schemas.Appointment], dependencies=[query_budget.budget(2)])
 async def get_appointments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
     doctor_id: Optional[int] = Query(None, description="Filter by doctor ID"),
     status: Optional[str] = Query(None, description="Filter by appointment status"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,scheduled_datetime,status"),
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db)
 ):
-    """Get appointments with optional filtering."""
+    """Get appointments with optional filtering.
+
+    ``fields`` limits both the columns read and the ones returned.
+    """
     
+    fields = fieldsets.parse(schemas.Appointment, fields)
     query = db.query(models.Appointment)
+    if fields:
+        query = query.options(*fieldsets.options(
+            models.Appointment, fields, [models.Appointment.scheduled_datetime]
+        ))
     
     # Apply filters
     if patient_id:
@@ -151,10 +608,161 @@ async def get_appointments(
         query = query.filter(models.Appointment.scheduled_datetime <= end_date)
     
     # Apply pagination
-    appointments = query.order_by(models.Appointment.scheduled_datetime).offset(skip).limit(limit).all()
+    appointments = pagination.paginate(
+        query,
+        [(models.Appointment.scheduled_datetime, False), (models.Appointment.id, False)],
+        limit, cursor, skip, response
+    )
+    if fields:
+        return fieldsets.render(appointments, schemas.Appointment, fields, response)
     
     return appointments
 
+@router.get("/availability/search", response_model=schemas.AvailabilitySearchResult)
+async def search_availability(
+    start_date: date = Query(..., description="First day to search"),
+    end_date: Optional[date] = Query(None, description="Last day to search (defaults to a week)"),
+    specialization: Optional[str] = Query(None, description="Filter doctors by specialization"),
+    duration_minutes: int = Query(30, ge=15, le=480, description="Required slot length"),
+    limit: int = Query(10, ge=1, le=100, description="Number of slots to return"),
+    step_minutes: int = Query(15, ge=5, le=240, description="Spacing of candidate start times"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Find the earliest free slots across doctors using occupancy bitmaps."""
+    
+    if end_date is None:
+        end_date = start_date + timedelta(days=6)
+    
+    if end_date < start_date or (end_date - start_date).days > 31:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date range must be between 1 and 32 days"
+        )
+    
+    if step_minutes % availability.SLOT_MINUTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"step_minutes must be a multiple of {availability.SLOT_MINUTES}"
+        )
+    
+    query = db.query(models.Doctor).filter(models.Doctor.is_active == True)
+    if specialization:
+        query = query.filter(models.Doctor.specialization.ilike(specialization))
+    doctors = query.order_by(models.Doctor.id).all()
+    
+    free_slots = availability.find_free_slots(
+        db, doctors, start_date, end_date,
+        duration_minutes=duration_minutes,
+        limit=limit,
+        step_minutes=step_minutes,
+        not_before=datetime.now()
+    )
+    
+    return {
+        "specialization": specialization,
+        "start_date": start_date,
+        "end_date": end_date,
+        "duration_minutes": duration_minutes,
+        "slots": [
+            {
+                "doctor_id": doctor.id,
+                "doctor_name": f"{doctor.first_name} {doctor.last_name}",
+                "specialization": doctor.specialization,
+                "start": start,
+                "end": scheduling.appointment_end(start, duration_minutes)
+            }
+            for doctor, start in free_slots
+        ]
+    }
+
+@router.get("/calendar", response_model=schemas.CalendarRange, dependencies=[query_budget.budget(5)])
+async def get_calendars(
+    doctor_ids: List[int] = Query(..., description="Doctors to include"),
+    start_date: date = Query(..., description="First day of the calendar"),
+    end_date: Optional[date] = Query(None, description="Last day of the calendar (defaults to start_date)"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get calendars for several doctors over a date range."""
+    
+    if end_date is None:
+        end_date = start_date
+    
+    if end_date < start_date or (end_date - start_date).days > 31:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date range must be between 1 and 32 days"
+        )
+    
+    if len(doctor_ids) > 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At most 50 doctors can be requested at once"
+        )
+    
+    doctors = db.query(models.Doctor).filter(
+        models.Doctor.id.in_(doctor_ids),
+        models.Doctor.is_active == True
+    ).all()
+    doctors_by_id = {doctor.id: doctor for doctor in doctors}
+    
+    missing = [doctor_id for doctor_id in doctor_ids if doctor_id not in doctors_by_id]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Doctors not found or inactive: {missing}"
+        )
+    
+    ordered_ids = list(dict.fromkeys(doctor_ids))
+    calendars = calendar.build_calendars(db, ordered_ids, start_date, end_date)
+    
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "calendars": [
+            {
+                "doctor_id": doctor_id,
+                "doctor_name": f"{doctors_by_id[doctor_id].first_name} {doctors_by_id[doctor_id].last_name}",
+                "specialization": doctors_by_id[doctor_id].specialization,
+                "days": [
+                    {
+                        "date": day["date"],
+                        "working_hours": day["working_hours"],
+                        "time_slots": [
+                            {
+                                "time": slot["time"],
+                                "datetime": slot["datetime"],
+                                "available": slot["available"],
+                                "appointment_id": slot["appointment"].id if slot["appointment"] else None
+                            }
+                            for slot in day["time_slots"]
+                        ]
+                    }
+                    for day in calendars[doctor_id]["days"]
+                ],
+                "appointments": calendars[doctor_id]["appointments"]
+            }
+            for doctor_id in ordered_ids
+        ]
+    }
+
+@router.get("/export")
+async def export_appointments(
+    format: str = Query("csv", pattern=exports.FORMAT_PATTERN, description="csv or ndjson"),
+    compress: bool = Query(False, description="gzip the output"),
+    start_date: Optional[datetime] = Query(None, description="Scheduled on or after"),
+    end_date: Optional[datetime] = Query(None, description="Scheduled on or before"),
+    updated_since: Optional[datetime] = Query(None, description="Only rows created or changed since this X-Export-Watermark"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Stream appointments as CSV or NDJSON for bulk extracts (admin only)."""
+    
+    return exports.streaming_response(
+        db, "appointments", format, start_date, end_date, updated_since, compress
+    )
+
 @router.get("/{appointment_id}", response_model=schemas.Appointment)
 async def get_appointment(
     appointment_id: int,
@@ -206,50 +814,48 @@ async def update_appointment(
         "notes": appointment.notes
     }
     
-    # Check for conflicts if datetime or doctor is being changed
-    if (appointment_data.scheduled_datetime or appointment_data.doctor_id or 
-        appointment_data.duration_minutes):
-        
-        new_datetime = appointment_data.scheduled_datetime or appointment.scheduled_datetime
-        new_doctor_id = appointment_data.doctor_id or appointment.doctor_id
-        new_duration = appointment_data.duration_minutes or appointment.duration_minutes
-        
-        appointment_start = new_datetime
-        appointment_end = appointment_start + timedelta(minutes=new_duration)
-        
-        # Check for conflicts excluding current appointment
-        conflicting_appointments = db.query(models.Appointment).filter(
-            and_(
-                models.Appointment.id != appointment_id,
-                models.Appointment.doctor_id == new_doctor_id,
-                models.Appointment.status.in_([
-                    AppointmentStatusEnum.SCHEDULED,
-                    AppointmentStatusEnum.CONFIRMED
-                ]),
-                or_(
-                    and_(
-                        models.Appointment.scheduled_datetime < appointment_end,
-                        models.Appointment.scheduled_datetime + 
-                        func.cast(models.Appointment.duration_minutes, func.Integer) * 
-                        func.interval('1 minute') > appointment_start
-                    )
+    update_data = appointment_data.model_dump(exclude_unset=True)
+    
+    def save():
+        # Check for conflicts if datetime, doctor or patient is being changed
+        if (appointment_data.scheduled_datetime or appointment_data.doctor_id or 
+            appointment_data.patient_id or appointment_data.duration_minutes):
+            
+            new_datetime = appointment_data.scheduled_datetime or appointment.scheduled_datetime
+            new_doctor_id = appointment_data.doctor_id or appointment.doctor_id
+            new_patient_id = appointment_data.patient_id or appointment.patient_id
+            new_duration = appointment_data.duration_minutes or appointment.duration_minutes
+            
+            appointment_start = new_datetime
+            appointment_end = scheduling.appointment_end(appointment_start, new_duration)
+            
+            # Check for conflicts excluding current appointment
+            if scheduling.find_doctor_conflict(
+                db, new_doctor_id, appointment_start, appointment_end,
+                exclude_appointment_id=appointment_id
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=booking.DOCTOR_CONFLICT_DETAIL
+                )
+            
+            if scheduling.find_patient_conflict(
+                db, new_patient_id, appointment_start, appointment_end,
+                exclude_appointment_id=appointment_id
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=booking.PATIENT_CONFLICT_DETAIL
                 )
-            )
-        ).first()
         
-        if conflicting_appointments:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Doctor has a conflicting appointment at this time"
-            )
-    
-    # Update appointment fields
-    update_data = appointment_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(appointment, field, value)
+        # Update appointment fields
+        for field, value in update_data.items():
+            setattr(appointment, field, value)
+        
+        db.commit()
+        db.refresh(appointment)
     
-    db.commit()
-    db.refresh(appointment)
+    booking.run_booking(db, save)
     
     # Log appointment update
     audit.AuditLogger.log_update(
@@ -332,7 +938,8 @@ async def update_appointment_status(
     old_status = appointment.status
     appointment.status = status
     
-    db.commit()
+    with booking.overlap_as_conflict(db):
+        db.commit()
     db.refresh(appointment)
     
     # Log status change
@@ -364,52 +971,21 @@ async def get_doctor_calendar(
             detail="Doctor not found or inactive"
         )
     
-    # Get appointments for the date
-    start_datetime = datetime.combine(date, datetime.min.time())
-    end_datetime = datetime.combine(date, datetime.max.time())
-    
-    appointments = db.query(models.Appointment).filter(
-        and_(
-            models.Appointment.doctor_id == doctor_id,
-            models.Appointment.scheduled_datetime >= start_datetime,
-            models.Appointment.scheduled_datetime <= end_datetime
-        )
-    ).order_by(models.Appointment.scheduled_datetime).all()
-    
-    # Create time slots (assuming 30-minute slots from 8 AM to 6 PM)
-    time_slots = []
-    start_time = datetime.combine(date, datetime.min.time().replace(hour=8))
-    end_time = datetime.combine(date, datetime.min.time().replace(hour=18))
-    
-    current_time = start_time
-    while current_time < end_time:
-        slot_end = current_time + timedelta(minutes=30)
-        
-        # Check if slot is occupied
-        occupied_appointment = None
-        for appointment in appointments:
-            appointment_end = appointment.scheduled_datetime + timedelta(
-                minutes=appointment.duration_minutes
-            )
-            if (appointment.scheduled_datetime < slot_end and 
-                appointment_end > current_time):
-                occupied_appointment = appointment
-                break
-        
-        time_slots.append({
-            "time": current_time.strftime("%H:%M"),
-            "datetime": current_time.isoformat(),
-            "available": occupied_appointment is None,
-            "appointment": occupied_appointment
-        })
-        
-        current_time = slot_end
+    doctor_calendar = calendar.build_calendars(db, [doctor_id], date, date)[doctor_id]
     
     return {
         "doctor": doctor,
         "date": date.isoformat(),
-        "time_slots": time_slots,
-        "appointments": appointments
+        "time_slots": [
+            {
+                "time": slot["time"],
+                "datetime": slot["datetime"].isoformat(),
+                "available": slot["available"],
+                "appointment": slot["appointment"]
+            }
+            for slot in doctor_calendar["days"][0]["time_slots"]
+        ],
+        "appointments": doctor_calendar["appointments"]
     }
 
 @router.get("/conflicts/check")
@@ -436,32 +1012,12 @@ async def check_scheduling_conflicts(
         )
     
     appointment_start = start_datetime
-    appointment_end = appointment_start + timedelta(minutes=duration_minutes)
-    
-    # Build query
-    query = db.query(models.Appointment).filter(
-        and_(
-            models.Appointment.doctor_id == doctor_id,
-            models.Appointment.status.in_([
-                AppointmentStatusEnum.SCHEDULED,
-                AppointmentStatusEnum.CONFIRMED
-            ]),
-            or_(
-                and_(
-                    models.Appointment.scheduled_datetime < appointment_end,
-                    models.Appointment.scheduled_datetime + 
-                    func.cast(models.Appointment.duration_minutes, func.Integer) * 
-                    func.interval('1 minute') > appointment_start
-                )
-            )
-        )
-    )
-    
-    # Exclude specific appointment if provided
-    if exclude_appointment_id:
-        query = query.filter(models.Appointment.id != exclude_appointment_id)
+    appointment_end = scheduling.appointment_end(appointment_start, duration_minutes)
     
-    conflicting_appointments = query.all()
+    conflicting_appointments = scheduling.find_doctor_conflicts(
+        db, doctor_id, appointment_start, appointment_end,
+        exclude_appointment_id=exclude_appointment_id
+    )
     
     return {
         "has_conflicts": len(conflicting_appointments) > 0,
@@ -476,38 +1032,130 @@ async def check_scheduling_conflicts(
 @router.get("/reports/daily")
 async def get_daily_appointments_report(
     date: date = Query(..., description="Date for report"),
+    include_appointments: bool = Query(False, description="Also list the day's appointments from the appointments table"),
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db)
 ):
-    """Get daily appointments report."""
+    """Get daily appointments report.
     
-    start_datetime = datetime.combine(date, datetime.min.time())
-    end_datetime = datetime.combine(date, datetime.max.time())
+    Served from the daily rollup like the range reports; the appointments
+    table is only read when the appointment list is asked for.
+    """
     
-    # Get all appointments for the date
-    appointments = db.query(models.Appointment).filter(
-        and_(
-            models.Appointment.scheduled_datetime >= start_datetime,
-            models.Appointment.scheduled_datetime <= end_datetime
-        )
-    ).order_by(models.Appointment.scheduled_datetime).all()
+    # Counts come from the daily rollup
+    stats = db.query(
+        models.AppointmentDailyStat.doctor_id,
+        models.AppointmentDailyStat.status,
+        models.AppointmentDailyStat.count
+    ).filter(
+        models.AppointmentDailyStat.day == date,
+        models.AppointmentDailyStat.count > 0
+    ).all()
     
-    # Group by status
     status_counts = {}
     doctor_counts = {}
+    for doctor_id, appointment_status, count in stats:
+        status_counts[appointment_status.value] = status_counts.get(appointment_status.value, 0) + count
+        doctor_counts[doctor_id] = doctor_counts.get(doctor_id, 0) + count
+    
+    report = {
+        "date": date.isoformat(),
+        "total_appointments": sum(status_counts.values()),
+        "status_breakdown": status_counts,
+        "doctor_breakdown": doctor_counts
+    }
+    
+    if include_appointments:
+        start_datetime = datetime.combine(date, datetime.min.time())
+        end_datetime = datetime.combine(date, datetime.max.time())
+        report["appointments"] = db.query(models.Appointment).filter(
+            and_(
+                models.Appointment.scheduled_datetime >= start_datetime,
+                models.Appointment.scheduled_datetime <= end_datetime
+            )
+        ).order_by(models.Appointment.scheduled_datetime).all()
+    
+    return report
+
+@router.get("/reports/summary")
+async def get_appointments_summary_report(
+    start_date: date = Query(..., description="First day of the report"),
+    end_date: date = Query(..., description="Last day of the report"),
+    group_by: str = Query("day", pattern="^(day|week|month)$", description="Period size"),
+    doctor_id: Optional[int] = Query(None, description="Restrict to one doctor"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get appointment counts per period for a date range from the daily rollup."""
     
-    for appointment in appointments:
-        # Count by status
-        status = appointment.status.value
-        status_counts[status] = status_counts.get(status, 0) + 1
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date"
+        )
+    
+    query = db.query(
+        models.AppointmentDailyStat.day,
+        models.AppointmentDailyStat.doctor_id,
+        models.AppointmentDailyStat.status,
+        func.sum(models.AppointmentDailyStat.count)
+    ).filter(
+        models.AppointmentDailyStat.day >= start_date,
+        models.AppointmentDailyStat.day <= end_date
+    )
+    if doctor_id is not None:
+        query = query.filter(models.AppointmentDailyStat.doctor_id == doctor_id)
+    stats = query.group_by(
+        models.AppointmentDailyStat.day,
+        models.AppointmentDailyStat.doctor_id,
+        models.AppointmentDailyStat.status
+    ).order_by(models.AppointmentDailyStat.day).all()
+    
+    # Fold day rows into the requested periods
+    periods = {}
+    status_counts = {}
+    doctor_counts = {}
+    for day, stat_doctor_id, appointment_status, count in stats:
+        if not count:
+            continue
+        if group_by == "week":
+            period_start = day - timedelta(days=day.weekday())
+        elif group_by == "month":
+            period_start = day.replace(day=1)
+        else:
+            period_start = day
         
-        # Count by doctor
-        doctor_counts[appointment.doctor_id] = doctor_counts.get(appointment.doctor_id, 0) + 1
+        period = periods.setdefault(period_start, {
+            "period_start": period_start.isoformat(),
+            "total_appointments": 0,
+            "status_breakdown": {}
+        })
+        period["total_appointments"] += count
+        breakdown = period["status_breakdown"]
+        breakdown[appointment_status.value] = breakdown.get(appointment_status.value, 0) + count
+        status_counts[appointment_status.value] = status_counts.get(appointment_status.value, 0) + count
+        doctor_counts[stat_doctor_id] = doctor_counts.get(stat_doctor_id, 0) + count
     
     return {
-        "date": date.isoformat(),
-        "total_appointments": len(appointments),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "group_by": group_by,
+        "total_appointments": sum(status_counts.values()),
         "status_breakdown": status_counts,
         "doctor_breakdown": doctor_counts,
-        "appointments": appointments
+        "periods": [periods[key] for key in sorted(periods)]
     }
+
+@router.post("/reports/rollups/rebuild")
+async def rebuild_appointment_rollups(
+    start_date: Optional[date] = Query(None, description="First day to rebuild"),
+    end_date: Optional[date] = Query(None, description="Last day to rebuild"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Recompute the daily appointment rollup from the appointments table."""
+    
+    rows = rollups.rebuild_appointment_stats(db, start_date, end_date)
+    db.commit()
+    
+    return {"message": "Appointment rollups rebuilt", "rows": rows}
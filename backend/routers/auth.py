@@ -1,14 +1,14 @@
 import os
 from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
 from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from backend import models, schemas
-from backend.core import database, security
+from backend.core import database, exports, pagination, security
 from backend.core.config import settings
 from backend import audit
 
@@ -255,14 +255,18 @@ async def create_user(
 
 @router.get("/users", response_model=List[schemas.User])
 async def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     current_user: models.User = Depends(security.require_admin),
     db: Session = Depends(database.get_db)
 ):
     """Get all users (admin only)."""
     
-    users = db.query(models.User).offset(skip).limit(limit).all()
+    users = pagination.paginate(
+        db.query(models.User), [(models.User.id, False)], limit, cursor, skip, response
+    )
     return users
 
 @router.get("/users/{user_id}", response_model=schemas.User)
@@ -432,18 +436,42 @@ async def get_audit_logs(
     table_name: str = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    response: Response = None,
     current_user: models.User = Depends(security.require_admin),
     db: Session = Depends(database.get_db)
 ):
     """Get audit logs (admin only)."""
     
-    logs = audit.get_audit_logs(
-        db, user_id=user_id, action=action,
-        table_name=table_name, limit=limit, offset=offset
-    )
+    try:
+        logs, next_cursor = audit.get_audit_log_page(
+            db, user_id=user_id, action=action,
+            table_name=table_name, limit=limit, offset=offset, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
     
     return logs
 
+@router.get("/audit-logs/export")
+async def stream_audit_logs(
+    format: str = Query("csv", pattern=exports.FORMAT_PATTERN, description="csv or ndjson"),
+    compress: bool = Query(False, description="gzip the output"),
+    start_date: Optional[datetime] = Query(None, description="Logged on or after"),
+    end_date: Optional[datetime] = Query(None, description="Logged on or before"),
+    updated_since: Optional[datetime] = Query(None, description="Only rows created or changed since this X-Export-Watermark"),
+    current_user: models.User = Depends(security.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Stream audit logs as CSV or NDJSON for bulk extracts (admin only)."""
+    
+    return exports.streaming_response(
+        db, "audit_logs", format, start_date, end_date, updated_since, compress
+    )
+
 @router.get("/user-activity/{user_id}")
 async def get_user_activity(
     user_id: int,
@@ -1,13 +1,14 @@
 from typing import List, Optional
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Request, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import exists, func, and_, or_, insert, select
 from backend import models, schemas
-from backend.core import database
+from backend.core import database, exports, fieldsets, loading, pagination, payment_posting, query_budget, receivables, rollups
 from backend.core import security as auth
 from backend import audit
-from backend.core.security import generate_bill_id, generate_payment_id
+from backend.core.security import generate_bill_id
 from backend.models.billing import PaymentStatusEnum
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
@@ -19,28 +20,29 @@ async def create_bill(
     db: Session = Depends(database.get_db),
     request: Request = None
 ):
-    """Create a new bill with items."""
+    """Create a new bill with its items in a single transaction.
     
-    # Verify patient exists
-    patient = db.query(models.Patient).filter(
-        models.Patient.id == bill_data.patient_id
-    ).first()
-    if not patient:
+    The items are inserted as a single batched INSERT, in the same
+    transaction as the bill and its audit row. The response is built from
+    the inserted objects, so the round trips do not grow with the number of
+    items. Item and bill totals are checked by ``BillCreate``.
+    """
+    
+    # Verify the patient, and the appointment if provided, in one query
+    checks = [exists().where(models.Patient.id == bill_data.patient_id)]
+    if bill_data.appointment_id:
+        checks.append(exists().where(models.Appointment.id == bill_data.appointment_id))
+    found = db.execute(select(*checks)).one()
+    if not found[0]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Patient not found"
         )
-    
-    # Verify appointment exists if provided
-    if bill_data.appointment_id:
-        appointment = db.query(models.Appointment).filter(
-            models.Appointment.id == bill_data.appointment_id
-        ).first()
-        if not appointment:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Appointment not found"
-            )
+    if bill_data.appointment_id and not found[1]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found"
+        )
     
     # Generate unique bill ID
     bill_id = generate_bill_id()
@@ -60,54 +62,65 @@ async def create_bill(
         payment_status=PaymentStatusEnum.PENDING,
         notes=bill_data.notes
     )
-    
     db.add(db_bill)
-    db.commit()
-    db.refresh(db_bill)
-    
-    # Create bill items
-    for item_data in bill_data.bill_items:
-        db_item = models.BillItem(
-            bill_id=db_bill.id,
-            item_name=item_data.item_name,
-            description=item_data.description,
-            quantity=item_data.quantity,
-            unit_price=item_data.unit_price,
-            total_price=item_data.total_price
-        )
-        db.add(db_item)
-    
-    db.commit()
-    db.refresh(db_bill)
-    
-    # Log bill creation
-    audit.AuditLogger.log_create(
-        db, current_user.id, "bills", db_bill.id,
-        {
+    db.flush()
+    
+    # Insert the items as one batched statement. Unit of work inserts go
+    # row by row on SQLite, which cannot order RETURNING rows without a
+    # sentinel column; the rows come back here and are attached to the
+    # bill as its loaded collection, ordered by id
+    items = []
+    if bill_data.bill_items:
+        items = db.scalars(
+            insert(models.BillItem).returning(models.BillItem),
+            [dict(item_data.model_dump(), bill_id=db_bill.id) for item_data in bill_data.bill_items]
+        ).all()
+    set_committed_value(db_bill, "bill_items", sorted(items, key=lambda item: item.id))
+    
+    # Log bill creation in the same transaction
+    audit.AuditLogger.log_bulk_create(
+        db, current_user.id, "bills",
+        [(db_bill.id, {
             "bill_id": bill_id,
             "patient_id": bill_data.patient_id,
             "total_amount": bill_data.total_amount,
             "items_count": len(bill_data.bill_items)
-        },
+        })],
         request
     )
     
-    return db_bill
+    # Serialize before committing, while the inserted rows are loaded
+    result = schemas.Bill.model_validate(db_bill)
+    db.commit()
+    
+    return result
 
-@router.get("/bills", response_model=List[schemas.Bill])
+@router.get("/bills", response_model=List[schemas.Bill], dependencies=[query_budget.budget(3)])
 async def get_bills(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
     status: Optional[str] = Query(None, description="Filter by payment status"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,bill_id,total_amount,payment_status"),
     current_user: models.User = Depends(auth.require_receptionist),
     db: Session = Depends(database.get_db)
 ):
-    """Get bills with optional filtering."""
+    """Get bills with optional filtering.
+
+    ``fields`` limits both the columns read and the ones returned; bill
+    items are only loaded when asked for.
+    """
     
+    fields = fieldsets.parse(schemas.Bill, fields)
     query = db.query(models.Bill)
+    if fields:
+        query = query.options(*fieldsets.options(models.Bill, fields, [models.Bill.bill_date]))
+    else:
+        query = query.options(*loading.eager(models.Bill, schemas.Bill))
     
     # Apply filters
     if patient_id:
@@ -123,11 +136,33 @@ async def get_bills(
         query = query.filter(models.Bill.bill_date <= end_date)
     
     # Apply pagination
-    bills = query.order_by(models.Bill.bill_date.desc()).offset(skip).limit(limit).all()
+    bills = pagination.paginate(
+        query,
+        [(models.Bill.bill_date, True), (models.Bill.id, True)],
+        limit, cursor, skip, response
+    )
+    if fields:
+        return fieldsets.render(bills, schemas.Bill, fields, response)
     
     return bills
 
-@router.get("/bills/{bill_id}", response_model=schemas.Bill)
+@router.get("/bills/export")
+async def export_bills(
+    format: str = Query("csv", pattern=exports.FORMAT_PATTERN, description="csv or ndjson"),
+    compress: bool = Query(False, description="gzip the output"),
+    start_date: Optional[datetime] = Query(None, description="Billed on or after"),
+    end_date: Optional[datetime] = Query(None, description="Billed on or before"),
+    updated_since: Optional[datetime] = Query(None, description="Only rows created or changed since this X-Export-Watermark"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Stream bills as CSV or NDJSON for bulk extracts (admin only)."""
+    
+    return exports.streaming_response(
+        db, "bills", format, start_date, end_date, updated_since, compress
+    )
+
+@router.get("/bills/{bill_id}", response_model=schemas.Bill, dependencies=[query_budget.budget(3)])
 async def get_bill(
     bill_id: int,
     current_user: models.User = Depends(auth.require_receptionist),
@@ -135,7 +170,9 @@ async def get_bill(
 ):
     """Get a specific bill by ID."""
     
-    bill = db.query(models.Bill).filter(models.Bill.id == bill_id).first()
+    bill = db.query(models.Bill).options(
+        *loading.eager(models.Bill, schemas.Bill)
+    ).filter(models.Bill.id == bill_id).first()
     if not bill:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -252,60 +289,31 @@ async def delete_bill(
 async def create_payment(
     bill_id: int,
     payment_data: schemas.PaymentCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None, alias=payment_posting.IDEMPOTENCY_HEADER, max_length=100,
+        description="Key making retries safe"
+    ),
     current_user: models.User = Depends(auth.require_receptionist),
     db: Session = Depends(database.get_db),
     request: Request = None
 ):
-    """Create a payment for a bill."""
-    
-    # Verify bill exists
-    bill = db.query(models.Bill).filter(models.Bill.id == bill_id).first()
-    if not bill:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bill not found"
-        )
-    
-    # Check if payment amount exceeds remaining balance
-    remaining_balance = bill.total_amount - bill.paid_amount
-    if payment_data.amount > remaining_balance:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Payment amount exceeds remaining balance of ${remaining_balance:.2f}"
-        )
-    
-    # Generate unique payment ID
-    payment_id = generate_payment_id()
-    
-    # Create payment
-    db_payment = models.Payment(
-        payment_id=payment_id,
-        bill_id=bill_id,
-        amount=payment_data.amount,
-        payment_method=payment_data.payment_method,
-        payment_date=payment_data.payment_date,
-        reference_number=payment_data.reference_number,
-        notes=payment_data.notes
-    )
+    """Create a payment for a bill.
     
-    db.add(db_payment)
+    Retries carrying the same Idempotency-Key header return the original
+    payment with Idempotent-Replayed set.
+    """
     
-    # Update bill paid amount and status
-    bill.paid_amount += payment_data.amount
-    
-    if bill.paid_amount >= bill.total_amount:
-        bill.payment_status = PaymentStatusEnum.PAID
-    else:
-        bill.payment_status = PaymentStatusEnum.PARTIAL
-    
-    db.commit()
-    db.refresh(db_payment)
+    db_payment, replayed = payment_posting.post_payment(db, bill_id, payment_data, idempotency_key)
+    if replayed:
+        response.headers[payment_posting.REPLAYED_HEADER] = "true"
+        return db_payment
     
     # Log payment creation
     audit.AuditLogger.log_create(
         db, current_user.id, "payments", db_payment.id,
         {
-            "payment_id": payment_id,
+            "payment_id": db_payment.payment_id,
             "bill_id": bill_id,
             "amount": payment_data.amount,
             "payment_method": payment_data.payment_method
@@ -315,7 +323,7 @@ async def create_payment(
     
     return db_payment
 
-@router.get("/bills/{bill_id}/payments", response_model=List[schemas.Payment])
+@router.get("/bills/{bill_id}/payments", response_model=List[schemas.Payment], dependencies=[query_budget.budget(3)])
 async def get_bill_payments(
     bill_id: int,
     current_user: models.User = Depends(auth.require_receptionist),
@@ -337,10 +345,12 @@ async def get_bill_payments(
     
     return payments
 
-@router.get("/payments", response_model=List[schemas.Payment])
+@router.get("/payments", response_model=List[schemas.Payment], dependencies=[query_budget.budget(2)])
 async def get_payments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     payment_method: Optional[str] = Query(None, description="Filter by payment method"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
@@ -362,10 +372,30 @@ async def get_payments(
         query = query.filter(models.Payment.payment_date <= end_date)
     
     # Apply pagination
-    payments = query.order_by(models.Payment.payment_date.desc()).offset(skip).limit(limit).all()
+    payments = pagination.paginate(
+        query,
+        [(models.Payment.payment_date, True), (models.Payment.id, True)],
+        limit, cursor, skip, response
+    )
     
     return payments
 
+@router.get("/payments/export")
+async def export_payments(
+    format: str = Query("csv", pattern=exports.FORMAT_PATTERN, description="csv or ndjson"),
+    compress: bool = Query(False, description="gzip the output"),
+    start_date: Optional[datetime] = Query(None, description="Paid on or after"),
+    end_date: Optional[datetime] = Query(None, description="Paid on or before"),
+    updated_since: Optional[datetime] = Query(None, description="Only rows created or changed since this X-Export-Watermark"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Stream payments as CSV or NDJSON for bulk extracts (admin only)."""
+    
+    return exports.streaming_response(
+        db, "payments", format, start_date, end_date, updated_since, compress
+    )
+
 @router.get("/reports/revenue")
 async def get_revenue_report(
     start_date: Optional[datetime] = Query(None, description="Start date"),
@@ -373,79 +403,83 @@ async def get_revenue_report(
     current_user: models.User = Depends(auth.require_receptionist),
     db: Session = Depends(database.get_db)
 ):
-    """Get revenue report for the specified period."""
-    
-    query = db.query(models.Payment)
-    
-    if start_date:
-        query = query.filter(models.Payment.payment_date >= start_date)
-    
-    if end_date:
-        query = query.filter(models.Payment.payment_date <= end_date)
-    
-    # Get total revenue
-    total_revenue = query.with_entities(func.sum(models.Payment.amount)).scalar() or 0
+    """Get revenue report for the specified period from the daily revenue rollup."""
     
-    # Get revenue by payment method
-    revenue_by_method = db.query(
-        models.Payment.payment_method,
-        func.sum(models.Payment.amount).label('total')
-    ).filter(query.whereclause).group_by(models.Payment.payment_method).all()
-    
-    # Get daily revenue
-    daily_revenue = db.query(
-        func.date(models.Payment.payment_date).label('date'),
-        func.sum(models.Payment.amount).label('total')
-    ).filter(query.whereclause).group_by(
-        func.date(models.Payment.payment_date)
-    ).order_by(func.date(models.Payment.payment_date)).all()
+    revenue_by_method = {}
+    daily_revenue = {}
+    for day, method, total in rollups.revenue_by_day(db, start_date, end_date):
+        revenue_by_method[method] = revenue_by_method.get(method, 0.0) + total
+        daily_revenue[day] = daily_revenue.get(day, 0.0) + total
     
     return {
         "period": {
             "start_date": start_date,
             "end_date": end_date
         },
-        "total_revenue": float(total_revenue),
+        "total_revenue": float(sum(daily_revenue.values())),
         "revenue_by_method": [
-            {"method": item.payment_method, "total": float(item.total)}
-            for item in revenue_by_method
+            {"method": method, "total": float(total)}
+            for method, total in sorted(revenue_by_method.items())
         ],
         "daily_revenue": [
-            {"date": item.date.isoformat(), "total": float(item.total)}
-            for item in daily_revenue
+            {"date": day.isoformat(), "total": float(total)}
+            for day, total in sorted(daily_revenue.items())
         ]
     }
 
+@router.post("/reports/revenue/rebuild")
+async def rebuild_revenue_rollup(
+    start_date: Optional[date] = Query(None, description="First day to rebuild"),
+    end_date: Optional[date] = Query(None, description="Last day to rebuild"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Recompute the daily revenue rollup from the payments table."""
+    
+    rows = rollups.rebuild_revenue_daily(db, start_date, end_date)
+    db.commit()
+    
+    return {"message": "Revenue rollup rebuilt", "rows": rows}
+
 @router.get("/reports/outstanding-bills")
 async def get_outstanding_bills_report(
+    response: Response,
+    limit: int = Query(100, ge=0, le=1000, description="Bills listed in outstanding_bills"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    as_of: Optional[datetime] = Query(None, description="Age bills as of this time; defaults to now"),
     current_user: models.User = Depends(auth.require_receptionist),
     db: Session = Depends(database.get_db)
 ):
-    """Get report of outstanding bills."""
-    
-    # Get outstanding bills
-    outstanding_bills = db.query(models.Bill).filter(
-        models.Bill.payment_status.in_([
-            PaymentStatusEnum.PENDING,
-            PaymentStatusEnum.PARTIAL
-        ])
-    ).all()
-    
-    # Calculate totals
-    total_outstanding = sum(bill.total_amount - bill.paid_amount for bill in outstanding_bills)
-    total_bills = len(outstanding_bills)
+    """Get report of outstanding bills.
+
+    Totals and aging buckets are aggregated by the database. The bills
+    themselves are paged oldest due first; follow X-Next-Cursor for more,
+    or stream them all from /reports/outstanding-bills/export.
+    """
+    
+    as_of = as_of or datetime.now()
+    report = receivables.aging_summary(db, as_of)
+    
+    rows = []
+    if limit:
+        rows = pagination.paginate(
+            receivables.detail_query(db), receivables.ORDERING, limit, cursor, 0, response
+        )
+    report["outstanding_bills"] = [receivables.detail_row(row, as_of) for row in rows]
     
-    # Group by status
-    pending_bills = [b for b in outstanding_bills if b.payment_status == PaymentStatusEnum.PENDING]
-    partial_bills = [b for b in outstanding_bills if b.payment_status == PaymentStatusEnum.PARTIAL]
+    return report
+
+@router.get("/reports/outstanding-bills/export")
+async def export_outstanding_bills(
+    format: str = Query("csv", pattern=exports.FORMAT_PATTERN, description="csv or ndjson"),
+    compress: bool = Query(False, description="gzip the output"),
+    as_of: Optional[datetime] = Query(None, description="Age bills as of this time; defaults to now"),
+    current_user: models.User = Depends(auth.require_receptionist),
+    db: Session = Depends(database.get_db)
+):
+    """Stream every outstanding bill with its balance and days past due."""
     
-    return {
-        "total_outstanding_amount": float(total_outstanding),
-        "total_outstanding_bills": total_bills,
-        "pending_bills_count": len(pending_bills),
-        "partial_bills_count": len(partial_bills),
-        "outstanding_bills": outstanding_bills
-    }
+    return receivables.stream_detail(db, format, as_of or datetime.now(), compress)
 
 @router.get("/reports/patient-billing/{patient_id}")
 async def get_patient_billing_report(
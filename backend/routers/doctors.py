@@ -1,10 +1,10 @@
 from typing import List, Optional
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from backend import models, schemas
-from backend.core import database
+from backend.core import database, pagination, query_budget, schedule_summary
 from backend.core import security as auth
 from backend import audit
 from backend.core.security import generate_doctor_id
@@ -70,10 +70,12 @@ async def create_doctor(
     
     return db_doctor
 
-@router.get("/", response_model=List[schemas.Doctor])
+@router.get("/", response_model=List[schemas.Doctor], dependencies=[query_budget.budget(2)])
 async def get_doctors(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     search: Optional[str] = Query(None, description="Search by name, specialization, or license number"),
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db)
@@ -95,10 +97,44 @@ async def get_doctors(
         )
     
     # Apply pagination
-    doctors = query.order_by(models.Doctor.last_name, models.Doctor.first_name).offset(skip).limit(limit).all()
+    doctors = pagination.paginate(
+        query,
+        [
+            (models.Doctor.last_name, False),
+            (models.Doctor.first_name, False),
+            (models.Doctor.id, False)
+        ],
+        limit, cursor, skip, response
+    )
     
     return doctors
 
+@router.get("/schedule/summary")
+async def get_schedule_summaries(
+    date: date = Query(..., description="Date to summarize"),
+    doctor_ids: Optional[List[int]] = Query(None, description="Doctors to include (default: all active)"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get schedule statistics for many doctors on one day."""
+    
+    if not doctor_ids:
+        doctor_ids = [
+            doctor_id for (doctor_id,) in db.query(models.Doctor.id).filter(
+                models.Doctor.is_active == True
+            ).order_by(models.Doctor.id)
+        ]
+    
+    summaries = schedule_summary.doctor_day_summaries(db, doctor_ids, date)
+    
+    return {
+        "date": date.isoformat(),
+        "doctors": [
+            {"doctor_id": doctor_id, "statistics": summaries[doctor_id]}
+            for doctor_id in doctor_ids
+        ]
+    }
+
 @router.get("/{doctor_id}", response_model=schemas.Doctor)
 async def get_doctor(
     doctor_id: int,
@@ -251,7 +287,7 @@ async def delete_doctor(
     
     return {"message": "Doctor deleted successfully"}
 
-@router.get("/{doctor_id}/appointments", response_model=List[schemas.Appointment])
+@router.get("/{doctor_id}/appointments", response_model=List[schemas.Appointment], dependencies=[query_budget.budget(3)])
 async def get_doctor_appointments(
     doctor_id: int,
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
@@ -290,6 +326,7 @@ async def get_doctor_appointments(
 async def get_doctor_schedule(
     doctor_id: int,
     date: date = Query(..., description="Date to get schedule for"),
+    include_appointments: bool = Query(True, description="Include the appointment list"),
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db)
 ):
@@ -307,36 +344,184 @@ async def get_doctor_schedule(
             detail="Doctor not found or inactive"
         )
     
-    # Get appointments for the date
-    start_datetime = datetime.combine(date, datetime.min.time())
-    end_datetime = datetime.combine(date, datetime.max.time())
+    schedule = {
+        "doctor": doctor,
+        "date": date.isoformat(),
+        "statistics": schedule_summary.doctor_day_summary(db, doctor_id, date)
+    }
+    
+    if include_appointments:
+        start_datetime = datetime.combine(date, datetime.min.time())
+        end_datetime = datetime.combine(date, datetime.max.time())
+        schedule["appointments"] = db.query(models.Appointment).filter(
+            and_(
+                models.Appointment.doctor_id == doctor_id,
+                models.Appointment.scheduled_datetime >= start_datetime,
+                models.Appointment.scheduled_datetime <= end_datetime
+            )
+        ).order_by(models.Appointment.scheduled_datetime).all()
+    
+    return schedule
+
+@router.get("/{doctor_id}/working-hours", response_model=List[schemas.WorkingHours])
+async def get_working_hours(
+    doctor_id: int,
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get a doctor's weekly working-hour template."""
+    
+    doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+    
+    return db.query(models.DoctorWorkingHours).filter(
+        models.DoctorWorkingHours.doctor_id == doctor_id
+    ).order_by(
+        models.DoctorWorkingHours.weekday,
+        models.DoctorWorkingHours.start_time
+    ).all()
+
+@router.put("/{doctor_id}/working-hours", response_model=List[schemas.WorkingHours])
+async def replace_working_hours(
+    doctor_id: int,
+    working_hours: List[schemas.WorkingHoursCreate],
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db),
+    request: Request = None
+):
+    """Replace a doctor's weekly working-hour template."""
     
-    appointments = db.query(models.Appointment).filter(
-        and_(
-            models.Appointment.doctor_id == doctor_id,
-            models.Appointment.scheduled_datetime >= start_datetime,
-            models.Appointment.scheduled_datetime <= end_datetime
+    doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
         )
-    ).order_by(models.Appointment.scheduled_datetime).all()
     
-    # Calculate schedule statistics
-    total_appointments = len(appointments)
-    completed_appointments = len([a for a in appointments if a.status == models.AppointmentStatusEnum.COMPLETED])
-    cancelled_appointments = len([a for a in appointments if a.status == models.AppointmentStatusEnum.CANCELLED])
-    no_shows = len([a for a in appointments if a.status == models.AppointmentStatusEnum.NO_SHOW])
+    db.query(models.DoctorWorkingHours).filter(
+        models.DoctorWorkingHours.doctor_id == doctor_id
+    ).delete()
     
-    return {
-        "doctor": doctor,
-        "date": date.isoformat(),
-        "appointments": appointments,
-        "statistics": {
-            "total_appointments": total_appointments,
-            "completed_appointments": completed_appointments,
-            "cancelled_appointments": cancelled_appointments,
-            "no_shows": no_shows,
-            "completion_rate": (completed_appointments / total_appointments * 100) if total_appointments > 0 else 0
-        }
+    rows = [
+        models.DoctorWorkingHours(doctor_id=doctor_id, **item.model_dump())
+        for item in working_hours
+    ]
+    db.add_all(rows)
+    db.commit()
+    
+    # Log template change
+    user_id = current_user.id if current_user else None
+    audit.AuditLogger.log_update(
+        db, user_id, "doctor_working_hours", doctor_id,
+        {}, {"windows": len(rows)}, request
+    )
+    
+    return db.query(models.DoctorWorkingHours).filter(
+        models.DoctorWorkingHours.doctor_id == doctor_id
+    ).order_by(
+        models.DoctorWorkingHours.weekday,
+        models.DoctorWorkingHours.start_time
+    ).all()
+
+@router.get("/{doctor_id}/schedule-exceptions", response_model=List[schemas.ScheduleException])
+async def get_schedule_exceptions(
+    doctor_id: int,
+    start_date: Optional[date] = Query(None, description="Filter by start date"),
+    end_date: Optional[date] = Query(None, description="Filter by end date"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get a doctor's schedule exceptions."""
+    
+    query = db.query(models.DoctorScheduleException).filter(
+        models.DoctorScheduleException.doctor_id == doctor_id
+    )
+    
+    if start_date:
+        query = query.filter(models.DoctorScheduleException.date >= start_date)
+    
+    if end_date:
+        query = query.filter(models.DoctorScheduleException.date <= end_date)
+    
+    return query.order_by(models.DoctorScheduleException.date).all()
+
+@router.post("/{doctor_id}/schedule-exceptions", response_model=schemas.ScheduleException, status_code=201)
+async def create_schedule_exception(
+    doctor_id: int,
+    exception_data: schemas.ScheduleExceptionCreate,
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db),
+    request: Request = None
+):
+    """Add a day off, blocked window or extra hours for a doctor."""
+    
+    doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+    
+    db_exception = models.DoctorScheduleException(
+        doctor_id=doctor_id,
+        **exception_data.model_dump()
+    )
+    db.add(db_exception)
+    db.commit()
+    db.refresh(db_exception)
+    
+    # Log exception creation
+    user_id = current_user.id if current_user else None
+    audit.AuditLogger.log_create(
+        db, user_id, "doctor_schedule_exceptions", db_exception.id,
+        exception_data.model_dump(), request
+    )
+    
+    return db_exception
+
+@router.delete("/{doctor_id}/schedule-exceptions/{exception_id}")
+async def delete_schedule_exception(
+    doctor_id: int,
+    exception_id: int,
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db),
+    request: Request = None
+):
+    """Delete a schedule exception."""
+    
+    db_exception = db.query(models.DoctorScheduleException).filter(
+        models.DoctorScheduleException.id == exception_id,
+        models.DoctorScheduleException.doctor_id == doctor_id
+    ).first()
+    
+    if not db_exception:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Schedule exception not found"
+        )
+    
+    # Store old values for audit
+    old_values = {
+        "doctor_id": doctor_id,
+        "date": db_exception.date,
+        "is_available": db_exception.is_available
     }
+    
+    db.delete(db_exception)
+    db.commit()
+    
+    # Log exception deletion
+    user_id = current_user.id if current_user else None
+    audit.AuditLogger.log_delete(
+        db, user_id, "doctor_schedule_exceptions", exception_id,
+        old_values, request
+    )
+    
+    return {"message": "Schedule exception deleted successfully"}
 
 @router.get("/specializations")
 async def get_doctor_specializations(
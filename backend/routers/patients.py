@@ -1,11 +1,12 @@
+import os
 from typing import List, Optional
-from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_
 from backend import models
 from backend import schemas
-from backend.core import database
+from backend.core import database, documents, duplicates, exports, fieldsets, loading, pagination, patient_facets, patient_import, patient_search, patient_suggest, patient_summary, patient_timeline, query_budget
 from backend.core import security as auth
 from backend import audit
 from backend.core.security import generate_patient_id
@@ -17,9 +18,14 @@ async def create_patient(
     patient_data: schemas.PatientCreate,
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db),
-    request: Request = None
+    request: Request = None,
+    response: Response = None
 ):
-    """Create a new patient."""
+    """Create a new patient.
+
+    Probable duplicates of the new registration are recorded for review
+    and listed in the X-Possible-Duplicates header; they do not block it.
+    """
     
     # Generate unique patient ID
     patient_id = generate_patient_id()
@@ -36,10 +42,26 @@ async def create_patient(
         **patient_dict
     )
     
+    # Look for probable duplicates through the blocking-key indexes
+    matches = duplicates.find_duplicates(db, duplicates.person(patient_data))
+    
     db.add(db_patient)
+    db.flush()
+    if matches:
+        duplicates.record(
+            db.connection(),
+            [duplicates.Match(db_patient.id, candidate.id, score, reasons)
+             for candidate, score, reasons in matches],
+            duplicates.REGISTRATION
+        )
     db.commit()
     db.refresh(db_patient)
     
+    if matches and response is not None:
+        response.headers[duplicates.DUPLICATES_HEADER] = ",".join(
+            str(candidate.id) for candidate, _, _ in matches
+        )
+    
     # Log patient creation
     try:
         if current_user:
@@ -53,32 +75,29 @@ async def create_patient(
     
     return db_patient
 
-@router.get("/", response_model=List[schemas.Patient])
+@router.get("/", response_model=List[schemas.Patient], dependencies=[query_budget.budget(2)])
 async def get_patients(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    search: Optional[str] = Query(None, description="Search by name, phone, or patient ID"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    search: Optional[str] = Query(None, description="Search by name, patient ID, phone, email or insurance provider"),
     gender: Optional[str] = Query(None, description="Filter by gender"),
     min_age: Optional[int] = Query(None, description="Minimum age"),
     max_age: Optional[int] = Query(None, description="Maximum age"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,first_name,last_name"),
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db)
 ):
-    """Get patients with optional filtering and search."""
+    """Get patients with optional filtering and search.
+
+    ``fields`` limits both the columns read and the ones returned.
+    """
     
+    fields = fieldsets.parse(schemas.Patient, fields)
     query = db.query(models.Patient)
-    
-    # Apply search filter
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.Patient.first_name.ilike(search_term),
-                models.Patient.last_name.ilike(search_term),
-                models.Patient.patient_id.ilike(search_term),
-                models.Patient.phone.ilike(search_term)
-            )
-        )
+    if fields:
+        query = query.options(*fieldsets.options(models.Patient, fields))
     
     # Apply gender filter
     if gender:
@@ -94,11 +113,189 @@ async def get_patients(
             min_birth_date = today.replace(year=today.year - max_age - 1)
             query = query.filter(models.Patient.date_of_birth > min_birth_date)
     
-    # Apply pagination
-    patients = query.offset(skip).limit(limit).all()
+    # Apply indexed search, ranked by relevance, and pagination
+    patients = patient_search.paginate(
+        db, query, {"any": search}, limit, cursor, skip, response
+    )
+    if fields:
+        return fieldsets.render(patients, schemas.Patient, fields, response)
     
     return patients
 
+@router.post("/duplicates/check", response_model=List[schemas.PatientDuplicateCandidate])
+async def check_patient_duplicates(
+    patient_data: schemas.PatientCreate,
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Probable existing registrations of a patient, before creating it."""
+    
+    return [
+        {**candidate._asdict(), "score": score, "reasons": list(reasons)}
+        for candidate, score, reasons in duplicates.find_duplicates(db, duplicates.person(patient_data))
+    ]
+
+@router.get("/duplicates", response_model=List[schemas.PatientDuplicate])
+async def get_patient_duplicates(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Recorded probable duplicate pairs, newest first."""
+    
+    query = db.query(models.PatientDuplicate)
+    return pagination.paginate(
+        query, [(models.PatientDuplicate.id, True)], limit, cursor, 0, response
+    )
+
+def _import_format(format: str) -> str:
+    if format not in patient_import.FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of: {', '.join(patient_import.FORMATS)}"
+        )
+    return format
+
+@router.post("/import/start", response_model=schemas.PatientImportStart, status_code=201)
+async def start_patient_import(
+    format: str = Query(..., description="csv or ndjson"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Create an import and return its key before any data is sent (admin only).
+    
+    Upload the file to POST /patients/import under this key; if the upload
+    is interrupted, re-sending it under the same key resumes it.
+    """
+    
+    job = patient_import.start(db, _import_format(format), user_id=current_user.id if current_user else None)
+    return schemas.PatientImportStart(
+        import_key=job.key, format=job.format, status=job.status, rows_processed=job.rows_processed
+    )
+
+@router.post("/import", response_model=schemas.PatientImportResult)
+async def import_patients(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson; detected from the content type by default"),
+    import_key: Optional[str] = Query(None, max_length=100, description="Key of the import, from POST /patients/import/start or chosen by the client; re-send the same file under the same key to resume it"),
+    dry_run: bool = Query(False, description="Validate without writing anything"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Import patients from a streamed CSV or NDJSON body (admin only).
+    
+    The body is parsed as it arrives and written in committed chunks, so
+    an interrupted import resumes from the last chunk when re-sent with
+    the same import key. Failed rows are reported and skipped. Without an
+    import key one is generated but only returned once the upload ends,
+    so an interruptible upload should get its key from
+    POST /patients/import/start first.
+    """
+    
+    format = _import_format(format or patient_import.detect_format(request.headers.get("content-type", "")))
+    
+    user_id = current_user.id if current_user else None
+    if dry_run:
+        job = import_key and db.query(models.PatientImport).filter(
+            models.PatientImport.key == import_key
+        ).first()
+    else:
+        job = patient_import.start(db, format, import_key, user_id)
+    if job and job.format != format:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Import {job.key} was started as {job.format}"
+        )
+    
+    parser = patient_import.RecordParser(format)
+    importer = patient_import.PatientImporter(
+        db, format, job or None, dry_run=dry_run, user_id=user_id, request=request
+    )
+    try:
+        async for data in request.stream():
+            importer.add(parser.feed(data))
+        importer.add(parser.close())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return importer.finish()
+
+@router.get("/export")
+async def export_patients(
+    format: str = Query("csv", pattern=exports.FORMAT_PATTERN, description="csv or ndjson"),
+    compress: bool = Query(False, description="gzip the output"),
+    start_date: Optional[datetime] = Query(None, description="Registered on or after"),
+    end_date: Optional[datetime] = Query(None, description="Registered on or before"),
+    updated_since: Optional[datetime] = Query(None, description="Only rows created or changed since this X-Export-Watermark"),
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Stream patients as CSV or NDJSON for bulk extracts (admin only)."""
+    
+    return exports.streaming_response(
+        db, "patients", format, start_date, end_date, updated_since, compress
+    )
+
+@router.get("/suggest", response_model=List[schemas.PatientSuggestion])
+async def suggest_patients(
+    q: str = Query(..., min_length=1, max_length=100, description="Start of a name or patient ID, or the last digits of a phone number"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Typeahead suggestions served from the in-memory prefix index."""
+    
+    patient_suggest.index.refresh(db)
+    return [suggestion._asdict() for suggestion in patient_suggest.index.suggest(q, limit)]
+
+@router.get("/suggest/stats", response_model=schemas.PatientSuggestStats)
+async def get_suggest_stats(
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Size and version of this worker's suggest index (admin only)."""
+    
+    patient_suggest.index.refresh(db)
+    return patient_suggest.index.stats()
+
+@router.get("/facets", response_model=schemas.PatientFacets)
+async def get_patient_facets(
+    gender: List[str] = Query([], description="Filter by gender; repeat for alternatives"),
+    blood_group: List[str] = Query([], description="Filter by blood group; repeat for alternatives"),
+    insurance_provider: List[str] = Query([], description="Filter by insurance provider; repeat for alternatives"),
+    has_allergies: Optional[bool] = Query(None, description="Filter by allergies"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Patient counts by gender, blood group, insurance provider and allergies.
+    
+    Each facet is narrowed by the filters on the others, all in one call,
+    from the in-memory bitmap index.
+    """
+    
+    patient_facets.index.refresh(db)
+    return patient_facets.index.counts({
+        "gender": gender,
+        "blood_group": blood_group,
+        "insurance_provider": insurance_provider,
+        "has_allergies": [] if has_allergies is None else [has_allergies],
+    })
+
+@router.get("/facets/stats", response_model=schemas.PatientFacetStats)
+async def get_facet_stats(
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Size and version of this worker's facet index (admin only)."""
+    
+    patient_facets.index.refresh(db)
+    return patient_facets.index.stats()
+
 @router.get("/{patient_id}", response_model=schemas.Patient)
 async def get_patient(
     patient_id: int,
@@ -244,7 +441,7 @@ async def delete_patient(
     
     return {"message": "Patient deleted successfully"}
 
-@router.get("/{patient_id}/appointments", response_model=List[schemas.Appointment])
+@router.get("/{patient_id}/appointments", response_model=List[schemas.Appointment], dependencies=[query_budget.budget(3)])
 async def get_patient_appointments(
     patient_id: int,
     current_user: models.User = Depends(auth.require_staff),
@@ -268,7 +465,7 @@ async def get_patient_appointments(
 
 # Medical records endpoint removed - functionality moved to separate service
 
-@router.get("/{patient_id}/bills", response_model=List[schemas.Bill])
+@router.get("/{patient_id}/bills", response_model=List[schemas.Bill], dependencies=[query_budget.budget(4)])
 async def get_patient_bills(
     patient_id: int,
     current_user: models.User = Depends(auth.require_receptionist),
@@ -284,7 +481,9 @@ async def get_patient_bills(
             detail="Patient not found"
         )
     
-    bills = db.query(models.Bill).filter(
+    bills = db.query(models.Bill).options(
+        *loading.eager(models.Bill, schemas.Bill)
+    ).filter(
         models.Bill.patient_id == patient_id
     ).order_by(models.Bill.bill_date.desc()).all()
     
@@ -298,43 +497,161 @@ async def get_patient_summary(
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db)
 ):
-    """Get a comprehensive summary of a patient."""
+    """Get a comprehensive summary of a patient.
+
+    Served from a per-process cache that appointment, billing and patient
+    writes invalidate; a miss costs one query.
+    """
     
-    # Verify patient exists
-    patient = db.query(models.Patient).filter(models.Patient.id == patient_id).first()
+    summary = patient_summary.patient_summary(db, patient_id)
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found"
+        )
+    
+    return summary
+
+@router.get("/{patient_id}/timeline", response_model=List[schemas.PatientTimelineEntry])
+async def get_patient_timeline(
+    patient_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    types: Optional[List[str]] = Query(None, description="Entry types to include: appointment, bill, payment, document"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get a patient's appointments, bills, payments and documents, newest first.
+
+    Pages by keyset; pass the X-Next-Cursor header of one page as the
+    cursor of the next. Bills and payments are only listed for users who
+    may see the patient's bills.
+    """
+    
+    unknown = set(types or ()) - set(patient_timeline.ENTRY_TYPES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown entry types: {', '.join(sorted(unknown))}"
+        )
+    
+    patient = db.query(models.Patient.id).filter(models.Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Patient not found"
         )
     
-    # Get counts
-    appointment_count = db.query(models.Appointment).filter(
-        models.Appointment.patient_id == patient_id
-    ).count()
+    types = list(types or patient_timeline.ENTRY_TYPES)
+    if current_user.role not in ("admin", "receptionist"):
+        types = [type for type in types if type not in patient_timeline.FINANCIAL_TYPES]
     
-    bill_count = db.query(models.Bill).filter(
-        models.Bill.patient_id == patient_id
-    ).count()
+    try:
+        entries, next_cursor = patient_timeline.timeline_page(db, patient_id, limit, cursor, types)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
     
-    # Get latest records
-    latest_appointment = db.query(models.Appointment).filter(
-        models.Appointment.patient_id == patient_id
-    ).order_by(models.Appointment.scheduled_datetime.desc()).first()
+    return entries
+
+@router.post("/{patient_id}/documents", response_model=schemas.PatientDocument, status_code=201)
+async def upload_patient_document(
+    patient_id: int,
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=255, description="Original file name"),
+    document_type: str = Query(..., min_length=1, max_length=50, description="e.g. lab_report, scan, consent"),
+    description: Optional[str] = Query(None),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Upload a patient document sent as the raw request body.
     
-    latest_bill = db.query(models.Bill).filter(
-        models.Bill.patient_id == patient_id
-    ).order_by(models.Bill.bill_date.desc()).first()
-    
-    return {
-        "patient": patient,
-        "summary": {
-                    "total_appointments": appointment_count,
-        "total_bills": bill_count,
-            "latest_appointment": latest_appointment,
-            "latest_bill": latest_bill
-        }
-    }
+    The body is streamed to disk and hashed as it arrives, so memory use
+    does not grow with the file. Identical files are stored once however
+    often they are uploaded.
+    """
+    
+    extension = documents.check_filename(filename)
+    documents.check_size(request.headers.get("content-length"))
+    
+    patient = db.query(models.Patient.id).filter(models.Patient.id == patient_id).first()
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found"
+        )
+    # Return the connection to the pool while the body streams in
+    db.commit()
+    
+    stored = await documents.store(request.stream())
+    document = models.PatientDocument(
+        patient_id=patient_id,
+        filename=stored.content_hash + extension,
+        original_filename=os.path.basename(filename),
+        file_path=stored.path,
+        document_type=document_type,
+        description=description,
+        file_size=stored.size,
+        content_hash=stored.content_hash,
+        content_type=documents.content_type(filename, request.headers.get("content-type")),
+        uploaded_by=current_user.id
+    )
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+    
+    try:
+        audit.AuditLogger.log_create(
+            db, current_user.id, "patient_documents", document.id,
+            {"patient_id": patient_id, "original_filename": document.original_filename,
+             "document_type": document_type, "content_hash": stored.content_hash},
+            request
+        )
+    except Exception as e:
+        # Log error but don't fail the request
+        print(f"Audit logging failed: {e}")
+    
+    return document
+
+@router.get("/{patient_id}/documents", response_model=List[schemas.PatientDocument])
+async def get_patient_documents(
+    patient_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Get a patient's documents, newest first."""
+    
+    query = db.query(models.PatientDocument).filter(models.PatientDocument.patient_id == patient_id)
+    return pagination.paginate(
+        query, [(models.PatientDocument.id, True)], limit, cursor, skip, response
+    )
+
+@router.get("/{patient_id}/documents/{document_id}/content")
+async def download_patient_document(
+    patient_id: int,
+    document_id: int,
+    current_user: models.User = Depends(auth.require_staff),
+    db: Session = Depends(database.get_db)
+):
+    """Download a patient document; supports Range requests."""
+    
+    document = db.query(models.PatientDocument).filter(
+        models.PatientDocument.id == document_id,
+        models.PatientDocument.patient_id == patient_id
+    ).first()
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    return documents.download(document)
 
 @router.get("/search/advanced")
 async def advanced_patient_search(
@@ -344,8 +661,10 @@ async def advanced_patient_search(
     blood_group: Optional[str] = Query(None, description="Filter by blood group"),
     insurance_provider: Optional[str] = Query(None, description="Filter by insurance provider"),
     has_allergies: Optional[bool] = Query(None, description="Filter by allergies"),
+    response: Response = None,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     current_user: models.User = Depends(auth.require_staff),
     db: Session = Depends(database.get_db)
 ):
@@ -354,36 +673,36 @@ async def advanced_patient_search(
     query = db.query(models.Patient)
     
     # Apply filters
-    if name:
-        name_term = f"%{name}%"
-        query = query.filter(
-            or_(
-                models.Patient.first_name.ilike(name_term),
-                models.Patient.last_name.ilike(name_term)
-            )
-        )
-    
-    if phone:
-        query = query.filter(models.Patient.phone.ilike(f"%{phone}%"))
-    
-    if email:
-        query = query.filter(models.Patient.email.ilike(f"%{email}%"))
-    
     if blood_group:
         query = query.filter(models.Patient.blood_group == blood_group)
     
-    if insurance_provider:
-        query = query.filter(
-            models.Patient.insurance_provider.ilike(f"%{insurance_provider}%")
-        )
-    
     if has_allergies is not None:
         if has_allergies:
             query = query.filter(models.Patient.allergies.isnot(None))
         else:
             query = query.filter(models.Patient.allergies.is_(None))
     
-    # Apply pagination
-    patients = query.offset(skip).limit(limit).all()
+    # Apply indexed text search, ranked by relevance, and pagination
+    criteria = {
+        "name": name,
+        "phone": phone,
+        "email": email,
+        "insurance_provider": insurance_provider,
+    }
+    patients = patient_search.paginate(
+        db, query, criteria, limit, cursor, skip, response
+    )
     
     return patients
+
+@router.post("/search/rebuild")
+async def rebuild_patient_search(
+    current_user: models.User = Depends(auth.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Backfill normalized phones and rebuild the patient search index (admin only)."""
+    
+    normalized = patient_search.rebuild(db)
+    db.commit()
+    
+    return {"index": patient_search.index_for(db).name, "phones_normalized": normalized}
@@ -1,6 +1,6 @@
 from datetime import datetime, date, time
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import Enum
 
 
@@ -26,6 +26,10 @@ class AppointmentCreate(AppointmentBase):
     pass
 
 
+class BulkAppointmentRow(AppointmentCreate):
+    status: AppointmentStatusEnum = AppointmentStatusEnum.SCHEDULED
+
+
 class AppointmentUpdate(BaseModel):
     patient_id: Optional[int] = None
     doctor_id: Optional[int] = None
@@ -40,6 +44,7 @@ class Appointment(AppointmentBase):
     id: int
     appointment_id: str
     status: AppointmentStatusEnum
+    series_id: Optional[int] = None
     created_by: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -48,6 +53,93 @@ class Appointment(AppointmentBase):
         from_attributes = True
 
 
+class BulkStatusTransition(BaseModel):
+    status: AppointmentStatusEnum
+    appointment_ids: Optional[List[int]] = Field(None, min_length=1)
+    scheduled_date: Optional[date] = None
+    doctor_id: Optional[int] = None
+    current_status: Optional[List[AppointmentStatusEnum]] = None
+    dry_run: bool = False
+
+    @model_validator(mode='after')
+    def check_selection(self):
+        if self.appointment_ids is None and self.scheduled_date is None:
+            raise ValueError('Provide appointment_ids or a scheduled_date')
+        return self
+
+
+class BulkStatusTransitionResult(BaseModel):
+    status: AppointmentStatusEnum
+    dry_run: bool
+    updated: int
+    appointment_ids: List[int]
+    skipped_ids: List[int] = []
+
+
+class RecurrenceFrequencyEnum(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+
+class AppointmentSeriesBase(BaseModel):
+    patient_id: int
+    doctor_id: int
+    start_datetime: datetime
+    duration_minutes: int = Field(30, ge=15, le=480)
+    frequency: RecurrenceFrequencyEnum = RecurrenceFrequencyEnum.WEEKLY
+    interval: int = Field(1, ge=1, le=52)
+    weekdays: List[int] = []
+    until: Optional[date] = None
+    count: Optional[int] = Field(None, ge=1, le=1000)
+    reason: str = Field(..., min_length=1)
+    notes: Optional[str] = None
+
+
+class AppointmentSeriesCreate(AppointmentSeriesBase):
+    @model_validator(mode='after')
+    def validate_rule(self):
+        if any(day < 0 or day > 6 for day in self.weekdays):
+            raise ValueError('Weekdays must be between 0 (Monday) and 6 (Sunday)')
+        if self.weekdays and self.frequency != RecurrenceFrequencyEnum.WEEKLY:
+            raise ValueError('Weekdays only apply to weekly series')
+        if self.until and self.until < self.start_datetime.date():
+            raise ValueError('Until must not be before the first occurrence')
+        return self
+
+
+class AppointmentSeries(AppointmentSeriesBase):
+    id: int
+    materialized_until: Optional[date] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+
+    @field_validator('weekdays', mode='before')
+    @classmethod
+    def parse_weekdays(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [int(part) for part in value.split(',') if part]
+        return value
+
+    class Config:
+        from_attributes = True
+
+
+class SeriesOccurrence(BaseModel):
+    scheduled_datetime: datetime
+    appointment_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class AppointmentSeriesResult(BaseModel):
+    series: Optional[AppointmentSeries] = None
+    dry_run: bool
+    created: int
+    conflicts: int
+    occurrences: List[SeriesOccurrence]
+
+
 class SmartAppointmentRequest(BaseModel):
     patient_id: int
     doctor_id: int
@@ -56,4 +148,53 @@ class SmartAppointmentRequest(BaseModel):
     duration_minutes: int = Field(30, ge=15, le=480)
     reason: str = Field(..., min_length=1)
     notes: Optional[str] = None
-    appointment_id: Optional[str] = None 
\ No newline at end of file
+    appointment_id: Optional[str] = None
+
+
+class AvailableSlot(BaseModel):
+    doctor_id: int
+    doctor_name: str
+    specialization: str
+    start: datetime
+    end: datetime
+
+
+class AvailabilitySearchResult(BaseModel):
+    specialization: Optional[str] = None
+    start_date: date
+    end_date: date
+    duration_minutes: int
+    slots: List[AvailableSlot]
+
+
+class CalendarWindow(BaseModel):
+    start: time
+    end: time
+    slot_minutes: int
+
+
+class CalendarSlot(BaseModel):
+    time: str
+    datetime: datetime
+    available: bool
+    appointment_id: Optional[int] = None
+
+
+class CalendarDay(BaseModel):
+    date: date
+    working_hours: List[CalendarWindow]
+    time_slots: List[CalendarSlot]
+
+
+class DoctorCalendar(BaseModel):
+    doctor_id: int
+    doctor_name: str
+    specialization: str
+    days: List[CalendarDay]
+    appointments: List[Appointment]
+
+
+class CalendarRange(BaseModel):
+    start_date: date
+    end_date: date
+    calendars: List[DoctorCalendar]
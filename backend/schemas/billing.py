@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import Enum
 
 
@@ -68,6 +68,23 @@ class BillBase(BaseModel):
 class BillCreate(BillBase):
     bill_items: List[BillItemCreate]
 
+    @model_validator(mode='after')
+    def validate_item_totals(self):
+        for index, item in enumerate(self.bill_items):
+            calculated_price = item.quantity * item.unit_price
+            if abs(item.total_price - calculated_price) > 0.01:
+                raise ValueError(
+                    f'Item {index} ({item.item_name}) total price ({item.total_price}) must equal '
+                    f'quantity ({item.quantity}) x unit price ({item.unit_price}) = {calculated_price}'
+                )
+        if self.bill_items:
+            items_total = sum(item.total_price for item in self.bill_items)
+            if abs(self.subtotal - items_total) > 0.01:
+                raise ValueError(
+                    f'Subtotal ({self.subtotal}) must equal the sum of item totals ({items_total})'
+                )
+        return self
+
 
 class BillUpdate(BaseModel):
     patient_id: Optional[int] = None
@@ -17,4 +17,20 @@ class SuccessResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     error: str
-    detail: Optional[str] = None 
\ No newline at end of file
+    detail: Optional[str] = None
+
+
+class BulkRowResult(BaseModel):
+    row: int
+    success: bool
+    id: Optional[int] = None
+    reference: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkImportResult(BaseModel):
+    total: int
+    created: int
+    failed: int
+    dry_run: bool
+    results: List[BulkRowResult]
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import datetime, date, time
 from typing import Optional
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
 
 class DoctorBase(BaseModel):
@@ -47,4 +47,60 @@ class Doctor(DoctorBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+
+class WorkingHoursBase(BaseModel):
+    weekday: int = Field(..., ge=0, le=6)  # 0 = Monday ... 6 = Sunday
+    start_time: time
+    end_time: time
+    slot_minutes: int = Field(30, ge=5, le=240)
+
+    @model_validator(mode='after')
+    def validate_times(self):
+        if self.end_time <= self.start_time:
+            raise ValueError('End time must be after start time')
+        return self
+
+
+class WorkingHoursCreate(WorkingHoursBase):
+    pass
+
+
+class WorkingHours(WorkingHoursBase):
+    id: int
+    doctor_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class ScheduleExceptionBase(BaseModel):
+    date: date
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    is_available: bool = False
+    slot_minutes: int = Field(30, ge=5, le=240)
+    reason: Optional[str] = Field(None, max_length=255)
+
+    @model_validator(mode='after')
+    def validate_times(self):
+        if (self.start_time is None) != (self.end_time is None):
+            raise ValueError('Start and end time must be given together')
+        if self.start_time and self.end_time <= self.start_time:
+            raise ValueError('End time must be after start time')
+        if self.is_available and self.start_time is None:
+            raise ValueError('Extra availability needs a start and end time')
+        return self
+
+
+class ScheduleExceptionCreate(ScheduleExceptionBase):
+    pass
+
+
+class ScheduleException(ScheduleExceptionBase):
+    id: int
+    doctor_id: int
+
+    class Config:
+        from_attributes = True
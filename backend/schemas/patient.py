@@ -1,7 +1,8 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import Dict, List, Optional, Union
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from enum import Enum
+from .common import BulkRowResult
 
 # Enums
 class GenderEnum(str, Enum):
@@ -62,6 +63,80 @@ class Patient(PatientBase):
     class Config:
         from_attributes = True
 
+class PatientSuggestion(BaseModel):
+    id: int
+    patient_id: str
+    first_name: str
+    last_name: str
+    date_of_birth: date
+
+class PatientSuggestStats(BaseModel):
+    patients: int
+    entries: int
+    version: int
+    estimated_bytes: int
+    loaded_at: Optional[datetime] = None
+
+class PatientDuplicateCandidate(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    date_of_birth: date
+    score: float
+    reasons: List[str] = []
+
+class PatientDuplicate(BaseModel):
+    id: int
+    patient_id: int
+    duplicate_of_id: int
+    score: float
+    reasons: List[str] = []
+    source: str
+    detected_at: Optional[datetime] = None
+
+    @field_validator('reasons', mode='before')
+    @classmethod
+    def parse_reasons(cls, v):
+        if isinstance(v, str):
+            return [reason for reason in v.split(',') if reason]
+        return v or []
+
+    class Config:
+        from_attributes = True
+
+class PatientFacetCount(BaseModel):
+    value: Optional[Union[bool, str]] = None
+    count: int
+
+class PatientFacets(BaseModel):
+    total: int
+    facets: Dict[str, List[PatientFacetCount]]
+
+class PatientFacetStats(BaseModel):
+    patients: int
+    values: Dict[str, int]
+    estimated_bytes: int
+    version: int
+    loaded_at: Optional[datetime] = None
+
+class PatientImportStart(BaseModel):
+    import_key: str
+    format: str
+    status: str
+    rows_processed: int
+
+class PatientImportResult(BaseModel):
+    import_key: Optional[str] = None
+    format: str
+    status: str
+    total: int
+    skipped: int
+    created: int
+    failed: int
+    dry_run: bool
+    errors: List[BulkRowResult]
+    errors_truncated: bool = False
+
 class PatientDocumentBase(BaseModel):
     document_type: str = Field(..., min_length=1, max_length=50)
     description: Optional[str] = None
@@ -76,11 +151,22 @@ class PatientDocument(PatientDocumentBase):
     original_filename: str
     file_path: str
     file_size: Optional[int] = None
+    content_hash: Optional[str] = None
+    content_type: Optional[str] = None
     uploaded_by: int
     uploaded_at: datetime
     class Config:
         from_attributes = True
 
+class PatientTimelineEntry(BaseModel):
+    type: str  # appointment, bill, payment, document
+    id: int
+    occurred_at: datetime
+    reference: Optional[str] = None
+    status: Optional[str] = None
+    amount: Optional[float] = None
+    description: Optional[str] = None
+
 class EmergencyContactUpdate(BaseModel):
     name: Optional[str] = Field(None, max_length=100)
     phone: Optional[str] = Field(None, max_length=20)
@@ -0,0 +1,214 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Bill, BillItem, AuditLog
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements executed while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def bill_payload(patient_id, items, tax=0.0, discount=0.0):
+    line_items = [
+        {
+            "item_name": f"Item {index}",
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "total_price": round(quantity * unit_price, 2),
+        }
+        for index, (quantity, unit_price) in enumerate(items)
+    ]
+    subtotal = round(sum(item["total_price"] for item in line_items), 2)
+    return {
+        "patient_id": patient_id,
+        "bill_date": "2030-01-01T09:00:00",
+        "due_date": "2030-01-31T09:00:00",
+        "subtotal": subtotal,
+        "tax_amount": tax,
+        "discount_amount": discount,
+        "total_amount": round(subtotal + tax - discount, 2),
+        "bill_items": line_items,
+    }
+
+
+def post_bill(client, auth_headers, statements, payload):
+    statements.clear()
+    response = client.post("/billing/bills", json=payload, headers=auth_headers)
+    executed = [
+        statement for statement in statements
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE"))
+    ]
+    return response, executed
+
+
+def test_create_bill_returns_items(client, auth_headers, test_patient, db_session):
+    payload = bill_payload(test_patient.id, [(2, 12.5), (1, 40.0)], tax=5.0, discount=2.0)
+    response = client.post("/billing/bills", json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_amount"] == 68.0
+    assert data["payment_status"] == "pending"
+    assert data["created_at"]
+    assert [item["item_name"] for item in data["bill_items"]] == ["Item 0", "Item 1"]
+    assert all(item["bill_id"] == data["id"] for item in data["bill_items"])
+
+    assert db_session.query(BillItem).filter(BillItem.bill_id == data["id"]).count() == 2
+    audit = db_session.query(AuditLog).filter(AuditLog.table_name == "bills").one()
+    assert audit.record_id == data["id"]
+
+
+def test_create_bill_round_trips_do_not_grow_with_items(client, auth_headers, test_patient, statements):
+    small, small_statements = post_bill(client, auth_headers, statements, bill_payload(test_patient.id, [(1, 10.0)]))
+    large, large_statements = post_bill(
+        client, auth_headers, statements, bill_payload(test_patient.id, [(index % 3 + 1, 1.25) for index in range(150)])
+    )
+    assert small.status_code == 200
+    assert large.status_code == 200
+    assert len(large.json()["bill_items"]) == 150
+    assert len(large_statements) == len(small_statements)
+
+    # The only SELECTs are the authentication lookup and the existence check
+    bill_statements = [statement for statement in large_statements if "bill" in statement.lower()]
+    assert not any(statement.lstrip().upper().startswith("SELECT") for statement in bill_statements)
+
+
+def test_create_bill_rejects_item_total_mismatch(client, auth_headers, test_patient, db_session):
+    payload = bill_payload(test_patient.id, [(3, 10.0)])
+    payload["bill_items"][0]["total_price"] = 20.0
+    payload["subtotal"] = payload["total_amount"] = 20.0
+    response = client.post("/billing/bills", json=payload, headers=auth_headers)
+    assert response.status_code == 422
+    assert "quantity (3) x unit price (10.0)" in response.text
+    assert db_session.query(Bill).count() == 0
+
+
+def test_create_bill_rejects_subtotal_mismatch(client, auth_headers, test_patient, db_session):
+    payload = bill_payload(test_patient.id, [(1, 10.0), (1, 15.0)])
+    payload["subtotal"] = payload["total_amount"] = 30.0
+    response = client.post("/billing/bills", json=payload, headers=auth_headers)
+    assert response.status_code == 422
+    assert "sum of item totals (25.0)" in response.text
+    assert db_session.query(Bill).count() == 0
+
+
+def test_create_bill_missing_references(client, auth_headers, test_patient, db_session):
+    response = client.post("/billing/bills", json=bill_payload(9999, [(1, 10.0)]), headers=auth_headers)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Patient not found"
+
+    payload = bill_payload(test_patient.id, [(1, 10.0)])
+    payload["appointment_id"] = 9999
+    response = client.post("/billing/bills", json=payload, headers=auth_headers)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Appointment not found"
+    assert db_session.query(Bill).count() == 0
+    assert db_session.query(BillItem).count() == 0
+
+
+def test_create_bill_failure_leaves_no_partial_rows(client, auth_headers, test_patient, db_session, monkeypatch):
+    from backend import audit
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("audit unavailable")
+
+    monkeypatch.setattr(audit.AuditLogger, "log_bulk_create", staticmethod(fail))
+    with pytest.raises(RuntimeError):
+        client.post("/billing/bills", json=bill_payload(test_patient.id, [(1, 10.0)] * 5), headers=auth_headers)
+    assert db_session.query(Bill).count() == 0
+    assert db_session.query(BillItem).count() == 0
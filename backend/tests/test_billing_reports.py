@@ -0,0 +1,367 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import csv
+import io
+import random
+
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import receivables, rollups
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Bill, Payment, PaymentStatusEnum, RevenueDaily
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements executed while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="function")
+def test_bill(db_session, test_patient):
+    bill = Bill(
+        bill_id="BILL001",
+        patient_id=test_patient.id,
+        bill_date=datetime(2030, 1, 1),
+        due_date=datetime(2030, 1, 31),
+        subtotal=1_000_000.0,
+        total_amount=1_000_000.0,
+    )
+    db_session.add(bill)
+    db_session.commit()
+    return bill
+
+
+def rollup(db_session):
+    return {
+        (row.day, row.payment_method): (round(row.total, 2), row.payments)
+        for row in db_session.query(RevenueDaily).all()
+        if row.payments
+    }
+
+
+def add_payment(db_session, bill, when, amount, method="cash"):
+    payment = Payment(
+        payment_id=f"PAY{random.getrandbits(40):x}",
+        bill_id=bill.id,
+        amount=amount,
+        payment_method=method,
+        payment_date=when,
+    )
+    db_session.add(payment)
+    db_session.commit()
+    return payment
+
+
+class TestRevenueRollup:
+    """Test the incrementally maintained daily revenue rollup"""
+
+    def test_create_payment_updates_rollup(self, client, auth_headers, db_session, test_bill):
+        for method, amount in (("cash", 40.0), ("card", 25.5), ("cash", 10.0)):
+            response = client.post(f"/billing/bills/{test_bill.id}/payments", json={
+                "bill_id": test_bill.id,
+                "amount": amount,
+                "payment_method": method,
+                "payment_date": "2030-01-05T14:30:00",
+            }, headers=auth_headers)
+            assert response.status_code == 200
+
+        assert rollup(db_session) == {
+            (date(2030, 1, 5), "cash"): (50.0, 2),
+            (date(2030, 1, 5), "card"): (25.5, 1),
+        }
+
+    def test_reversal_and_corrections(self, db_session, test_bill):
+        payment = add_payment(db_session, test_bill, datetime(2030, 1, 5, 9), 100.0)
+        add_payment(db_session, test_bill, datetime(2030, 1, 5, 10), 30.0)
+
+        payment.payment_date = datetime(2030, 1, 6, 9)
+        payment.payment_method = "card"
+        payment.amount = 90.0
+        db_session.commit()
+        assert rollup(db_session) == {
+            (date(2030, 1, 5), "cash"): (30.0, 1),
+            (date(2030, 1, 6), "card"): (90.0, 1),
+        }
+
+        db_session.delete(payment)
+        db_session.commit()
+        assert rollup(db_session) == {(date(2030, 1, 5), "cash"): (30.0, 1)}
+
+    def test_rebuild(self, client, auth_headers, db_session, test_bill):
+        add_payment(db_session, test_bill, datetime(2030, 1, 5, 9), 100.0)
+        add_payment(db_session, test_bill, datetime(2030, 1, 7, 9), 20.0, "card")
+        expected = rollup(db_session)
+        db_session.query(RevenueDaily).delete()
+        db_session.commit()
+
+        response = client.post("/billing/reports/revenue/rebuild", headers=auth_headers)
+        assert response.json()["rows"] == 2
+        db_session.expire_all()
+        assert rollup(db_session) == expected
+
+
+class TestRevenueReport:
+    """Test the revenue report served from the rollup"""
+
+    @pytest.fixture
+    def payments(self, db_session, test_bill):
+        random.seed(7)
+        rows = []
+        for _ in range(300):
+            when = datetime(2030, 1, 1) + timedelta(minutes=random.randrange(60 * 24 * 60))
+            rows.append(Payment(
+                payment_id=f"PAY{len(rows):05d}",
+                bill_id=test_bill.id,
+                amount=float(random.randrange(1, 500)),
+                payment_method=random.choice(["cash", "card", "insurance"]),
+                payment_date=when,
+            ))
+        db_session.add_all(rows)
+        db_session.commit()
+        return [(row.payment_date, row.payment_method, row.amount) for row in rows]
+
+    def expected(self, payments, start, end):
+        selected = [
+            row for row in payments
+            if (start is None or row[0] >= start) and (end is None or row[0] <= end)
+        ]
+        by_method, by_day = {}, {}
+        for when, method, amount in selected:
+            by_method[method] = by_method.get(method, 0) + amount
+            by_day[when.date().isoformat()] = by_day.get(when.date().isoformat(), 0) + amount
+        return sum(amount for _, _, amount in selected), by_method, by_day
+
+    def test_matches_payments_for_any_range(self, client, auth_headers, payments):
+        ranges = [
+            (None, None),
+            (datetime(2030, 1, 10), datetime(2030, 2, 10)),
+            (datetime(2030, 1, 10, 13, 30), datetime(2030, 2, 10, 8, 15)),
+            (datetime(2030, 1, 20, 6), datetime(2030, 1, 20, 18)),
+            (datetime(2030, 1, 20, 6), datetime(2030, 1, 21, 5)),
+            (None, datetime(2030, 1, 15, 12)),
+            (datetime(2030, 2, 1, 0, 0, 1), None),
+            (datetime(2030, 1, 5), datetime(2030, 1, 5, 23, 59, 59, 999999)),
+        ]
+        for start, end in ranges:
+            params = {}
+            if start:
+                params["start_date"] = start.isoformat()
+            if end:
+                params["end_date"] = end.isoformat()
+            report = client.get("/billing/reports/revenue", params=params, headers=auth_headers).json()
+
+            total, by_method, by_day = self.expected(payments, start, end)
+            assert report["total_revenue"] == pytest.approx(total), (start, end)
+            assert {row["method"]: row["total"] for row in report["revenue_by_method"]} == pytest.approx(by_method)
+            assert {row["date"]: row["total"] for row in report["daily_revenue"]} == pytest.approx(by_day)
+            assert [row["date"] for row in report["daily_revenue"]] == sorted(by_day)
+
+    def test_whole_days_do_not_read_payments(self, client, auth_headers, payments, statements):
+        response = client.get(
+            "/billing/reports/revenue",
+            params={"start_date": "2030-01-01T00:00:00", "end_date": "2030-02-28T23:59:59.999999"},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert not any("FROM payments" in statement for statement in statements)
+
+
+AS_OF = datetime(2030, 6, 1, 12, 0)
+
+
+class TestOutstandingBills:
+    """Test the database-side receivables report"""
+
+    @pytest.fixture
+    def bills(self, db_session, test_patient):
+        random.seed(11)
+        rows = []
+        for index in range(120):
+            total = float(random.randrange(50, 1000))
+            status = random.choice(list(PaymentStatusEnum))
+            paid = {
+                PaymentStatusEnum.PENDING: 0.0,
+                PaymentStatusEnum.PARTIAL: total / 2,
+                PaymentStatusEnum.PAID: total,
+            }.get(status, 0.0)
+            due = AS_OF - timedelta(days=random.randrange(-20, 150), hours=random.randrange(24))
+            rows.append(Bill(
+                bill_id=f"BILL{index:04d}",
+                patient_id=test_patient.id,
+                bill_date=due - timedelta(days=30),
+                due_date=due,
+                subtotal=total,
+                total_amount=total,
+                paid_amount=paid,
+                payment_status=status,
+            ))
+        db_session.add_all(rows)
+        db_session.commit()
+        return [
+            (bill.id, bill.due_date, bill.total_amount - bill.paid_amount, bill.payment_status)
+            for bill in rows
+            if bill.payment_status in receivables.OUTSTANDING_STATUSES
+        ]
+
+    def bucket(self, due_date):
+        if due_date > AS_OF:
+            return "current"
+        days = (AS_OF - due_date).days
+        return next(name for name, first, last in receivables.AGING_BUCKETS if last is None or days <= last)
+
+    def test_totals_and_aging(self, client, auth_headers, bills, statements):
+        response = client.get(
+            "/billing/reports/outstanding-bills",
+            params={"as_of": AS_OF.isoformat(), "limit": 0},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        report = response.json()
+
+        assert report["total_outstanding_bills"] == len(bills)
+        assert report["total_outstanding_amount"] == pytest.approx(sum(balance for _, _, balance, _ in bills))
+        assert report["pending_bills_count"] == sum(
+            1 for *_, status in bills if status == PaymentStatusEnum.PENDING
+        )
+        assert report["partial_bills_count"] == sum(
+            1 for *_, status in bills if status == PaymentStatusEnum.PARTIAL
+        )
+        for bucket in report["aging"]:
+            members = [balance for _, due, balance, _ in bills if self.bucket(due) == bucket["bucket"]]
+            assert bucket["bills"] == len(members), bucket["bucket"]
+            assert bucket["amount"] == pytest.approx(sum(members))
+        assert [bucket["bucket"] for bucket in report["aging"]] == ["current", "0-30", "31-60", "61-90", "90+"]
+        assert sum(1 for statement in statements if "FROM bills" in statement) == 1
+
+    def test_detail_pages_oldest_due_first(self, client, auth_headers, bills):
+        seen, cursor = [], None
+        while True:
+            params = {"as_of": AS_OF.isoformat(), "limit": 25}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/billing/reports/outstanding-bills", params=params, headers=auth_headers)
+            page = response.json()["outstanding_bills"]
+            seen.extend(page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert [row["id"] for row in seen] == [bill_id for bill_id, *_ in sorted(bills, key=lambda bill: (bill[1], bill[0]))]
+        row = seen[0]
+        assert row["balance"] == pytest.approx(row["total_amount"] - row["paid_amount"])
+        assert row["days_past_due"] == (AS_OF - datetime.fromisoformat(row["due_date"])).days
+
+    def test_export_streams_every_bill(self, client, auth_headers, bills, monkeypatch):
+        monkeypatch.setattr(receivables.exports, "FETCH_SIZE", 7)
+        response = client.get(
+            "/billing/reports/outstanding-bills/export",
+            params={"as_of": AS_OF.isoformat()},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [int(row["id"]) for row in rows] == [
+            bill_id for bill_id, *_ in sorted(bills, key=lambda bill: (bill[1], bill[0]))
+        ]
+        assert {row["payment_status"] for row in rows} <= {"pending", "partial"}
+
+    def test_detail_uses_partial_index(self, db_session, bills):
+        db_session.execute(text("ANALYZE"))
+        query = receivables.detail_query(db_session).order_by(Bill.due_date, Bill.id).limit(10)
+        compiled = query.statement.compile(engine, compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row) for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        assert "idx_bill_outstanding" in plan
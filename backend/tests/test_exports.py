@@ -0,0 +1,202 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import date, datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import exports
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Payment, Bill
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def patients(db_session):
+    rows = []
+    for index in range(5):
+        patient = Patient(
+            patient_id=f"PAT{index:03d}",
+            first_name=f"Pat{index}",
+            last_name="Export",
+            date_of_birth=date(1980, 1, index + 1),
+            gender="female",
+            address=f"{index}, Main St",
+            phone=f"555010{index:04d}",
+            created_at=datetime(2030, 1, 1, 9 + index),
+        )
+        db_session.add(patient)
+        rows.append(patient)
+    db_session.commit()
+    return rows
+
+
+def export(client, auth_headers, path, **params):
+    response = client.get(path, params=params, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def read_csv(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+class TestExports:
+    """Test the streaming bulk export endpoints"""
+
+    def test_patients_csv(self, client, auth_headers, patients):
+        response = export(client, auth_headers, "/patients/export")
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="patients-' in response.headers["content-disposition"]
+        assert response.headers[exports.WATERMARK_HEADER] == "2030-01-01T13:00:00"
+
+        rows = read_csv(response.text)
+        assert [row["patient_id"] for row in rows] == [f"PAT{index:03d}" for index in range(5)]
+        assert rows[0]["address"] == "0, Main St"
+        assert rows[0]["gender"] == "female"
+        assert rows[0]["date_of_birth"] == "1980-01-01"
+        assert "phone_normalized" not in rows[0]
+
+    def test_ndjson_with_date_range(self, client, auth_headers, patients):
+        response = export(
+            client, auth_headers, "/patients/export", format="ndjson",
+            start_date="2030-01-01T10:00:00", end_date="2030-01-01T11:00:00"
+        )
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [record["first_name"] for record in records] == ["Pat1", "Pat2"]
+
+    def test_gzip(self, client, auth_headers, patients):
+        plain = export(client, auth_headers, "/patients/export", format="ndjson")
+        compressed = export(client, auth_headers, "/patients/export", format="ndjson", compress=True)
+        assert compressed.headers["content-type"] == "application/gzip"
+        assert compressed.headers["content-disposition"].endswith('.ndjson.gz"')
+        assert gzip.decompress(compressed.content) == plain.content
+
+    def test_incremental_pull(self, client, auth_headers, db_session, patients):
+        first = export(client, auth_headers, "/patients/export")
+        watermark = first.headers[exports.WATERMARK_HEADER]
+
+        patients[0].first_name = "Changed"
+        patients[0].updated_at = datetime(2030, 1, 1, 14)
+        db_session.commit()
+
+        second = export(client, auth_headers, "/patients/export", updated_since=watermark)
+        # The boundary row is repeated; consumers upsert by id
+        assert [row["first_name"] for row in read_csv(second.text)] == ["Changed", "Pat4"]
+        assert second.headers[exports.WATERMARK_HEADER] == "2030-01-01T14:00:00"
+
+        third = export(client, auth_headers, "/patients/export",
+                       updated_since=second.headers[exports.WATERMARK_HEADER])
+        assert [row["first_name"] for row in read_csv(third.text)] == ["Changed"]
+
+    def test_empty_export(self, client, auth_headers, db_session):
+        response = export(client, auth_headers, "/billing/payments/export")
+        assert exports.WATERMARK_HEADER not in response.headers
+        assert response.text.splitlines()[0].startswith("id,payment_id,bill_id")
+        assert len(response.text.splitlines()) == 1
+
+    def test_other_datasets(self, client, auth_headers, db_session, patients):
+        bill = Bill(
+            bill_id="BILL1", patient_id=patients[0].id,
+            bill_date=datetime(2030, 1, 2), due_date=datetime(2030, 2, 2),
+            subtotal=100.0, total_amount=100.0, paid_amount=40.0,
+        )
+        db_session.add(bill)
+        db_session.flush()
+        db_session.add(Payment(
+            payment_id="PAY1", bill_id=bill.id, amount=40.0,
+            payment_method="cash", payment_date=datetime(2030, 1, 3),
+        ))
+        db_session.commit()
+
+        bills = read_csv(export(client, auth_headers, "/billing/bills/export").text)
+        assert [(row["bill_id"], row["payment_status"]) for row in bills] == [("BILL1", "pending")]
+        payments = export(client, auth_headers, "/billing/payments/export", format="ndjson")
+        assert json.loads(payments.text)["amount"] == 40.0
+        assert export(client, auth_headers, "/appointments/export").text.startswith("id,")
+        assert export(client, auth_headers, "/auth/audit-logs/export").text.startswith("id,")
+
+    def test_rejects_unknown_format(self, client, auth_headers):
+        response = client.get("/patients/export", params={"format": "xml"}, headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_requires_admin(self, client):
+        assert client.get("/patients/export").status_code in (401, 403)
+
+    def test_rows_are_fetched_in_partitions(self, db_session, patients, monkeypatch):
+        monkeypatch.setattr(exports, "FETCH_SIZE", 2)
+        query = exports.export_query(exports.DATASETS["patients"])
+        partitions = list(exports._partitions(engine, query))
+        assert [len(rows) for rows in partitions] == [2, 2, 1]
+
+        chunks = list(exports.encode(exports.CSV, ["id"], ([(row[0],) for row in rows] for rows in partitions)))
+        assert len(chunks) == 4
@@ -0,0 +1,250 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Doctor, Appointment, Bill, BillItem
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+
+@pytest.fixture(scope="function")
+def test_doctor(db_session):
+    doctor = Doctor(
+        doctor_id="DOC001",
+        first_name="Jane",
+        last_name="Smith",
+        specialization="Cardiology",
+        qualification="MD",
+        license_number="LIC001",
+        phone="5551234567",
+        email="jane.smith@hospital.com",
+        consultation_fee=150.0,
+        is_active=True
+    )
+    db_session.add(doctor)
+    db_session.commit()
+    db_session.refresh(doctor)
+    return doctor
+
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements executed while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+HISTORY = "Long-standing hypertension, managed with medication. " * 40
+
+
+@pytest.fixture(scope="function")
+def patients(db_session):
+    rows = [
+        Patient(
+            patient_id=f"PAT{index:03d}",
+            first_name=f"First{index}",
+            last_name="Doe",
+            date_of_birth=date(1980, 1, 1) + timedelta(days=index),
+            gender="female",
+            address="1 Long Road",
+            phone="5550000000",
+            allergies="Penicillin",
+            medical_history=HISTORY,
+        )
+        for index in range(25)
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return rows
+
+
+@pytest.fixture(scope="function")
+def bills(db_session, patients):
+    for index in range(5):
+        bill = Bill(
+            bill_id=f"BILL{index:03d}",
+            patient_id=patients[index].id,
+            bill_date=datetime(2030, 1, 1) + timedelta(days=index),
+            due_date=datetime(2030, 2, 1),
+            subtotal=100.0,
+            total_amount=100.0,
+            notes="Itemised notes " * 50,
+        )
+        db_session.add(bill)
+        db_session.flush()
+        db_session.add_all([
+            BillItem(bill_id=bill.id, item_name=f"Item {item}", quantity=1, unit_price=50.0, total_price=50.0)
+            for item in range(2)
+        ])
+    db_session.commit()
+
+
+class TestSparseFieldsets:
+    """Test fields= projection on list endpoints"""
+
+    def test_patients_read_and_return_only_requested_fields(
+        self, client, auth_headers, patients, statements
+    ):
+        response = client.get("/patients/?fields=first_name,last_name&limit=10", headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) == 10
+        assert page[0] == {"id": patients[0].id, "first_name": "First0", "last_name": "Doe"}
+
+        query = next(statement for statement in statements if "FROM patients" in statement)
+        assert "medical_history" not in query and "allergies" not in query
+
+        full = client.get("/patients/?limit=10", headers=auth_headers)
+        assert len(full.content) > 10 * len(response.content)
+
+    def test_fieldset_pages_keep_cursor(self, client, auth_headers, patients):
+        seen, cursor = [], None
+        while True:
+            params = {"fields": "patient_id", "limit": 7}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/patients/", params=params, headers=auth_headers)
+            seen.extend(row["patient_id"] for row in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == [patient.patient_id for patient in patients]
+
+    def test_fieldset_with_search(self, client, auth_headers, patients):
+        response = client.get("/patients/?search=First12&fields=first_name", headers=auth_headers)
+        assert response.status_code == 200
+        assert [row["first_name"] for row in response.json()][:1] == ["First12"]
+
+    def test_appointments(self, client, auth_headers, patients, test_doctor, db_session, statements):
+        for index in range(3):
+            db_session.add(Appointment(
+                appointment_id=f"APT{index}",
+                patient_id=patients[0].id,
+                doctor_id=test_doctor.id,
+                scheduled_datetime=datetime(2030, 1, 7, 9) + timedelta(hours=index),
+                reason="Checkup",
+                notes="Bring previous reports " * 20,
+            ))
+        db_session.commit()
+        statements.clear()
+
+        response = client.get(
+            "/appointments/?fields=scheduled_datetime,status&limit=2", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert [sorted(row) for row in response.json()] == [["id", "scheduled_datetime", "status"]] * 2
+        assert response.json()[0]["status"] == "scheduled"
+        assert response.headers.get("X-Next-Cursor")
+        query = next(statement for statement in statements if "FROM appointments" in statement)
+        assert "notes" not in query and "reason" not in query
+
+    def test_bill_items_loaded_only_when_requested(self, client, auth_headers, bills, statements):
+        response = client.get("/billing/bills?fields=bill_id,total_amount", headers=auth_headers)
+        assert response.status_code == 200
+        assert sorted(response.json()[0]) == ["bill_id", "id", "total_amount"]
+        assert not any("FROM bill_items" in statement for statement in statements)
+
+        statements.clear()
+        response = client.get("/billing/bills?fields=bill_id,bill_items", headers=auth_headers)
+        assert [len(row["bill_items"]) for row in response.json()] == [2] * 5
+        assert len([statement for statement in statements if "FROM bill_items" in statement]) == 1
+
+    def test_full_rows_without_fields(self, client, auth_headers, bills):
+        row = client.get("/billing/bills", headers=auth_headers).json()[0]
+        assert "notes" in row and len(row["bill_items"]) == 2
+
+    def test_unknown_field(self, client, auth_headers, patients):
+        response = client.get("/patients/?fields=first_name,password", headers=auth_headers)
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
@@ -0,0 +1,439 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import date, datetime
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.core.database import Base
+from backend.core.phonetic import metaphone
+from backend.models import (
+    Appointment, AppointmentDailyStat, AppointmentSeries, AppointmentStatusEnum,
+    RecurrenceFrequencyEnum, RevenueDaily,
+)
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "alembic")
+
+# The tables the migrations touch as create_all built them before the
+# backlog changes
+LEGACY_SCHEMA = (
+    "CREATE TABLE users (id INTEGER PRIMARY KEY)",
+    """CREATE TABLE patients (
+        id INTEGER NOT NULL,
+        patient_id VARCHAR(20) NOT NULL,
+        first_name VARCHAR(50) NOT NULL,
+        last_name VARCHAR(50) NOT NULL,
+        date_of_birth DATE NOT NULL,
+        gender VARCHAR(6) NOT NULL,
+        blood_group VARCHAR(5),
+        address TEXT NOT NULL,
+        phone VARCHAR(20) NOT NULL,
+        email VARCHAR(100),
+        emergency_contact_name VARCHAR(100),
+        emergency_contact_phone VARCHAR(20),
+        emergency_contact_relationship VARCHAR(50),
+        insurance_provider VARCHAR(100),
+        insurance_number VARCHAR(50),
+        allergies TEXT,
+        medical_history TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX idx_patient_email ON patients (email)",
+    "CREATE INDEX idx_patient_name ON patients (first_name, last_name)",
+    "CREATE INDEX idx_patient_phone ON patients (phone)",
+    "CREATE INDEX ix_patients_id ON patients (id)",
+    "CREATE UNIQUE INDEX ix_patients_patient_id ON patients (patient_id)",
+    """CREATE TABLE doctors (
+        id INTEGER NOT NULL,
+        doctor_id VARCHAR(20) NOT NULL,
+        first_name VARCHAR(50) NOT NULL,
+        last_name VARCHAR(50) NOT NULL,
+        specialization VARCHAR(100) NOT NULL,
+        qualification VARCHAR(100) NOT NULL,
+        license_number VARCHAR(50) NOT NULL,
+        phone VARCHAR(20) NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        address TEXT,
+        consultation_fee FLOAT,
+        is_active BOOLEAN,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (license_number)
+    )""",
+    "CREATE INDEX idx_doctor_license ON doctors (license_number)",
+    "CREATE INDEX idx_doctor_name ON doctors (first_name, last_name)",
+    "CREATE INDEX idx_doctor_specialization ON doctors (specialization)",
+    "CREATE UNIQUE INDEX ix_doctors_doctor_id ON doctors (doctor_id)",
+    "CREATE INDEX ix_doctors_id ON doctors (id)",
+    """CREATE TABLE patient_documents (
+        id INTEGER NOT NULL,
+        patient_id INTEGER NOT NULL,
+        filename VARCHAR(255) NOT NULL,
+        original_filename VARCHAR(255) NOT NULL,
+        file_path VARCHAR(500) NOT NULL,
+        document_type VARCHAR(50) NOT NULL,
+        description TEXT,
+        file_size INTEGER,
+        uploaded_by INTEGER NOT NULL,
+        uploaded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id),
+        FOREIGN KEY(patient_id) REFERENCES patients (id),
+        FOREIGN KEY(uploaded_by) REFERENCES users (id)
+    )""",
+    "CREATE INDEX idx_document_type ON patient_documents (document_type)",
+    "CREATE INDEX idx_uploaded_at ON patient_documents (uploaded_at)",
+    "CREATE INDEX ix_patient_documents_id ON patient_documents (id)",
+    """CREATE TABLE appointments (
+        id INTEGER NOT NULL,
+        appointment_id VARCHAR(20) NOT NULL,
+        patient_id INTEGER NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        scheduled_datetime DATETIME NOT NULL,
+        duration_minutes INTEGER,
+        reason TEXT NOT NULL,
+        status VARCHAR(11),
+        notes TEXT,
+        created_by INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(patient_id) REFERENCES patients (id),
+        FOREIGN KEY(doctor_id) REFERENCES doctors (id),
+        FOREIGN KEY(created_by) REFERENCES users (id)
+    )""",
+    "CREATE INDEX idx_appointment_datetime ON appointments (scheduled_datetime)",
+    "CREATE INDEX idx_appointment_doctor ON appointments (doctor_id)",
+    "CREATE INDEX idx_appointment_patient ON appointments (patient_id)",
+    "CREATE INDEX idx_appointment_status ON appointments (status)",
+    "CREATE UNIQUE INDEX ix_appointments_appointment_id ON appointments (appointment_id)",
+    "CREATE INDEX ix_appointments_id ON appointments (id)",
+    """CREATE TABLE bills (
+        id INTEGER NOT NULL,
+        bill_id VARCHAR(20) NOT NULL,
+        patient_id INTEGER NOT NULL,
+        appointment_id INTEGER,
+        bill_date DATETIME NOT NULL,
+        due_date DATETIME NOT NULL,
+        subtotal FLOAT NOT NULL,
+        tax_amount FLOAT,
+        discount_amount FLOAT,
+        total_amount FLOAT NOT NULL,
+        paid_amount FLOAT,
+        payment_status VARCHAR(9),
+        notes TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(patient_id) REFERENCES patients (id),
+        FOREIGN KEY(appointment_id) REFERENCES appointments (id)
+    )""",
+    "CREATE INDEX idx_bill_date ON bills (bill_date)",
+    "CREATE INDEX idx_bill_patient ON bills (patient_id)",
+    "CREATE INDEX idx_bill_status ON bills (payment_status)",
+    "CREATE UNIQUE INDEX ix_bills_bill_id ON bills (bill_id)",
+    "CREATE INDEX ix_bills_id ON bills (id)",
+    """CREATE TABLE bill_items (
+        id INTEGER NOT NULL,
+        bill_id INTEGER NOT NULL,
+        item_name VARCHAR(100) NOT NULL,
+        description TEXT,
+        quantity INTEGER,
+        unit_price FLOAT NOT NULL,
+        total_price FLOAT NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(bill_id) REFERENCES bills (id)
+    )""",
+    "CREATE INDEX ix_bill_items_id ON bill_items (id)",
+    """CREATE TABLE payments (
+        id INTEGER NOT NULL,
+        payment_id VARCHAR(20) NOT NULL,
+        bill_id INTEGER NOT NULL,
+        amount FLOAT NOT NULL,
+        payment_method VARCHAR(50) NOT NULL,
+        payment_date DATETIME NOT NULL,
+        reference_number VARCHAR(100),
+        notes TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id),
+        FOREIGN KEY(bill_id) REFERENCES bills (id)
+    )""",
+    "CREATE INDEX idx_payment_date ON payments (payment_date)",
+    "CREATE INDEX idx_payment_method ON payments (payment_method)",
+    "CREATE INDEX ix_payments_id ON payments (id)",
+    "CREATE UNIQUE INDEX ix_payments_payment_id ON payments (payment_id)",
+)
+
+
+@pytest.fixture
+def legacy_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(
+            "INSERT INTO patients (id, patient_id, first_name, last_name, date_of_birth, gender, address, phone) "
+            "VALUES (1, 'PAT001', 'Katherine', 'Phillips', '1984-03-07', 'FEMALE', '1 Main St', '(555) 020-1000')"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO doctors (id, doctor_id, first_name, last_name, specialization, qualification, "
+            "license_number, phone, email) "
+            "VALUES (1, 'DOC001', 'Jane', 'Smith', 'Cardiology', 'MD', 'LIC001', '5551234567', 'jane@hospital.com')"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO appointments (id, appointment_id, patient_id, doctor_id, scheduled_datetime, "
+            "duration_minutes, reason, status) VALUES "
+            "(1, 'APT1', 1, 1, '2030-01-07 09:00:00.000000', 45, 'Checkup', 'SCHEDULED'), "
+            "(2, 'APT2', 1, 1, '2030-01-07 11:30:00.000000', NULL, 'Follow-up', 'CANCELLED')"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO bills (id, bill_id, patient_id, appointment_id, bill_date, due_date, subtotal, "
+            "total_amount, paid_amount, payment_status) "
+            "VALUES (1, 'BILL001', 1, 1, '2030-01-07 10:00:00.000000', '2030-02-06 10:00:00.000000', "
+            "150.0, 150.0, 100.0, 'PARTIAL')"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO payments (id, payment_id, bill_id, amount, payment_method, payment_date, reference_number) "
+            "VALUES (1, 'PAY001', 1, 60.0, 'card', '2030-01-07 10:05:00.000000', 'CLAIM-1'), "
+            "(2, 'PAY002', 1, 40.0, 'cash', '2030-01-08 16:30:00.000000', 'CLAIM-1')"
+        )
+
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    config.set_main_option("sqlalchemy.url", url)
+    command.stamp(config, "4760d498899b")
+    yield engine, config
+    engine.dispose()
+
+
+def test_end_datetime_is_added_and_backfilled(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "14f7a589bfe0")
+
+    columns = {column["name"]: column for column in inspect(engine).get_columns("appointments")}
+    assert columns["end_datetime"]["nullable"] is False
+    indexes = {index["name"] for index in inspect(engine).get_indexes("appointments")}
+    assert {"idx_appointment_doctor_slot", "idx_appointment_patient_slot", "idx_appointment_doctor"} <= indexes
+
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT id, duration_minutes, end_datetime FROM appointments ORDER BY id"
+        )).all()
+        # The bill referencing the rebuilt table is untouched
+        assert connection.execute(text("SELECT appointment_id FROM bills")).scalar() == 1
+    assert rows == [
+        (1, 45, "2030-01-07 09:45:00.000000"),
+        (2, 30, "2030-01-07 12:00:00.000000"),
+    ]
+
+
+def test_end_datetime_migration_skips_new_databases(tmp_path):
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{tmp_path / 'new.db'}")
+    command.stamp(config, "4760d498899b")
+    command.upgrade(config, "14f7a589bfe0")
+
+
+def test_overlap_triggers_are_added(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "74e6856432ce")
+
+    with engine.connect() as connection:
+        triggers = set(connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )).scalars())
+    assert triggers == {"appointment_no_overlap_insert", "appointment_no_overlap_update"}
+
+    with pytest.raises(IntegrityError, match="appointment_no_overlap"):
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO appointments (appointment_id, patient_id, doctor_id, "
+                "scheduled_datetime, duration_minutes, end_datetime, reason, status) VALUES "
+                "('APT3', 1, 1, '2030-01-07 09:30:00.000000', 30, "
+                "'2030-01-07 10:00:00.000000', 'Overlap', 'SCHEDULED')"
+            )
+
+    # The cancelled appointment does not hold its slot
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO appointments (appointment_id, patient_id, doctor_id, "
+            "scheduled_datetime, duration_minutes, end_datetime, reason, status) VALUES "
+            "('APT4', 1, 1, '2030-01-07 11:30:00.000000', 30, "
+            "'2030-01-07 12:00:00.000000', 'Rebooked', 'SCHEDULED')"
+        )
+
+    command.downgrade(config, "14f7a589bfe0")
+    with engine.connect() as connection:
+        assert connection.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger'"
+        )).scalar() == 0
+
+
+def test_appointment_rollup_is_backfilled(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "887b1ead3092")
+
+    with Session(engine) as db:
+        stats = db.query(AppointmentDailyStat).order_by(AppointmentDailyStat.status).all()
+        assert [(stat.day, stat.doctor_id, stat.status, stat.count) for stat in stats] == [
+            (date(2030, 1, 7), 1, AppointmentStatusEnum.CANCELLED, 1),
+            (date(2030, 1, 7), 1, AppointmentStatusEnum.SCHEDULED, 1),
+        ]
+
+
+def index_columns(engine, table):
+    return {index["name"]: index["column_names"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_list_indexes_are_recreated(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "696fd67f4a65")
+
+    appointments = index_columns(engine, "appointments")
+    assert appointments["idx_appointment_datetime"] == ["scheduled_datetime", "id"]
+    assert appointments["idx_appointment_patient"] == ["patient_id", "scheduled_datetime"]
+    assert appointments["idx_appointment_updated"] == ["updated_at"]
+    assert index_columns(engine, "bills")["idx_bill_date"] == ["bill_date", "id"]
+    assert index_columns(engine, "payments")["idx_payment_bill"] == ["bill_id", "payment_date"]
+    assert index_columns(engine, "doctors")["idx_doctor_sort_name"] == ["last_name", "first_name", "id"]
+    assert index_columns(engine, "patient_documents")["idx_document_patient"] == ["patient_id", "uploaded_at"]
+
+    command.downgrade(config, "887b1ead3092")
+    appointments = index_columns(engine, "appointments")
+    assert appointments["idx_appointment_datetime"] == ["scheduled_datetime"]
+    assert "idx_appointment_updated" not in appointments
+    assert "idx_doctor_sort_name" not in index_columns(engine, "doctors")
+
+
+def test_appointments_link_to_series(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "f34354a3a195")
+    Base.metadata.create_all(bind=engine)
+
+    assert index_columns(engine, "appointments")["idx_appointment_series"] == ["series_id"]
+    with Session(engine) as db:
+        series = AppointmentSeries(
+            patient_id=1, doctor_id=1, start_datetime=datetime(2030, 1, 7, 9, 0),
+            frequency=RecurrenceFrequencyEnum.WEEKLY, reason="Checkup",
+        )
+        db.add(series)
+        db.flush()
+        appointment = db.get(Appointment, 1)
+        assert appointment.series_id is None
+        appointment.series_id = series.id
+        db.commit()
+        assert db.get(Appointment, 1).series.frequency == RecurrenceFrequencyEnum.WEEKLY
+
+    with pytest.raises(IntegrityError):
+        with engine.begin() as connection:
+            connection.exec_driver_sql("UPDATE appointments SET series_id = 999 WHERE id = 2")
+
+
+def test_patient_overlap_triggers_are_added(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "b4ed4645fdd1")
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO doctors (id, doctor_id, first_name, last_name, specialization, qualification, "
+            "license_number, phone, email) "
+            "VALUES (2, 'DOC002', 'Greg', 'House', 'Diagnostics', 'MD', 'LIC002', '5551234568', 'greg@hospital.com')"
+        )
+    with pytest.raises(IntegrityError, match="appointment_patient_no_overlap"):
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO appointments (appointment_id, patient_id, doctor_id, "
+                "scheduled_datetime, duration_minutes, end_datetime, reason, status) VALUES "
+                "('APT3', 1, 2, '2030-01-07 09:30:00.000000', 30, "
+                "'2030-01-07 10:00:00.000000', 'Overlap', 'SCHEDULED')"
+            )
+
+
+def test_patient_search_index_is_built(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "941a47a43a5e")
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT phone_normalized FROM patients")).scalar() == "5550201000"
+        matches = connection.execute(text(
+            "SELECT rowid FROM patient_search WHERE patient_search MATCH '\"0201\"'"
+        )).scalars().all()
+    assert matches == [1]
+    assert {"idx_patient_phone_normalized"} <= set(index_columns(engine, "patients"))
+
+    # The sync triggers keep it current from here on
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE patients SET last_name = 'Philips-Grant' WHERE id = 1")
+    with engine.connect() as connection:
+        assert connection.execute(text(
+            "SELECT rowid FROM patient_search WHERE patient_search MATCH '\"Grant\"'"
+        )).scalars().all() == [1]
+
+
+def test_patient_blocking_key_is_backfilled(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "eaabd17c8c03")
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT last_name_phonetic FROM patients")).scalar() == metaphone("Phillips")
+    assert index_columns(engine, "patients")["idx_patient_blocking"] == ["last_name_phonetic", "date_of_birth"]
+
+
+def test_document_hash_columns_are_added(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "ff03a2f68f7c")
+
+    columns = {column["name"] for column in inspect(engine).get_columns("patient_documents")}
+    assert {"content_hash", "content_type"} <= columns
+    assert index_columns(engine, "patient_documents")["idx_document_hash"] == ["content_hash"]
+
+
+def test_revenue_rollup_is_backfilled(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "22ad184ebd9c")
+
+    with Session(engine) as db:
+        rows = db.query(RevenueDaily).order_by(RevenueDaily.day).all()
+        assert [(row.day, row.payment_method, row.total, row.payments) for row in rows] == [
+            (date(2030, 1, 7), "card", 60.0, 1),
+            (date(2030, 1, 8), "cash", 40.0, 1),
+        ]
+
+
+def test_outstanding_bill_index_is_partial(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "63e5f820c0c9")
+
+    with engine.connect() as connection:
+        sql = connection.execute(text(
+            "SELECT sql FROM sqlite_master WHERE name = 'idx_bill_outstanding'"
+        )).scalar()
+        assert sql == (
+            "CREATE INDEX idx_bill_outstanding ON bills (due_date, id) "
+            "WHERE payment_status IN ('PENDING', 'PARTIAL')"
+        )
+
+
+def test_payment_idempotency_key_is_unique_per_bill(legacy_database):
+    engine, config = legacy_database
+    command.upgrade(config, "e9ed73db9f6b")
+
+    insert = text(
+        "INSERT INTO payments (payment_id, bill_id, amount, payment_method, payment_date, idempotency_key) "
+        "VALUES (:payment_id, 1, 10.0, 'cash', '2030-01-09 09:00:00.000000', 'retry-1')"
+    )
+    with engine.begin() as connection:
+        connection.execute(insert, {"payment_id": "PAY003"})
+    with pytest.raises(IntegrityError):
+        with engine.begin() as connection:
+            connection.execute(insert, {"payment_id": "PAY004"})
@@ -0,0 +1,201 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import datetime, timedelta, date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend import audit
+from backend.core.database import get_db, Base
+from backend.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Doctor, Bill, AuditLog
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def add_patients(db_session, count):
+    for index in range(count):
+        db_session.add(Patient(
+            patient_id=f"PAT{index:03d}",
+            first_name="Pat",
+            last_name=f"Patient{index}",
+            date_of_birth=date(1990, 1, 1),
+            gender="female",
+            address="1 Main St",
+            phone=f"555000{index:04d}",
+        ))
+    db_session.commit()
+
+
+def walk(client, url, headers, **params):
+    """Follow next cursors from the first page and return all item ids."""
+    ids = []
+    cursor = None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get(url, params=query, headers=headers)
+        assert response.status_code == 200
+        ids.extend(item["id"] for item in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids
+
+
+class TestCursorEncoding:
+    """Test opaque cursor tokens"""
+
+    def test_round_trip(self):
+        values = [datetime(2030, 1, 7, 10, 30), date(2030, 1, 7), "Smith", 42]
+        assert decode_cursor(encode_cursor(values), 4) == values
+
+    def test_rejects_tampered_tokens(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", 2)
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor([1, 2]), 3)
+
+
+class TestKeysetPagination:
+    """Test cursor pagination on list endpoints"""
+
+    def test_patients_walk_every_row_once(self, client, auth_headers, db_session):
+        add_patients(db_session, 25)
+        ids = walk(client, "/patients/", auth_headers, limit=10)
+        assert ids == sorted(ids)
+        assert len(ids) == len(set(ids)) == 25
+
+    def test_cursor_is_stable_under_inserts(self, client, auth_headers, db_session):
+        add_patients(db_session, 10)
+        first = client.get("/patients/", params={"limit": 5}, headers=auth_headers)
+        cursor = first.headers[NEXT_CURSOR_HEADER]
+
+        # Rows added ahead of the cursor do not shift the next page
+        db_session.add(Patient(
+            patient_id="PATNEW", first_name="New", last_name="Patient",
+            date_of_birth=date(1990, 1, 1), gender="male", address="x", phone="5559999999",
+        ))
+        db_session.commit()
+        second = client.get("/patients/", params={"limit": 5, "cursor": cursor}, headers=auth_headers)
+        assert [p["patient_id"] for p in second.json()] == [f"PAT{i:03d}" for i in range(5, 10)]
+
+    def test_skip_still_supported(self, client, auth_headers, db_session):
+        add_patients(db_session, 5)
+        response = client.get("/patients/", params={"skip": 3, "limit": 10}, headers=auth_headers)
+        assert [p["patient_id"] for p in response.json()] == ["PAT003", "PAT004"]
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_descending_dates_with_ties(self, client, auth_headers, db_session):
+        add_patients(db_session, 1)
+        patient = db_session.query(Patient).first()
+        base = datetime(2030, 1, 7, 9, 0)
+        for index in range(12):
+            db_session.add(Bill(
+                bill_id=f"BILL{index:03d}", patient_id=patient.id,
+                bill_date=base + timedelta(days=index // 3), due_date=base + timedelta(days=30),
+                subtotal=10.0, total_amount=10.0,
+            ))
+        db_session.commit()
+
+        ids = walk(client, "/billing/bills", auth_headers, limit=5)
+        bills = {bill.id: bill for bill in db_session.query(Bill).all()}
+        assert len(ids) == len(set(ids)) == 12
+        keys = [(bills[i].bill_date, i) for i in ids]
+        assert keys == sorted(keys, reverse=True)
+
+    def test_doctors_by_name(self, client, auth_headers, db_session):
+        for index, (last, first) in enumerate([("Smith", "Ann"), ("Adams", "Bo"), ("Smith", "Al")]):
+            db_session.add(Doctor(
+                doctor_id=f"DOC{index}", first_name=first, last_name=last,
+                specialization="General", qualification="MD", license_number=f"LIC{index}",
+                phone="5551234567", email=f"doc{index}@hospital.com", consultation_fee=100.0,
+            ))
+        db_session.commit()
+        response_ids = walk(client, "/doctors/", auth_headers, limit=1)
+        names = [db_session.get(Doctor, i).first_name for i in response_ids]
+        assert names == ["Bo", "Al", "Ann"]
+
+    def test_invalid_cursor(self, client, auth_headers, db_session):
+        response = client.get("/patients/", params={"cursor": "garbage"}, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_audit_logs_and_users(self, client, auth_headers, db_session, test_user):
+        for index in range(7):
+            audit.AuditLogger.log_create(db_session, test_user.id, "patients", index, {})
+        logs, cursor = audit.get_audit_log_page(db_session, limit=4)
+        rest, last_cursor = audit.get_audit_log_page(db_session, limit=4, cursor=cursor)
+        ids = [log.id for log in logs + rest]
+        assert ids == sorted(ids, reverse=True) and len(ids) == 7
+        assert last_cursor is None
+
+        response = client.get("/auth/audit-logs", params={"limit": 3}, headers=auth_headers)
+        assert len(response.json()) == 3
+        assert response.headers[NEXT_CURSOR_HEADER]
+        assert walk(client, "/auth/users", auth_headers, limit=1) == [test_user.id]
+
+    def test_advanced_search_pages(self, client, auth_headers, db_session):
+        add_patients(db_session, 7)
+        ids = walk(client, "/patients/search/advanced", auth_headers, name="Patient", limit=3)
+        assert len(ids) == len(set(ids)) == 7
@@ -0,0 +1,227 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+import hashlib
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import documents
+from backend.core.config import settings
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, PatientDocument
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "DOCUMENT_ACCEL_REDIRECT", None)
+    return tmp_path
+
+
+SCAN = bytes(range(256)) * 20_000  # ~5MB
+
+
+def upload(client, headers, patient, content, filename="scan.pdf", **params):
+    return client.post(
+        f"/patients/{patient.id}/documents",
+        params={"filename": filename, "document_type": "scan", **params},
+        content=content,
+        headers={**headers, "Content-Type": "application/pdf"},
+    )
+
+
+def stored_files(upload_dir):
+    root = upload_dir / documents.DOCUMENTS_DIR
+    return sorted(path for path in root.rglob("*") if path.is_file())
+
+
+class TestDocumentUpload:
+    """Test streamed, content-addressed document uploads"""
+
+    def test_upload_is_streamed_and_hashed(self, client, auth_headers, test_patient, upload_dir, monkeypatch):
+        monkeypatch.setattr(documents, "WRITE_BLOCK", 64 * 1024)
+        chunks = (SCAN[offset:offset + 10_000] for offset in range(0, len(SCAN), 10_000))
+
+        response = upload(client, auth_headers, test_patient, chunks, description="Chest CT")
+
+        assert response.status_code == 201
+        document = response.json()
+        digest = hashlib.sha256(SCAN).hexdigest()
+        assert document["content_hash"] == digest
+        assert document["file_size"] == len(SCAN)
+        assert document["original_filename"] == "scan.pdf"
+        assert document["content_type"] == "application/pdf"
+        assert stored_files(upload_dir) == [upload_dir / documents.DOCUMENTS_DIR / documents.blob_path(digest)]
+        assert stored_files(upload_dir)[0].read_bytes() == SCAN
+
+    def test_identical_files_are_stored_once(self, client, auth_headers, test_patient, upload_dir, db_session):
+        first = upload(client, auth_headers, test_patient, SCAN, filename="a.pdf").json()
+        second = upload(client, auth_headers, test_patient, SCAN, filename="b.pdf").json()
+        other = upload(client, auth_headers, test_patient, SCAN[:1000], filename="c.pdf").json()
+
+        assert first["id"] != second["id"]
+        assert first["file_path"] == second["file_path"] != other["file_path"]
+        assert len(stored_files(upload_dir)) == 2
+        assert db_session.query(PatientDocument).count() == 3
+
+    def test_rejected_uploads_leave_nothing(self, client, auth_headers, test_patient, upload_dir, monkeypatch):
+        monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 100_000)
+
+        declared = upload(client, auth_headers, test_patient, SCAN)
+        streamed = upload(client, auth_headers, test_patient, iter([SCAN[:60_000], SCAN[60_000:120_000]]))
+
+        assert declared.status_code == 413
+        assert streamed.status_code == 413
+        assert upload(client, auth_headers, test_patient, b"").status_code == 400
+        assert upload(client, auth_headers, test_patient, b"MZ", filename="tool.exe").status_code == 400
+        assert stored_files(upload_dir) == []
+
+    def test_unknown_patient(self, client, auth_headers):
+        response = client.post(
+            "/patients/999/documents",
+            params={"filename": "scan.pdf", "document_type": "scan"},
+            content=b"%PDF",
+            headers=auth_headers,
+        )
+        assert response.status_code == 404
+
+    def test_listed_newest_first(self, client, auth_headers, test_patient):
+        for index in range(3):
+            upload(client, auth_headers, test_patient, SCAN[:index + 1], filename=f"{index}.pdf")
+        response = client.get(f"/patients/{test_patient.id}/documents?limit=2", headers=auth_headers)
+        assert [row["original_filename"] for row in response.json()] == ["2.pdf", "1.pdf"]
+        assert response.headers.get("X-Next-Cursor")
+
+
+class TestDocumentDownload:
+    """Test document downloads with Range support"""
+
+    @pytest.fixture
+    def document(self, client, auth_headers, test_patient):
+        return upload(client, auth_headers, test_patient, SCAN, filename="ct scan.pdf").json()
+
+    def url(self, document):
+        return f"/patients/{document['patient_id']}/documents/{document['id']}/content"
+
+    def test_full_download(self, client, auth_headers, document):
+        response = client.get(self.url(document), headers=auth_headers)
+        assert response.status_code == 200
+        assert response.content == SCAN
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["etag"] == f'"{document["content_hash"]}"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert "ct%20scan.pdf" in response.headers["content-disposition"]
+
+    def test_range_requests(self, client, auth_headers, document):
+        response = client.get(self.url(document), headers={**auth_headers, "Range": "bytes=1000-1999"})
+        assert response.status_code == 206
+        assert response.content == SCAN[1000:2000]
+        assert response.headers["content-range"] == f"bytes 1000-1999/{len(SCAN)}"
+
+        tail = client.get(self.url(document), headers={**auth_headers, "Range": "bytes=-10"})
+        assert tail.content == SCAN[-10:]
+
+        stale = client.get(self.url(document), headers={
+            **auth_headers, "Range": "bytes=0-9", "If-Range": '"0000"'
+        })
+        assert stale.status_code == 200 and stale.content == SCAN
+
+    def test_accel_redirect(self, client, auth_headers, document, monkeypatch):
+        monkeypatch.setattr(settings, "DOCUMENT_ACCEL_REDIRECT", "/_documents/")
+        response = client.get(self.url(document), headers=auth_headers)
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response.headers["x-accel-redirect"] == "/_documents/" + documents.blob_path(
+            document["content_hash"]
+        )
+
+    def test_other_patients_document(self, client, auth_headers, document):
+        response = client.get(
+            f"/patients/{document['patient_id'] + 1}/documents/{document['id']}/content",
+            headers=auth_headers
+        )
+        assert response.status_code == 404
@@ -0,0 +1,223 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import duplicates
+from backend.core.phonetic import metaphone
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, PatientDuplicate
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def add_patient(db_session, first_name, last_name, date_of_birth, phone, **fields):
+    patient = Patient(
+        patient_id=f"PAT{db_session.query(Patient).count():03d}",
+        first_name=first_name,
+        last_name=last_name,
+        date_of_birth=date_of_birth,
+        gender="female",
+        address="1 Main St",
+        phone=phone,
+        **fields
+    )
+    db_session.add(patient)
+    db_session.commit()
+    return patient
+
+
+def registration(**overrides):
+    data = {
+        "first_name": "Katherine",
+        "last_name": "Phillips",
+        "date_of_birth": "1984-03-07",
+        "gender": "female",
+        "address": "9 Elm St",
+        "phone": "555 020 1000",
+    }
+    data.update(overrides)
+    return data
+
+
+class TestScoring:
+    """Test phonetic keys and similarity scoring"""
+
+    def test_phonetic_keys(self):
+        assert metaphone("Smith") == metaphone("Smyth")
+        assert metaphone("Philips") == metaphone("Phillips")
+        assert metaphone("Catherine") == metaphone("Katherine")
+        assert metaphone("Knight") == metaphone("Night")
+        assert metaphone("Smith") != metaphone("Jones")
+        assert metaphone("") == ""
+
+    def test_jaro_winkler(self):
+        assert duplicates.jaro_winkler("martha", "marhta") == pytest.approx(0.9611, abs=1e-4)
+        assert duplicates.jaro_winkler("same", "same") == 1.0
+        assert duplicates.jaro_winkler("abc", "xyz") == 0.0
+
+    def test_score(self):
+        a = duplicates.Person(1, "Katherine", "Phillips", date(1984, 3, 7), "5550201000", None)
+        typo = a._replace(id=2, first_name="Catherine", last_name="Philips")
+        swapped = a._replace(id=3, date_of_birth=date(1984, 7, 3), phone_normalized=None)
+        sibling = a._replace(id=4, first_name="Robert", date_of_birth=date(1986, 1, 1))
+
+        value, reasons = duplicates.score(a, typo)
+        assert value >= duplicates.DUPLICATE_THRESHOLD
+        assert reasons == ("similar name", "same date of birth", "same phone")
+        assert duplicates.score(a, swapped)[0] >= duplicates.DUPLICATE_THRESHOLD
+        assert duplicates.score(a, sibling)[0] < duplicates.DUPLICATE_THRESHOLD
+
+
+class TestRegistrationDuplicates:
+    """Test duplicate detection when registering patients"""
+
+    def test_blocking_keys_are_stored(self, db_session):
+        patient = add_patient(db_session, "Katherine", "Phillips", date(1984, 3, 7), "555-020-1000")
+        assert patient.last_name_phonetic == metaphone("Phillips")
+        assert patient.phone_normalized == "5550201000"
+
+    def test_candidates_come_from_blocks(self, db_session):
+        same_key = add_patient(db_session, "Anne", "Philips", date(1984, 12, 31), "5550000001")
+        same_phone = add_patient(db_session, "Zed", "Other", date(1950, 1, 1), "555 020 1000")
+        add_patient(db_session, "Anne", "Philips", date(1985, 1, 1), "5550000002")
+        add_patient(db_session, "Katherine", "Jones", date(1984, 3, 7), "5550000003")
+
+        subject = duplicates.person(duplicates.Person(
+            None, "Katherine", "Phillips", date(1984, 3, 7), "5550201000", None
+        ))
+        candidates = duplicates.find_candidates(db_session, subject)
+        assert sorted(c.id for c in candidates) == [same_key.id, same_phone.id]
+
+    def test_best_candidates_survive_a_crowded_block(self, db_session):
+        for index in range(duplicates.MAX_CANDIDATES + 5):
+            add_patient(db_session, "Anne", "Philips", date(1984, 1, 1), f"55500000{index:02d}")
+        same_birth = add_patient(db_session, "Kate", "Phillips", date(1984, 3, 7), "5550009999")
+        same_phone = add_patient(db_session, "Catherine", "Philips", date(1984, 7, 3), "5550201000")
+
+        subject = duplicates.person(duplicates.Person(
+            None, "Katherine", "Phillips", date(1984, 3, 7), "5550201000", None
+        ))
+        candidates = duplicates.find_candidates(db_session, subject)
+        assert len(candidates) == duplicates.MAX_CANDIDATES
+        assert [c.id for c in candidates[:2]] == [same_phone.id, same_birth.id]
+        assert candidates == duplicates.find_candidates(db_session, subject)
+
+    def test_create_reports_probable_duplicates(self, client, auth_headers, db_session):
+        existing = add_patient(db_session, "Catherine", "Philips", date(1984, 3, 7), "5550201000")
+
+        response = client.post("/patients/", json=registration(), headers=auth_headers)
+        assert response.status_code == 201
+        assert response.headers[duplicates.DUPLICATES_HEADER] == str(existing.id)
+
+        pair = db_session.query(PatientDuplicate).one()
+        assert (pair.patient_id, pair.duplicate_of_id) == (response.json()["id"], existing.id)
+        assert pair.source == duplicates.REGISTRATION
+
+        listed = client.get("/patients/duplicates", headers=auth_headers).json()
+        assert listed[0]["reasons"] == ["similar name", "same date of birth", "same phone"]
+
+    def test_distinct_patients_are_not_flagged(self, client, auth_headers, db_session):
+        add_patient(db_session, "Robert", "Phillips", date(1984, 5, 1), "5550209999")
+        response = client.post("/patients/", json=registration(), headers=auth_headers)
+        assert response.status_code == 201
+        assert duplicates.DUPLICATES_HEADER not in response.headers
+        assert db_session.query(PatientDuplicate).count() == 0
+
+    def test_check_before_create(self, client, auth_headers, db_session):
+        existing = add_patient(db_session, "Katherine", "Phillips", date(1984, 3, 7), "5559999999")
+        response = client.post("/patients/duplicates/check", json=registration(), headers=auth_headers)
+        assert [c["id"] for c in response.json()] == [existing.id]
+        assert response.json()[0]["reasons"] == ["similar name", "same date of birth"]
+        assert db_session.query(Patient).count() == 1
+
+
+class TestBatchScan:
+    """Test the offline registry scan"""
+
+    def test_scan_finds_pairs_once(self, db_session):
+        a = add_patient(db_session, "Katherine", "Phillips", date(1984, 3, 7), "5550201000")
+        b = add_patient(db_session, "Catherine", "Philips", date(1984, 3, 7), "5550201000")
+        c = add_patient(db_session, "Jon", "Smyth", date(1990, 6, 1), "5550300000")
+        d = add_patient(db_session, "John", "Smith", date(1990, 6, 1), "5550300001")
+        add_patient(db_session, "Mary", "Smith", date(1990, 6, 1), "5550300002")
+
+        # Rows written outside the ORM lack blocking keys until backfilled
+        db_session.query(Patient).filter(Patient.id == d.id).update(
+            {"last_name_phonetic": None}, synchronize_session=False
+        )
+        db_session.commit()
+
+        assert duplicates.scan_registry(engine, workers=1, chunk_size=2) == 2
+        pairs = {(p.patient_id, p.duplicate_of_id) for p in db_session.query(PatientDuplicate)}
+        assert pairs == {(b.id, a.id), (d.id, c.id)}
+        assert all(p.source == duplicates.BATCH for p in db_session.query(PatientDuplicate))
+
+        # Rescanning updates rather than duplicates the pairs
+        assert duplicates.scan_registry(engine, workers=1) == 2
+        assert db_session.query(PatientDuplicate).count() == 2
@@ -0,0 +1,267 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import random
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import patient_changes, patient_facets, patient_import
+from backend.core.bitmap import ARRAY_LIMIT, Bitmap
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+PROFILES = [
+    # gender, blood group, insurer, allergies
+    ("female", "A+", "Acme", "Penicillin"),
+    ("female", "O-", "Acme", None),
+    ("male", "A+", "Acme", None),
+    ("male", "A+", None, "Nuts"),
+    ("male", None, "Blue Cross", None),
+    ("other", "O-", "Blue Cross", "Latex"),
+]
+
+
+def add_patient(db_session, index, gender, blood_group, insurance_provider, allergies):
+    patient = Patient(
+        patient_id=f"PAT{index:03d}",
+        first_name=f"Pat{index}",
+        last_name="Facet",
+        date_of_birth=date(1980, 1, 1),
+        gender=gender,
+        blood_group=blood_group,
+        insurance_provider=insurance_provider,
+        allergies=allergies,
+        address="1 Main St",
+        phone=f"555010{index:04d}",
+    )
+    db_session.add(patient)
+    db_session.commit()
+    return patient
+
+
+@pytest.fixture(scope="function")
+def patients(db_session):
+    return [add_patient(db_session, index, *profile) for index, profile in enumerate(PROFILES)]
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    patient_facets.index.clear()
+    yield
+    patient_facets.index.clear()
+
+
+def as_dict(facet):
+    return {item["value"]: item["count"] for item in facet}
+
+
+class TestBitmap:
+    """Test the roaring-style compressed bitmap"""
+
+    def test_matches_set_semantics(self):
+        rng = random.Random(7)
+        # Sparse and dense containers in several 65,536-wide chunks
+        a_values = set(rng.sample(range(300_000), 20_000)) | set(range(70_000, 80_000))
+        b_values = set(rng.sample(range(300_000), 3_000)) | set(range(75_000, 76_000))
+        a, b = Bitmap(a_values), Bitmap(b_values)
+
+        assert len(a) == len(a_values)
+        assert list(a & b) == sorted(a_values & b_values)
+        assert list(a | b) == sorted(a_values | b_values)
+        assert a.intersection_count(b) == len(a_values & b_values)
+        assert b.intersection_count(None) == len(b_values)
+        assert 70_500 in a and 299_999 + 1 not in a
+
+    def test_containers_convert_both_ways(self):
+        bitmap = Bitmap()
+        for value in range(ARRAY_LIMIT + 1):
+            bitmap.add(value)
+        assert isinstance(bitmap._containers[0], int)
+        for value in range(ARRAY_LIMIT // 2 + 1):
+            bitmap.discard(value)
+        assert isinstance(bitmap._containers[0], set)
+        assert list(bitmap) == list(range(ARRAY_LIMIT // 2 + 1, ARRAY_LIMIT + 1))
+        for value in list(bitmap):
+            bitmap.discard(value)
+        assert len(bitmap) == 0 and bitmap.nbytes() == 0
+
+
+class TestFacetIndex:
+    """Test facet counts from the bitmap index"""
+
+    def test_counts_match_brute_force(self, db_session):
+        rng = random.Random(3)
+        index = patient_facets.FacetIndex()
+        records = {}
+        for patient_id in range(1, 2_000):
+            values = (
+                rng.choice(["male", "female", "other"]),
+                rng.choice(["A+", "B+", "O-", None]),
+                rng.choice(["Acme", "Blue Cross", "Medi", None]),
+                rng.random() < 0.3,
+            )
+            records[patient_id] = values
+            index.upsert(patient_id, values)
+        for patient_id in range(1, 2_000, 7):
+            index.remove(patient_id)
+            del records[patient_id]
+
+        filters = {"gender": ["female", "other"], "insurance_provider": ["Acme"], "has_allergies": [True]}
+        result = index.counts(filters)
+
+        def matches(values, excluded=None):
+            return all(
+                values[patient_facets.FACETS.index(facet)] in accepted
+                for facet, accepted in filters.items() if facet != excluded
+            )
+
+        assert result["total"] == sum(matches(values) for values in records.values())
+        for position, facet in enumerate(patient_facets.FACETS):
+            expected = {}
+            for values in records.values():
+                if matches(values, excluded=facet):
+                    expected[values[position]] = expected.get(values[position], 0) + 1
+            assert as_dict(result["facets"][facet]) == expected
+
+
+class TestFacetsEndpoint:
+    """Test /patients/facets"""
+
+    def facets(self, client, auth_headers, **params):
+        response = client.get("/patients/facets", params=params, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def test_unfiltered(self, client, auth_headers, patients):
+        result = self.facets(client, auth_headers)
+        assert result["total"] == 6
+        assert result["facets"]["gender"][0] == {"value": "male", "count": 3}
+        assert as_dict(result["facets"]["blood_group"]) == {"A+": 3, "O-": 2, None: 1}
+        assert as_dict(result["facets"]["has_allergies"]) == {True: 3, False: 3}
+
+    def test_each_facet_narrowed_by_the_others(self, client, auth_headers, patients):
+        result = self.facets(client, auth_headers, gender="male", insurance_provider=["Acme", "Blue Cross"])
+        assert result["total"] == 2
+        # Gender counts ignore the gender filter but apply the insurer one
+        assert as_dict(result["facets"]["gender"]) == {"female": 2, "male": 2, "other": 1}
+        assert as_dict(result["facets"]["insurance_provider"]) == {"Acme": 1, "Blue Cross": 1, None: 1}
+        assert as_dict(result["facets"]["blood_group"]) == {"A+": 1, None: 1}
+
+        result = self.facets(client, auth_headers, has_allergies=True, blood_group="B+")
+        assert result["total"] == 0
+        assert as_dict(result["facets"]["blood_group"]) == {"A+": 2, "O-": 1, "B+": 0}
+
+    def test_follows_writes(self, client, auth_headers, db_session, patients):
+        self.facets(client, auth_headers)
+
+        patients[0].gender = "other"
+        patients[0].allergies = None
+        db_session.commit()
+        db_session.delete(patients[5])
+        db_session.commit()
+
+        result = self.facets(client, auth_headers)
+        assert result["total"] == 5
+        assert as_dict(result["facets"]["gender"]) == {"male": 3, "female": 1, "other": 1}
+        assert as_dict(result["facets"]["has_allergies"]) == {False: 4, True: 1}
+
+    def test_refresh_picks_up_bulk_imports(self, db_session, patients):
+        other = patient_facets.FacetIndex()
+        other.load(db_session)
+
+        importer = patient_import.PatientImporter(db_session, patient_import.NDJSON)
+        importer.add([(0, {
+            "first_name": "Bulk", "last_name": "Import", "date_of_birth": "1990-01-01",
+            "gender": "female", "address": "1 Main St", "phone": "5550109999", "blood_group": "B+",
+        }, None)])
+        importer.finish()
+        assert other.counts({})["total"] == 6
+
+        other.refresh(db_session, force=True)
+        result = other.counts({"blood_group": ["B+"]})
+        assert result["total"] == 1
+        assert as_dict(result["facets"]["gender"]) == {"female": 1}
+
+    def test_stats(self, client, auth_headers, patients):
+        response = client.get("/patients/facets/stats", headers=auth_headers)
+        stats = response.json()
+        assert stats["patients"] == 6
+        assert stats["values"] == {"gender": 3, "blood_group": 3, "insurance_provider": 3, "has_allergies": 2}
+        assert stats["loaded_at"]
+
+    def test_follower_hooks_are_required(self):
+        class Incomplete(patient_changes.ChangeFollower):
+            def _load(self, db):
+                pass
+
+        with pytest.raises(TypeError, match="apply_snapshot"):
+            Incomplete()
+        # The indexes built on it implement every hook
+        patient_facets.FacetIndex()
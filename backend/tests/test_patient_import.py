@@ -0,0 +1,259 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+import io
+import json
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import patient_import
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, PatientImport
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+HEADER = "first_name,last_name,date_of_birth,gender,address,phone,email,allergies\n"
+
+
+def csv_row(index, **overrides):
+    fields = {
+        "first_name": f"Pat{index}",
+        "last_name": "Importer",
+        "date_of_birth": "1980-02-03",
+        "gender": "female",
+        "address": f"{index} Main St",
+        "phone": f"555-010-{index:04d}",
+        "email": f"pat{index}@example.com",
+        "allergies": "",
+    }
+    fields.update(overrides)
+    return ",".join(fields.values()) + "\n"
+
+
+def ndjson_row(index, **overrides):
+    record = {
+        "first_name": f"Pat{index}",
+        "last_name": "Importer",
+        "date_of_birth": "1980-02-03",
+        "gender": "male",
+        "address": f"{index} Main St",
+        "phone": f"555-020-{index:04d}",
+    }
+    record.update(overrides)
+    return json.dumps(record) + "\n"
+
+
+def parse(format, body, block=1):
+    """Feed ``body`` to a parser ``block`` bytes at a time."""
+    parser = patient_import.RecordParser(format)
+    data = body.encode()
+    rows = []
+    for start in range(0, len(data), block):
+        rows.extend(parser.feed(data[start:start + block]))
+    rows.extend(parser.close())
+    return rows
+
+
+class TestRecordParser:
+    """Test incremental CSV and NDJSON parsing"""
+
+    def test_csv_records_split_across_blocks(self):
+        body = 'name,notes\r\n\r\nAnn,"likes ""tea""\nand, cake"\r\nBob,\r\n'
+        rows = parse(patient_import.CSV, body)
+        assert rows == [
+            (0, {"name": "Ann", "notes": 'likes "tea"\nand, cake'}, None),
+            (1, {"name": "Bob"}, None),
+        ]
+
+    def test_csv_row_errors(self):
+        rows = parse(patient_import.CSV, 'a,b\n1,2,3\n4,"open\n', block=4)
+        assert rows[0] == (0, None, "Expected 2 fields, found 3")
+        assert rows[1] == (1, None, "Unterminated quoted field")
+
+    def test_ndjson_records_and_errors(self):
+        body = '{"a": 1}\n\n{"a": \n[1]\n{"b": "\u00e9"}'
+        rows = parse(patient_import.NDJSON, body, block=3)
+        assert rows[0] == (0, {"a": 1}, None)
+        assert rows[1][0] == 1 and rows[1][2].startswith("Invalid JSON")
+        assert rows[2] == (2, None, "Expected a JSON object")
+        assert rows[3] == (3, {"b": "\u00e9"}, None)
+
+    def test_detect_format(self):
+        assert patient_import.detect_format("text/csv") == patient_import.CSV
+        assert patient_import.detect_format(filename="clinic.CSV") == patient_import.CSV
+        assert patient_import.detect_format("application/x-ndjson") == patient_import.NDJSON
+
+
+class TestImportEndpoint:
+    """Test the streaming patient import endpoint"""
+
+    def test_csv_import(self, client, auth_headers, db_session):
+        body = HEADER + csv_row(1) + csv_row(2, date_of_birth="not-a-date") + csv_row(3, phone="(555) 0103")
+        response = client.post(
+            "/patients/import", content=body.encode(),
+            headers={**auth_headers, "Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["format"] == "csv"
+        assert result["status"] == "completed"
+        assert (result["total"], result["created"], result["failed"]) == (3, 1, 2)
+        assert [error["row"] for error in result["errors"]] == [1, 2]
+        assert "date_of_birth" in result["errors"][0]["error"]
+
+        patient = db_session.query(Patient).one()
+        assert patient.first_name == "Pat1"
+        assert patient.allergies is None
+        assert patient.phone_normalized == "5550100001"
+        assert patient.last_name_phonetic == "IMPR"
+        assert patient.patient_id.startswith("P")
+
+        found = client.get("/patients/", params={"search": "Importer"}, headers=auth_headers)
+        assert [p["id"] for p in found.json()] == [patient.id]
+
+    def test_ndjson_import(self, client, auth_headers, db_session):
+        body = "".join(ndjson_row(index) for index in range(5))
+        response = client.post(
+            "/patients/import", content=body.encode(),
+            headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+        )
+        result = response.json()
+        assert result["created"] == 5
+        patient_ids = {patient_id for patient_id, in db_session.query(Patient.patient_id)}
+        assert len(patient_ids) == 5
+
+    def test_dry_run_writes_nothing(self, client, auth_headers, db_session):
+        body = HEADER + csv_row(1) + csv_row(2, gender="unknown")
+        response = client.post(
+            "/patients/import", params={"dry_run": True}, content=body.encode(),
+            headers={**auth_headers, "Content-Type": "text/csv"}
+        )
+        result = response.json()
+        assert result["dry_run"] is True
+        assert (result["created"], result["failed"]) == (0, 1)
+        assert db_session.query(Patient).count() == 0
+        assert db_session.query(PatientImport).count() == 0
+
+    def test_resend_under_same_key_skips_imported_rows(self, client, auth_headers, db_session):
+        body = "".join(ndjson_row(index) for index in range(3))
+        params = {"import_key": "clinic-a", "format": "ndjson"}
+        first = client.post("/patients/import", params=params, content=body.encode(), headers=auth_headers)
+        assert first.json()["import_key"] == "clinic-a"
+
+        second = client.post("/patients/import", params=params, content=body.encode(), headers=auth_headers)
+        assert (second.json()["skipped"], second.json()["created"]) == (3, 0)
+        assert db_session.query(Patient).count() == 3
+
+    def test_start_returns_key_before_upload(self, client, auth_headers, db_session):
+        started = client.post("/patients/import/start", params={"format": "ndjson"}, headers=auth_headers)
+        assert started.status_code == 201
+        key = started.json()["import_key"]
+        assert started.json()["rows_processed"] == 0
+        assert db_session.query(PatientImport).filter(PatientImport.key == key).count() == 1
+
+        body = "".join(ndjson_row(index) for index in range(2))
+        response = client.post("/patients/import", params={"import_key": key, "format": "ndjson"},
+                               content=body.encode(), headers=auth_headers)
+        assert (response.json()["import_key"], response.json()["created"]) == (key, 2)
+        assert db_session.query(PatientImport).count() == 1
+
+        bad = client.post("/patients/import/start", params={"format": "xml"}, headers=auth_headers)
+        assert bad.status_code == 400
+
+    def test_format_must_match_resumed_import(self, client, auth_headers):
+        client.post("/patients/import", params={"import_key": "clinic-b", "format": "ndjson"},
+                    content=ndjson_row(1).encode(), headers=auth_headers)
+        response = client.post("/patients/import", params={"import_key": "clinic-b", "format": "csv"},
+                               content=(HEADER + csv_row(1)).encode(), headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_requires_admin(self, client):
+        response = client.post("/patients/import", content=ndjson_row(1).encode())
+        assert response.status_code in (401, 403)
+
+
+class TestResume:
+    """Test resuming an interrupted import"""
+
+    def test_interrupted_import_resumes_after_last_chunk(self, db_session):
+        body = "".join(ndjson_row(index) for index in range(7)).encode()
+        job = patient_import.start(db_session, patient_import.NDJSON, "clinic-c")
+
+        # Two chunks of two commit, then the run dies mid-chunk
+        parser = patient_import.RecordParser(patient_import.NDJSON)
+        importer = patient_import.PatientImporter(db_session, patient_import.NDJSON, job, chunk_size=2)
+        importer.add(parser.feed(body[:body.index(ndjson_row(5).encode())]))
+        db_session.rollback()
+        assert db_session.query(Patient).count() == 4
+        assert job.rows_processed == 4
+
+        job = patient_import.start(db_session, patient_import.NDJSON, "clinic-c")
+        result = patient_import.import_file(db_session, io.BytesIO(body), patient_import.NDJSON, job)
+        assert (result["skipped"], result["created"]) == (4, 3)
+        names = sorted(first_name for first_name, in db_session.query(Patient.first_name))
+        assert names == [f"Pat{index}" for index in range(7)]
+        assert (job.status, job.rows_processed, job.created) == ("completed", 7, 7)
@@ -0,0 +1,281 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import patient_changes, patient_search, patient_suggest
+from backend.core.pagination import NEXT_CURSOR_HEADER
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, PatientChange
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def add_patient(db_session, patient_id, first_name, last_name, phone, **fields):
+    patient = Patient(
+        patient_id=patient_id,
+        first_name=first_name,
+        last_name=last_name,
+        date_of_birth=date(1985, 6, 1),
+        gender="female",
+        address="1 Main St",
+        phone=phone,
+        **fields
+    )
+    db_session.add(patient)
+    db_session.commit()
+    return patient
+
+
+@pytest.fixture(scope="function")
+def patients(db_session):
+    return [
+        add_patient(db_session, "PAT001", "Maria", "Smithson", "555 010 2000",
+                    email="maria@example.com", insurance_provider="Blue Shield"),
+        add_patient(db_session, "PAT002", "John", "Smith", "555-010-3000",
+                    email="jsmith@example.com", insurance_provider="Aetna"),
+        add_patient(db_session, "PAT003", "Anna", "Blacksmith", "+1 555 010 4000",
+                    insurance_provider="Blue Cross"),
+    ]
+
+
+def search(client, auth_headers, url="/patients/", **params):
+    response = client.get(url, params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return [p["patient_id"] for p in response.json()]
+
+
+class TestSearchIndex:
+    """Test the patient search index and its maintenance"""
+
+    def test_sqlite_uses_fts5(self, db_session):
+        assert patient_search.index_for(db_session).name == "fts5"
+
+    def test_phone_is_normalized(self, db_session, patients):
+        assert [p.phone_normalized for p in patients] == ["5550102000", "5550103000", "15550104000"]
+        assert patient_search.search_tokens("(555) 010-3000") == ["5550103000"]
+        assert patient_search.search_tokens("  John  SMITH ") == ["john", "smith"]
+
+    def test_index_follows_writes(self, client, auth_headers, db_session, patients):
+        assert search(client, auth_headers, search="smithson") == ["PAT001"]
+
+        patients[0].last_name = "Jones"
+        db_session.commit()
+        assert search(client, auth_headers, search="smithson") == []
+        assert search(client, auth_headers, search="jones") == ["PAT001"]
+
+        db_session.delete(patients[0])
+        db_session.commit()
+        assert search(client, auth_headers, search="jones") == []
+
+    def test_rebuild(self, client, auth_headers, db_session, patients):
+        # Simulate rows written before the index and normalized phone existed
+        db_session.execute(text("UPDATE patients SET phone_normalized = NULL"))
+        db_session.execute(text("DROP TABLE patient_search"))
+        db_session.commit()
+
+        response = client.post("/patients/search/rebuild", headers=auth_headers)
+        assert response.json() == {"index": "fts5", "phones_normalized": 3}
+        assert sorted(search(client, auth_headers, search="smith")) == ["PAT001", "PAT002", "PAT003"]
+
+
+class TestPatientSearch:
+    """Test relevance-ranked patient search"""
+
+    def test_substring_match_across_fields(self, client, auth_headers, patients):
+        assert sorted(search(client, auth_headers, search="smith")) == ["PAT001", "PAT002", "PAT003"]
+        assert search(client, auth_headers, search="pat002") == ["PAT002"]
+        assert search(client, auth_headers, search="jsmith@") == ["PAT002"]
+        assert search(client, auth_headers, search="shield") == ["PAT001"]
+
+    def test_all_tokens_must_match(self, client, auth_headers, patients):
+        assert search(client, auth_headers, search="john smith") == ["PAT002"]
+        assert sorted(search(client, auth_headers, search="smith blue")) == ["PAT001", "PAT003"]
+
+    def test_phone_formatting_is_ignored(self, client, auth_headers, patients):
+        assert search(client, auth_headers, search="555.010.4000") == ["PAT003"]
+        assert search(client, auth_headers, search="0103000") == ["PAT002"]
+
+    def test_short_terms_still_match(self, client, auth_headers, patients):
+        assert search(client, auth_headers, search="jo") == ["PAT002"]
+        assert search(client, auth_headers, search="smith an") == ["PAT003"]
+
+    def test_ranked_by_relevance(self, client, auth_headers, patients):
+        assert search(client, auth_headers, search="smith")[0] == "PAT002"
+
+    def test_filters_combine_with_search(self, client, auth_headers, db_session, patients):
+        patients[1].gender = "male"
+        db_session.commit()
+        assert sorted(search(client, auth_headers, search="smith", gender="female")) == ["PAT001", "PAT003"]
+
+    def test_ranked_results_page_with_cursor(self, client, auth_headers, db_session, patients):
+        for index in range(7):
+            add_patient(db_session, f"SMI{index:03d}", "Sam", f"Smith{index}", f"555999{index:04d}")
+        expected = search(client, auth_headers, search="smith", limit=100)
+
+        ids = []
+        cursor = None
+        while True:
+            params = {"search": "smith", "limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/patients/", params=params, headers=auth_headers)
+            ids.extend(p["patient_id"] for p in response.json())
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+        assert ids == expected and len(ids) == 10
+
+    def test_advanced_search_fields(self, client, auth_headers, patients):
+        url = "/patients/search/advanced"
+        assert search(client, auth_headers, url, name="smith")[0] == "PAT002"
+        assert search(client, auth_headers, url, phone="555-010-2000") == ["PAT001"]
+        assert sorted(search(client, auth_headers, url, email="example")) == ["PAT001", "PAT002"]
+        assert sorted(search(client, auth_headers, url, insurance_provider="blue")) == ["PAT001", "PAT003"]
+        assert search(client, auth_headers, url, name="pat001") == []
+        assert search(client, auth_headers, url, name="smith", insurance_provider="cross") == ["PAT003"]
+
+    def test_quotes_are_escaped(self, client, auth_headers, patients):
+        assert search(client, auth_headers, search='smith" OR "x') == []
+
+
+class TestPatientSuggest:
+    """Test the in-memory typeahead index"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_index(self):
+        patient_suggest.index.clear()
+        yield
+        patient_suggest.index.clear()
+
+    def suggest(self, client, auth_headers, q, **params):
+        response = client.get("/patients/suggest", params={"q": q, **params}, headers=auth_headers)
+        assert response.status_code == 200
+        return [s["patient_id"] for s in response.json()]
+
+    def test_prefix_lookups(self, client, auth_headers, patients):
+        assert self.suggest(client, auth_headers, "smi") == ["PAT002", "PAT001"]
+        assert self.suggest(client, auth_headers, "anna b") == ["PAT003"]
+        assert self.suggest(client, auth_headers, "Blacksmith, A") == ["PAT003"]
+        assert self.suggest(client, auth_headers, "pat00", limit=2) == ["PAT001", "PAT002"]
+        assert self.suggest(client, auth_headers, "010-4000") == ["PAT003"]
+        assert self.suggest(client, auth_headers, "000") == []
+        assert self.suggest(client, auth_headers, "mith") == []
+
+    def test_names_are_normalized(self, client, auth_headers, db_session):
+        add_patient(db_session, "PAT010", "José", "Núñez", "5550105000")
+        assert self.suggest(client, auth_headers, "nunez j") == ["PAT010"]
+
+    def test_follows_writes_in_this_process(self, client, auth_headers, db_session, patients):
+        assert self.suggest(client, auth_headers, "smith j") == ["PAT002"]
+
+        patients[1].last_name = "Jones"
+        patients[1].phone = "555 777 1234"
+        db_session.commit()
+        assert self.suggest(client, auth_headers, "smith j") == []
+        assert self.suggest(client, auth_headers, "jones") == ["PAT002"]
+        assert self.suggest(client, auth_headers, "7771234") == ["PAT002"]
+
+        db_session.delete(patients[1])
+        db_session.commit()
+        assert self.suggest(client, auth_headers, "jones") == []
+
+    def test_refresh_picks_up_other_workers(self, db_session, patients):
+        other = patient_suggest.PrefixIndex()
+        other.load(db_session)
+        assert [s.patient_id for s in other.suggest("maria")] == ["PAT001"]
+
+        patients[0].first_name = "Marta"
+        db_session.commit()
+        add_patient(db_session, "PAT004", "Maria", "Lopez", "5550106000")
+        assert [s.patient_id for s in other.suggest("maria")] == ["PAT001"]
+
+        version = other.version
+        other.refresh(db_session, force=True)
+        assert other.version > version
+        assert [s.patient_id for s in other.suggest("maria")] == ["PAT004"]
+        assert [s.patient_id for s in other.suggest("marta")] == ["PAT001"]
+
+    def test_change_log_is_pruned_while_running(self, db_session, monkeypatch):
+        monkeypatch.setattr(patient_changes, "PRUNE_EVERY_WRITES", 2)
+        monkeypatch.setattr(patient_changes, "_writes_since_prune", 0)
+        stale = datetime.now(timezone.utc) - patient_changes.CHANGE_RETENTION - timedelta(hours=1)
+        db_session.add_all([PatientChange(patient_id=99, changed_at=stale) for _ in range(3)])
+        db_session.commit()
+
+        add_patient(db_session, "PAT010", "Ada", "Lovelace", "5550107000")
+        assert db_session.query(PatientChange).filter_by(patient_id=99).count() == 3
+        add_patient(db_session, "PAT011", "Alan", "Turing", "5550108000")
+        assert db_session.query(PatientChange).filter_by(patient_id=99).count() == 0
+        assert db_session.query(PatientChange).count() == 2
+
+    def test_stats(self, client, auth_headers, patients):
+        response = client.get("/patients/suggest/stats", headers=auth_headers)
+        stats = response.json()
+        assert stats["patients"] == 3
+        assert stats["entries"] == 12
+        assert stats["estimated_bytes"] > 0
+        assert stats["loaded_at"]
@@ -0,0 +1,255 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import patient_summary
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Doctor, Appointment, Bill, BillItem
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    patient_summary.cache.clear()
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+
+@pytest.fixture(scope="function")
+def test_doctor(db_session):
+    doctor = Doctor(
+        doctor_id="DOC001",
+        first_name="Jane",
+        last_name="Smith",
+        specialization="Cardiology",
+        qualification="MD",
+        license_number="LIC001",
+        phone="5551234567",
+        email="jane.smith@hospital.com",
+        consultation_fee=150.0,
+        is_active=True
+    )
+    db_session.add(doctor)
+    db_session.commit()
+    db_session.refresh(doctor)
+    return doctor
+
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements executed while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+SLOT = datetime(2030, 1, 7, 10, 0)
+
+
+def bill_payload(patient, bill_date, total=100.0):
+    return {
+        "patient_id": patient.id,
+        "bill_date": bill_date.isoformat(),
+        "due_date": (bill_date + timedelta(days=30)).isoformat(),
+        "subtotal": total,
+        "total_amount": total,
+        "bill_items": [
+            {"item_name": "Consultation", "quantity": 1, "unit_price": total, "total_price": total}
+        ],
+    }
+
+
+class TestPatientSummary:
+    """Test the single-query, cached patient summary"""
+
+    def test_summary_is_one_query(self, db_session, test_patient, test_doctor, statements):
+        patient_id = test_patient.id
+        for offset in range(3):
+            db_session.add(Appointment(
+                appointment_id=f"APT{offset}",
+                patient_id=test_patient.id,
+                doctor_id=test_doctor.id,
+                scheduled_datetime=SLOT + timedelta(days=offset),
+                duration_minutes=30,
+                reason="Checkup",
+            ))
+        bill = Bill(bill_id="BILL001", patient_id=test_patient.id, bill_date=SLOT,
+                    due_date=SLOT + timedelta(days=30), subtotal=150.0, total_amount=150.0)
+        db_session.add(bill)
+        db_session.flush()
+        db_session.add_all([
+            BillItem(bill_id=bill.id, item_name="Consultation", unit_price=100.0, total_price=100.0),
+            BillItem(bill_id=bill.id, item_name="Lab work", unit_price=50.0, total_price=50.0),
+        ])
+        db_session.commit()
+        statements.clear()
+
+        summary = patient_summary.patient_summary(db_session, patient_id)
+
+        assert len(statements) == 1
+        assert summary["patient"]["patient_id"] == "PAT001"
+        assert summary["summary"]["total_appointments"] == 3
+        assert summary["summary"]["total_bills"] == 1
+        assert summary["summary"]["latest_appointment"]["appointment_id"] == "APT2"
+        latest_bill = summary["summary"]["latest_bill"]
+        assert latest_bill["bill_id"] == "BILL001"
+        assert [item["item_name"] for item in latest_bill["bill_items"]] == ["Consultation", "Lab work"]
+
+    def test_repeat_reads_are_cached(self, db_session, test_patient, statements):
+        patient_id = test_patient.id
+        patient_summary.patient_summary(db_session, patient_id)
+        statements.clear()
+
+        patient_summary.patient_summary(db_session, patient_id)
+
+        assert statements == []
+
+    def test_unknown_patient(self, client, auth_headers):
+        response = client.get("/patients/999/summary", headers=auth_headers)
+        assert response.status_code == 404
+
+    def test_appointment_booking_invalidates(self, client, auth_headers, test_patient, test_doctor):
+        before = client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers).json()
+        assert before["summary"]["total_appointments"] == 0
+
+        response = client.post("/appointments/", json={
+            "patient_id": test_patient.id,
+            "doctor_id": test_doctor.id,
+            "scheduled_datetime": SLOT.isoformat(),
+            "duration_minutes": 30,
+            "reason": "Regular checkup",
+        }, headers=auth_headers)
+        assert response.status_code == 201
+
+        after = client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers).json()
+        assert after["summary"]["total_appointments"] == 1
+        assert after["summary"]["latest_appointment"]["id"] == response.json()["id"]
+
+    def test_bulk_import_invalidates(self, client, auth_headers, test_patient, test_doctor):
+        client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers)
+
+        response = client.post("/appointments/bulk", json=[{
+            "patient_id": test_patient.id,
+            "doctor_id": test_doctor.id,
+            "scheduled_datetime": (SLOT + timedelta(hours=offset)).isoformat(),
+            "duration_minutes": 30,
+            "reason": "Follow-up",
+        } for offset in range(2)], headers=auth_headers)
+        assert response.status_code in (200, 201)
+
+        summary = client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers).json()
+        assert summary["summary"]["total_appointments"] == 2
+
+    def test_billing_invalidates(self, client, auth_headers, test_patient):
+        client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers)
+
+        bill = client.post("/billing/bills", json=bill_payload(test_patient, SLOT),
+                           headers=auth_headers).json()
+        summary = client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers).json()
+        assert summary["summary"]["total_bills"] == 1
+        assert summary["summary"]["latest_bill"]["payment_status"] == "pending"
+
+        response = client.post(f"/billing/bills/{bill['id']}/payments", json={
+            "bill_id": bill["id"],
+            "amount": 40.0,
+            "payment_method": "cash",
+            "payment_date": SLOT.isoformat(),
+        }, headers=auth_headers)
+        assert response.status_code == 200
+
+        summary = client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers).json()
+        assert summary["summary"]["latest_bill"]["paid_amount"] == 40.0
+        assert summary["summary"]["latest_bill"]["payment_status"] == "partial"
+
+    def test_patient_update_invalidates(self, client, auth_headers, db_session, test_patient):
+        client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers)
+
+        test_patient.first_name = "Jonathan"
+        db_session.commit()
+
+        summary = client.get(f"/patients/{test_patient.id}/summary", headers=auth_headers).json()
+        assert summary["patient"]["first_name"] == "Jonathan"
@@ -0,0 +1,262 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Doctor, Appointment, Bill, Payment, PatientDocument
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+
+@pytest.fixture(scope="function")
+def test_doctor(db_session):
+    doctor = Doctor(
+        doctor_id="DOC001",
+        first_name="Jane",
+        last_name="Smith",
+        specialization="Cardiology",
+        qualification="MD",
+        license_number="LIC001",
+        phone="5551234567",
+        email="jane.smith@hospital.com",
+        consultation_fee=150.0,
+        is_active=True
+    )
+    db_session.add(doctor)
+    db_session.commit()
+    db_session.refresh(doctor)
+    return doctor
+
+
+@pytest.fixture(scope="function")
+def nurse_headers(db_session):
+    nurse = User(
+        username="nurse",
+        email="nurse@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="nurse",
+        is_active=True
+    )
+    db_session.add(nurse)
+    db_session.commit()
+    access_token = create_access_token(
+        data={"sub": nurse.username, "user_id": nurse.id, "role": nurse.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+START = datetime(2010, 1, 4, 9, 0)
+
+
+@pytest.fixture(scope="function")
+def history(db_session, test_user, test_patient, test_doctor):
+    """Twelve years of appointments, bills, payments and documents.
+
+    Several entries share a timestamp so ties are broken by type and id.
+    """
+    for month in range(0, 144, 6):
+        when = START + timedelta(days=30 * month)
+        appointment = Appointment(
+            appointment_id=f"APT{month:03d}",
+            patient_id=test_patient.id,
+            doctor_id=test_doctor.id,
+            scheduled_datetime=when,
+            duration_minutes=30,
+            reason="Checkup",
+        )
+        bill = Bill(
+            bill_id=f"BILL{month:03d}",
+            patient_id=test_patient.id,
+            bill_date=when,
+            due_date=when + timedelta(days=30),
+            subtotal=100.0,
+            total_amount=100.0,
+        )
+        db_session.add_all([appointment, bill])
+        db_session.flush()
+        for part in range(2):
+            db_session.add(Payment(
+                payment_id=f"PAY{month:03d}{part}",
+                bill_id=bill.id,
+                amount=50.0,
+                payment_method="cash",
+                payment_date=when + timedelta(days=7 * part),
+            ))
+        if month % 24 == 0:
+            db_session.add(PatientDocument(
+                patient_id=test_patient.id,
+                filename=f"doc{month}.pdf",
+                original_filename=f"scan-{month}.pdf",
+                file_path=f"/uploads/doc{month}.pdf",
+                document_type="lab_report",
+                uploaded_by=test_user.id,
+                uploaded_at=when,
+            ))
+    # Recorded "now" by the server, at second resolution on SQLite
+    for index in range(2):
+        db_session.add(PatientDocument(
+            patient_id=test_patient.id,
+            filename=f"intake{index}.pdf",
+            original_filename=f"intake-{index}.pdf",
+            file_path=f"/uploads/intake{index}.pdf",
+            document_type="consent",
+            uploaded_by=test_user.id,
+        ))
+    db_session.commit()
+    return test_patient
+
+
+def read_all(client, headers, url, limit, **filters):
+    entries, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, **filters}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        entries.extend(page)
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return entries, pages
+
+
+RANK = {"appointment": 0, "bill": 1, "payment": 2, "document": 3}
+
+
+def timeline_key(entry):
+    return (datetime.fromisoformat(entry["occurred_at"]), RANK[entry["type"]], entry["id"])
+
+
+class TestPatientTimeline:
+    """Test the merged, keyset-paginated patient timeline"""
+
+    def test_pages_merge_every_stream_in_order(self, client, auth_headers, history):
+        url = f"/patients/{history.id}/timeline"
+        expected = client.get(url, params={"limit": 500}, headers=auth_headers).json()
+        assert len(expected) == 24 * 4 + 6 + 2
+        assert [timeline_key(entry) for entry in expected] == sorted(
+            (timeline_key(entry) for entry in expected), reverse=True
+        )
+
+        for limit in (1, 3, 7):
+            entries, pages = read_all(client, auth_headers, url, limit)
+            assert entries == expected
+            assert pages == -(-len(expected) // limit)
+
+    def test_same_instant_entries_order_by_type(self, client, auth_headers, history):
+        entries = client.get(
+            f"/patients/{history.id}/timeline",
+            params={"limit": 500, "types": ["appointment", "bill", "payment"]},
+            headers=auth_headers
+        ).json()
+        oldest = [entry for entry in entries if entry["occurred_at"] == START.isoformat()]
+        assert [entry["type"] for entry in oldest] == ["payment", "bill", "appointment"]
+        assert oldest[0]["reference"] == "PAY0000"
+        assert oldest[1]["status"] == "pending" and oldest[1]["amount"] == 100.0
+
+    def test_type_filter(self, client, auth_headers, history):
+        entries, _ = read_all(
+            client, auth_headers, f"/patients/{history.id}/timeline", 3, types="document"
+        )
+        assert [entry["type"] for entry in entries] == ["document"] * 8
+        assert entries[0]["reference"] == "intake-1.pdf"
+
+    def test_clinical_staff_do_not_see_billing(self, client, nurse_headers, history):
+        entries = client.get(
+            f"/patients/{history.id}/timeline", params={"limit": 500}, headers=nurse_headers
+        ).json()
+        assert {entry["type"] for entry in entries} == {"appointment", "document"}
+
+    def test_errors(self, client, auth_headers, test_patient):
+        url = f"/patients/{test_patient.id}/timeline"
+        assert client.get(url, params={"types": "visit"}, headers=auth_headers).status_code == 400
+        assert client.get(url, params={"cursor": "nope"}, headers=auth_headers).status_code == 400
+        assert client.get("/patients/999/timeline", headers=auth_headers).status_code == 404
+        assert client.get(url, headers=auth_headers).json() == []
@@ -0,0 +1,301 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from datetime import date, datetime
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend import schemas
+from backend.core.database import get_db, Base
+from backend.core import payment_posting
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import User, Patient, Bill, Payment, AuditLog, PaymentStatusEnum, RevenueDaily
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements executed while the test runs."""
+
+
+def make_bill(session, patient_id, total=100.0, bill_id="BILL001"):
+    bill = Bill(
+        bill_id=bill_id,
+        patient_id=patient_id,
+        bill_date=datetime(2030, 1, 1),
+        due_date=datetime(2030, 1, 31),
+        subtotal=total,
+        total_amount=total,
+        paid_amount=0.0,
+        payment_status=PaymentStatusEnum.PENDING
+    )
+    session.add(bill)
+    session.commit()
+    session.refresh(bill)
+    return bill
+
+
+@pytest.fixture(scope="function")
+def test_bill(db_session, test_patient):
+    return make_bill(db_session, test_patient.id)
+
+
+def payment(amount, reference_number=None, payment_method="card"):
+    return {
+        "bill_id": 0,
+        "amount": amount,
+        "payment_method": payment_method,
+        "payment_date": "2030-01-05T10:00:00",
+        "reference_number": reference_number,
+    }
+
+
+def post(client, auth_headers, bill_id, body, key=None):
+    headers = dict(auth_headers)
+    if key:
+        headers[payment_posting.IDEMPOTENCY_HEADER] = key
+    return client.post(f"/billing/bills/{bill_id}/payments", json=body, headers=headers)
+
+
+def test_payments_update_bill_balance_and_status(client, auth_headers, test_bill, db_session):
+    response = post(client, auth_headers, test_bill.id, payment(40.0))
+    assert response.status_code == 200
+    assert payment_posting.REPLAYED_HEADER not in response.headers
+    db_session.refresh(test_bill)
+    assert test_bill.paid_amount == 40.0
+    assert test_bill.payment_status == PaymentStatusEnum.PARTIAL
+
+    response = post(client, auth_headers, test_bill.id, payment(60.0))
+    assert response.status_code == 200
+    db_session.refresh(test_bill)
+    assert test_bill.paid_amount == 100.0
+    assert test_bill.payment_status == PaymentStatusEnum.PAID
+
+    revenue = db_session.query(func.sum(RevenueDaily.total), func.sum(RevenueDaily.payments)).one()
+    assert revenue == (100.0, 2)
+    assert db_session.query(AuditLog).filter(AuditLog.table_name == "payments").count() == 2
+
+
+def test_overpayment_is_rejected(client, auth_headers, test_bill, db_session):
+    assert post(client, auth_headers, test_bill.id, payment(70.0)).status_code == 200
+    response = post(client, auth_headers, test_bill.id, payment(40.0))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Payment amount exceeds remaining balance of $30.00"
+    db_session.refresh(test_bill)
+    assert test_bill.paid_amount == 70.0
+    assert db_session.query(Payment).count() == 1
+
+
+def test_missing_bill(client, auth_headers, test_user):
+    response = post(client, auth_headers, 9999, payment(10.0))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Bill not found"
+
+
+def test_retry_with_idempotency_key_returns_original(client, auth_headers, test_bill, db_session):
+    first = post(client, auth_headers, test_bill.id, payment(25.0), key="terminal-7f3a")
+    retry = post(client, auth_headers, test_bill.id, payment(25.0), key="terminal-7f3a")
+    assert first.status_code == retry.status_code == 200
+    assert retry.json()["payment_id"] == first.json()["payment_id"]
+    assert retry.headers[payment_posting.REPLAYED_HEADER] == "true"
+
+    db_session.refresh(test_bill)
+    assert test_bill.paid_amount == 25.0
+    assert db_session.query(Payment).count() == 1
+    assert db_session.query(AuditLog).filter(AuditLog.table_name == "payments").count() == 1
+
+
+def test_shared_reference_number_is_not_a_key(client, auth_headers, test_bill, db_session):
+    # Two instalments quoting the same claim number are both recorded
+    first = post(client, auth_headers, test_bill.id, payment(30.0, reference_number="CLAIM-1001"))
+    second = post(client, auth_headers, test_bill.id, payment(30.0, reference_number="CLAIM-1001"))
+    assert first.status_code == second.status_code == 200
+    assert second.json()["id"] != first.json()["id"]
+    assert payment_posting.REPLAYED_HEADER not in second.headers
+    db_session.refresh(test_bill)
+    assert test_bill.paid_amount == 60.0
+
+    retry = post(client, auth_headers, test_bill.id,
+                 payment(30.0, reference_number="CLAIM-1001"), key="CLAIM-1001")
+    again = post(client, auth_headers, test_bill.id,
+                 payment(30.0, reference_number="CLAIM-1001"), key="CLAIM-1001")
+    assert again.json()["id"] == retry.json()["id"]
+    db_session.refresh(test_bill)
+    assert test_bill.paid_amount == 90.0
+
+
+def test_key_reused_for_different_payment_conflicts(client, auth_headers, test_bill, db_session):
+    assert post(client, auth_headers, test_bill.id, payment(25.0), key="k-1").status_code == 200
+    response = post(client, auth_headers, test_bill.id, payment(35.0), key="k-1")
+    assert response.status_code == 409
+    db_session.refresh(test_bill)
+    assert test_bill.paid_amount == 25.0
+
+
+@pytest.fixture
+def file_sessions(tmp_path):
+    """Sessions on a file database with a real pool, for concurrent writers."""
+    file_engine = create_engine(
+        f"sqlite:///{tmp_path / 'payments.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=16,
+    )
+    Base.metadata.create_all(bind=file_engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=file_engine)
+    file_engine.dispose()
+
+
+def post_concurrently(sessions, bill_id, requests):
+    """Post each (payment, key) from its own thread and session at once."""
+    start = threading.Barrier(len(requests))
+
+    def worker(request):
+        body, key = request
+        db = sessions()
+        try:
+            start.wait()
+            posted, replayed = payment_posting.post_payment(
+                db, bill_id, schemas.PaymentCreate(**body), key
+            )
+            return posted.payment_id, replayed
+        except HTTPException as e:
+            return e.status_code, None
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        return list(pool.map(worker, requests))
+
+
+def test_concurrent_postings_never_lose_updates_or_overpay(file_sessions):
+    db = file_sessions()
+    patient = Patient(
+        patient_id="PAT100", first_name="Ada", last_name="Stone", date_of_birth=date(1980, 5, 1),
+        gender="female", address="1 Side St", phone="1234567890", email="ada@example.com"
+    )
+    db.add(patient)
+    db.commit()
+    bill = make_bill(db, patient.id, total=100.0)
+
+    # Forty terminals and insurers try to post 5.00 each against 100.00
+    results = post_concurrently(
+        file_sessions, bill.id,
+        [(payment(5.0, payment_method="insurance" if index % 2 else "card"), None) for index in range(40)]
+    )
+    posted = [result for result in results if result[1] is False]
+    rejected = [result for result in results if result[0] == 400]
+    assert len(posted) == 20
+    assert len(rejected) == 20
+
+    db.expire_all()
+    bill = db.get(Bill, bill.id)
+    assert bill.paid_amount == 100.0
+    assert bill.payment_status == PaymentStatusEnum.PAID
+    assert db.query(func.sum(Payment.amount)).scalar() == 100.0
+    assert db.query(func.sum(RevenueDaily.total)).scalar() == 100.0
+    db.close()
+
+
+def test_concurrent_retries_post_once(file_sessions):
+    db = file_sessions()
+    patient = Patient(
+        patient_id="PAT101", first_name="Ben", last_name="Hart", date_of_birth=date(1975, 3, 2),
+        gender="male", address="2 Side St", phone="1234567890", email="ben@example.com"
+    )
+    db.add(patient)
+    db.commit()
+    bill = make_bill(db, patient.id, total=100.0)
+
+    results = post_concurrently(file_sessions, bill.id, [(payment(45.0), "retry-key")] * 12)
+    assert len({payment_id for payment_id, _ in results}) == 1
+    assert sum(1 for _, replayed in results if replayed is False) == 1
+
+    db.expire_all()
+    assert db.get(Bill, bill.id).paid_amount == 45.0
+    assert db.query(Payment).count() == 1
+    assert db.query(RevenueDaily.payments).scalar() == 1
+    db.close()
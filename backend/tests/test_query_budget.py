@@ -0,0 +1,208 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import logging
+
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import loading, query_budget
+from backend.core.security import create_access_token, get_password_hash
+from backend import schemas
+from backend.models import User, Patient, Bill, BillItem, Appointment, PaymentStatusEnum
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements executed while the test runs."""
+
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements executed while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="function")
+def bills(db_session, test_patient):
+    for index in range(100):
+        bill = Bill(
+            bill_id=f"BILL{index:03d}",
+            patient_id=test_patient.id,
+            bill_date=datetime(2030, 1, 1) + timedelta(hours=index),
+            due_date=datetime(2030, 2, 1),
+            subtotal=30.0,
+            total_amount=30.0,
+            paid_amount=0.0,
+            payment_status=PaymentStatusEnum.PENDING,
+            bill_items=[
+                BillItem(item_name="Consultation", quantity=1, unit_price=20.0, total_price=20.0),
+                BillItem(item_name="Dressing", quantity=2, unit_price=5.0, total_price=10.0),
+            ]
+        )
+        db_session.add(bill)
+    db_session.commit()
+
+
+def budget_app(queries, statements_run):
+    """A bare app with one route declaring ``queries`` and running ``statements_run``."""
+    budget_app = FastAPI()
+    budget_app.add_middleware(query_budget.QueryBudgetMiddleware)
+
+    @budget_app.get("/work", dependencies=[query_budget.budget(queries)])
+    def work(db=Depends(override_get_db)):
+        for _ in range(statements_run):
+            db.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    return budget_app
+
+
+def test_eager_options_follow_response_models():
+    options = loading.eager(Bill, schemas.Bill)
+    assert len(options) == 1
+    assert "bill_items" in str(options[0].path)
+    assert loading.eager(Appointment, schemas.Appointment) == ()
+    assert loading.eager(Patient, schemas.Patient) == ()
+
+
+def test_listing_bills_costs_two_queries(client, auth_headers, bills, statements):
+    response = client.get("/billing/bills", params={"limit": 100}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 100
+    assert all(len(bill["bill_items"]) == 2 for bill in data)
+
+    bill_statements = [statement for statement in statements if "FROM bill" in statement]
+    assert len(bill_statements) == 2
+
+
+def test_patient_bills_load_items_up_front(client, auth_headers, test_patient, bills, statements):
+    response = client.get(f"/patients/{test_patient.id}/bills", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 100
+    assert len([statement for statement in statements if "FROM bill_items" in statement]) == 1
+
+
+def test_within_budget_passes():
+    with TestClient(budget_app(3, 3)) as budget_client:
+        assert budget_client.get("/work").json() == {"ok": True}
+
+
+def test_over_budget_fails_in_strict_mode():
+    with TestClient(budget_app(2, 3)) as budget_client:
+        with pytest.raises(query_budget.QueryBudgetExceeded, match="ran 3 queries, over its budget of 2"):
+            budget_client.get("/work")
+
+
+def test_over_budget_is_logged_otherwise(monkeypatch, caplog):
+    monkeypatch.setattr(query_budget, "strict", lambda: False)
+    with caplog.at_level(logging.WARNING, logger=query_budget.__name__):
+        with TestClient(budget_app(2, 3)) as budget_client:
+            assert budget_client.get("/work").status_code == 200
+    assert "GET /work ran 3 queries, over its budget of 2" in caplog.text
+
+
+def test_routes_without_budget_are_not_checked():
+    unbudgeted = FastAPI()
+    unbudgeted.add_middleware(query_budget.QueryBudgetMiddleware)
+
+    @unbudgeted.get("/work")
+    def work(db=Depends(override_get_db)):
+        for _ in range(10):
+            db.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    with TestClient(unbudgeted) as budget_client:
+        assert budget_client.get("/work").status_code == 200
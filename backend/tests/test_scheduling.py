@@ -0,0 +1,1087 @@
+import os
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+import pytest
+from datetime import datetime, timedelta, date, time
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.main import app
+from backend.core.database import get_db, Base
+from backend.core import availability, booking, rollups, schedule_summary, scheduling
+from backend.core.security import create_access_token, get_password_hash
+from backend.models import (
+    User, Patient, Doctor, Appointment, AppointmentStatusEnum, DoctorDayOccupancy,
+    DoctorWorkingHours, DoctorScheduleException, AppointmentDailyStat,
+)
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="function")
+def test_user(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        role="admin",
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user):
+    access_token = create_access_token(
+        data={"sub": test_user.username, "user_id": test_user.id, "role": test_user.role}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def test_patient(db_session):
+    patient = Patient(
+        patient_id="PAT001",
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date(1990, 1, 1),
+        gender="male",
+        address="123 Main St",
+        phone="1234567890",
+        email="john.doe@example.com"
+    )
+    db_session.add(patient)
+    db_session.commit()
+    db_session.refresh(patient)
+    return patient
+
+
+@pytest.fixture(scope="function")
+def test_doctor(db_session):
+    doctor = Doctor(
+        doctor_id="DOC001",
+        first_name="Jane",
+        last_name="Smith",
+        specialization="Cardiology",
+        qualification="MD",
+        license_number="LIC001",
+        phone="5551234567",
+        email="jane.smith@hospital.com",
+        consultation_fee=150.0,
+        is_active=True
+    )
+    db_session.add(doctor)
+    db_session.commit()
+    db_session.refresh(doctor)
+    return doctor
+
+
+def make_appointment(db_session, patient, doctor, start, duration=30,
+                     status=AppointmentStatusEnum.SCHEDULED, suffix="1"):
+    appointment = Appointment(
+        appointment_id=f"APT{suffix}",
+        patient_id=patient.id,
+        doctor_id=doctor.id,
+        scheduled_datetime=start,
+        duration_minutes=duration,
+        reason="Checkup",
+        status=status,
+    )
+    db_session.add(appointment)
+    db_session.commit()
+    db_session.refresh(appointment)
+    return appointment
+
+
+SLOT = datetime(2030, 1, 7, 10, 0)
+
+
+class TestConflictEngine:
+    """Test the shared interval-overlap conflict engine"""
+
+    def test_end_datetime_is_maintained(self, db_session, test_patient, test_doctor):
+        appointment = make_appointment(db_session, test_patient, test_doctor, SLOT, 45)
+        assert appointment.end_datetime == SLOT + timedelta(minutes=45)
+
+        appointment.duration_minutes = 60
+        db_session.commit()
+        db_session.refresh(appointment)
+        assert appointment.end_datetime == SLOT + timedelta(minutes=60)
+
+    def test_overlapping_slot_conflicts(self, db_session, test_patient, test_doctor):
+        make_appointment(db_session, test_patient, test_doctor, SLOT, 60)
+        start = SLOT + timedelta(minutes=30)
+        assert scheduling.find_doctor_conflict(
+            db_session, test_doctor.id, start, start + timedelta(minutes=30)
+        ) is not None
+        assert scheduling.find_patient_conflict(
+            db_session, test_patient.id, start, start + timedelta(minutes=30)
+        ) is not None
+
+    def test_earlier_and_adjacent_appointments_do_not_conflict(
+        self, db_session, test_patient, test_doctor
+    ):
+        make_appointment(db_session, test_patient, test_doctor,
+                         SLOT - timedelta(days=1), suffix="1")
+        make_appointment(db_session, test_patient, test_doctor,
+                         SLOT - timedelta(minutes=30), suffix="2")
+        assert scheduling.find_doctor_conflict(
+            db_session, test_doctor.id, SLOT, SLOT + timedelta(minutes=30)
+        ) is None
+
+    def test_long_appointment_starting_earlier_conflicts(
+        self, db_session, test_patient, test_doctor
+    ):
+        make_appointment(db_session, test_patient, test_doctor,
+                         SLOT - timedelta(hours=7), duration=480)
+        assert scheduling.find_doctor_conflict(
+            db_session, test_doctor.id, SLOT, SLOT + timedelta(minutes=30)
+        ) is not None
+
+    def test_inactive_statuses_and_excluded_id_ignored(
+        self, db_session, test_patient, test_doctor
+    ):
+        cancelled = make_appointment(db_session, test_patient, test_doctor, SLOT,
+                                     status=AppointmentStatusEnum.CANCELLED, suffix="1")
+        active = make_appointment(db_session, test_patient, test_doctor, SLOT, suffix="2")
+        end = SLOT + timedelta(minutes=30)
+        conflicts = scheduling.find_doctor_conflicts(db_session, test_doctor.id, SLOT, end)
+        assert [a.id for a in conflicts] == [active.id]
+        assert scheduling.find_doctor_conflict(
+            db_session, test_doctor.id, SLOT, end, exclude_appointment_id=active.id
+        ) is None
+        assert cancelled.id not in [a.id for a in conflicts]
+
+    def test_requires_exactly_one_owner(self, db_session):
+        with pytest.raises(ValueError):
+            scheduling.conflict_query(db_session, SLOT, SLOT)
+
+
+class TestBookingConflicts:
+    """Test conflict detection through the appointment endpoints"""
+
+    def payload(self, patient, doctor, start, duration=30):
+        return {
+            "patient_id": patient.id,
+            "doctor_id": doctor.id,
+            "scheduled_datetime": start.isoformat(),
+            "duration_minutes": duration,
+            "reason": "Regular checkup",
+        }
+
+    def test_booking_after_earlier_appointment_succeeds(
+        self, client, auth_headers, db_session, test_patient, test_doctor
+    ):
+        make_appointment(db_session, test_patient, test_doctor, SLOT - timedelta(days=3))
+        response = client.post(
+            "/appointments/", json=self.payload(test_patient, test_doctor, SLOT),
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+
+    def test_double_booking_rejected(self, client, auth_headers, test_patient, test_doctor):
+        first = client.post(
+            "/appointments/", json=self.payload(test_patient, test_doctor, SLOT),
+            headers=auth_headers,
+        )
+        assert first.status_code == 201
+        second = client.post(
+            "/appointments/",
+            json=self.payload(test_patient, test_doctor, SLOT + timedelta(minutes=15)),
+            headers=auth_headers,
+        )
+        assert second.status_code == 400
+        assert "Doctor" in second.json()["detail"]
+
+    def test_update_checks_conflicts(
+        self, client, auth_headers, db_session, test_patient, test_doctor
+    ):
+        make_appointment(db_session, test_patient, test_doctor, SLOT, suffix="1")
+        other = make_appointment(db_session, test_patient, test_doctor,
+                                 SLOT + timedelta(hours=2), suffix="2")
+        response = client.put(
+            f"/appointments/{other.id}",
+            json={"scheduled_datetime": SLOT.isoformat()},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+        response = client.put(
+            f"/appointments/{other.id}",
+            json={"duration_minutes": 60},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+
+    def test_conflict_check_endpoint(
+        self, client, auth_headers, db_session, test_patient, test_doctor
+    ):
+        make_appointment(db_session, test_patient, test_doctor, SLOT)
+        response = client.get(
+            "/appointments/conflicts/check",
+            params={"doctor_id": test_doctor.id, "start_datetime": SLOT.isoformat()},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["has_conflicts"] is True
+
+
+def occupancy(db_session, doctor, day):
+    row = db_session.query(DoctorDayOccupancy).filter(
+        DoctorDayOccupancy.doctor_id == doctor.id,
+        DoctorDayOccupancy.day == day
+    ).first()
+    return availability.decode_bitmap(row.bitmap) if row else None
+
+
+class TestAvailabilityBitmaps:
+    """Test occupancy bitmaps and the free-slot search"""
+
+    def test_bitmap_helpers(self):
+        day = SLOT.date()
+        mask = availability.interval_mask(day, SLOT, SLOT + timedelta(minutes=30))
+        assert list(availability.iter_bits(mask)) == list(range(120, 126))
+        assert availability.decode_bitmap(availability.encode_bitmap(mask)) == mask
+        assert availability.run_starts(0b1110111, 3) == 0b0010001
+
+    def test_bitmap_follows_appointment_writes(self, db_session, test_patient, test_doctor):
+        day = SLOT.date()
+        appointment = make_appointment(db_session, test_patient, test_doctor, SLOT)
+        expected = availability.interval_mask(day, SLOT, SLOT + timedelta(minutes=30))
+        assert occupancy(db_session, test_doctor, day) == expected
+
+        appointment.scheduled_datetime = SLOT + timedelta(days=1)
+        db_session.commit()
+        assert occupancy(db_session, test_doctor, day) == 0
+        assert occupancy(db_session, test_doctor, day + timedelta(days=1)) != 0
+
+        appointment.status = AppointmentStatusEnum.CANCELLED
+        db_session.commit()
+        assert occupancy(db_session, test_doctor, day + timedelta(days=1)) == 0
+
+        appointment.status = AppointmentStatusEnum.SCHEDULED
+        db_session.commit()
+        db_session.delete(appointment)
+        db_session.commit()
+        assert occupancy(db_session, test_doctor, day + timedelta(days=1)) == 0
+
+    def test_missing_bitmaps_do_not_commit_the_caller(self, tmp_path):
+        file_engine = create_engine(f"sqlite:///{tmp_path / 'bitmaps.db'}", connect_args={"timeout": 0.1})
+        Base.metadata.create_all(bind=file_engine)
+        FileSession = sessionmaker(bind=file_engine, autoflush=False)
+        day = SLOT.date()
+        with FileSession() as db:
+            doctor = Doctor(doctor_id="DOC001", first_name="Jane", last_name="Smith",
+                            specialization="Cardiology", qualification="MD",
+                            license_number="LIC001", phone="5551234567",
+                            email="jane.smith@hospital.com", consultation_fee=150.0)
+            db.add(doctor)
+            db.commit()
+            doctor_id = doctor.id
+
+        # A caller with uncommitted writes gets its masks, and neither its
+        # writes nor the masks are committed for it
+        with FileSession() as db:
+            db.get(Doctor, doctor_id).consultation_fee = 999.0
+            db.flush()
+            assert availability.load_bitmaps(db, [doctor_id], day, day) == {(doctor_id, day): 0}
+            db.rollback()
+            assert db.get(Doctor, doctor_id).consultation_fee == 150.0
+            assert db.query(DoctorDayOccupancy).count() == 0
+
+        # A read-only caller gets them stored without committing itself
+        with FileSession() as db:
+            availability.load_bitmaps(db, [doctor_id], day, day)
+        with FileSession() as db:
+            assert db.query(DoctorDayOccupancy).count() == 1
+        file_engine.dispose()
+
+    def test_refresh_locks_bitmap_rows_on_postgresql(self):
+        from sqlalchemy.dialects import postgresql
+
+        class RecordingConnection:
+            dialect = postgresql.dialect()
+
+            def __init__(self):
+                self.statements = []
+
+            def execute(self, statement, parameters=None):
+                self.statements.append(str(statement.compile(dialect=self.dialect)))
+
+        connection = RecordingConnection()
+        availability.lock_masks(connection, {(2, SLOT.date()), (1, SLOT.date())})
+        insert, lock = connection.statements
+        assert "ON CONFLICT (doctor_id, day) DO NOTHING" in insert
+        assert lock.endswith("FOR UPDATE")
+
+    def test_search_returns_earliest_free_slots(
+        self, client, auth_headers, db_session, test_patient, test_doctor
+    ):
+        day_start = datetime.combine(SLOT.date(), datetime.min.time()).replace(hour=8)
+        make_appointment(db_session, test_patient, test_doctor, day_start, duration=60)
+        response = client.get(
+            "/appointments/availability/search",
+            params={
+                "specialization": "cardiology",
+                "start_date": SLOT.date().isoformat(),
+                "duration_minutes": 30,
+                "limit": 3,
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        slots = response.json()["slots"]
+        assert [slot["start"] for slot in slots] == [
+            "2030-01-07T09:00:00", "2030-01-07T09:15:00", "2030-01-07T09:30:00"
+        ]
+        assert all(slot["doctor_id"] == test_doctor.id for slot in slots)
+
+    def test_search_rejects_bad_range(self, client, auth_headers, db_session):
+        response = client.get(
+            "/appointments/availability/search",
+            params={"start_date": "2030-01-07", "end_date": "2030-01-01"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+    def test_search_respects_working_hours(
+        self, client, auth_headers, db_session, test_doctor
+    ):
+        db_session.add(DoctorWorkingHours(
+            doctor_id=test_doctor.id, weekday=SLOT.weekday(),
+            start_time=time(14, 0), end_time=time(16, 0)
+        ))
+        db_session.commit()
+        response = client.get(
+            "/appointments/availability/search",
+            params={"start_date": SLOT.date().isoformat(), "end_date": SLOT.date().isoformat(),
+                    "duration_minutes": 60, "step_minutes": 60},
+            headers=auth_headers,
+        )
+        assert [slot["start"] for slot in response.json()["slots"]] == [
+            "2030-01-07T14:00:00", "2030-01-07T15:00:00"
+        ]
+
+
+class TestCalendars:
+    """Test working-hour templates and the batched calendar"""
+
+    def test_default_calendar_unchanged(
+        self, client, auth_headers, db_session, test_patient, test_doctor
+    ):
+        make_appointment(db_session, test_patient, test_doctor, SLOT, duration=45)
+        response = client.get(
+            f"/appointments/calendar/{test_doctor.id}",
+            params={"date": SLOT.date().isoformat()},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        slots = response.json()["time_slots"]
+        assert len(slots) == 20
+        busy = [slot["time"] for slot in slots if not slot["available"]]
+        assert busy == ["10:00", "10:30"]
+
+    def test_batched_calendar_uses_templates_and_exceptions(
+        self, client, auth_headers, db_session, test_patient, test_doctor
+    ):
+        other = Doctor(
+            doctor_id="DOC002", first_name="Greg", last_name="House",
+            specialization="Diagnostics", qualification="MD", license_number="LIC002",
+            phone="5550000000", email="house@hospital.com", is_active=True
+        )
+        db_session.add(other)
+        db_session.commit()
+        db_session.add_all([
+            DoctorWorkingHours(doctor_id=test_doctor.id, weekday=day, start_time=time(9, 0),
+                               end_time=time(12, 0), slot_minutes=60)
+            for day in range(5)
+        ])
+        db_session.add(DoctorScheduleException(
+            doctor_id=test_doctor.id, date=SLOT.date() + timedelta(days=1), is_available=False
+        ))
+        db_session.commit()
+        make_appointment(db_session, test_patient, test_doctor, SLOT, duration=30, suffix="1")
+        make_appointment(db_session, test_patient, other, SLOT, suffix="2",
+                         status=AppointmentStatusEnum.CANCELLED)
+
+        response = client.get(
+            "/appointments/calendar",
+            params={
+                "doctor_ids": [test_doctor.id, other.id],
+                "start_date": SLOT.date().isoformat(),
+                "end_date": (SLOT.date() + timedelta(days=6)).isoformat(),
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        first, second = response.json()["calendars"]
+        assert first["doctor_id"] == test_doctor.id
+        monday, tuesday = first["days"][0], first["days"][1]
+        assert [(s["time"], s["available"]) for s in monday["time_slots"]] == [
+            ("09:00", True), ("10:00", False), ("11:00", True)
+        ]
+        assert tuesday["time_slots"] == []
+        assert first["days"][5]["time_slots"] == []
+        assert len(first["appointments"]) == 1
+
+        assert len(second["days"][0]["time_slots"]) == 20
+        assert all(slot["available"] for slot in second["days"][0]["time_slots"])
+
+    def test_batched_calendar_unknown_doctor(self, client, auth_headers, test_doctor):
+        response = client.get(
+            "/appointments/calendar",
+            params={"doctor_ids": [test_doctor.id, 999], "start_date": SLOT.date().isoformat()},
+            headers=auth_headers,
+        )
+        assert response.status_code == 404
+
+    def test_working_hours_and_exceptions_endpoints(self, client, auth_headers, test_doctor):
+        response = client.put(
+            f"/doctors/{test_doctor.id}/working-hours",
+            json=[{"weekday": 0, "start_time": "09:00", "end_time": "13:00"}],
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+
+        response = client.post(
+            f"/doctors/{test_doctor.id}/schedule-exceptions",
+            json={"date": "2030-01-07", "start_time": "10:00", "end_time": "11:00"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        exception_id = response.json()["id"]
+
+        response = client.get(
+            "/appointments/calendar",
+            params={"doctor_ids": [test_doctor.id], "start_date": "2030-01-07"},
+            headers=auth_headers,
+        )
+        windows = response.json()["calendars"][0]["days"][0]["working_hours"]
+        assert [(w["start"], w["end"]) for w in windows] == [
+            ("09:00:00", "10:00:00"), ("11:00:00", "13:00:00")
+        ]
+
+        response = client.delete(
+            f"/doctors/{test_doctor.id}/schedule-exceptions/{exception_id}",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+
+
+class TestBulkImport:
+    """Test bulk appointment import"""
+
+    def rows(self, patient, doctor, starts, **extra):
+        return [
+            {
+                "patient_id": patient.id,
+                "doctor_id": doctor.id,
+                "scheduled_datetime": start.isoformat(),
+                "duration_minutes": 30,
+                "reason": "Imported",
+                **extra,
+            }
+            for start in starts
+        ]
+
+    def test_json_array_import(self, client, auth_headers, db_session, test_patient, test_doctor):
+        make_appointment(db_session, test_patient, test_doctor, SLOT)
+        starts = [SLOT + timedelta(hours=h) for h in (0, 1, 2)] + [SLOT + timedelta(hours=2, minutes=15)]
+        payload = self.rows(test_patient, test_doctor, starts)
+        payload.append({"patient_id": 999, "doctor_id": test_doctor.id,
+                        "scheduled_datetime": SLOT.isoformat(), "reason": "x"})
+        payload.append({"patient_id": test_patient.id})
+
+        response = client.post("/appointments/bulk", json=payload, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 6
+        assert data["created"] == 2
+        results = data["results"]
+        assert "Doctor has a conflicting appointment" in results[0]["error"]
+        assert results[1]["success"] and results[1]["id"]
+        assert results[2]["success"]
+        assert "same batch" in results[3]["error"]
+        assert results[4]["error"] == "Patient not found"
+        assert "scheduled_datetime" in results[5]["error"]
+
+        assert db_session.query(Appointment).count() == 3
+        assert occupancy(db_session, test_doctor, SLOT.date()) != 0
+
+    def test_ndjson_import_and_dry_run(self, client, auth_headers, db_session, test_patient, test_doctor):
+        import json
+        body = "\n".join(
+            json.dumps(row) for row in self.rows(
+                test_patient, test_doctor, [SLOT, SLOT + timedelta(hours=1)]
+            )
+        )
+        headers = {**auth_headers, "Content-Type": "application/x-ndjson"}
+        response = client.post("/appointments/bulk", params={"dry_run": True},
+                               content=body, headers=headers)
+        assert response.json()["created"] == 0
+        assert db_session.query(Appointment).count() == 0
+
+        response = client.post("/appointments/bulk", content=body, headers=headers)
+        assert response.json()["created"] == 2
+        ids = {row.appointment_id for row in db_session.query(Appointment).all()}
+        assert len(ids) == 2
+
+    def test_historical_rows_skip_conflicts(self, client, auth_headers, test_patient, test_doctor):
+        payload = self.rows(test_patient, test_doctor, [SLOT, SLOT], status="completed")
+        response = client.post("/appointments/bulk", json=payload, headers=auth_headers)
+        assert response.json()["created"] == 2
+
+    def test_all_or_nothing(self, client, auth_headers, db_session, test_patient, test_doctor):
+        payload = self.rows(test_patient, test_doctor, [SLOT, SLOT])
+        response = client.post("/appointments/bulk", params={"all_or_nothing": True},
+                               json=payload, headers=auth_headers)
+        assert response.json()["created"] == 0
+        assert db_session.query(Appointment).count() == 0
+
+    def test_malformed_body(self, client, auth_headers, test_doctor):
+        headers = {**auth_headers, "Content-Type": "application/x-ndjson"}
+        response = client.post("/appointments/bulk", content="{bad", headers=headers)
+        assert response.status_code == 400
+
+
+def stat_counts(db_session):
+    return {
+        (row.day, row.doctor_id, row.status): row.count
+        for row in db_session.query(AppointmentDailyStat).all()
+        if row.count
+    }
+
+
+class TestAppointmentRollups:
+    """Test the incrementally maintained daily appointment rollup"""
+
+    def test_orm_writes_update_rollup(self, db_session, test_patient, test_doctor):
+        appointment = make_appointment(db_session, test_patient, test_doctor, SLOT)
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=1), suffix="2")
+        key = (SLOT.date(), test_doctor.id, AppointmentStatusEnum.SCHEDULED)
+        assert stat_counts(db_session) == {key: 2}
+
+        appointment.status = AppointmentStatusEnum.COMPLETED
+        db_session.commit()
+        completed = (SLOT.date(), test_doctor.id, AppointmentStatusEnum.COMPLETED)
+        assert stat_counts(db_session) == {key: 1, completed: 1}
+
+        appointment.scheduled_datetime = SLOT + timedelta(days=1)
+        db_session.commit()
+        moved = (SLOT.date() + timedelta(days=1), test_doctor.id, AppointmentStatusEnum.COMPLETED)
+        assert stat_counts(db_session) == {key: 1, moved: 1}
+
+        db_session.delete(appointment)
+        db_session.commit()
+        assert stat_counts(db_session) == {key: 1}
+
+    def test_rebuild_matches_incremental(self, db_session, test_patient, test_doctor):
+        for offset in range(3):
+            make_appointment(db_session, test_patient, test_doctor,
+                             SLOT + timedelta(days=offset), suffix=str(offset))
+        incremental = stat_counts(db_session)
+
+        db_session.query(AppointmentDailyStat).delete()
+        db_session.commit()
+        assert rollups.rebuild_appointment_stats(db_session) == 3
+        db_session.commit()
+        assert stat_counts(db_session) == incremental
+
+    def test_bulk_import_updates_rollup(self, client, auth_headers, db_session, test_patient, test_doctor):
+        payload = [
+            {"patient_id": test_patient.id, "doctor_id": test_doctor.id,
+             "scheduled_datetime": (SLOT + timedelta(hours=h)).isoformat(),
+             "reason": "Imported", "status": status}
+            for h, status in ((0, "scheduled"), (1, "scheduled"), (2, "completed"))
+        ]
+        response = client.post("/appointments/bulk", json=payload, headers=auth_headers)
+        assert response.json()["created"] == 3
+        assert stat_counts(db_session) == {
+            (SLOT.date(), test_doctor.id, AppointmentStatusEnum.SCHEDULED): 2,
+            (SLOT.date(), test_doctor.id, AppointmentStatusEnum.COMPLETED): 1,
+        }
+
+    def test_daily_and_summary_reports(self, client, auth_headers, db_session, test_patient, test_doctor):
+        make_appointment(db_session, test_patient, test_doctor, SLOT)
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(days=1),
+                         status=AppointmentStatusEnum.CANCELLED, suffix="2")
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(days=7), suffix="3")
+
+        executed = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            executed.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get("/appointments/reports/daily",
+                                  params={"date": SLOT.date().isoformat()}, headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        data = response.json()
+        assert data["total_appointments"] == 1
+        assert data["status_breakdown"] == {"scheduled": 1}
+        assert "appointments" not in data
+        assert not any("FROM appointments" in statement for statement in executed)
+
+        response = client.get("/appointments/reports/daily",
+                              params={"date": SLOT.date().isoformat(), "include_appointments": True},
+                              headers=auth_headers)
+        data = response.json()
+        assert data["total_appointments"] == 1
+        assert len(data["appointments"]) == 1
+
+        response = client.get("/appointments/reports/summary", params={
+            "start_date": SLOT.date().isoformat(),
+            "end_date": (SLOT.date() + timedelta(days=13)).isoformat(),
+            "group_by": "week",
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_appointments"] == 3
+        assert data["status_breakdown"] == {"scheduled": 2, "cancelled": 1}
+        assert [p["period_start"] for p in data["periods"]] == ["2030-01-07", "2030-01-14"]
+        assert data["periods"][0]["total_appointments"] == 2
+
+        response = client.get("/appointments/reports/summary", params={
+            "start_date": SLOT.date().isoformat(),
+            "end_date": SLOT.date().isoformat(),
+            "group_by": "year",
+        }, headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_rebuild_endpoint(self, client, auth_headers, db_session, test_patient, test_doctor):
+        make_appointment(db_session, test_patient, test_doctor, SLOT)
+        db_session.query(AppointmentDailyStat).delete()
+        db_session.commit()
+
+        response = client.post("/appointments/reports/rollups/rebuild", headers=auth_headers)
+        assert response.json()["rows"] == 1
+        assert stat_counts(db_session) == {
+            (SLOT.date(), test_doctor.id, AppointmentStatusEnum.SCHEDULED): 1
+        }
+
+
+class TestBulkStatusTransitions:
+    """Test set-based appointment status transitions"""
+
+    def test_close_day_marks_no_shows(self, client, auth_headers, db_session, test_patient, test_doctor):
+        scheduled = make_appointment(db_session, test_patient, test_doctor, SLOT)
+        confirmed = make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=1),
+                                     status=AppointmentStatusEnum.CONFIRMED, suffix="2")
+        completed = make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=2),
+                                     status=AppointmentStatusEnum.COMPLETED, suffix="3")
+        tomorrow = make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(days=1),
+                                    suffix="4")
+        assert occupancy(db_session, test_doctor, SLOT.date()) != 0
+
+        response = client.post("/appointments/status/bulk", json={
+            "status": "no_show",
+            "scheduled_date": SLOT.date().isoformat(),
+            "doctor_id": test_doctor.id,
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["updated"] == 2
+        assert data["appointment_ids"] == sorted([scheduled.id, confirmed.id])
+
+        db_session.expire_all()
+        assert db_session.get(Appointment, scheduled.id).status == AppointmentStatusEnum.NO_SHOW
+        assert db_session.get(Appointment, completed.id).status == AppointmentStatusEnum.COMPLETED
+        assert db_session.get(Appointment, tomorrow.id).status == AppointmentStatusEnum.SCHEDULED
+        assert occupancy(db_session, test_doctor, SLOT.date()) == 0
+        assert stat_counts(db_session) == {
+            (SLOT.date(), test_doctor.id, AppointmentStatusEnum.NO_SHOW): 2,
+            (SLOT.date(), test_doctor.id, AppointmentStatusEnum.COMPLETED): 1,
+            (tomorrow.scheduled_datetime.date(), test_doctor.id, AppointmentStatusEnum.SCHEDULED): 1,
+        }
+
+        from backend.models import AuditLog
+        logs = db_session.query(AuditLog).filter(AuditLog.action == "update").all()
+        assert sorted(log.record_id for log in logs) == sorted([scheduled.id, confirmed.id])
+
+    def test_explicit_ids_report_disallowed(self, client, auth_headers, db_session, test_patient, test_doctor):
+        scheduled = make_appointment(db_session, test_patient, test_doctor, SLOT)
+        completed = make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=2),
+                                     status=AppointmentStatusEnum.COMPLETED, suffix="2")
+
+        response = client.post("/appointments/status/bulk", json={
+            "status": "confirmed",
+            "appointment_ids": [scheduled.id, completed.id, 999],
+            "dry_run": True,
+        }, headers=auth_headers)
+        data = response.json()
+        assert data["appointment_ids"] == [scheduled.id]
+        assert data["skipped_ids"] == [completed.id, 999]
+        db_session.expire_all()
+        assert db_session.get(Appointment, scheduled.id).status == AppointmentStatusEnum.SCHEDULED
+
+    def test_requires_selection(self, client, auth_headers):
+        response = client.post("/appointments/status/bulk", json={"status": "no_show"},
+                               headers=auth_headers)
+        assert response.status_code == 422
+
+
+class TestScheduleSummary:
+    """Test cached per-doctor-day schedule statistics"""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        schedule_summary.cache.clear()
+        yield
+        schedule_summary.cache.clear()
+
+    def test_conditional_aggregates(self, db_session, test_patient, test_doctor):
+        make_appointment(db_session, test_patient, test_doctor, SLOT,
+                         status=AppointmentStatusEnum.COMPLETED)
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=1),
+                         status=AppointmentStatusEnum.NO_SHOW, suffix="2")
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=2), suffix="3")
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(days=1), suffix="4")
+
+        summary = schedule_summary.doctor_day_summary(db_session, test_doctor.id, SLOT.date())
+        assert summary == {
+            "total_appointments": 3,
+            "completed_appointments": 1,
+            "cancelled_appointments": 0,
+            "no_shows": 1,
+            "completion_rate": 1 / 3 * 100,
+        }
+        empty = schedule_summary.doctor_day_summary(db_session, test_doctor.id, date(2030, 2, 1))
+        assert empty["total_appointments"] == 0
+
+    def test_writes_invalidate_cache(self, client, auth_headers, db_session, test_patient, test_doctor):
+        appointment = make_appointment(db_session, test_patient, test_doctor, SLOT)
+        params = {"date": SLOT.date().isoformat()}
+
+        response = client.get(f"/doctors/{test_doctor.id}/schedule", params=params, headers=auth_headers)
+        assert response.json()["statistics"]["completed_appointments"] == 0
+        assert (test_doctor.id, SLOT.date()) in schedule_summary.cache._entries
+
+        client.put(f"/appointments/{appointment.id}/status", params={"status": "completed"},
+                   headers=auth_headers)
+        response = client.get("/doctors/schedule/summary", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["doctors"] == [{
+            "doctor_id": test_doctor.id,
+            "statistics": {
+                "total_appointments": 1,
+                "completed_appointments": 1,
+                "cancelled_appointments": 0,
+                "no_shows": 0,
+                "completion_rate": 100.0,
+            },
+        }]
+
+        client.post("/appointments/status/bulk", json={
+            "status": "no_show", "scheduled_date": SLOT.date().isoformat()
+        }, headers=auth_headers)
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=3), suffix="2")
+        response = client.get(f"/doctors/{test_doctor.id}/schedule",
+                              params={**params, "include_appointments": False}, headers=auth_headers)
+        data = response.json()
+        assert "appointments" not in data
+        assert data["statistics"]["total_appointments"] == 2
+
+
+class TestRecurringSeries:
+    """Test recurring appointment series"""
+
+    def series_payload(self, patient, doctor, **extra):
+        return {
+            "patient_id": patient.id,
+            "doctor_id": doctor.id,
+            "start_datetime": SLOT.isoformat(),
+            "reason": "Dialysis",
+            "frequency": "weekly",
+            "weekdays": [0, 3],
+            **extra,
+        }
+
+    def test_lazy_expansion(self):
+        from backend.core import recurrence
+        from backend.models import RecurrenceFrequencyEnum
+        weekly = recurrence.iter_occurrences(SLOT, RecurrenceFrequencyEnum.WEEKLY, 2, [0, 3])
+        assert [next(weekly) for _ in range(3)] == [
+            SLOT, SLOT + timedelta(days=3), SLOT + timedelta(days=14)
+        ]
+        daily = list(recurrence.iter_occurrences(
+            SLOT, RecurrenceFrequencyEnum.DAILY, count=5, after=SLOT + timedelta(days=1)
+        ))
+        assert daily == [SLOT + timedelta(days=d) for d in (2, 3, 4)]
+
+    def test_year_long_series(self, client, auth_headers, db_session, test_patient, test_doctor):
+        response = client.post("/appointments/series", json=self.series_payload(
+            test_patient, test_doctor, until=(SLOT.date() + timedelta(days=363)).isoformat()
+        ), headers=auth_headers)
+        assert response.status_code == 201
+        data = response.json()
+        assert data["created"] == 104
+        assert data["series"]["weekdays"] == [0, 3]
+        series_id = data["series"]["id"]
+        appointments = db_session.query(Appointment).filter(Appointment.series_id == series_id).all()
+        assert len(appointments) == 104
+        assert {a.scheduled_datetime.weekday() for a in appointments} == {0, 3}
+        assert occupancy(db_session, test_doctor, SLOT.date()) != 0
+
+    def test_conflicts_reject_or_skip(self, client, auth_headers, db_session, test_patient, test_doctor):
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(days=7, minutes=15))
+        payload = self.series_payload(test_patient, test_doctor, count=6)
+
+        response = client.post("/appointments/series", json=payload, headers=auth_headers)
+        assert response.status_code == 400
+        assert "1 occurrences conflict" in response.json()["detail"]
+
+        response = client.post("/appointments/series", params={"skip_conflicts": True},
+                               json=payload, headers=auth_headers)
+        data = response.json()
+        assert data["created"] == 5 and data["conflicts"] == 1
+        assert data["occurrences"][2]["error"] == "Doctor has a conflicting appointment at this time"
+
+    def test_extend_series(self, client, auth_headers, db_session, test_patient, test_doctor):
+        response = client.post("/appointments/series", params={"horizon_end": "2030-01-20"},
+                               json=self.series_payload(test_patient, test_doctor, count=10),
+                               headers=auth_headers)
+        data = response.json()
+        assert data["created"] == 4
+        series_id = data["series"]["id"]
+
+        response = client.post(f"/appointments/series/{series_id}/extend",
+                               params={"horizon_end": "2030-12-31"}, headers=auth_headers)
+        data = response.json()
+        assert data["created"] == 6
+        assert data["series"]["materialized_until"] == "2030-12-31"
+        assert db_session.query(Appointment).filter(Appointment.series_id == series_id).count() == 10
+
+        response = client.post(f"/appointments/series/{series_id}/extend",
+                               params={"horizon_end": "2030-06-01"}, headers=auth_headers)
+        assert response.status_code == 400
+
+
+def _book_in_process(url, doctor_id, patient_id, barrier, outcomes):
+    # Runs in a spawned worker process with its own engine, like a
+    # separate server worker would
+    import time as _time
+    from fastapi import HTTPException
+    from backend import schemas
+
+    find_doctor_conflict = scheduling.find_doctor_conflict
+
+    def slow_check(*args, **kwargs):
+        # Widen the window between the conflict check and the insert
+        conflict = find_doctor_conflict(*args, **kwargs)
+        _time.sleep(0.2)
+        return conflict
+
+    scheduling.find_doctor_conflict = slow_check
+    worker_engine = create_engine(url, connect_args={"timeout": 30})
+    data = schemas.AppointmentCreate(
+        patient_id=patient_id, doctor_id=doctor_id,
+        scheduled_datetime=SLOT, reason="Race",
+    )
+    with sessionmaker(bind=worker_engine, autoflush=False)() as db:
+        barrier.wait()
+        try:
+            booking.book_appointment(db, data)
+            outcomes.put("booked")
+        except HTTPException as e:
+            outcomes.put("conflict" if e.status_code == 400 else str(e.status_code))
+    worker_engine.dispose()
+
+
+class TestConcurrentBooking:
+    """Test database-enforced non-overlap and concurrent booking"""
+
+    def test_database_rejects_overlap(self, db_session, test_patient, test_doctor):
+        from sqlalchemy.exc import IntegrityError
+        make_appointment(db_session, test_patient, test_doctor, SLOT, 60)
+        with pytest.raises(IntegrityError) as error:
+            make_appointment(db_session, test_patient, test_doctor,
+                             SLOT + timedelta(minutes=30), suffix="2")
+        assert booking.is_overlap_violation(error.value)
+        db_session.rollback()
+
+        # Released and adjacent appointments do not collide
+        make_appointment(db_session, test_patient, test_doctor, SLOT,
+                         status=AppointmentStatusEnum.CANCELLED, suffix="3")
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=1), suffix="4")
+
+    def test_database_rejects_patient_overlap(self, db_session, test_patient, test_doctor):
+        from sqlalchemy.exc import IntegrityError
+        other_doctor = Doctor(doctor_id="DOC002", first_name="Greg", last_name="House",
+                              specialization="Diagnostics", qualification="MD",
+                              license_number="LIC002", phone="5551234568",
+                              email="greg.house@hospital.com")
+        db_session.add(other_doctor)
+        make_appointment(db_session, test_patient, test_doctor, SLOT, 60)
+        with pytest.raises(IntegrityError) as error:
+            make_appointment(db_session, test_patient, other_doctor,
+                             SLOT + timedelta(minutes=30), suffix="2")
+        assert booking.overlap_detail(error.value) == booking.PATIENT_CONFLICT_DETAIL
+        db_session.rollback()
+
+        make_appointment(db_session, test_patient, other_doctor, SLOT + timedelta(hours=1), suffix="3")
+
+    def test_overlap_maps_to_400(self, client, auth_headers, db_session, test_patient, test_doctor):
+        other_patient = Patient(patient_id="PAT002", first_name="Ann", last_name="Lee",
+                                date_of_birth=date(1985, 5, 5), gender="female",
+                                address="1 Elm St", phone="1234567891")
+        other_doctor = Doctor(doctor_id="DOC002", first_name="Greg", last_name="House",
+                              specialization="Diagnostics", qualification="MD",
+                              license_number="LIC002", phone="5551234568",
+                              email="greg.house@hospital.com")
+        db_session.add_all([other_patient, other_doctor])
+        doctor_busy = make_appointment(db_session, test_patient, test_doctor, SLOT,
+                                       status=AppointmentStatusEnum.CANCELLED)
+        patient_busy = make_appointment(db_session, test_patient, other_doctor, SLOT + timedelta(hours=2),
+                                        status=AppointmentStatusEnum.CANCELLED, suffix="2")
+        make_appointment(db_session, other_patient, test_doctor, SLOT, suffix="3")
+        make_appointment(db_session, test_patient, test_doctor, SLOT + timedelta(hours=2), suffix="4")
+
+        response = client.put(f"/appointments/{doctor_busy.id}/status",
+                              params={"status": "scheduled"}, headers=auth_headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == booking.DOCTOR_CONFLICT_DETAIL
+
+        response = client.put(f"/appointments/{patient_busy.id}/status",
+                              params={"status": "scheduled"}, headers=auth_headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == booking.PATIENT_CONFLICT_DETAIL
+
+    def test_parallel_bookings_never_double_book(self, tmp_path):
+        import threading
+        from fastapi import HTTPException
+        from backend import schemas
+
+        file_engine = create_engine(
+            f"sqlite:///{tmp_path / 'booking.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        Base.metadata.create_all(bind=file_engine)
+        FileSession = sessionmaker(bind=file_engine, autoflush=False)
+        with FileSession() as db:
+            doctor = Doctor(doctor_id="DOC001", first_name="Jane", last_name="Smith",
+                            specialization="Cardiology", qualification="MD",
+                            license_number="LIC001", phone="5551234567",
+                            email="jane.smith@hospital.com", consultation_fee=150.0)
+            db.add(doctor)
+            for index in range(8):
+                db.add(Patient(patient_id=f"PAT{index}", first_name="P", last_name=str(index),
+                               date_of_birth=date(1990, 1, 1), gender="male",
+                               address="x", phone=f"555000000{index}"))
+            db.commit()
+            doctor_id = doctor.id
+            patient_ids = [p.id for p in db.query(Patient).all()]
+
+        outcomes = []
+        barrier = threading.Barrier(len(patient_ids))
+
+        def book(patient_id):
+            data = schemas.AppointmentCreate(
+                patient_id=patient_id, doctor_id=doctor_id,
+                scheduled_datetime=SLOT, reason="Race",
+            )
+            with FileSession() as db:
+                barrier.wait()
+                try:
+                    booking.book_appointment(db, data)
+                    outcomes.append("booked")
+                except HTTPException as e:
+                    assert e.status_code == 400
+                    outcomes.append("conflict")
+
+        threads = [threading.Thread(target=book, args=(p,)) for p in patient_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(outcomes) == ["booked"] + ["conflict"] * (len(patient_ids) - 1)
+        with FileSession() as db:
+            assert db.query(Appointment).count() == 1
+        file_engine.dispose()
+
+    def test_parallel_processes_never_double_book(self, tmp_path):
+        import multiprocessing
+
+        url = f"sqlite:///{tmp_path / 'booking.db'}"
+        file_engine = create_engine(url)
+        Base.metadata.create_all(bind=file_engine)
+        with file_engine.begin() as connection:
+            # Leave the write lock as the only guard
+            connection.exec_driver_sql("DROP TRIGGER appointment_no_overlap_insert")
+            connection.exec_driver_sql("DROP TRIGGER appointment_no_overlap_update")
+        FileSession = sessionmaker(bind=file_engine, autoflush=False)
+        with FileSession() as db:
+            doctor = Doctor(doctor_id="DOC001", first_name="Jane", last_name="Smith",
+                            specialization="Cardiology", qualification="MD",
+                            license_number="LIC001", phone="5551234567",
+                            email="jane.smith@hospital.com", consultation_fee=150.0)
+            db.add(doctor)
+            for index in range(4):
+                db.add(Patient(patient_id=f"PAT{index}", first_name="P", last_name=str(index),
+                               date_of_birth=date(1990, 1, 1), gender="male",
+                               address="x", phone=f"555000000{index}"))
+            db.commit()
+            doctor_id = doctor.id
+            patient_ids = [p.id for p in db.query(Patient).all()]
+
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(len(patient_ids))
+        outcomes = context.Queue()
+        processes = [
+            context.Process(target=_book_in_process,
+                            args=(url, doctor_id, patient_id, barrier, outcomes))
+            for patient_id in patient_ids
+        ]
+        for process in processes:
+            process.start()
+        results = [outcomes.get(timeout=120) for _ in processes]
+        for process in processes:
+            process.join()
+
+        assert sorted(results) == ["booked"] + ["conflict"] * (len(patient_ids) - 1)
+        with FileSession() as db:
+            assert db.query(Appointment).count() == 1
+        file_engine.dispose()
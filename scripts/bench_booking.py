@@ -0,0 +1,145 @@
+"""Concurrent booking benchmark.
+
+Runs many threads booking random slots through ``core.booking`` against a
+fresh database, once per doctor count, and reports throughput, conflicts
+and whether any doctor ended up double-booked.
+
+    PYTHONPATH=. python scripts/bench_booking.py --doctors 1 4 16 --threads 16
+
+Set BENCH_DATABASE_URL to benchmark PostgreSQL; the default is a temporary
+SQLite file.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DEV_MODE", "false")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend import models, schemas
+from backend.core import booking
+from backend.core.database import Base
+
+FIRST_SLOT = datetime(2030, 1, 7, 8, 0)
+SLOT_MINUTES = 30
+
+
+def make_engine(url):
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+    return create_engine(url, pool_size=64, max_overflow=0)
+
+
+def seed(Session, doctors, patients):
+    with Session() as db:
+        for index in range(doctors):
+            db.add(models.Doctor(
+                doctor_id=f"BDOC{index}", first_name="Bench", last_name=f"Doctor{index}",
+                specialization="General", qualification="MD", license_number=f"BLIC{index}",
+                phone="5550000000", email=f"bench{index}@example.com", consultation_fee=100.0,
+            ))
+        for index in range(patients):
+            db.add(models.Patient(
+                patient_id=f"BPAT{index}", first_name="Bench", last_name=f"Patient{index}",
+                date_of_birth=date(1980, 1, 1), gender="other", address="-",
+                phone=f"555{index:07d}",
+            ))
+        db.commit()
+        doctor_ids = [d for (d,) in db.query(models.Doctor.id)]
+        patient_ids = [p for (p,) in db.query(models.Patient.id)]
+    return doctor_ids, patient_ids
+
+
+def double_bookings(engine):
+    with engine.connect() as connection:
+        return connection.execute(text(
+            "SELECT COUNT(*) FROM appointments a JOIN appointments b "
+            "ON a.doctor_id = b.doctor_id AND a.id < b.id "
+            "AND a.scheduled_datetime < b.end_datetime AND b.scheduled_datetime < a.end_datetime "
+            "WHERE a.status IN ('SCHEDULED', 'CONFIRMED') AND b.status IN ('SCHEDULED', 'CONFIRMED')"
+        )).scalar()
+
+
+def run(url, doctors, threads, attempts_per_thread, slots):
+    engine = make_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    doctor_ids, patient_ids = seed(Session, doctors, threads * attempts_per_thread)
+
+    counts = {"booked": 0, "conflicts": 0}
+    counts_lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def worker(worker_index):
+        rng = random.Random(worker_index)
+        start_barrier.wait()
+        with Session() as db:
+            for attempt in range(attempts_per_thread):
+                data = schemas.AppointmentCreate(
+                    patient_id=patient_ids[worker_index * attempts_per_thread + attempt],
+                    doctor_id=rng.choice(doctor_ids),
+                    scheduled_datetime=FIRST_SLOT + timedelta(minutes=SLOT_MINUTES * rng.randrange(slots)),
+                    duration_minutes=SLOT_MINUTES,
+                    reason="Benchmark",
+                )
+                try:
+                    booking.book_appointment(db, data)
+                    outcome = "booked"
+                except HTTPException:
+                    outcome = "conflicts"
+                with counts_lock:
+                    counts[outcome] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "doctors": doctors,
+        "requests": threads * attempts_per_thread,
+        "booked": counts["booked"],
+        "conflicts": counts["conflicts"],
+        "seconds": elapsed,
+        "per_second": threads * attempts_per_thread / elapsed,
+        "double_booked": double_bookings(engine),
+    }
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--doctors", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=50, help="Bookings per thread")
+    parser.add_argument("--slots", type=int, default=20, help="Distinct slots per doctor")
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_booking.db')}"
+
+    print(f"{'doctors':>8} {'requests':>9} {'booked':>7} {'conflicts':>9} {'req/s':>9} {'double':>7}")
+    for doctors in args.doctors:
+        r = run(url, doctors, args.threads, args.attempts, args.slots)
+        print(f"{r['doctors']:>8} {r['requests']:>9} {r['booked']:>7} {r['conflicts']:>9} "
+              f"{r['per_second']:>9.0f} {r['double_booked']:>7}")
+        if r["double_booked"]:
+            raise SystemExit("Double booking detected")
+
+
+if __name__ == "__main__":
+    main()
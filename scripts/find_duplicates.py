@@ -0,0 +1,38 @@
+"""Offline duplicate-patient scan.
+
+Compares every pair of patients that share a blocking key (phonetic last
+name within a birth year, or normalized phone) in parallel worker
+processes and records probable duplicates for review in
+patient_duplicates.
+
+    PYTHONPATH=. python scripts/find_duplicates.py --workers 8
+
+Uses DATABASE_URL from the application settings unless --database-url is
+given.
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine
+
+from backend.core import duplicates
+from backend.core.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=duplicates.BATCH_CHUNK,
+                        help="Patients per worker task")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    started = time.perf_counter()
+    pairs = duplicates.scan_registry(engine, workers=args.workers, chunk_size=args.chunk_size)
+    print(f"Recorded {pairs} probable duplicate pairs in {time.perf_counter() - started:.1f}s")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()